@@ -242,6 +242,68 @@ RUNTIME_VM_GPU_MIG_UUIDS = tuple(
 )
 RUNTIME_VM_ROOT = Path(os.environ.get("RUNTIME_VM_ROOT", str(BASE_DIR / "media" / "notebook_sessions")))
 RUNTIME_EXECUTION_BACKEND = os.environ.get("RUNTIME_EXECUTION_BACKEND", "legacy")
+# How the server talks to agents inside Docker VMs: "socket" (Unix socket in the
+# workspace, falling back to files) or "file" (command/result files only).
+RUNTIME_VM_AGENT_TRANSPORT = os.environ.get("RUNTIME_VM_AGENT_TRANSPORT", "socket")
+# Shared virtualenv of local sessions; each session only keeps its own installs in an overlay.
+RUNTIME_LOCAL_BASE_VENV = os.environ.get("RUNTIME_LOCAL_BASE_VENV", str(BASE_DIR / "media" / "runtime_base_venv"))
+# Optional requirements file installed into the shared env when it is built.
+RUNTIME_LOCAL_BASE_REQUIREMENTS = os.environ.get("RUNTIME_LOCAL_BASE_REQUIREMENTS", "")
+# Problem datasets are placed into workspaces by reflink, by a link into this cache
+# (Docker VMs mount it read-only) or by copy: "auto" picks the cheapest of them, or
+# force "reflink", "symlink" or "copy". Entries no workspace links to are pruned.
+RUNTIME_DATASET_CACHE_ROOT = os.environ.get("RUNTIME_DATASET_CACHE_ROOT", str(BASE_DIR / "media" / "dataset_cache"))
+RUNTIME_DATASET_PROVISIONING = os.environ.get("RUNTIME_DATASET_PROVISIONING", "auto")
+# Host pip cache (empty disables it). Local sessions share pip's cache in it; Docker
+# VMs keep their own and only read its wheelhouse/, the wheels seeded by
+# `manage.py seed_pip_cache` that pip finds before the index.
+RUNTIME_PIP_CACHE_ROOT = os.environ.get("RUNTIME_PIP_CACHE_ROOT", str(BASE_DIR / "media" / "pip_cache"))
+# Install only from the wheelhouse, without a package index (air-gapped hosts, tests).
+RUNTIME_PIP_OFFLINE = os.environ.get("RUNTIME_PIP_OFFLINE", "0").lower() in {"1", "true", "yes"}
+RUNTIME_PIP_SEED_PACKAGES = os.environ.get("RUNTIME_PIP_SEED_PACKAGES", "lightgbm xgboost catboost optuna")
+# Warm Docker VMs kept ready per resource profile (0 disables the pool).
+RUNTIME_VM_POOL_SIZE = int(os.environ.get("RUNTIME_VM_POOL_SIZE", "0"))
+# Optional JSON list of profiles, e.g. [{"cpu": 2, "ram_mb": 4096, "size": 4}, {"gpu": true, "size": 1}].
+RUNTIME_VM_POOL_PROFILES = os.environ.get("RUNTIME_VM_POOL_PROFILES", "")
+RUNTIME_VM_POOL_REFILL_INTERVAL_SECONDS = float(os.environ.get("RUNTIME_VM_POOL_REFILL_INTERVAL_SECONDS", "30"))
+# Shared session registry: "file" (one host), "redis" (several hosts) or "memory" (tests).
+RUNTIME_SESSION_REGISTRY = os.environ.get(
+    "RUNTIME_SESSION_REGISTRY",
+    "memory" if RUNNING_TESTS else "file",
+)
+RUNTIME_SESSION_REGISTRY_URL = os.environ.get("RUNTIME_SESSION_REGISTRY_URL", "")
+RUNTIME_SESSION_REGISTRY_ROOT = os.environ.get("RUNTIME_SESSION_REGISTRY_ROOT", "")
+RUNTIME_SESSION_HEARTBEAT_TIMEOUT_SECONDS = int(os.environ.get("RUNTIME_SESSION_HEARTBEAT_TIMEOUT_SECONDS", "120"))
+# Background reaper: scans for expired sessions and tears VMs/workspaces down off the request path.
+RUNTIME_SESSION_REAPER_ENABLED = os.environ.get(
+    "RUNTIME_SESSION_REAPER_ENABLED",
+    "0" if RUNNING_TESTS else "1",
+).lower() in {"1", "true", "yes"}
+RUNTIME_SESSION_REAPER_INTERVAL_SECONDS = float(os.environ.get("RUNTIME_SESSION_REAPER_INTERVAL_SECONDS", "15"))
+RUNTIME_SESSION_REAPER_WORKERS = int(os.environ.get("RUNTIME_SESSION_REAPER_WORKERS", "4"))
+# Idle sessions are snapshotted to disk and their VM released; 0 disables hibernation.
+RUNTIME_SESSION_HIBERNATE_AFTER_SECONDS = int(os.environ.get("RUNTIME_SESSION_HIBERNATE_AFTER_SECONDS", "0"))
+RUNTIME_SESSION_SNAPSHOT_MAX_BYTES = int(
+    os.environ.get("RUNTIME_SESSION_SNAPSHOT_MAX_BYTES", str(512 * 1024 * 1024))
+)
+# Per-user limits on running sessions and their combined memory (0 means unlimited).
+RUNTIME_USER_MAX_SESSIONS = int(os.environ.get("RUNTIME_USER_MAX_SESSIONS", "0"))
+RUNTIME_USER_MAX_MEMORY_MB = int(os.environ.get("RUNTIME_USER_MAX_MEMORY_MB", "0"))
+# Above the high watermark (share of host RAM in use) least recently used sessions are
+# evicted until usage drops below the low watermark; 0 disables host eviction.
+RUNTIME_HOST_MEMORY_HIGH_WATERMARK = float(
+    os.environ.get("RUNTIME_HOST_MEMORY_HIGH_WATERMARK", "0" if RUNNING_TESTS else "0.9")
+)
+RUNTIME_HOST_MEMORY_LOW_WATERMARK = float(os.environ.get("RUNTIME_HOST_MEMORY_LOW_WATERMARK", "0.8"))
+# What eviction does to a session: "hibernate" (restored on the next run) or "stop".
+RUNTIME_EVICTION_ACTION = os.environ.get("RUNTIME_EVICTION_ACTION", "hibernate")
+# Per-session CPU/memory/disk/network sampling for the dashboard and Prometheus.
+RUNTIME_TELEMETRY_INTERVAL_SECONDS = float(os.environ.get("RUNTIME_TELEMETRY_INTERVAL_SECONDS", "15"))
+RUNTIME_TELEMETRY_HISTORY = int(os.environ.get("RUNTIME_TELEMETRY_HISTORY", "60"))
+RUNTIME_TELEMETRY_CGROUP_ROOT = os.environ.get("RUNTIME_TELEMETRY_CGROUP_ROOT", "/sys/fs/cgroup")
+RUNTIME_TELEMETRY_PROC_ROOT = os.environ.get("RUNTIME_TELEMETRY_PROC_ROOT", "/proc")
+# How often run stream sockets (ws/runs/<run_id>/) push newly written cell output.
+RUNTIME_STREAM_PUSH_INTERVAL_SECONDS = float(os.environ.get("RUNTIME_STREAM_PUSH_INTERVAL_SECONDS", "0.1"))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
@@ -347,6 +409,23 @@ else:
         }
     }
 
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "").strip()
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+LEADERBOARD_CACHE_TTL_SECONDS = int(os.getenv("LEADERBOARD_CACHE_TTL_SECONDS", "300"))
+LEADERBOARD_PUSH_INTERVAL_SECONDS = float(os.getenv("LEADERBOARD_PUSH_INTERVAL_SECONDS", "2"))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -15,6 +15,7 @@ from .models import (
     FavoriteCourse,
     PreValidation,
     Leaderboard,
+    ContestStandingsSnapshot,
     ProblemDescriptor,
     Tag,
     ContestProblem,
@@ -143,6 +144,14 @@ class LeaderboardAdmin(admin.ModelAdmin):
     search_fields = ("name",)
 
 
+@admin.register(ContestStandingsSnapshot)
+class ContestStandingsSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("id", "contest", "contest_end_time", "raw_size", "updated_at")
+    search_fields = ("contest__title",)
+    exclude = ("data",)
+    readonly_fields = ("contest", "contest_end_time", "fingerprint", "raw_size", "created_at", "updated_at")
+
+
 @admin.register(ProblemDescriptor)
 class ProblemDescriptorAdmin(admin.ModelAdmin):
     list_display = (
@@ -5,11 +5,18 @@ from .sessions import (
     SessionResetSerializer,
     SessionFilesQuerySerializer,
     SessionFileDownloadSerializer,
+    SessionDataFrameRowsSerializer,
     SessionFileUploadSerializer,
     SessionFilePreviewSerializer,
     SessionFileChartSerializer,
 )
-from .cells import CellRunSerializer, CellRunStreamStatusSerializer, CellRunInputSerializer
+from .cells import (
+    CellRunSerializer,
+    CellRunStreamStatusSerializer,
+    CellRunInputSerializer,
+    NotebookRunSerializer,
+    NotebookRunStatusSerializer,
+)
 from .courses import (
     CourseCreateSerializer,
     CourseParticipantsUpdateSerializer,
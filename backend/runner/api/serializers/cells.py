@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 
 from rest_framework import serializers
 
@@ -54,3 +54,42 @@ class CellRunInputSerializer(serializers.Serializer):
     @property
     def cell(self) -> Optional[Cell]:
         return getattr(self, "_cell", None)
+
+
+class NotebookRunSerializer(serializers.Serializer):
+    session_id = serializers.CharField(max_length=255, allow_blank=False)
+    notebook_id = serializers.IntegerField(min_value=1)
+    cell_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False)
+    stop_on_error = serializers.BooleanField(required=False, default=True)
+    # "stale" runs only the cells that changed since their last run and the cells depending on them.
+    mode = serializers.ChoiceField(choices=["all", "stale"], required=False, default="all")
+
+    def validate(self, attrs):
+        code_cells = Cell.objects.select_related("notebook").filter(
+            notebook_id=attrs["notebook_id"], cell_type=Cell.CODE
+        )
+        cell_ids = attrs.get("cell_ids")
+        if cell_ids is None:
+            cells = list(code_cells.order_by("execution_order", "id"))
+        else:
+            by_id = {cell.id: cell for cell in code_cells.filter(pk__in=cell_ids)}
+            missing = [cell_id for cell_id in cell_ids if cell_id not in by_id]
+            if missing:
+                raise serializers.ValidationError({"cell_ids": f"Cells are not code cells of the notebook: {missing}"})
+            cells = [by_id[cell_id] for cell_id in dict.fromkeys(cell_ids)]
+        if not cells:
+            raise serializers.ValidationError({"notebook_id": "Notebook has no code cells"})
+        self._cells = cells
+        return attrs
+
+    @property
+    def cells(self) -> List[Cell]:
+        return getattr(self, "_cells", [])
+
+
+class NotebookRunStatusSerializer(serializers.Serializer):
+    run_id = serializers.CharField(max_length=64, allow_blank=False)
+    events_offset = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    cell_id = serializers.IntegerField(min_value=1, required=False, allow_null=True)
+    stdout_offset = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    stderr_offset = serializers.IntegerField(min_value=0, required=False, allow_null=True)
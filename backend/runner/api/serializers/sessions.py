@@ -50,6 +50,13 @@ class SessionFilesQuerySerializer(serializers.Serializer):
     session_id = serializers.CharField(max_length=255, allow_blank=False)
 
 
+class SessionDataFrameRowsSerializer(serializers.Serializer):
+    session_id = serializers.CharField(max_length=255, allow_blank=False)
+    frame_id = serializers.RegexField(r"^[0-9a-f]{32}$")
+    offset = serializers.IntegerField(min_value=0, required=False, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=500, required=False, default=50)
+
+
 class SessionFileDownloadSerializer(serializers.Serializer):
     session_id = serializers.CharField(max_length=255, allow_blank=False)
     path = serializers.CharField(max_length=1000, allow_blank=False)
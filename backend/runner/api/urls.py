@@ -24,12 +24,18 @@ from .views import (
     RunCellInputView,
     RunCellStreamStartView,
     RunCellStreamStatusView,
+    RunNotebookStartView,
+    RunNotebookStatusView,
     SessionFilesView,
     SessionFileDownloadView,
+    SessionOutputBlobView,
+    SessionDataFrameRowsView,
     SessionFileUploadView,
     SessionFilePreviewView,
     SessionFileChartView,
     StopSessionView,
+    InterruptSessionView,
+    SessionVariablesView,
     NotebookTreeView,
     NotebookFolderCreateView,
     NotebookFolderDetailView,
@@ -51,15 +57,21 @@ urlpatterns = [
     path("sessions/notebook/", CreateNotebookSessionView.as_view(), name="notebook-session-create"),
     path("sessions/reset/", ResetSessionView.as_view(), name="session-reset"),
     path("sessions/stop/", StopSessionView.as_view(), name="session-stop"),
+    path("sessions/interrupt/", InterruptSessionView.as_view(), name="session-interrupt"),
+    path("sessions/variables/", SessionVariablesView.as_view(), name="session-variables"),
     path("sessions/files/", SessionFilesView.as_view(), name="session-files"),
     path("sessions/files/upload/", SessionFileUploadView.as_view(), name="session-file-upload"),
     path("sessions/file/", SessionFileDownloadView.as_view(), name="session-file-download"),
+    path("sessions/outputs/<str:blob>/", SessionOutputBlobView.as_view(), name="session-output-blob"),
+    path("sessions/dataframe/rows/", SessionDataFrameRowsView.as_view(), name="session-dataframe-rows"),
     path("sessions/file/preview/", SessionFilePreviewView.as_view(), name="session-file-preview"),
     path("sessions/file/chart/", SessionFileChartView.as_view(), name="session-file-chart"),
     path("cells/run/", RunCellView.as_view(), name="run-cell"),
     path("cells/run/input/", RunCellInputView.as_view(), name="run-cell-input"),
     path("cells/run/stream/", RunCellStreamStartView.as_view(), name="run-cell-stream-start"),
     path("cells/run/stream/status/", RunCellStreamStatusView.as_view(), name="run-cell-stream-status"),
+    path("cells/run/all/", RunNotebookStartView.as_view(), name="run-notebook-start"),
+    path("cells/run/all/status/", RunNotebookStatusView.as_view(), name="run-notebook-status"),
     path("courses/", CourseCreateView.as_view(), name="course-create"),
     path("courses/browse/", CourseBrowseView.as_view(), name="course-browse"),
     path("courses/tree/", CourseTreeView.as_view(), name="course-tree"),
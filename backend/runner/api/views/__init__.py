@@ -4,8 +4,12 @@ from .sessions import (
     CreateNotebookSessionView,
     ResetSessionView,
     StopSessionView,
+    InterruptSessionView,
+    SessionVariablesView,
     SessionFilesView,
     SessionFileDownloadView,
+    SessionOutputBlobView,
+    SessionDataFrameRowsView,
     SessionFileUploadView,
     SessionFilePreviewView,
     SessionFileChartView,
@@ -31,7 +35,12 @@ from .home import (
     FavoriteCoursesReorderView,
 )
 from .run_cell import RunCellView, RunCellInputView
-from .run_cell_stream import RunCellStreamStartView, RunCellStreamStatusView
+from .run_cell_stream import (
+    RunCellStreamStartView,
+    RunCellStreamStatusView,
+    RunNotebookStartView,
+    RunNotebookStatusView,
+)
 from .notebook_tree import (
     NotebookTreeView,
     NotebookFolderCreateView,
@@ -5,7 +5,8 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.urls import reverse
 
-from ...services.runtime import SessionNotFoundError, run_code, provide_input
+from ...services.cell_dependencies import record_cell_execution
+from ...services.runtime import SessionNotFoundError, SessionQuotaExceeded, run_code, provide_input
 from ..serializers import CellRunInputSerializer, CellRunSerializer
 from .sessions import build_notebook_session_id, ensure_notebook_access
 
@@ -25,11 +26,17 @@ class RunCellView(APIView):
         session_id = build_notebook_session_id(cell.notebook_id)
         try:
             result = run_code(session_id, cell.content or "")
+            record_cell_execution(session_id, cell.id, cell.content or "", result)
         except SessionNotFoundError:
             return Response(
                 {"detail": "Сессия не создана. Сначала создайте новую сессию."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        except SessionQuotaExceeded:
+            return Response(
+                {"detail": "Достигнут лимит одновременно запущенных сессий. Остановите одну из сессий."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
 
         outputs = _attach_output_urls(request, session_id, result.outputs or [])
         artifacts = _build_artifacts(outputs, result.artifacts or [])
@@ -47,6 +54,7 @@ class RunCellView(APIView):
                 "stderr": result.stderr,
                 "error": result.error,
                 "variables": result.variables,
+                "removed_variables": result.removed_variables,
                 "outputs": outputs,
                 "artifacts": artifacts,
             },
@@ -73,11 +81,17 @@ class RunCellInputView(APIView):
 
         try:
             result = provide_input(session_id, run_id, text, stdin_eof=stdin_eof)
+            record_cell_execution(session_id, cell.id, cell.content or "", result)
         except SessionNotFoundError:
             return Response(
                 {"detail": "Сессия не создана. Сначала создайте новую сессию."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        except SessionQuotaExceeded:
+            return Response(
+                {"detail": "Достигнут лимит одновременно запущенных сессий. Остановите одну из сессий."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
         except RuntimeError as exc:
             return Response(
                 {"detail": str(exc)},
@@ -99,6 +113,7 @@ class RunCellInputView(APIView):
                 "stderr": result.stderr,
                 "error": result.error,
                 "variables": result.variables,
+                "removed_variables": result.removed_variables,
                 "outputs": outputs,
                 "artifacts": artifacts,
             },
@@ -116,7 +131,12 @@ def _attach_output_urls(request, session_id: str, outputs: list[dict]) -> list[d
             continue
         next_item = dict(item)
         path = next_item.get("path")
-        if path:
+        blob = next_item.get("blob")
+        if blob:
+            query = urlencode({"session_id": session_id})
+            blob_url = reverse("session-output-blob", args=[blob])
+            next_item["url"] = request.build_absolute_uri(f"{blob_url}?{query}")
+        elif path:
             query = urlencode({"session_id": session_id, "path": path})
             next_item["url"] = request.build_absolute_uri(f"{url_template}?{query}")
         hydrated.append(next_item)
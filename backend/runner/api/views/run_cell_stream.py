@@ -7,13 +7,22 @@ from django.shortcuts import get_object_or_404
 
 from ...models.notebook import Notebook
 from ...services.runtime import SessionNotFoundError
+from ...services.cell_dependencies import stale_cells
+from ...services.cell_outputs import save_cell_outputs
 from ...services.streaming_runs import (
     RunInProgressError,
     get_streaming_run,
+    read_run_events,
     read_stream_output,
+    start_notebook_run,
     start_streaming_run,
 )
-from ..serializers import CellRunSerializer, CellRunStreamStatusSerializer
+from ..serializers import (
+    CellRunSerializer,
+    CellRunStreamStatusSerializer,
+    NotebookRunSerializer,
+    NotebookRunStatusSerializer,
+)
 from .run_cell import _attach_output_urls, _build_artifacts
 from .sessions import ensure_notebook_access
 
@@ -106,8 +115,139 @@ class RunCellStreamStatusView(APIView):
                 "stderr": run.result.stderr,
                 "error": run.result.error,
                 "variables": run.result.variables,
+                "removed_variables": run.result.removed_variables,
                 "outputs": outputs,
                 "artifacts": artifacts,
             }
 
         return Response(payload, status=status.HTTP_200_OK)
+
+
+class RunNotebookStartView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = NotebookRunSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cells = serializer.cells
+        notebook = cells[0].notebook
+        ensure_notebook_access(request.user, notebook)
+        session_id = serializer.validated_data["session_id"]
+        sources = [(cell.id, cell.content or "") for cell in cells]
+        if serializer.validated_data["mode"] == "stale":
+            stale = set(stale_cells(session_id, sources))
+            sources = [item for item in sources if item[0] in stale]
+            if not sources:
+                return Response(
+                    {
+                        "run_id": None,
+                        "status": "finished",
+                        "session_id": session_id,
+                        "notebook_id": notebook.id,
+                        "cell_ids": [],
+                    },
+                    status=status.HTTP_200_OK,
+                )
+
+        try:
+            run = start_notebook_run(
+                session_id=session_id,
+                notebook_id=notebook.id,
+                cells=sources,
+                stop_on_error=serializer.validated_data["stop_on_error"],
+                on_finish=_save_run_outputs,
+            )
+        except RunInProgressError:
+            return Response(
+                {"detail": "Сессия уже выполняет ячейку. Остановите или перезапустите сессию."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except SessionNotFoundError:
+            return Response(
+                {"detail": "Сессия не создана. Сначала создайте новую сессию."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(
+            {
+                "run_id": run.run_id,
+                "status": run.status,
+                "session_id": session_id,
+                "notebook_id": notebook.id,
+                "cell_ids": run.cell_ids,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class RunNotebookStatusView(APIView):
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        serializer = NotebookRunStatusSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        run_id = serializer.validated_data["run_id"]
+        run = get_streaming_run(run_id)
+        if run is None or not run.cell_ids:
+            return Response({"detail": "Run not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        notebook = get_object_or_404(Notebook, pk=run.notebook_id)
+        ensure_notebook_access(request.user, notebook)
+
+        events, events_next = read_run_events(run, offset=serializer.validated_data.get("events_offset") or 0)
+        for event in events:
+            if event.get("event") == "finished" and isinstance(event.get("result"), dict):
+                event["result"] = _build_cell_result(request, run.session_id, event["cell_id"], event["result"])
+
+        payload = {
+            "run_id": run_id,
+            "status": run.status,
+            "events": events,
+            "events_offset": events_next,
+        }
+
+        # Live output of the cell the client shows as running.
+        cell_id = serializer.validated_data.get("cell_id")
+        if cell_id in run.cell_ids:
+            stdout_chunk, stderr_chunk, stdout_next, stderr_next = read_stream_output(
+                run,
+                stdout_offset=serializer.validated_data.get("stdout_offset") or 0,
+                stderr_offset=serializer.validated_data.get("stderr_offset") or 0,
+                cell_id=cell_id,
+            )
+            payload.update(
+                {
+                    "cell_id": cell_id,
+                    "stdout": stdout_chunk,
+                    "stderr": stderr_chunk,
+                    "stdout_offset": stdout_next,
+                    "stderr_offset": stderr_next,
+                }
+            )
+
+        if run.status == "error":
+            payload["detail"] = run.error or "Ошибка выполнения"
+
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+def _save_run_outputs(run) -> None:
+    save_cell_outputs(run.session_id, run.notebook_id, run.cell_results)
+
+
+def _build_cell_result(request, session_id: str, cell_id: int, result: dict) -> dict:
+    outputs = _attach_output_urls(request, session_id, result.get("outputs") or [])
+    return {
+        "session_id": session_id,
+        "cell_id": cell_id,
+        "status": result.get("status") or ("error" if result.get("error") else "success"),
+        "stdout": result.get("stdout") or "",
+        "stderr": result.get("stderr") or "",
+        "error": result.get("error"),
+        "variables": result.get("variables") or {},
+        "removed_variables": result.get("removed_variables") or [],
+        "outputs": outputs,
+        "artifacts": _build_artifacts(outputs, result.get("artifacts") or []),
+    }
@@ -5,12 +5,16 @@ import csv
 import io
 import logging
 import math
-import shutil
+import mimetypes
+import re
 from pathlib import Path
 from typing import Any, Optional
 
 from django.http import FileResponse, Http404
+from django.http import HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.clickjacking import xframe_options_sameorigin
 from rest_framework import permissions, status
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
@@ -22,14 +26,21 @@ from ...models.problem import Problem
 from ...models.problem_data import ProblemData
 from ...services.runtime import (
     RuntimeSession,
+    SessionHeldElsewhereError,
     SessionNotFoundError,
+    SessionQuotaExceeded,
     create_session,
+    dataframe_rows,
     get_session,
+    inspect_session,
+    interrupt_session,
     reset_session,
     stop_session,
 )
+from ...services.dataset_provisioning import provision_dataset_file
 from ...services.permissions import user_has_gpu_access
 from ...services.streaming_runs import cancel_streaming_runs
+from ...services.vm_agent import OUTPUT_BLOBS_DIR
 from ...services.vm_exceptions import GpuSlotsBusy
 from ..serializers import (
     NotebookCreateSerializer,
@@ -40,6 +51,7 @@ from ..serializers import (
     SessionFileUploadSerializer,
     SessionFilePreviewSerializer,
     SessionFileChartSerializer,
+    SessionDataFrameRowsSerializer,
 )
 
 NOTEBOOK_SESSION_PREFIX = "notebook:"
@@ -56,6 +68,8 @@ MAX_CHART_POINTS = 5000
 DEFAULT_CHART_BINS = 20
 DEFAULT_BAR_TOP_N = 30
 MAX_BAR_TOP_N = 200
+OUTPUT_BLOB_NAME_RE = re.compile(r"^[0-9a-f]{64}\.[a-z0-9+.-]+$")
+OUTPUT_BLOB_CACHE_CONTROL = "private, max-age=31536000, immutable"
 
 
 def folder_has_ancestor(folder: NotebookFolder, ancestor_id: int) -> bool:
@@ -90,6 +104,13 @@ def extract_notebook_id(session_id: str) -> Optional[int]:
     return None
 
 
+def _request_user_id(request) -> Optional[int]:
+    user = getattr(request, "user", None)
+    if user is None or not getattr(user, "is_authenticated", False):
+        return None
+    return user.id
+
+
 def ensure_notebook_access(user, notebook: Notebook) -> None:
     if user is None or not getattr(user, "is_authenticated", False):
         return
@@ -100,7 +121,10 @@ def ensure_notebook_access(user, notebook: Notebook) -> None:
 
 def copy_problem_files_to_session(problem: Problem, session: RuntimeSession) -> None:
     """
-    Copy problem data files (train, test, sample_submission) to the notebook session workdir.
+    Place problem data files (train, test, sample_submission) into the notebook session workdir.
+
+    Files are cloned, or linked into the shared dataset cache for Docker VMs,
+    where possible instead of being copied; see ``services.dataset_provisioning``.
     """
     try:
         problem_data = ProblemData.objects.filter(problem=problem).first()
@@ -108,6 +132,8 @@ def copy_problem_files_to_session(problem: Problem, session: RuntimeSession) ->
             return
         workdir = session.workdir
         workdir.mkdir(parents=True, exist_ok=True)
+        # Docker VMs mount the dataset cache read-only, so they can link into it.
+        shared_cache = session.vm is not None and session.vm.backend == "docker"
 
         files_to_copy = [
             (problem_data.train_file, "train.csv"),
@@ -120,7 +146,7 @@ def copy_problem_files_to_session(problem: Problem, session: RuntimeSession) ->
                     source_path = Path(file_field.path)
                     if source_path.exists():
                         target_path = workdir / target_name
-                        shutil.copy2(source_path, target_path)
+                        provision_dataset_file(source_path, target_path, shared_cache=shared_cache)
                 except Exception as exc:
                     logger = logging.getLogger(__name__)
                     logger.warning("Failed to copy %s: %s", target_name, exc)
@@ -262,12 +288,22 @@ class CreateNotebookSessionView(APIView):
             "gpu": notebook.compute_device == Notebook.ComputeDevice.GPU,
         }
         try:
-            session = create_session(session_id, overrides=overrides)
+            session = create_session(session_id, overrides=overrides, user_id=_request_user_id(request))
         except GpuSlotsBusy:
             return Response(
                 {"detail": "Все GPU-слоты сейчас заняты, попробуйте позже"},
                 status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
+        except SessionHeldElsewhereError:
+            return Response(
+                {"detail": "Сессия уже запущена в другом процессе сервера. Перезапустите сессию или повторите позже."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except SessionQuotaExceeded:
+            return Response(
+                {"detail": "Достигнут лимит одновременно запущенных сессий. Остановите одну из сессий."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
 
         if notebook.problem:
             copy_problem_files_to_session(notebook.problem, session)
@@ -308,7 +344,7 @@ class ResetSessionView(APIView):
                     status=status.HTTP_403_FORBIDDEN,
                 )
         try:
-            session = reset_session(session_id, overrides=overrides)
+            session = reset_session(session_id, overrides=overrides, user_id=_request_user_id(request))
         except SessionNotFoundError:
             raise Http404("Session not found")
         except GpuSlotsBusy:
@@ -316,6 +352,11 @@ class ResetSessionView(APIView):
                 {"detail": "Все GPU-слоты сейчас заняты, попробуйте позже"},
                 status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
+        except SessionQuotaExceeded:
+            return Response(
+                {"detail": "Достигнут лимит одновременно запущенных сессий. Остановите одну из сессий."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS,
+            )
         if notebook and notebook.problem:
             copy_problem_files_to_session(notebook.problem, session)
         payload = _build_session_payload(session_id, session, status_label="reset")
@@ -342,6 +383,68 @@ class StopSessionView(APIView):
         return Response(payload, status=status.HTTP_200_OK)
 
 
+class InterruptSessionView(APIView):
+    """
+    POST /api/sessions/interrupt/ - Stop the running cell with ``KeyboardInterrupt``.
+
+    Unlike a reset, the VM and the notebook variables are kept.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        serializer = SessionResetSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session_id = serializer.validated_data["session_id"]
+        notebook_id = extract_notebook_id(session_id)
+        if notebook_id is not None:
+            notebook = get_object_or_404(Notebook, pk=notebook_id)
+            ensure_notebook_access(request.user, notebook)
+
+        try:
+            result = interrupt_session(session_id)
+        except SessionNotFoundError:
+            raise Http404("Session not found")
+        if result.get("status") == "error":
+            return Response(
+                {"session_id": session_id, "detail": result.get("error") or "Не удалось прервать выполнение"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        payload = {"session_id": session_id, "interrupted": bool(result.get("interrupted"))}
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class SessionVariablesView(APIView):
+    """
+    GET /api/sessions/variables/ - Session variables, available while a cell is running.
+
+    Every variable is described by a short summary; ``?name=<var>`` (repeatable)
+    returns the full repr of the named variables instead.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        serializer = SessionFilesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        session_id = serializer.validated_data["session_id"]
+        notebook_id = extract_notebook_id(session_id)
+        if notebook_id is not None:
+            notebook = get_object_or_404(Notebook, pk=notebook_id)
+            ensure_notebook_access(request.user, notebook)
+
+        names = [name for name in request.query_params.getlist("name") if name]
+        try:
+            result = inspect_session(session_id, names or None)
+        except SessionNotFoundError:
+            raise Http404("Session not found")
+        if result.get("status") == "error":
+            return Response(
+                {"session_id": session_id, "detail": result.get("error") or "Не удалось получить переменные"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        payload = {"session_id": session_id, "variables": result.get("variables") or {}}
+        return Response(payload, status=status.HTTP_200_OK)
+
+
 class SessionFilesView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -359,7 +462,7 @@ class SessionFilesView(APIView):
             if not path.is_file():
                 continue
             rel = path.relative_to(session.workdir)
-            if ".streams" in rel.parts:
+            if ".streams" in rel.parts or OUTPUT_BLOBS_DIR in rel.parts:
                 continue
             stat = path.stat()
             files.append({
@@ -492,6 +595,80 @@ class SessionFileDownloadView(APIView):
         )
 
 
+class SessionOutputBlobView(APIView):
+    """
+    GET /api/sessions/outputs/<blob>/ - A rich cell output stored as a blob.
+
+    Blob names are content hashes, so a response never changes: it is cached
+    for good and revalidated by its hash. Outputs are served in a sandbox so
+    that HTML produced by a notebook cannot act as the application.
+    """
+    permission_classes = [permissions.AllowAny]
+
+    @method_decorator(xframe_options_sameorigin)
+    def get(self, request, blob: str):
+        serializer = SessionFilesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        session_id = serializer.validated_data["session_id"]
+        if not OUTPUT_BLOB_NAME_RE.match(blob):
+            raise Http404("Output not found")
+
+        session = get_session(session_id, touch=False)
+        if session is None:
+            raise Http404("Session not found")
+
+        notebook_id = extract_notebook_id(session_id)
+        if notebook_id is not None:
+            notebook = get_object_or_404(Notebook, pk=notebook_id)
+            ensure_notebook_access(request.user, notebook)
+
+        candidate = session.workdir / OUTPUT_BLOBS_DIR / blob
+        if not candidate.is_file():
+            raise Http404("Output not found")
+
+        etag = f'"{blob.split(".", 1)[0]}"'
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        else:
+            content_type = mimetypes.guess_type(blob)[0] or "application/octet-stream"
+            response = FileResponse(candidate.open("rb"), content_type=content_type)
+        response["ETag"] = etag
+        response["Cache-Control"] = OUTPUT_BLOB_CACHE_CONTROL
+        response["Content-Security-Policy"] = "sandbox allow-scripts"
+        return response
+
+
+class SessionDataFrameRowsView(APIView):
+    """GET /api/sessions/dataframe/rows/ - More rows of a DataFrame output shown truncated."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        serializer = SessionDataFrameRowsSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        session_id = serializer.validated_data["session_id"]
+        notebook_id = extract_notebook_id(session_id)
+        if notebook_id is not None:
+            notebook = get_object_or_404(Notebook, pk=notebook_id)
+            ensure_notebook_access(request.user, notebook)
+
+        try:
+            result = dataframe_rows(
+                session_id,
+                serializer.validated_data["frame_id"],
+                offset=serializer.validated_data["offset"],
+                limit=serializer.validated_data["limit"],
+            )
+        except SessionNotFoundError:
+            raise Http404("Session not found")
+        if result.get("status") == "error":
+            return Response(
+                {"session_id": session_id, "detail": result.get("error") or "Не удалось загрузить строки"},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+        result.pop("status", None)
+        return Response({"session_id": session_id, **result}, status=status.HTTP_200_OK)
+
+
 class SessionFilePreviewView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -1,6 +1,7 @@
 from http import HTTPStatus
 from tempfile import TemporaryDirectory
 import importlib.util
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
@@ -137,6 +138,27 @@ class NotebookSessionAPITests(TestCase):
         content = b"".join(resp.streaming_content)
         self.assertEqual(content, b"ping")
 
+    def test_session_output_blob_is_served_with_cache_headers(self):
+        session_id = f"notebook:{self.notebook.id}"
+        create_session(session_id)
+        with patch.dict("os.environ", {"RUNTIME_OUTPUT_INLINE_MAX_BYTES": "4096"}):
+            result = run_code(session_id, "{'type': 'text/html', 'data': '<p>' + 'x' * 10000 + '</p>'}")
+        blob = result.outputs[0]["blob"]
+        blob_url = reverse("session-output-blob", args=[blob])
+
+        resp = self.client.get(f"{blob_url}?session_id={session_id}")
+        self.assertEqual(resp.status_code, HTTPStatus.OK)
+        self.assertEqual(resp["Content-Type"], "text/html")
+        self.assertIn("immutable", resp["Cache-Control"])
+        self.assertEqual(b"".join(resp.streaming_content), ("<p>" + "x" * 10000 + "</p>").encode())
+
+        cached = self.client.get(f"{blob_url}?session_id={session_id}", HTTP_IF_NONE_MATCH=resp["ETag"])
+        self.assertEqual(cached.status_code, HTTPStatus.NOT_MODIFIED)
+
+        for name in ("..%2Fsecret.txt", "not-a-hash.png"):
+            missing = self.client.get(f"/api/sessions/outputs/{name}/?session_id={session_id}")
+            self.assertEqual(missing.status_code, HTTPStatus.NOT_FOUND)
+
     def test_session_file_download_prevents_escape(self):
         session_id = f"notebook:{self.notebook.id}"
         create_session(session_id)
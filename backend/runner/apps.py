@@ -8,3 +8,5 @@ class RunnerConfig(AppConfig):
     def ready(self):
         from runner.services.runtime import register_runtime_shutdown_hooks
         register_runtime_shutdown_hooks()
+        from runner.services.leaderboard_cache import register_leaderboard_cache_hooks
+        register_leaderboard_cache_hooks()
@@ -0,0 +1,140 @@
+import io
+import json
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from runner.models import Course
+from runner.services.leaderboard_benchmark import (
+    SyntheticLeaderboardSpec,
+    check_budgets,
+    load_benchmark_budgets,
+    measure,
+    profile_spec,
+    run_benchmark,
+    seed_synthetic_course,
+)
+from runner.views.contest_leaderboard import build_contest_leaderboards, build_course_leaderboard
+
+TARGETS = ("contest_leaderboards", "course_leaderboard")
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic loadtest_<run_id> course and report SQL query count, wall time and "
+        "peak memory of the contest and course leaderboard builders. With --check the command "
+        "fails when a committed budget or a previous baseline is exceeded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--run-id", required=True, help="Run id used in loadtest_<run_id> names.")
+        parser.add_argument(
+            "--profile",
+            default="small",
+            help="Size profile from the budgets file (small, medium, large, course).",
+        )
+        parser.add_argument("--students", type=int, default=None)
+        parser.add_argument("--contests", type=int, default=None)
+        parser.add_argument("--problems-per-contest", type=int, default=None)
+        parser.add_argument("--submissions", type=int, default=None)
+        parser.add_argument("--repeat", type=int, default=3, help="Measured runs after one warm-up run.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--target",
+            action="append",
+            choices=TARGETS,
+            default=[],
+            help="Builder to measure; repeat for several. Defaults to all.",
+        )
+        parser.add_argument("--budgets", default=None, help="Budgets JSON file (defaults to the committed one).")
+        parser.add_argument("--baseline", default=None, help="JSON output of an earlier run to compare against.")
+        parser.add_argument("--tolerance", type=float, default=1.25)
+        parser.add_argument("--check", action="store_true", help="Fail when budgets or the baseline are exceeded.")
+        parser.add_argument(
+            "--reuse",
+            action="store_true",
+            help="Measure an already seeded loadtest_<run_id>_course instead of seeding a new one.",
+        )
+        parser.add_argument(
+            "--cleanup",
+            action="store_true",
+            help="Delete the seeded data with cleanup_load_test_data when finished.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print only JSON output.")
+
+    def handle(self, *args, **options):
+        run_id = str(options["run_id"]).strip()
+        if not run_id:
+            raise CommandError("--run-id must be non-empty")
+
+        budgets_file = load_benchmark_budgets(Path(options["budgets"]) if options["budgets"] else None)
+        profile_name = options["profile"]
+        profile = budgets_file.get(profile_name)
+        if profile is None:
+            raise CommandError(f"Unknown profile {profile_name!r}; expected one of {sorted(budgets_file)}.")
+
+        base_spec = profile_spec(profile, seed=int(options["seed"]))
+        overrides = {
+            name: options[name]
+            for name in ("students", "contests", "problems_per_contest", "submissions")
+            if options[name] is not None
+        }
+        spec = SyntheticLeaderboardSpec(
+            students=max(int(overrides.get("students", base_spec.students)), 1),
+            contests=max(int(overrides.get("contests", base_spec.contests)), 1),
+            problems_per_contest=max(int(overrides.get("problems_per_contest", base_spec.problems_per_contest)), 1),
+            submissions=max(int(overrides.get("submissions", base_spec.submissions)), 0),
+            seed=base_spec.seed,
+        )
+        # Budgets only describe the profile sizes.
+        budgets = {} if overrides else profile.get("budgets", {})
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"], encoding="utf-8") as baseline_file:
+                baseline = json.load(baseline_file).get("results", {})
+
+        if options["reuse"]:
+            course = Course.objects.filter(title=f"loadtest_{run_id}_course").first()
+            if course is None:
+                raise CommandError(f"No seeded course for run id {run_id!r}.")
+            seeding = None
+        else:
+            seeding = measure(lambda: seed_synthetic_course(run_id, spec))
+            course = Course.objects.get(title=f"loadtest_{run_id}_course")
+        contest = course.contests.order_by("position", "id").first()
+
+        builders = {
+            "contest_leaderboards": lambda: build_contest_leaderboards(contest),
+            "course_leaderboard": lambda: build_course_leaderboard(course),
+        }
+        targets = options["target"] or list(TARGETS)
+        try:
+            results = {
+                target: run_benchmark(builders[target], repeat=options["repeat"])
+                for target in targets
+            }
+        finally:
+            if options["cleanup"]:
+                call_command("cleanup_load_test_data", run_id=run_id, yes=True, json=True, stdout=io.StringIO())
+
+        violations = check_budgets(results, budgets, baseline=baseline, tolerance=options["tolerance"])
+        payload = {
+            "run_id": run_id,
+            "profile": profile_name,
+            "spec": spec.__dict__,
+            "seeding": seeding,
+            "results": results,
+            "budgets": budgets,
+            "violations": violations,
+        }
+        output = json.dumps(payload, indent=2, sort_keys=True)
+        if options["json"]:
+            self.stdout.write(output)
+        else:
+            self.stdout.write(self.style.SUCCESS("BOOML leaderboard benchmark:"))
+            self.stdout.write(output)
+
+        if options["check"] and violations:
+            raise CommandError("Leaderboard benchmark budget exceeded:\n" + "\n".join(violations))
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from runner.services.vm_agent_benchmark import run_transport_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the VM agent server locally and compare the round-trip latency of the command-file "
+        "and Unix-socket transports for the same cell."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=50, help="Measured round trips per transport.")
+        parser.add_argument("--code", default="pass", help="Cell source sent on every round trip.")
+        parser.add_argument("--json", action="store_true", help="Print only JSON output.")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be positive")
+        results = run_transport_benchmark(code=options["code"], repeat=options["repeat"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        for transport in ("file", "socket"):
+            stats = results[transport]
+            self.stdout.write(
+                f"{transport:>6}: p50={stats['p50_ms']:.2f} ms p95={stats['p95_ms']:.2f} ms "
+                f"mean={stats['mean_ms']:.2f} ms min={stats['min_ms']:.2f} ms ({stats['runs']} runs)"
+            )
+        if results["p50_speedup"] is not None:
+            self.stdout.write(self.style.SUCCESS(f"socket p50 is {results['p50_speedup']}x faster"))
@@ -6,6 +6,7 @@ from django.core.management.base import BaseCommand
 
 from runner.models import Problem, Submission
 from runner.services.checker import SubmissionChecker
+from runner.services.leaderboard_cache import invalidate_problem_leaderboards
 from runner.services.problem_scoring import (
     default_curve_p,
     extract_raw_metric,
@@ -13,6 +14,7 @@ from runner.services.problem_scoring import (
     resolve_score_spec,
     score_from_raw,
 )
+from runner.services.standings_snapshots import discard_standings_snapshots
 
 
 VALID_STATUSES = (Submission.STATUS_ACCEPTED, Submission.STATUS_VALIDATED)
@@ -170,6 +172,7 @@ class Command(BaseCommand):
 
             if to_update and not dry_run:
                 Submission.objects.bulk_update(to_update, ["metrics"])
+                discard_standings_snapshots(invalidate_problem_leaderboards([problem.id]))
 
             if to_update:
                 updated_submissions += len(to_update)
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from runner.services.package_cache import get_wheelhouse, seed_packages, seed_wheelhouse
+
+
+class Command(BaseCommand):
+    help = (
+        "Put wheels of common packages into the wheelhouse of the shared pip cache, so that "
+        "`!pip install` of them in any session is served from local files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "packages",
+            nargs="*",
+            help="Requirement specifiers to seed (default: RUNTIME_PIP_SEED_PACKAGES).",
+        )
+        parser.add_argument("-r", "--requirements", type=Path, help="Also seed everything in this requirements file.")
+        parser.add_argument(
+            "--python-version",
+            help="Download binary wheels for this Python of the VM image (e.g. 3.11) instead of building for the server's.",
+        )
+        parser.add_argument("--platform", help="Platform tag of the binary wheels to download (e.g. manylinux2014_x86_64).")
+
+    def handle(self, *args, **options):
+        packages = options["packages"] or ([] if options["requirements"] else seed_packages())
+        if not packages and not options["requirements"]:
+            raise CommandError("Nothing to seed: pass packages, --requirements or set RUNTIME_PIP_SEED_PACKAGES")
+        try:
+            result = seed_wheelhouse(
+                packages,
+                requirements=options["requirements"],
+                python_version=options["python_version"],
+                platform=options["platform"],
+            )
+        except RuntimeError as exc:
+            raise CommandError(str(exc)) from exc
+        if result.returncode != 0:
+            raise CommandError(f"pip failed with exit code {result.returncode}:\n{result.stderr.strip()}")
+
+        wheelhouse = get_wheelhouse()
+        wheels = sorted(path.name for path in wheelhouse.glob("*.whl"))
+        self.stdout.write(self.style.SUCCESS(f"{len(wheels)} wheels in {wheelhouse}"))
@@ -0,0 +1,63 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from runner.models import Contest
+from runner.views.contest_leaderboard import refresh_contest_standings_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write (or rewrite) final standings snapshots of finished contests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--contest-id", type=int, action="append", default=[])
+        parser.add_argument(
+            "--all-finished",
+            action="store_true",
+            help="Refresh every contest whose end time has passed.",
+        )
+        parser.add_argument(
+            "--missing-only",
+            action="store_true",
+            help="With --all-finished, skip contests that already have a snapshot.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print only JSON output.")
+
+    def handle(self, *args, **options):
+        contest_ids = options["contest_id"]
+        if not contest_ids and not options["all_finished"]:
+            raise CommandError("Pass --contest-id or --all-finished.")
+
+        contests = Contest.objects.select_related("course").order_by("id")
+        if options["all_finished"]:
+            contests = contests.filter(
+                start_time__isnull=False,
+                duration_minutes__isnull=False,
+            )
+            if options["missing_only"]:
+                contests = contests.filter(standings_snapshot__isnull=True)
+        if contest_ids:
+            contests = contests.filter(id__in=contest_ids)
+
+        now = timezone.now()
+        results = []
+        for contest in contests.iterator(chunk_size=100):
+            end_time = contest.get_end_time()
+            if end_time is None or end_time > now:
+                if contest_ids:
+                    results.append({"contest_id": contest.id, "saved": False, "reason": "not_finished"})
+                continue
+            results.append(refresh_contest_standings_snapshot(contest))
+
+        payload = {
+            "saved": sum(1 for result in results if result["saved"]),
+            "skipped": sum(1 for result in results if not result["saved"]),
+            "contests": results,
+        }
+        output = json.dumps(payload, indent=2, sort_keys=True)
+        if options["json"]:
+            self.stdout.write(output)
+            return
+        self.stdout.write(self.style.SUCCESS("Contest standings snapshots:"))
+        self.stdout.write(output)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.8 on 2026-10-19 00:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('runner', '0038_teacheraccessrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContestStandingsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contest_end_time', models.DateTimeField()),
+                ('fingerprint', models.CharField(max_length=64)),
+                ('data', models.BinaryField()),
+                ('raw_size', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('contest', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='standings_snapshot', to='runner.contest')),
+            ],
+        ),
+    ]
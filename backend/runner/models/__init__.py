@@ -7,7 +7,7 @@ from .contest import Contest, ContestProblem
 from .problem_desriptor import ProblemDescriptor
 from .problem_data import ProblemData
 from .prevalidation import PreValidation
-from .leaderboard import Leaderboard
+from .leaderboard import ContestStandingsSnapshot, Leaderboard
 from .problem import Problem
 from .tag import Tag
 from .section import Section, SectionTeacher
@@ -8,3 +8,29 @@ class Leaderboard(models.Model):
 
     def __str__(self):
         return self.name or f"Leaderboard #{self.pk}"
+
+
+class ContestStandingsSnapshot(models.Model):
+    """
+    Frozen final standings of a finished contest.
+
+    ``data`` holds zlib-compressed JSON with the rendered payload and the
+    aggregated pre-deadline state; ``fingerprint`` covers everything besides
+    submissions that the standings depend on (deadline, scoring, problems,
+    participants), so a stale snapshot is simply ignored and rewritten.
+    """
+
+    contest = models.OneToOneField(
+        "Contest",
+        on_delete=models.CASCADE,
+        related_name="standings_snapshot",
+    )
+    contest_end_time = models.DateTimeField()
+    fingerprint = models.CharField(max_length=64)
+    data = models.BinaryField()
+    raw_size = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Standings snapshot for contest #{self.contest_id}"
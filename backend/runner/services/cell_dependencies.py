@@ -0,0 +1,241 @@
+"""Which cells of a notebook need to run again after an edit.
+
+Every executed cell leaves a record in its session: a hash of the source that
+ran, the names it reads and the names it defines. Reads come from the cell's
+AST; definitions are the names the AST binds plus the variables the agent saw
+change during the run (``variables``/``removed_variables`` of the result), which
+also catches ``exec``, star imports and in-place updates that alter a value.
+
+A bare method call on a name (``model.fit(X, y)``, ``rows.append(r)``) counts as
+defining that name, since such calls usually mutate their object without the
+agent noticing. Imports only count when the agent saw the name change, so
+re-running an import cell does not make every user of the module stale.
+
+``stale_cells`` walks the notebook in order and keeps a cell when:
+
+* it never ran in the session, its source changed or its last run failed;
+* or a cell above it, which is itself re-run or ran after it, defines a name
+  it reads.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import itertools
+from dataclasses import dataclass
+from typing import Any, FrozenSet, Iterable, List, Sequence, Set, Tuple
+
+from .runtime import RuntimeExecutionResult, get_session
+from .vm_agent import _rewrite_shell_commands
+
+_RUNTIME_PREFIX = "_booml_"
+_SEQUENCE = itertools.count(1)
+# Results of runs that are still waiting for more input say nothing yet.
+_UNFINISHED_STATUSES = {"input_required", "running"}
+
+
+@dataclass(frozen=True)
+class CellRecord:
+    code_hash: str
+    # ``None`` when the source could not be parsed: the cell is always re-run.
+    reads: FrozenSet[str] | None
+    writes: FrozenSet[str]
+    failed: bool
+    sequence: int
+
+
+def analyze_cell(code: str) -> Tuple[FrozenSet[str] | None, FrozenSet[str]]:
+    """Names ``code`` reads before binding them and names it binds, or ``(None, set())`` for invalid code."""
+    reads, writes, _ = _analyze(code)
+    return reads, writes
+
+
+def record_cell_execution(session_id: str, cell_id: Any, code: str, result: RuntimeExecutionResult) -> None:
+    """Remember what a finished run of ``cell_id`` read and defined in its session."""
+    if result.status in _UNFINISHED_STATUSES:
+        return
+    session = get_session(session_id, touch=False)
+    if session is None:
+        return
+    reads, writes, imports = _analyze(code)
+    changed = set(result.variables or {}) | set(result.removed_variables or [])
+    record = CellRecord(
+        code_hash=_code_hash(code),
+        reads=reads,
+        writes=(writes - imports) | _user_names(changed),
+        failed=bool(result.error) or result.status == "error",
+        sequence=next(_SEQUENCE),
+    )
+    with session.lock:
+        session.executed_cells[cell_id] = record
+
+
+def stale_cells(session_id: str, cells: Sequence[Tuple[Any, str]]) -> List[Any]:
+    """Ids of ``cells`` (id and source, in notebook order) that a "run stale" has to execute."""
+    session = get_session(session_id, touch=False)
+    records = dict(session.executed_cells) if session is not None else {}
+    stale: List[Any] = []
+    # Newest run above the current cell that defined each name; re-run cells count as newest.
+    defined_at: dict[str, float] = {}
+    for cell_id, code in cells:
+        record = records.get(cell_id)
+        if _needs_run(record, code, defined_at):
+            stale.append(cell_id)
+            _, writes = analyze_cell(code)
+            _mark_defined(defined_at, writes | (record.writes if record else frozenset()), float("inf"))
+        else:
+            _mark_defined(defined_at, record.writes, record.sequence)
+    return stale
+
+
+def _analyze(code: str) -> Tuple[FrozenSet[str] | None, FrozenSet[str], FrozenSet[str]]:
+    try:
+        tree = ast.parse(_rewrite_shell_commands(code))
+    except (SyntaxError, ValueError):
+        return None, frozenset(), frozenset()
+    reads: Set[str] = set()
+    writes: Set[str] = set()
+    imports: Set[str] = set()
+    for statement in tree.body:
+        names = _NameCollector()
+        names.visit(statement)
+        reads |= names.loads - writes
+        writes |= names.stores
+        imports = (imports | names.imports) - (names.stores - names.imports)
+    return _user_names(reads), _user_names(writes), _user_names(imports)
+
+
+def _needs_run(record: CellRecord | None, code: str, defined_at: dict[str, float]) -> bool:
+    if record is None or record.failed or record.reads is None:
+        return True
+    if record.code_hash != _code_hash(code):
+        return True
+    return any(defined_at.get(name, 0) > record.sequence for name in record.reads)
+
+
+def _mark_defined(defined_at: dict[str, float], names: Iterable[str], sequence: float) -> None:
+    for name in names:
+        defined_at[name] = max(defined_at.get(name, 0), sequence)
+
+
+def _code_hash(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def _user_names(names: Iterable[str]) -> FrozenSet[str]:
+    return frozenset(name for name in names if not name.startswith(_RUNTIME_PREFIX))
+
+
+class _NameCollector(ast.NodeVisitor):
+    """Module-level names one statement loads and binds."""
+
+    def __init__(self) -> None:
+        self.loads: Set[str] = set()
+        self.stores: Set[str] = set()
+        self.globals: Set[str] = set()
+        self.imports: Set[str] = set()
+
+    def visit_Name(self, node: ast.Name) -> None:
+        if isinstance(node.ctx, ast.Load):
+            self.loads.add(node.id)
+        else:
+            self.stores.add(node.id)
+
+    def visit_Import(self, node: ast.Import | ast.ImportFrom) -> None:
+        for alias in node.names:
+            if alias.name != "*":
+                self.stores.add(alias.asname or alias.name.split(".")[0])
+                self.imports.add(alias.asname or alias.name.split(".")[0])
+
+    visit_ImportFrom = visit_Import
+
+    def visit_Global(self, node: ast.Global) -> None:
+        self.globals.update(node.names)
+
+    def visit_AugAssign(self, node: ast.AugAssign) -> None:
+        root = _root_name(node.target)
+        if root is not None:
+            self.loads.add(root)
+        self.generic_visit(node)
+
+    def visit_Attribute(self, node: ast.Attribute) -> None:
+        self._visit_target(node)
+
+    def visit_Subscript(self, node: ast.Subscript) -> None:
+        self._visit_target(node)
+
+    def visit_Expr(self, node: ast.Expr) -> None:
+        # ``obj.method(...)`` whose result is dropped is called for its effect on ``obj``.
+        if isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Attribute):
+            root = _root_name(node.value.func)
+            if root is not None:
+                self.stores.add(root)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: ast.FunctionDef | ast.AsyncFunctionDef) -> None:
+        self.stores.add(node.name)
+        for expr in [*node.decorator_list, *node.args.defaults, *node.args.kw_defaults]:
+            if expr is not None:
+                self.visit(expr)
+        self._visit_scope(node.body, _parameters(node.args))
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node: ast.Lambda) -> None:
+        for expr in [*node.args.defaults, *node.args.kw_defaults]:
+            if expr is not None:
+                self.visit(expr)
+        self._visit_scope([node.body], _parameters(node.args))
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self.stores.add(node.name)
+        for expr in [*node.decorator_list, *node.bases, *(keyword.value for keyword in node.keywords)]:
+            self.visit(expr)
+        self._visit_scope(node.body, set())
+
+    def visit_ListComp(self, node: ast.ListComp | ast.SetComp | ast.GeneratorExp | ast.DictComp) -> None:
+        self._visit_scope([node], set(), comprehension=True)
+
+    visit_SetComp = visit_ListComp
+    visit_GeneratorExp = visit_ListComp
+    visit_DictComp = visit_ListComp
+
+    def _visit_target(self, node: ast.Attribute | ast.Subscript) -> None:
+        # ``df["a"] = ...`` or ``obj.attr = ...`` changes the object bound to the root name.
+        if not isinstance(node.ctx, ast.Load):
+            root = _root_name(node)
+            if root is not None:
+                self.stores.add(root)
+        self.generic_visit(node)
+
+    def _visit_scope(self, body: Sequence[ast.AST], local: Set[str], *, comprehension: bool = False) -> None:
+        inner = _NameCollector()
+        for node in body:
+            if comprehension:
+                inner.generic_visit(node)
+            else:
+                inner.visit(node)
+        bound = (inner.stores | local) - inner.globals
+        self.loads |= inner.loads - bound
+        self.stores |= inner.globals
+
+
+def _root_name(node: ast.AST) -> str | None:
+    while isinstance(node, (ast.Attribute, ast.Subscript, ast.Call)):
+        node = node.func if isinstance(node, ast.Call) else node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+def _parameters(args: ast.arguments) -> Set[str]:
+    names = {arg.arg for arg in [*args.posonlyargs, *args.args, *args.kwonlyargs]}
+    names.update(arg.arg for arg in (args.vararg, args.kwarg) if arg is not None)
+    return names
+
+
+__all__ = [
+    "CellRecord",
+    "analyze_cell",
+    "record_cell_execution",
+    "stale_cells",
+]
@@ -0,0 +1,200 @@
+"""Cell outputs in the notebook's stored format.
+
+The notebook page keeps every cell output as ``__booml_output_v2__:`` followed
+by a JSON model (``buildStructuredOutput`` in ``NotebookPage.vue``). Runs that
+finish on the server, such as "Run all", build the same model here so their
+outputs can be saved without a round trip through the browser.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Iterable, List
+from urllib.parse import urlencode
+
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models.cell import Cell
+from .runtime import CellExecutionResult, RuntimeExecutionResult
+
+OUTPUT_STORAGE_PREFIX = "__booml_output_v2__:"
+OUTPUT_MODEL_FORMAT = "booml_output_v2"
+
+_IMAGE_MIME_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+    ".svg": "image/svg+xml",
+}
+
+
+def session_file_url(session_id: str, path: str) -> str:
+    if not session_id or not path:
+        return ""
+    return f"{reverse('session-file-download')}?{urlencode({'session_id': session_id, 'path': path})}"
+
+
+def output_blob_url(session_id: str, blob: str) -> str:
+    if not session_id or not blob:
+        return ""
+    return f"{reverse('session-output-blob', args=[blob])}?{urlencode({'session_id': session_id})}"
+
+
+def build_output_model(
+    session_id: str,
+    result: RuntimeExecutionResult,
+    *,
+    duration_ms: int | None = None,
+) -> Dict[str, Any]:
+    """Structured output model of one cell run, as the notebook page builds it."""
+    streams = []
+    if result.stdout:
+        streams.append({"channel": "stdout", "text": result.stdout})
+    if result.stderr:
+        streams.append({"channel": "stderr", "text": result.stderr})
+
+    rich_outputs = []
+    for item in result.outputs or []:
+        if not isinstance(item, dict):
+            continue
+        path = str(item.get("path") or "")
+        blob = str(item.get("blob") or "")
+        rich_outputs.append(
+            {
+                "type": str(item.get("type") or "text/plain"),
+                "data": item.get("data", ""),
+                "metadata": item.get("metadata"),
+                "name": str(item.get("name") or ""),
+                "path": path,
+                "blob": blob,
+                "url": output_blob_url(session_id, blob) if blob else session_file_url(session_id, path),
+            }
+        )
+
+    artifacts = []
+    for item in result.artifacts or []:
+        if not isinstance(item, dict):
+            continue
+        path = str(item.get("path") or "")
+        name = str(item.get("name") or path)
+        if not name:
+            continue
+        artifacts.append(
+            {
+                "name": name,
+                "path": path,
+                "url": session_file_url(session_id, path),
+                "mime": _detect_mime(name),
+            }
+        )
+
+    return {
+        "kind": "structured",
+        "format": OUTPUT_MODEL_FORMAT,
+        "version": 2,
+        "status": result.status or ("error" if result.error else "success"),
+        "meta": {
+            "duration_ms": duration_ms if duration_ms is not None and duration_ms >= 0 else None,
+            "memory_bytes": _memory_bytes(result.outputs or []),
+        },
+        "created_at": timezone.now().isoformat(),
+        "streams": streams,
+        "rich_outputs": rich_outputs,
+        "artifacts": artifacts,
+        "error": result.error or "",
+    }
+
+
+def result_payload(session_id: str, cell_id: Any, result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A run result as the run endpoints return it, for clients without a request.
+
+    URLs of outputs are relative; outputs saved as files are listed as
+    artifacts as well.
+    """
+    outputs = []
+    for item in result.get("outputs") or []:
+        if not isinstance(item, dict):
+            continue
+        blob = item.get("blob")
+        path = item.get("path")
+        url = output_blob_url(session_id, blob) if blob else session_file_url(session_id, path or "")
+        outputs.append({**item, "url": url} if url else dict(item))
+    artifacts = []
+    seen = set()
+    for item in result.get("artifacts") or []:
+        path = item.get("path") if isinstance(item, dict) else None
+        if path and path not in seen:
+            seen.add(path)
+            artifacts.append(item)
+    for item in outputs:
+        path = item.get("path")
+        if path and path not in seen:
+            seen.add(path)
+            artifacts.append({"name": item.get("name") or path, "path": path})
+    return {
+        "session_id": session_id,
+        "cell_id": cell_id,
+        "status": result.get("status") or ("error" if result.get("error") else "success"),
+        "stdout": result.get("stdout") or "",
+        "stderr": result.get("stderr") or "",
+        "error": result.get("error"),
+        "variables": result.get("variables") or {},
+        "removed_variables": result.get("removed_variables") or [],
+        "outputs": outputs,
+        "artifacts": artifacts,
+    }
+
+
+def serialize_output_model(model: Dict[str, Any]) -> str:
+    return f"{OUTPUT_STORAGE_PREFIX}{json.dumps(model, ensure_ascii=False, default=str)}"
+
+
+def save_cell_outputs(session_id: str, notebook_id: int, results: Iterable[CellExecutionResult]) -> List[int]:
+    """Store the outputs of ``results`` in their cells with one bulk update; returns the saved cell ids."""
+    by_id = {item.cell_id: item for item in results}
+    if not by_id:
+        return []
+    cells = list(Cell.objects.filter(notebook_id=notebook_id, pk__in=list(by_id)))
+    for cell in cells:
+        item = by_id[cell.pk]
+        cell.output = serialize_output_model(build_output_model(session_id, item.result, duration_ms=item.duration_ms))
+    Cell.objects.bulk_update(cells, ["output"])
+    return [cell.pk for cell in cells]
+
+
+def _detect_mime(name: str) -> str:
+    lowered = name.lower()
+    for suffix, mime in _IMAGE_MIME_TYPES.items():
+        if lowered.endswith(suffix):
+            return mime
+    return ""
+
+
+def _memory_bytes(outputs: List[Dict[str, Any]]) -> int | None:
+    for item in outputs:
+        metadata = item.get("metadata") if isinstance(item, dict) else None
+        if not isinstance(metadata, dict):
+            continue
+        try:
+            value = float(metadata.get("memory_bytes"))
+        except (TypeError, ValueError):
+            continue
+        if value >= 0:
+            return round(value)
+    return None
+
+
+__all__ = [
+    "OUTPUT_MODEL_FORMAT",
+    "OUTPUT_STORAGE_PREFIX",
+    "build_output_model",
+    "output_blob_url",
+    "result_payload",
+    "save_cell_outputs",
+    "serialize_output_model",
+    "session_file_url",
+]
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+import asyncio
+from dataclasses import asdict
+from urllib.parse import parse_qs
+
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
-from ..models import Contest
+from ..models import Contest, Notebook
+from .cell_outputs import result_payload
+from .leaderboard_cache import ROLE_MANAGER, ROLE_PARTICIPANT
+from .leaderboard_deltas import diff_leaderboard_rows, index_rows
+from .streaming_runs import StreamCursor, StreamingRun, get_streaming_run, read_run_updates
+from .websocket_notifications import session_group_name
 
 
 class SubmissionMetricConsumer(AsyncJsonWebsocketConsumer):
@@ -147,3 +157,309 @@ class ContestNotificationConsumer(AsyncJsonWebsocketConsumer):
         if contest is None:
             return False
         return bool(contest.is_visible_to(user))
+
+
+class ContestLeaderboardConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Streams overall standings of a contest as row-level deltas.
+
+    Subscribers get a full ``snapshot`` on connect, then ``delta`` messages with
+    only the rows that changed. Change events are coalesced so that a burst of
+    graded submissions results in at most one push per ``push_interval``.
+    """
+
+    contest_id: int
+    group_name: str
+    role: str
+
+    async def connect(self) -> None:  # pragma: no cover - exercised via async tests
+        raw_contest_id = (
+            self.scope.get("url_route", {})
+            .get("kwargs", {})
+            .get("contest_id")
+        )
+        parsed_contest_id = ContestNotificationConsumer._parse_positive_int(raw_contest_id)
+        if parsed_contest_id is None:
+            await self.close(code=4400)
+            return
+
+        user = self.scope.get("user")
+        if not user or not getattr(user, "is_authenticated", False):
+            await self.close(code=4401)
+            return
+
+        role = await self._resolve_viewer_role(user.id, parsed_contest_id)
+        if role is None:
+            await self.close(code=4403)
+            return
+
+        if self.channel_layer is None:
+            await self.close(code=4500)
+            return
+
+        self.contest_id = parsed_contest_id
+        self.role = role
+        self.push_interval = float(getattr(settings, "LEADERBOARD_PUSH_INTERVAL_SECONDS", 2.0))
+        self._rows = {}
+        self._version = None
+        self._last_push_at = None
+        self._pending_push = None
+        self._dirty = False
+        self.group_name = f"contest_{self.contest_id}_leaderboard"
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self._push(initial=True)
+
+    async def disconnect(self, close_code: int) -> None:  # pragma: no cover - tested indirectly
+        pending = getattr(self, "_pending_push", None)
+        if pending is not None and not pending.done():
+            pending.cancel()
+        if self.channel_layer is None or not hasattr(self, "group_name"):
+            return
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def leaderboard_changed(self, event):
+        if self._pending_push is not None and not self._pending_push.done():
+            # The pending push may already be reading standings older than this change.
+            self._dirty = True
+            return
+        loop = asyncio.get_running_loop()
+        delay = 0.0
+        if self._last_push_at is not None:
+            delay = max(0.0, self._last_push_at + self.push_interval - loop.time())
+        self._pending_push = asyncio.ensure_future(self._push_after(delay))
+
+    async def _push_after(self, delay: float) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._dirty = False
+        await self._push()
+        if self._dirty:
+            self._dirty = False
+            self._pending_push = asyncio.ensure_future(self._push_after(self.push_interval))
+
+    async def _push(self, *, initial: bool = False) -> None:
+        version, entries = await self._load_standings(self.contest_id, self.role)
+        self._last_push_at = asyncio.get_running_loop().time()
+        if not initial and version == self._version:
+            return
+
+        rows = index_rows(entries)
+        if initial:
+            await self.send_json(
+                {
+                    "type": "snapshot",
+                    "contest_id": self.contest_id,
+                    "version": version,
+                    "rows": list(rows.values()),
+                }
+            )
+        else:
+            delta = diff_leaderboard_rows(self._rows, rows)
+            if delta["changed"] or delta["removed"]:
+                await self.send_json(
+                    {
+                        "type": "delta",
+                        "contest_id": self.contest_id,
+                        "version": version,
+                        **delta,
+                    }
+                )
+        self._rows = rows
+        self._version = version
+
+    @database_sync_to_async
+    def _resolve_viewer_role(self, user_id: int, contest_id: int):
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is None:
+            return None
+        contest = (
+            Contest.objects.select_related("course__section", "course__owner")
+            .prefetch_related("allowed_participants")
+            .filter(pk=contest_id)
+            .first()
+        )
+        if contest is None:
+            return None
+        if not contest.is_visible_to(user) or not contest.are_problems_visible_to(user):
+            return None
+        return ROLE_MANAGER if contest.is_user_manager(user) else ROLE_PARTICIPANT
+
+    @database_sync_to_async
+    def _load_standings(self, contest_id: int, role: str):
+        from ..views.contest_leaderboard import load_contest_overall_standings
+
+        contest = (
+            Contest.objects.select_related("course__section")
+            .prefetch_related("problems", "allowed_participants")
+            .get(pk=contest_id)
+        )
+        # Shares the cache entry of the HTTP leaderboard view, so N subscribers
+        # trigger at most one rebuild per leaderboard version.
+        return load_contest_overall_standings(contest, role)
+
+
+class NotebookSessionConsumer(AsyncJsonWebsocketConsumer):
+    """Pushes lifecycle events (eviction, hibernation) of a notebook's runtime session."""
+
+    notebook_id: int
+    group_name: str
+
+    async def connect(self) -> None:  # pragma: no cover - exercised via async tests
+        raw_notebook_id = (
+            self.scope.get("url_route", {})
+            .get("kwargs", {})
+            .get("notebook_id")
+        )
+        parsed_notebook_id = ContestNotificationConsumer._parse_positive_int(raw_notebook_id)
+        if parsed_notebook_id is None:
+            await self.close(code=4400)
+            return
+
+        user = self.scope.get("user")
+        has_access = await self._user_has_access_to_notebook(user, parsed_notebook_id)
+        if not has_access:
+            await self.close(code=4403)
+            return
+
+        if self.channel_layer is None:
+            await self.close(code=4500)
+            return
+
+        self.notebook_id = parsed_notebook_id
+        self.group_name = session_group_name(f"notebook:{self.notebook_id}")
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, close_code: int) -> None:  # pragma: no cover - tested indirectly
+        if self.channel_layer is None or not hasattr(self, "group_name"):
+            return
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def session_evicted(self, event):
+        await self.send_json(
+            {
+                "type": "session_evicted",
+                "session_id": event.get("session_id"),
+                "action": event.get("action"),
+                "reason": event.get("reason"),
+                "message": event.get("message"),
+            }
+        )
+
+    @database_sync_to_async
+    def _user_has_access_to_notebook(self, user, notebook_id: int) -> bool:
+        notebook = Notebook.objects.filter(pk=notebook_id).only("id", "owner_id").first()
+        if notebook is None:
+            return False
+        # Mirrors ensure_notebook_access of the sessions API.
+        if user is None or not getattr(user, "is_authenticated", False):
+            return True
+        return notebook.owner_id in (None, user.id) or bool(user.is_staff)
+
+
+class RunStreamConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes the output of a streaming run to the client as it is written.
+
+    The run's stream files are tailed every ``RUNTIME_STREAM_PUSH_INTERVAL_SECONDS``
+    and new output goes out coalesced, one message per cell and interval, so
+    clients do not poll the status endpoints. After a reconnect a client passes
+    the offsets of the last message it got (``stdout_offset``, ``stderr_offset``,
+    ``events_offset`` and, for "Run all" jobs, ``cell_id``) as query
+    parameters and continues from there. The last message is ``finished``; it has
+    status ``error`` when the run disappears from the registry before finishing.
+    """
+
+    run_id: str
+    cursor: StreamCursor
+    # Consecutive failed lookups of the run after which the stream ends with an error.
+    max_lookup_misses = 3
+
+    async def connect(self) -> None:  # pragma: no cover - exercised via async tests
+        run_id = str(self.scope.get("url_route", {}).get("kwargs", {}).get("run_id") or "")
+        run = await asyncio.to_thread(get_streaming_run, run_id) if run_id else None
+        if run is None:
+            await self.close(code=4404)
+            return
+
+        user = self.scope.get("user")
+        has_access = await self._user_has_access_to_notebook(user, run.notebook_id)
+        if not has_access:
+            await self.close(code=4403)
+            return
+
+        self.run_id = run_id
+        self.cursor = self._parse_cursor(self.scope.get("query_string", b""))
+        self.push_interval = float(getattr(settings, "RUNTIME_STREAM_PUSH_INTERVAL_SECONDS", 0.1))
+        await self.accept()
+        self._follower = asyncio.ensure_future(self._follow(run))
+
+    async def disconnect(self, close_code: int) -> None:  # pragma: no cover - tested indirectly
+        follower = getattr(self, "_follower", None)
+        if follower is not None and not follower.done():
+            follower.cancel()
+
+    async def _follow(self, run: StreamingRun) -> None:
+        misses = 0
+        while True:
+            # Read the status first: output written before the run finished is then always sent.
+            finished = run.status != "running"
+            for update in await asyncio.to_thread(self._collect, run):
+                await self.send_json(update)
+            if finished:
+                await self.send_json(self._finished_message(run))
+                await self.close()
+                return
+            await asyncio.sleep(self.push_interval)
+            # Runs executing in another worker are snapshots of the registry record.
+            latest = await asyncio.to_thread(get_streaming_run, self.run_id)
+            if latest is not None:
+                run, misses = latest, 0
+                continue
+            # The record expired or its registry is unreachable; the run will not finish here.
+            misses += 1
+            if misses >= self.max_lookup_misses:
+                await self.send_json(
+                    {
+                        "type": "finished",
+                        "run_id": self.run_id,
+                        "status": "error",
+                        "detail": "Run is no longer available: its record was not found",
+                    }
+                )
+                await self.close()
+                return
+
+    def _collect(self, run: StreamingRun) -> list[dict]:
+        updates = read_run_updates(run, self.cursor)
+        for update in updates:
+            for event in update.get("events", []):
+                if event.get("event") == "finished" and isinstance(event.get("result"), dict):
+                    event["result"] = result_payload(run.session_id, event.get("cell_id"), event["result"])
+        return updates
+
+    def _finished_message(self, run: StreamingRun) -> dict:
+        message = {"type": "finished", "run_id": self.run_id, "status": run.status}
+        if run.status == "error":
+            message["detail"] = run.error or "Ошибка выполнения"
+        if run.result is not None and not run.cell_ids:
+            message["result"] = result_payload(run.session_id, run.cell_id, asdict(run.result))
+        return message
+
+    @staticmethod
+    def _parse_cursor(query_string: bytes) -> StreamCursor:
+        params = parse_qs(query_string.decode("latin-1"))
+
+        def value(name: str) -> int | None:
+            raw = (params.get(name) or [""])[0].strip()
+            return int(raw) if raw.isdigit() else None
+
+        return StreamCursor(
+            cell_id=value("cell_id"),
+            stdout_offset=value("stdout_offset") or 0,
+            stderr_offset=value("stderr_offset") or 0,
+            events_offset=value("events_offset") or 0,
+        )
+
+    _user_has_access_to_notebook = NotebookSessionConsumer._user_has_access_to_notebook
@@ -0,0 +1,249 @@
+"""Placement of problem datasets into session workspaces without copying them.
+
+Workspaces receive each source file by the cheapest method the filesystem and
+backend allow:
+
+* ``reflink`` - a copy-on-write clone (btrfs, XFS, ...): shares blocks until
+  the user modifies the file, then only the changed blocks are copied;
+* ``symlink`` - a link into the shared dataset cache (``RUNTIME_DATASET_CACHE_ROOT``),
+  which Docker VMs mount read-only at the same path. The user can read the data
+  and delete or replace the link, but cannot write into the shared file. Local
+  sessions run as the server user, who can write the cache, so they never get
+  symlinks;
+* ``copy`` - a plain copy, used when neither of the above is possible.
+
+A cache entry is keyed by the source's path, size and mtime, so a re-uploaded
+file gets a fresh entry, and it is a hardlink of the uploaded file where media
+and cache share a filesystem, so it takes no extra space. Each entry records
+the workspaces linked to it; ``prune_dataset_cache`` removes entries that no
+workspace links to any more.
+"""
+
+from __future__ import annotations
+
+import errno
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Tuple
+
+from django.conf import settings
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+METHOD_REFLINK = "reflink"
+METHOD_SYMLINK = "symlink"
+METHOD_COPY = "copy"
+PROVISIONING_MODES = ("auto", METHOD_REFLINK, METHOD_SYMLINK, METHOD_COPY)
+REFS_DIRNAME = "refs"
+LOCK_FILENAME = ".lock"
+# A workspace missing for less than this keeps its references (it may only be moving, e.g. on resume).
+REFERENCE_GRACE_SECONDS = 600
+# ioctl number of FICLONE on Linux (_IOW(0x94, 9, int)).
+FICLONE = 0x40049409
+_UNSUPPORTED_ERRNOS = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.EPERM, errno.ENOSYS}
+
+METRIC_NAMESPACE = getattr(settings, "PROMETHEUS_METRIC_NAMESPACE", "booml")
+
+DATASET_BYTES = Counter(
+    "session_dataset_bytes_total",
+    "Bytes of problem datasets placed into session workspaces, by placement method.",
+    labelnames=("method",),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+DATASET_BYTES_SAVED = Counter(
+    "session_dataset_bytes_saved_total",
+    "Bytes of problem datasets placed into workspaces without being copied.",
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+# (source device, target device) pairs on which reflinks failed; avoids retrying per file.
+_NO_REFLINK: set[Tuple[int, int]] = set()
+
+
+def get_dataset_cache_root() -> Path:
+    configured = getattr(settings, "RUNTIME_DATASET_CACHE_ROOT", "") or ""
+    if configured:
+        return Path(configured).absolute()
+    return Path(settings.BASE_DIR).absolute() / "media" / "dataset_cache"
+
+
+def get_provisioning_mode() -> str:
+    mode = str(getattr(settings, "RUNTIME_DATASET_PROVISIONING", "auto") or "auto").strip().lower()
+    return mode if mode in PROVISIONING_MODES else "auto"
+
+
+def cached_dataset(source: Path) -> Path:
+    """Path of ``source`` in the shared dataset cache, populating the entry on first use."""
+    stat = source.stat()
+    key = hashlib.sha256(f"{source.resolve()}:{stat.st_size}:{stat.st_mtime_ns}".encode()).hexdigest()[:32]
+    entry = get_dataset_cache_root() / key / source.name
+    if entry.exists():
+        return entry
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = entry.with_name(f".{entry.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        # Sessions only read entries through a read-only mount, so the uploaded file's inode can be shared.
+        if not _hardlink(source, tmp_path):
+            if not _reflink(source, tmp_path):
+                shutil.copyfile(source, tmp_path)
+            os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, entry)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return entry
+
+
+def _reflink(source: Path, target: Path) -> bool:
+    devices = (source.stat().st_dev, target.parent.stat().st_dev)
+    if devices in _NO_REFLINK:
+        return False
+    try:
+        with source.open("rb") as src, target.open("wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError as exc:
+        target.unlink(missing_ok=True)
+        if exc.errno in _UNSUPPORTED_ERRNOS:
+            _NO_REFLINK.add(devices)
+            return False
+        raise
+    return True
+
+
+@contextmanager
+def _cache_lock(*, exclusive: bool, blocking: bool = True) -> Iterator[bool]:
+    root = get_dataset_cache_root()
+    root.mkdir(parents=True, exist_ok=True)
+    with (root / LOCK_FILENAME).open("a") as lock_file:
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        try:
+            fcntl.flock(lock_file, flags if blocking else flags | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def provision_dataset_file(source: Path, target: Path, *, shared_cache: bool = False) -> str:
+    """
+    Place ``source`` at ``target`` (replacing it) and return the method used.
+
+    ``shared_cache`` tells that the session sees the dataset cache read-only at
+    its host path (Docker VMs); only such sessions get symlinks into it.
+    """
+    mode = get_provisioning_mode()
+    size = source.stat().st_size
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        if mode in ("auto", METHOD_REFLINK) and _reflink(source, tmp_path):
+            method = METHOD_REFLINK
+            # Clones inherit the mode of the uploaded file; the user owns them.
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+        elif mode in ("auto", METHOD_SYMLINK) and shared_cache:
+            method = METHOD_SYMLINK
+            # Pruning takes the lock exclusively, so it never sees the entry without this link.
+            with _cache_lock(exclusive=False):
+                entry = cached_dataset(source)
+                _add_reference(entry, target)
+                os.symlink(entry, tmp_path)
+                os.replace(tmp_path, target)
+        else:
+            method = METHOD_COPY
+            shutil.copyfile(source, tmp_path)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    DATASET_BYTES.labels(method=method).inc(size)
+    if method != METHOD_COPY:
+        DATASET_BYTES_SAVED.inc(size)
+    return method
+
+
+def prune_dataset_cache(*, now: float | None = None) -> int:
+    """
+    Remove cache entries that no workspace links to any more; returns how many were removed.
+
+    Skipped (returning 0) while a session is being provisioned.
+    """
+    root = get_dataset_cache_root()
+    if not root.is_dir():
+        return 0
+    cutoff = (now if now is not None else time.time()) - REFERENCE_GRACE_SECONDS
+    removed = 0
+    with _cache_lock(exclusive=True, blocking=False) as locked:
+        if not locked:
+            return 0
+        for entry_dir in root.iterdir():
+            if entry_dir.name.startswith(".") or not entry_dir.is_dir():
+                continue
+            if _count_references(entry_dir, cutoff=cutoff):
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def _add_reference(entry: Path, target: Path) -> None:
+    refs = entry.parent / REFS_DIRNAME
+    refs.mkdir(exist_ok=True)
+    link = str(target.absolute())
+    (refs / hashlib.sha256(link.encode()).hexdigest()[:32]).write_text(link)
+
+
+def _count_references(entry_dir: Path, *, cutoff: float) -> int:
+    refs = entry_dir / REFS_DIRNAME
+    if not refs.is_dir():
+        return 0
+    count = 0
+    for ref in refs.iterdir():
+        try:
+            linked = Path(os.readlink(ref.read_text())).parent == entry_dir
+        except OSError:
+            linked = False
+        if linked:
+            # Refresh so that a workspace moving later gets the full grace period.
+            os.utime(ref)
+            count += 1
+        elif ref.stat().st_mtime >= cutoff:
+            count += 1
+        else:
+            ref.unlink(missing_ok=True)
+    return count
+
+
+def _hardlink(source: Path, target: Path) -> bool:
+    try:
+        os.link(source, target)
+    except OSError as exc:
+        if exc.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+            return False
+        raise
+    return True
+
+
+__all__ = [
+    "METHOD_REFLINK",
+    "METHOD_SYMLINK",
+    "METHOD_COPY",
+    "cached_dataset",
+    "get_dataset_cache_root",
+    "get_provisioning_mode",
+    "provision_dataset_file",
+    "prune_dataset_cache",
+]
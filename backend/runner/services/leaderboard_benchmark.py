@@ -0,0 +1,322 @@
+"""Synthetic data and measurements for leaderboard benchmarks.
+
+Everything seeded here is named ``loadtest_<run_id>_*`` so that
+``cleanup_load_test_data --run-id <run_id> --yes`` removes it afterwards.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from ..models import (
+    Contest,
+    ContestProblem,
+    Course,
+    CourseParticipant,
+    Problem,
+    ProblemDescriptor,
+    Section,
+    Submission,
+)
+
+User = get_user_model()
+
+_BATCH_SIZE = 5000
+_METRICS = ("accuracy", "f1", "rmse")
+
+BUDGETS_PATH = Path(__file__).with_name("leaderboard_benchmark_budgets.json")
+
+
+@dataclass(frozen=True)
+class SyntheticLeaderboardSpec:
+    students: int
+    contests: int
+    problems_per_contest: int
+    submissions: int
+    valid_ratio: float = 0.85
+    seed: int = 0
+
+
+@dataclass(frozen=True)
+class SyntheticLeaderboardData:
+    prefix: str
+    course: Course
+    contests: List[Contest]
+    problem_ids: List[int]
+    student_ids: List[int]
+    submissions: int
+
+
+def _submission_metrics(rng: random.Random, metric_name: str) -> Dict[str, Any]:
+    raw = round(rng.random(), 6)
+    return {
+        metric_name: raw,
+        "raw_metric": raw,
+        "raw_metric_name": metric_name,
+        "score_100": round(raw * 100, 4),
+        "metric": round(raw * 100, 4),
+    }
+
+
+@transaction.atomic
+def seed_synthetic_course(run_id: str, spec: SyntheticLeaderboardSpec) -> SyntheticLeaderboardData:
+    """Bulk-insert a course with contests, problems, students and submissions."""
+    rng = random.Random(spec.seed)
+    prefix = f"loadtest_{run_id}"
+    unusable_password = make_password(None)
+
+    teacher = User.objects.create(
+        username=f"{prefix}_teacher",
+        email=f"{prefix}_teacher@example.test",
+        password=unusable_password,
+        is_staff=True,
+    )
+    students = User.objects.bulk_create(
+        [
+            User(
+                username=f"{prefix}_student_{idx}",
+                email=f"{prefix}_student_{idx}@example.test",
+                password=unusable_password,
+            )
+            for idx in range(spec.students)
+        ],
+        batch_size=_BATCH_SIZE,
+    )
+    student_ids = [student.id for student in students]
+
+    section = Section.objects.create(
+        title=f"{prefix}_section",
+        description="Leaderboard benchmark section.",
+        owner=teacher,
+    )
+    course = Course.objects.create(
+        title=f"{prefix}_course",
+        description="Leaderboard benchmark course.",
+        is_open=True,
+        section=section,
+        owner=teacher,
+    )
+    CourseParticipant.objects.bulk_create(
+        [
+            CourseParticipant(
+                course=course,
+                user=teacher,
+                role=CourseParticipant.Role.TEACHER,
+                is_owner=True,
+            )
+        ]
+        + [
+            CourseParticipant(course=course, user_id=student_id, role=CourseParticipant.Role.STUDENT)
+            for student_id in student_ids
+        ],
+        batch_size=_BATCH_SIZE,
+    )
+
+    problem_count = max(spec.contests * spec.problems_per_contest, 1)
+    problems = Problem.objects.bulk_create(
+        [
+            Problem(
+                title=f"{prefix}_problem_{idx}",
+                statement="Leaderboard benchmark problem.",
+                is_published=True,
+                author=teacher,
+            )
+            for idx in range(problem_count)
+        ]
+    )
+    problem_metrics = {problem.id: _METRICS[idx % len(_METRICS)] for idx, problem in enumerate(problems)}
+    ProblemDescriptor.objects.bulk_create(
+        [
+            ProblemDescriptor(problem=problem, metric=problem_metrics[problem.id], metric_name=problem_metrics[problem.id])
+            for problem in problems
+        ]
+    )
+
+    start_time = timezone.now() - timedelta(days=spec.contests + 1)
+    contests = Contest.objects.bulk_create(
+        [
+            Contest(
+                course=course,
+                position=idx,
+                title=f"{prefix}_contest_{idx}",
+                created_by=teacher,
+                is_published=True,
+                approval_status=Contest.ApprovalStatus.APPROVED,
+                start_time=start_time + timedelta(days=idx),
+                duration_minutes=24 * 60,
+                allow_upsolving=True,
+            )
+            for idx in range(spec.contests)
+        ]
+    )
+    ContestProblem.objects.bulk_create(
+        [
+            ContestProblem(
+                contest=contest,
+                problem=problems[contest_idx * spec.problems_per_contest + position],
+                position=position,
+            )
+            for contest_idx, contest in enumerate(contests)
+            for position in range(spec.problems_per_contest)
+        ]
+    )
+
+    problem_ids = [problem.id for problem in problems]
+    valid_statuses = (Submission.STATUS_ACCEPTED, Submission.STATUS_VALIDATED)
+    invalid_statuses = (Submission.STATUS_FAILED, Submission.STATUS_VALIDATION_ERROR)
+    created = 0
+    while created < spec.submissions and student_ids:
+        batch = []
+        for _ in range(min(_BATCH_SIZE, spec.submissions - created)):
+            problem_id = rng.choice(problem_ids)
+            is_valid = rng.random() < spec.valid_ratio
+            batch.append(
+                Submission(
+                    user_id=rng.choice(student_ids),
+                    problem_id=problem_id,
+                    source=Submission.SOURCE_TEXT,
+                    raw_text="id,prediction\n",
+                    code_size=14,
+                    status=rng.choice(valid_statuses) if is_valid else rng.choice(invalid_statuses),
+                    metrics=(
+                        _submission_metrics(rng, problem_metrics[problem_id])
+                        if is_valid
+                        else {"error": "synthetic failure"}
+                    ),
+                )
+            )
+        Submission.objects.bulk_create(batch, batch_size=_BATCH_SIZE)
+        created += len(batch)
+
+    return SyntheticLeaderboardData(
+        prefix=prefix,
+        course=course,
+        contests=list(contests),
+        problem_ids=problem_ids,
+        student_ids=student_ids,
+        submissions=created,
+    )
+
+
+def measure(func: Callable[[], Any], *, trace_memory: bool = False) -> Dict[str, Any]:
+    """
+    Run ``func`` once and report wall time and SQL query count.
+
+    With ``trace_memory`` the Python heap peak is recorded as well; tracing
+    slows allocation-heavy code down, so keep it out of timed runs.
+    """
+    started_tracing = False
+    if trace_memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        tracemalloc.reset_peak()
+        baseline_memory, _ = tracemalloc.get_traced_memory()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            started_at = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started_at
+        result = {
+            "wall_time_ms": round(elapsed * 1000, 2),
+            "queries": len(queries.captured_queries),
+        }
+        if trace_memory:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            result["peak_memory_mb"] = round(max(peak_memory - baseline_memory, 0) / (1024 * 1024), 2)
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    return result
+
+
+def run_benchmark(func: Callable[[], Any], *, repeat: int) -> Dict[str, Any]:
+    """One warm-up run, ``repeat`` timed runs and one memory-traced run."""
+    func()
+    runs = [measure(func) for _ in range(max(int(repeat), 1))]
+    traced = measure(func, trace_memory=True)
+    return {
+        "runs": runs,
+        "queries": max(run["queries"] for run in runs),
+        "wall_time_ms_min": min(run["wall_time_ms"] for run in runs),
+        "wall_time_ms_max": max(run["wall_time_ms"] for run in runs),
+        "peak_memory_mb": traced["peak_memory_mb"],
+    }
+
+
+def load_benchmark_budgets(path: Optional[Path] = None) -> Dict[str, Any]:
+    with open(path or BUDGETS_PATH, encoding="utf-8") as budgets_file:
+        return json.load(budgets_file)
+
+
+def profile_spec(profile: Mapping[str, Any], *, seed: int = 0) -> SyntheticLeaderboardSpec:
+    return SyntheticLeaderboardSpec(seed=seed, **profile["spec"])
+
+
+def check_budgets(
+    results: Mapping[str, Mapping[str, Any]],
+    budgets: Mapping[str, Mapping[str, Any]],
+    *,
+    baseline: Optional[Mapping[str, Mapping[str, Any]]] = None,
+    tolerance: float = 1.25,
+) -> List[str]:
+    """
+    Compare benchmark results with committed budgets and an optional baseline.
+
+    Budgets are hard ceilings (``queries``, ``wall_time_ms``, ``peak_memory_mb``);
+    against a baseline from an earlier run the fastest wall time and the memory
+    peak may grow by at most ``tolerance`` and the query count may not grow.
+    Returns human-readable violations, empty when everything fits.
+    """
+    violations: List[str] = []
+    for target, result in results.items():
+        budget = budgets.get(target, {})
+        observed = {
+            "queries": result["queries"],
+            "wall_time_ms": result["wall_time_ms_min"],
+            "peak_memory_mb": result["peak_memory_mb"],
+        }
+        for name, value in observed.items():
+            limit = budget.get(name)
+            if limit is not None and value > limit:
+                violations.append(f"{target}: {name}={value} exceeds budget {limit}")
+
+        previous = (baseline or {}).get(target)
+        if not previous:
+            continue
+        if result["queries"] > previous["queries"]:
+            violations.append(
+                f"{target}: queries={result['queries']} grew from baseline {previous['queries']}"
+            )
+        for name, key in (("wall_time_ms", "wall_time_ms_min"), ("peak_memory_mb", "peak_memory_mb")):
+            if previous.get(key) is None:
+                continue
+            limit = round(previous[key] * tolerance, 2)
+            if result[key] > limit:
+                violations.append(f"{target}: {name}={result[key]} exceeds baseline {previous[key]} x {tolerance}")
+    return violations
+
+
+__all__ = [
+    "SyntheticLeaderboardSpec",
+    "SyntheticLeaderboardData",
+    "seed_synthetic_course",
+    "measure",
+    "run_benchmark",
+    "load_benchmark_budgets",
+    "profile_spec",
+    "check_budgets",
+]
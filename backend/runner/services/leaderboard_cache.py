@@ -0,0 +1,364 @@
+"""Versioned cache for contest and course leaderboard payloads.
+
+Every leaderboard scope (a contest or a course) owns a version counter stored in
+the Django cache. Anything that can change a leaderboard (a submission being
+created or graded, participants or problems changing, contest settings being
+edited) bumps the counter, which implicitly invalidates every cached payload and
+every ETag handed out for the previous version. Polls that send a matching
+``If-None-Match`` header get ``304 Not Modified`` without touching the
+submissions table.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+import weakref
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse, HttpResponseNotModified
+
+from ..models import Contest, ContestProblem, CourseParticipant, Problem, ProblemDescriptor, Submission
+from .standings_snapshots import discard_standings_snapshots
+
+logger = logging.getLogger(__name__)
+
+CONTEST_SCOPE = "contest"
+COURSE_SCOPE = "course"
+
+ROLE_MANAGER = "manager"
+ROLE_PARTICIPANT = "participant"
+
+LEADERBOARD_CACHE_TTL_SECONDS = max(
+    1,
+    int(getattr(settings, "LEADERBOARD_CACHE_TTL_SECONDS", 300)),
+)
+# Version keys outlive payloads so that an idle contest does not restart
+# numbering and accidentally re-validate a stale ETag.
+_VERSION_TTL_SECONDS = max(LEADERBOARD_CACHE_TTL_SECONDS * 12, 3600)
+
+_VERSION_KEY_PATTERN = "leaderboard:{scope}:{object_id}:version"
+_PAYLOAD_KEY_PATTERN = "leaderboard:{scope}:{object_id}:{view}:{role}:v{version}"
+
+_GRADED_STATUSES = frozenset(
+    {
+        Submission.STATUS_ACCEPTED,
+        Submission.STATUS_VALIDATED,
+        Submission.STATUS_FAILED,
+        Submission.STATUS_VALIDATION_ERROR,
+    }
+)
+
+_hooks_registered = False
+# Bulk/cascade deletes send one post_delete per row; remember which problems a
+# given delete origin has already invalidated so that deleting 100k submissions
+# costs one lookup per problem instead of one per row.
+_invalidated_by_delete_origin: "weakref.WeakKeyDictionary[Any, set]" = weakref.WeakKeyDictionary()
+
+
+def _version_key(scope: str, object_id: int) -> str:
+    return _VERSION_KEY_PATTERN.format(scope=scope, object_id=object_id)
+
+
+def _payload_key(scope: str, object_id: int, view: str, role: str, version: int) -> str:
+    return _PAYLOAD_KEY_PATTERN.format(
+        scope=scope,
+        object_id=object_id,
+        view=view,
+        role=role,
+        version=version,
+    )
+
+
+def _initial_version() -> int:
+    # Seed from the clock so a counter lost on eviction never reuses old values.
+    return time.time_ns() // 1000
+
+
+def get_leaderboard_version(scope: str, object_id: int) -> int:
+    key = _version_key(scope, object_id)
+    version = cache.get(key)
+    if isinstance(version, int):
+        return version
+    cache.add(key, _initial_version(), _VERSION_TTL_SECONDS)
+    version = cache.get(key)
+    return version if isinstance(version, int) else _initial_version()
+
+
+def bump_leaderboard_version(scope: str, object_id: int) -> None:
+    key = _version_key(scope, object_id)
+    try:
+        cache.incr(key)
+        cache.touch(key, _VERSION_TTL_SECONDS)
+    except ValueError:
+        cache.set(key, _initial_version(), _VERSION_TTL_SECONDS)
+
+
+def _bump_all(contest_ids: Iterable[int], course_ids: Iterable[int]) -> None:
+    for contest_id in contest_ids:
+        bump_leaderboard_version(CONTEST_SCOPE, contest_id)
+    for course_id in course_ids:
+        bump_leaderboard_version(COURSE_SCOPE, course_id)
+
+
+def invalidate_leaderboards(
+    *,
+    contest_ids: Iterable[int] = (),
+    course_ids: Iterable[int] = (),
+) -> None:
+    """Bump versions now and, inside a transaction, once more after commit.
+
+    The immediate bump stops serving payloads that are already stale; the
+    post-commit bump discards anything rebuilt from pre-commit data by a
+    concurrent reader in between.
+    """
+    contest_ids = sorted({int(cid) for cid in contest_ids if cid})
+    course_ids = sorted({int(cid) for cid in course_ids if cid})
+    if not contest_ids and not course_ids:
+        return
+
+    _bump_all(contest_ids, course_ids)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _bump_all(contest_ids, course_ids))
+
+
+def invalidate_problem_leaderboards(problem_ids: Iterable[int]) -> List[int]:
+    """Invalidate every contest and course that uses the problems; return the contest ids."""
+    problem_ids = [pid for pid in set(problem_ids) if pid]
+    if not problem_ids:
+        return []
+    rows = ContestProblem.objects.filter(problem_id__in=problem_ids).values_list(
+        "contest_id",
+        "contest__course_id",
+    )
+    contest_ids = set()
+    course_ids = set()
+    for contest_id, course_id in rows:
+        contest_ids.add(contest_id)
+        course_ids.add(course_id)
+    invalidate_leaderboards(contest_ids=contest_ids, course_ids=course_ids)
+    return sorted(contest_ids)
+
+
+def invalidate_course_leaderboards(course_id: int) -> None:
+    contest_ids = Contest.objects.filter(course_id=course_id).values_list("id", flat=True)
+    invalidate_leaderboards(contest_ids=contest_ids, course_ids=[course_id])
+
+
+def build_leaderboard_etag(scope: str, object_id: int, view: str, role: str, version: int) -> str:
+    return f'W/"lb-{scope}-{object_id}-{view}-{role}-{version}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an ``If-None-Match`` header matches ``etag`` (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = {item.strip() for item in if_none_match.split(",")}
+    if "*" in candidates:
+        return True
+    normalized = etag[2:] if etag.startswith("W/") else etag
+    for candidate in candidates:
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == normalized:
+            return True
+    return False
+
+
+def apply_leaderboard_cache_headers(response: HttpResponse, etag: str) -> HttpResponse:
+    """Set the ETag and revalidation headers every leaderboard response carries."""
+    response["ETag"] = etag
+    # Clients must revalidate every poll; the ETag makes that cheap.
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def get_cached_leaderboard_body(
+    *,
+    scope: str,
+    object_id: int,
+    view: str,
+    role: str,
+    build_payload: Callable[[], Dict[str, Any]],
+) -> Tuple[int, str]:
+    """Return ``(version, json_body)``, building the payload only on a cache miss."""
+    version = get_leaderboard_version(scope, object_id)
+    payload_key = _payload_key(scope, object_id, view, role, version)
+    body = cache.get(payload_key)
+    if body is None:
+        body = json.dumps(build_payload(), cls=DjangoJSONEncoder)
+        cache.set(payload_key, body, LEADERBOARD_CACHE_TTL_SECONDS)
+    return version, body
+
+
+def cached_leaderboard_response(
+    request,
+    *,
+    scope: str,
+    object_id: int,
+    view: str,
+    role: str,
+    build_payload: Callable[[], Dict[str, Any]],
+) -> HttpResponse:
+    """Serve a leaderboard payload through the versioned cache."""
+    version = get_leaderboard_version(scope, object_id)
+    etag = build_leaderboard_etag(scope, object_id, view, role, version)
+
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return apply_leaderboard_cache_headers(HttpResponseNotModified(), etag)
+
+    version, body = get_cached_leaderboard_body(
+        scope=scope,
+        object_id=object_id,
+        view=view,
+        role=role,
+        build_payload=build_payload,
+    )
+    etag = build_leaderboard_etag(scope, object_id, view, role, version)
+    response = HttpResponse(body, content_type="application/json", status=200)
+    return apply_leaderboard_cache_headers(response, etag)
+
+
+def _publish_standings_changed(contest_ids: List[int]) -> None:
+    from .websocket_notifications import broadcast_leaderboard_changed
+
+    try:
+        broadcast_leaderboard_changed(contest_ids)
+    except Exception:  # pragma: no cover - channel layer outages must not fail grading
+        logger.warning("Failed to publish leaderboard change for contests %s", contest_ids, exc_info=True)
+
+
+def _discard_snapshots(contest_ids: List[int], submitted_at) -> None:
+    if not contest_ids:
+        return
+    discard_standings_snapshots(contest_ids, submitted_at=submitted_at)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: discard_standings_snapshots(contest_ids, submitted_at=submitted_at))
+
+
+def _on_submission_changed(sender, instance, **kwargs):
+    if not instance.problem_id:
+        return
+    contest_ids = invalidate_problem_leaderboards([instance.problem_id])
+    _discard_snapshots(contest_ids, instance.submitted_at)
+    if contest_ids and instance.status in _GRADED_STATUSES:
+        transaction.on_commit(lambda: _publish_standings_changed(contest_ids))
+
+
+def _on_submission_deleted(sender, instance, origin=None, **kwargs):
+    if not instance.problem_id:
+        return
+    if origin is not None:
+        try:
+            seen = _invalidated_by_delete_origin.setdefault(origin, set())
+        except TypeError:
+            seen = set()
+        if instance.problem_id in seen:
+            return
+        seen.add(instance.problem_id)
+    contest_ids = invalidate_problem_leaderboards([instance.problem_id])
+    # With origin dedup only the first row per problem gets here, so drop the
+    # snapshots regardless of when that particular row was submitted.
+    _discard_snapshots(contest_ids, instance.submitted_at if origin is None else None)
+
+
+def _on_problem_changed(sender, instance, **kwargs):
+    invalidate_problem_leaderboards([instance.pk])
+
+
+def _on_descriptor_changed(sender, instance, **kwargs):
+    # Scoring settings live on the descriptor, so frozen standings are stale too.
+    _discard_snapshots(invalidate_problem_leaderboards([instance.problem_id]), None)
+
+
+def _on_contest_changed(sender, instance, **kwargs):
+    invalidate_leaderboards(contest_ids=[instance.pk], course_ids=[instance.course_id])
+
+
+def _on_contest_problem_changed(sender, instance, **kwargs):
+    course_id = Contest.objects.filter(pk=instance.contest_id).values_list("course_id", flat=True).first()
+    invalidate_leaderboards(contest_ids=[instance.contest_id], course_ids=[course_id])
+
+
+def _on_contest_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate_leaderboards(contest_ids=[instance.pk], course_ids=[instance.course_id])
+        return
+    # Reverse side (user.allowed_contests / problem.contests): pk_set holds contest ids.
+    if action == "post_clear" or not pk_set:
+        return
+    rows = Contest.objects.filter(pk__in=pk_set).values_list("id", "course_id")
+    invalidate_leaderboards(
+        contest_ids=[row[0] for row in rows],
+        course_ids=[row[1] for row in rows],
+    )
+
+
+def _on_course_participant_changed(sender, instance, **kwargs):
+    invalidate_course_leaderboards(instance.course_id)
+
+
+def register_leaderboard_cache_hooks() -> None:
+    global _hooks_registered
+    if _hooks_registered:
+        return
+
+    post_save.connect(_on_submission_changed, sender=Submission, dispatch_uid="leaderboard_cache_submission")
+    post_delete.connect(_on_submission_deleted, sender=Submission, dispatch_uid="leaderboard_cache_submission")
+    for signal in (post_save, post_delete):
+        signal.connect(_on_problem_changed, sender=Problem, dispatch_uid="leaderboard_cache_problem")
+        signal.connect(
+            _on_descriptor_changed,
+            sender=ProblemDescriptor,
+            dispatch_uid="leaderboard_cache_descriptor",
+        )
+        signal.connect(_on_contest_changed, sender=Contest, dispatch_uid="leaderboard_cache_contest")
+        signal.connect(
+            _on_contest_problem_changed,
+            sender=ContestProblem,
+            dispatch_uid="leaderboard_cache_contest_problem",
+        )
+        signal.connect(
+            _on_course_participant_changed,
+            sender=CourseParticipant,
+            dispatch_uid="leaderboard_cache_course_participant",
+        )
+    m2m_changed.connect(
+        _on_contest_m2m_changed,
+        sender=Contest.allowed_participants.through,
+        dispatch_uid="leaderboard_cache_allowed_participants",
+    )
+    m2m_changed.connect(
+        _on_contest_m2m_changed,
+        sender=Contest.problems.through,
+        dispatch_uid="leaderboard_cache_contest_problems",
+    )
+    _hooks_registered = True
+
+
+__all__ = [
+    "CONTEST_SCOPE",
+    "COURSE_SCOPE",
+    "ROLE_MANAGER",
+    "ROLE_PARTICIPANT",
+    "LEADERBOARD_CACHE_TTL_SECONDS",
+    "get_leaderboard_version",
+    "bump_leaderboard_version",
+    "invalidate_leaderboards",
+    "invalidate_problem_leaderboards",
+    "invalidate_course_leaderboards",
+    "build_leaderboard_etag",
+    "etag_matches",
+    "apply_leaderboard_cache_headers",
+    "get_cached_leaderboard_body",
+    "cached_leaderboard_response",
+    "register_leaderboard_cache_hooks",
+]
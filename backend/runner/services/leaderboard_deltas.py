@@ -0,0 +1,39 @@
+"""Row-level differences between two leaderboard snapshots."""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Mapping
+
+Row = Dict[str, Any]
+
+
+def index_rows(entries: Iterable[Mapping[str, Any]]) -> Dict[int, Row]:
+    return {int(entry["user_id"]): dict(entry) for entry in entries if entry.get("user_id") is not None}
+
+
+def diff_leaderboard_rows(
+    previous: Mapping[int, Mapping[str, Any]],
+    current: Mapping[int, Mapping[str, Any]],
+) -> Dict[str, List[Any]]:
+    """
+    Compare two ``{user_id: row}`` snapshots.
+
+    ``changed`` holds full current rows for users whose row differs (new users
+    included), each with ``previous_rank`` so clients can animate rank
+    movements; ``removed`` lists user ids that are no longer on the board.
+    """
+    changed: List[Row] = []
+    for user_id, row in current.items():
+        before = previous.get(user_id)
+        if before is not None and dict(before) == dict(row):
+            continue
+        delta_row = dict(row)
+        delta_row["previous_rank"] = before.get("rank") if before is not None else None
+        changed.append(delta_row)
+
+    changed.sort(key=lambda row: (row.get("rank") is None, row.get("rank") or 0, row["user_id"]))
+    removed = sorted(user_id for user_id in previous if user_id not in current)
+    return {"changed": changed, "removed": removed}
+
+
+__all__ = ["index_rows", "diff_leaderboard_rows"]
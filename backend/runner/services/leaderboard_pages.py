@@ -0,0 +1,261 @@
+"""Paginated standings and "my position" lookups on top of the leaderboard cache.
+
+For every leaderboard version the ranked rows are written once into the cache as
+fixed-size chunks, together with bucketed ``user_id -> position`` maps. A page
+request then reads one or two chunks and a position lookup reads one bucket and
+the chunks around that position, instead of loading and sorting the whole table
+on every poll.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+
+from .leaderboard_cache import (
+    LEADERBOARD_CACHE_TTL_SECONDS,
+    apply_leaderboard_cache_headers,
+    build_leaderboard_etag,
+    etag_matches,
+    get_leaderboard_version,
+)
+
+STANDINGS_CHUNK_SIZE = 100
+STANDINGS_POSITION_BUCKETS = 64
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DEFAULT_NEIGHBOURS = 5
+MAX_NEIGHBOURS = 25
+
+_INDEX_KEY_PATTERN = "leaderboard:{scope}:{object_id}:{view}:{role}:v{version}:standings"
+
+Row = Dict[str, Any]
+LoadStandings = Callable[[], Tuple[int, Sequence[Row]]]
+
+
+def _index_prefix(scope: str, object_id: int, view: str, role: str, version: int) -> str:
+    return _INDEX_KEY_PATTERN.format(
+        scope=scope,
+        object_id=object_id,
+        view=view,
+        role=role,
+        version=version,
+    )
+
+
+def _chunk_key(prefix: str, chunk: int) -> str:
+    return f"{prefix}:chunk:{chunk}"
+
+
+def _bucket_key(prefix: str, bucket: int) -> str:
+    return f"{prefix}:positions:{bucket}"
+
+
+def _write_standings_index(prefix: str, rows: Sequence[Row]) -> Dict[str, Any]:
+    rows = list(rows)
+    values: Dict[str, Any] = {}
+    for chunk, start in enumerate(range(0, len(rows), STANDINGS_CHUNK_SIZE)):
+        values[_chunk_key(prefix, chunk)] = rows[start:start + STANDINGS_CHUNK_SIZE]
+
+    buckets: Dict[int, Dict[int, int]] = {bucket: {} for bucket in range(STANDINGS_POSITION_BUCKETS)}
+    for position, row in enumerate(rows):
+        user_id = row.get("user_id")
+        if user_id is not None:
+            buckets[int(user_id) % STANDINGS_POSITION_BUCKETS][int(user_id)] = position
+    for bucket, positions in buckets.items():
+        values[_bucket_key(prefix, bucket)] = positions
+
+    meta = {"total": len(rows)}
+    cache.set_many(values, LEADERBOARD_CACHE_TTL_SECONDS)
+    # Meta goes last: its presence means the chunks and buckets are in place.
+    cache.set(prefix, meta, LEADERBOARD_CACHE_TTL_SECONDS)
+    return meta
+
+
+class _StandingsIndex:
+    """Cached chunks of one leaderboard, rebuilt at most once per request."""
+
+    def __init__(self, *, scope: str, object_id: int, view: str, role: str, load_standings: LoadStandings):
+        self._scope = scope
+        self._object_id = object_id
+        self._view = view
+        self._role = role
+        self._load_standings = load_standings
+        self._rows: Optional[List[Row]] = None
+        self.version = get_leaderboard_version(scope, object_id)
+        self.prefix = self._prefix(self.version)
+        self.meta = cache.get(self.prefix)
+        if self.meta is None:
+            self._rebuild()
+
+    def _prefix(self, version: int) -> str:
+        return _index_prefix(self._scope, self._object_id, self._view, self._role, version)
+
+    def _rebuild(self) -> None:
+        version, rows = self._load_standings()
+        self._rows = list(rows)
+        self.version = version
+        self.prefix = self._prefix(version)
+        self.meta = _write_standings_index(self.prefix, self._rows)
+
+    @property
+    def total(self) -> int:
+        return int(self.meta["total"])
+
+    def rows(self, start: int, stop: int) -> List[Row]:
+        start = max(start, 0)
+        stop = min(stop, self.total)
+        if start >= stop:
+            return []
+        if self._rows is not None:
+            return self._rows[start:stop]
+
+        first_chunk = start // STANDINGS_CHUNK_SIZE
+        last_chunk = (stop - 1) // STANDINGS_CHUNK_SIZE
+        keys = [_chunk_key(self.prefix, chunk) for chunk in range(first_chunk, last_chunk + 1)]
+        found = cache.get_many(keys)
+        if len(found) != len(keys):
+            # A chunk was evicted before its meta key; rebuild this version.
+            self._rebuild()
+            return self.rows(start, stop)
+        rows: List[Row] = []
+        for key in keys:
+            rows.extend(found[key])
+        offset = first_chunk * STANDINGS_CHUNK_SIZE
+        return rows[start - offset:stop - offset]
+
+    def position_of(self, user_id: int) -> Optional[int]:
+        if self._rows is None:
+            positions = cache.get(_bucket_key(self.prefix, int(user_id) % STANDINGS_POSITION_BUCKETS))
+            if positions is None:
+                self._rebuild()
+            else:
+                return positions.get(int(user_id))
+        for position, row in enumerate(self._rows or ()):
+            if row.get("user_id") == user_id:
+                return position
+        return None
+
+
+def _clamp(value: Any, *, default: int, minimum: int, maximum: int) -> int:
+    try:
+        parsed = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(minimum, min(parsed, maximum))
+
+
+def _json_response(payload: Dict[str, Any], etag: str) -> HttpResponse:
+    response = HttpResponse(json.dumps(payload), content_type="application/json", status=200)
+    return apply_leaderboard_cache_headers(response, etag)
+
+
+def standings_page_response(
+    request,
+    *,
+    scope: str,
+    object_id: int,
+    view: str,
+    role: str,
+    load_standings: LoadStandings,
+) -> HttpResponse:
+    """``?page=N&page_size=M`` slice of the ranked rows (pages start at 1)."""
+    page_size = _clamp(
+        request.GET.get("page_size"),
+        default=DEFAULT_PAGE_SIZE,
+        minimum=1,
+        maximum=MAX_PAGE_SIZE,
+    )
+    page = _clamp(request.GET.get("page"), default=1, minimum=1, maximum=10**6)
+    etag_view = f"{view}-page-{page}-{page_size}"
+
+    version = get_leaderboard_version(scope, object_id)
+    etag = build_leaderboard_etag(scope, object_id, etag_view, role, version)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return apply_leaderboard_cache_headers(HttpResponseNotModified(), etag)
+
+    index = _StandingsIndex(
+        scope=scope,
+        object_id=object_id,
+        view=view,
+        role=role,
+        load_standings=load_standings,
+    )
+    start = (page - 1) * page_size
+    entries = index.rows(start, start + page_size)
+    total = index.total
+    payload = {
+        "version": index.version,
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "pages": (total + page_size - 1) // page_size,
+        "entries": entries,
+    }
+    return _json_response(
+        payload,
+        build_leaderboard_etag(scope, object_id, etag_view, role, index.version),
+    )
+
+
+def standings_position_response(
+    request,
+    *,
+    scope: str,
+    object_id: int,
+    view: str,
+    role: str,
+    load_standings: LoadStandings,
+) -> HttpResponse:
+    """Current user's row with ``?neighbours=N`` rows above and below it."""
+    neighbours = _clamp(
+        request.GET.get("neighbours"),
+        default=DEFAULT_NEIGHBOURS,
+        minimum=0,
+        maximum=MAX_NEIGHBOURS,
+    )
+    user_id = request.user.id
+    # The response is per user, so the user id is part of the validator.
+    etag_view = f"{view}-position-{user_id}-{neighbours}"
+
+    version = get_leaderboard_version(scope, object_id)
+    etag = build_leaderboard_etag(scope, object_id, etag_view, role, version)
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        return apply_leaderboard_cache_headers(HttpResponseNotModified(), etag)
+
+    index = _StandingsIndex(
+        scope=scope,
+        object_id=object_id,
+        view=view,
+        role=role,
+        load_standings=load_standings,
+    )
+    position = index.position_of(user_id)
+    entries: List[Row] = []
+    if position is not None:
+        entries = index.rows(position - neighbours, position + neighbours + 1)
+    payload = {
+        "version": index.version,
+        "total": index.total,
+        "user_id": user_id,
+        "position": position + 1 if position is not None else None,
+        "entries": entries,
+    }
+    return _json_response(
+        payload,
+        build_leaderboard_etag(scope, object_id, etag_view, role, index.version),
+    )
+
+
+__all__ = [
+    "STANDINGS_CHUNK_SIZE",
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "DEFAULT_NEIGHBOURS",
+    "MAX_NEIGHBOURS",
+    "standings_page_response",
+    "standings_position_response",
+]
@@ -0,0 +1,198 @@
+"""Python environments of local (in-process) runtime sessions.
+
+All local sessions share one base virtualenv, built once per host with access
+to the server's site-packages (so the preinstalled ML stack is available) and
+optionally extended from ``RUNTIME_LOCAL_BASE_REQUIREMENTS``. The base is never
+written to after it is built: each session gets an overlay directory in its
+workspace (``.venv``) used as ``PYTHONUSERBASE``, and shell commands run with
+``PIP_USER=1`` so ``!pip install`` lands in the overlay only.
+
+In-process code of a session imports from its overlay through a meta path
+finder that is only active while that session's code runs (``overlay_imports``);
+the process-wide ``sys.path`` is never changed. Modules loaded from an overlay
+are taken out of ``sys.modules`` afterwards and put back for the next run of
+the same session, so other sessions and the server cannot import them.
+
+Creating a session therefore costs a directory, not a virtualenv, and disk use
+grows only with what users install themselves.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import fcntl
+import importlib.abc
+import importlib.machinery
+import logging
+import os
+import shutil
+import site
+import subprocess
+import sys
+import sysconfig
+import venv
+from contextlib import contextmanager
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, Iterator
+
+from django.conf import settings
+
+from .package_cache import pip_cache_env
+
+logger = logging.getLogger(__name__)
+
+OVERLAY_DIRNAME = ".venv"
+READY_MARKER = ".booml-ready"
+
+# Overlay site-packages of the session whose code runs in the current thread.
+_ACTIVE_OVERLAY: contextvars.ContextVar[str | None] = contextvars.ContextVar("booml_active_overlay", default=None)
+# Modules loaded from each overlay, kept out of ``sys.modules`` between runs.
+_OVERLAY_MODULES: Dict[str, Dict[str, ModuleType]] = {}
+
+
+def get_base_env_path() -> Path:
+    configured = getattr(settings, "RUNTIME_LOCAL_BASE_VENV", "") or ""
+    if configured:
+        return Path(configured)
+    return Path(settings.BASE_DIR) / "media" / "runtime_base_venv"
+
+
+def _base_python(base: Path) -> Path:
+    if os.name == "nt":
+        return base / "Scripts" / "python.exe"
+    return base / "bin" / "python"
+
+
+def ensure_base_env() -> Path | None:
+    """Return the interpreter of the shared base env, building it on first use."""
+    base = get_base_env_path()
+    python = _base_python(base)
+    if (base / READY_MARKER).exists() and python.exists():
+        return python
+    try:
+        base.parent.mkdir(parents=True, exist_ok=True)
+        with (base.parent / f".{base.name}.lock").open("w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if not (base / READY_MARKER).exists():
+                _build_base_env(base)
+    except Exception:
+        logger.exception("Failed to build the shared local runtime env at %s", base)
+        return None
+    return python if python.exists() else None
+
+
+def _build_base_env(base: Path) -> None:
+    # Scripts in a virtualenv embed its absolute path, so it is built in place
+    # under the lock and only marked ready once complete.
+    shutil.rmtree(base, ignore_errors=True)
+    builder = venv.EnvBuilder(with_pip=True, system_site_packages=True, symlinks=os.name != "nt")
+    builder.create(base)
+    if sys.prefix != sys.base_prefix:
+        # The server itself runs in a virtualenv, which system_site_packages
+        # does not reach; expose its packages through a .pth file instead.
+        purelib = Path(sysconfig.get_path("purelib", vars={"base": str(base), "platbase": str(base)}))
+        (purelib / "booml-server.pth").write_text("\n".join(site.getsitepackages()) + "\n")
+    python = _base_python(base)
+    subprocess.run(
+        [str(python), "-m", "pip", "install", "--upgrade", "pip"],
+        check=False,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    requirements = getattr(settings, "RUNTIME_LOCAL_BASE_REQUIREMENTS", "") or ""
+    if requirements:
+        subprocess.run(
+            [str(python), "-m", "pip", "install", "-r", str(requirements)],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+    (base / READY_MARKER).write_text("1")
+    logger.info("Built shared local runtime env at %s", base)
+
+
+def overlay_path(workdir: Path) -> Path:
+    return workdir / OVERLAY_DIRNAME
+
+
+def overlay_site_packages(workdir: Path) -> Path:
+    scheme = "nt_user" if os.name == "nt" else "posix_user"
+    return Path(sysconfig.get_path("purelib", scheme, vars={"userbase": str(overlay_path(workdir))}))
+
+
+def prepare_session_env(workdir: Path) -> Path | None:
+    """Create the session overlay and return the interpreter shell commands should use."""
+    python = ensure_base_env()
+    if python is None:
+        return None
+    overlay_path(workdir).mkdir(parents=True, exist_ok=True)
+    return python
+
+
+def session_shell_env(workdir: Path, python_exec: Path | None) -> Dict[str, str]:
+    """Environment for ``!`` commands of a session: base interpreter first, installs into the overlay."""
+    env = {**os.environ, "PIP_ROOT_USER_ACTION": "ignore", **pip_cache_env()}
+    if python_exec is None:
+        return env
+    env.pop("PYTHONHOME", None)
+    env["VIRTUAL_ENV"] = str(python_exec.parent.parent)
+    env["PATH"] = os.pathsep.join([str(python_exec.parent), env.get("PATH", "")])
+    env["PYTHONUSERBASE"] = str(overlay_path(workdir))
+    env["PIP_USER"] = "1"
+    return env
+
+
+class _OverlayFinder(importlib.abc.MetaPathFinder):
+    """Finds top-level modules missing from the server env in the active session overlay."""
+
+    def find_spec(self, fullname, path=None, target=None):
+        site_dir = _ACTIVE_OVERLAY.get()
+        # Submodules are found through their package's ``__path__``.
+        if site_dir is None or path is not None or not os.path.isdir(site_dir):
+            return None
+        return importlib.machinery.PathFinder.find_spec(fullname, [site_dir])
+
+
+_FINDER = _OverlayFinder()
+
+
+@contextmanager
+def overlay_imports(workdir: Path) -> Iterator[None]:
+    """Make packages of the session overlay importable by in-process code run inside the block."""
+    site_dir = str(overlay_site_packages(workdir))
+    if _FINDER not in sys.meta_path:
+        sys.meta_path.append(_FINDER)
+    for stale in [key for key in _OVERLAY_MODULES if not os.path.isdir(key)]:
+        del _OVERLAY_MODULES[stale]
+    sys.modules.update(_OVERLAY_MODULES.pop(site_dir, {}))
+    token = _ACTIVE_OVERLAY.set(site_dir)
+    try:
+        yield
+    finally:
+        _ACTIVE_OVERLAY.reset(token)
+        private = {name: module for name, module in list(sys.modules.items()) if _loaded_from(module, site_dir)}
+        for name in private:
+            sys.modules.pop(name, None)
+        if private:
+            _OVERLAY_MODULES[site_dir] = private
+
+
+def _loaded_from(module: ModuleType, site_dir: str) -> bool:
+    spec = getattr(module, "__spec__", None)
+    if spec is None:
+        return False
+    prefix = site_dir + os.sep
+    locations = [spec.origin or "", *(spec.submodule_search_locations or [])]
+    return any(str(location).startswith(prefix) for location in locations)
+
+
+__all__ = [
+    "ensure_base_env",
+    "get_base_env_path",
+    "overlay_path",
+    "overlay_site_packages",
+    "prepare_session_env",
+    "session_shell_env",
+    "overlay_imports",
+]
@@ -0,0 +1,143 @@
+"""Host-level pip cache shared by notebook sessions.
+
+``!pip install`` in a fresh session would otherwise download (and, for
+sdists, build) the same distributions again. Sessions instead point pip at
+one host directory, ``RUNTIME_PIP_CACHE_ROOT``:
+
+* ``wheelhouse/`` - pre-seeded wheels (``manage.py seed_pip_cache``) passed to
+  pip as ``PIP_FIND_LINKS``, so common packages resolve to a local file. Only
+  that command writes it; VMs mount it read-only at ``/pip-cache/wheelhouse``;
+* pip's own cache (``PIP_CACHE_DIR``: ``http-v2/``, ``wheels/``) - downloaded
+  files and wheels built from sdists. pip trusts its cache: a cached wheel is
+  installed as is and a cached response stands in for the index, so whoever
+  can write it decides what other sessions install. Only local sessions share
+  it; they run as the server user, which can write the whole cache root (and
+  every other workspace) anyway. Docker VMs get a private cache in their own
+  VM directory (``/vm/pip-cache``) that is removed with the VM.
+
+With ``RUNTIME_PIP_OFFLINE`` (and in VMs without outbound network) pip gets
+``PIP_NO_INDEX`` and the wheelhouse acts as the whole package index; tests use
+it as a local stand-in for PyPI.
+"""
+
+from __future__ import annotations
+
+import logging
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+WHEELHOUSE_DIRNAME = "wheelhouse"
+VM_CACHE_MOUNT = "/pip-cache"
+# pip's writable cache inside a VM, under its private ``/vm`` mount.
+VM_PRIVATE_CACHE_DIR = "/vm/pip-cache"
+
+
+def get_pip_cache_root() -> Path | None:
+    """Host directory of the shared cache, or ``None`` when sharing is disabled."""
+    configured = getattr(settings, "RUNTIME_PIP_CACHE_ROOT", None)
+    if configured is None:
+        return Path(settings.BASE_DIR) / "media" / "pip_cache"
+    return Path(configured) if str(configured).strip() else None
+
+
+def get_wheelhouse(root: Path | None = None) -> Path | None:
+    root = root or get_pip_cache_root()
+    return root / WHEELHOUSE_DIRNAME if root is not None else None
+
+
+def ensure_pip_cache() -> Path | None:
+    """Create the cache layout; returns the root or ``None`` when it is disabled or unusable."""
+    root = get_pip_cache_root()
+    if root is None:
+        return None
+    try:
+        (root / WHEELHOUSE_DIRNAME).mkdir(parents=True, exist_ok=True)
+    except OSError:
+        logger.exception("Shared pip cache %s is not usable, sessions fall back to their own", root)
+        return None
+    return root
+
+
+def pip_cache_env(
+    root: Path | str | None = None,
+    *,
+    offline: bool | None = None,
+    cache_dir: Path | str | None = None,
+) -> Dict[str, str]:
+    """
+    Environment variables pointing pip at the shared cache rooted at ``root``.
+
+    ``root`` defaults to the host cache; VMs pass the mount point instead, with
+    their private ``cache_dir`` so they only read the shared wheelhouse.
+    """
+    if root is None:
+        root = ensure_pip_cache()
+        if root is None:
+            return {}
+    root = Path(root)
+    if offline is None:
+        offline = bool(getattr(settings, "RUNTIME_PIP_OFFLINE", False))
+    env = {
+        "PIP_CACHE_DIR": str(cache_dir or root),
+        "PIP_FIND_LINKS": str(root / WHEELHOUSE_DIRNAME),
+        "PIP_PREFER_BINARY": "1",
+    }
+    if offline:
+        env["PIP_NO_INDEX"] = "1"
+    return env
+
+
+def seed_packages() -> List[str]:
+    return str(getattr(settings, "RUNTIME_PIP_SEED_PACKAGES", "") or "").split()
+
+
+def seed_wheelhouse(
+    packages: Iterable[str] = (),
+    *,
+    requirements: Path | None = None,
+    python_version: str | None = None,
+    platform: str | None = None,
+) -> subprocess.CompletedProcess:
+    """
+    Put wheels of ``packages`` and their dependencies into the wheelhouse.
+
+    Wheels are built for the server's interpreter (``pip wheel``, which also
+    turns sdists into wheels); with ``python_version``/``platform`` only
+    published binary wheels for that target are downloaded, for VM images that
+    run another Python.
+    """
+    root = ensure_pip_cache()
+    if root is None:
+        raise RuntimeError("RUNTIME_PIP_CACHE_ROOT is disabled")
+    wheelhouse = get_wheelhouse(root)
+    if python_version or platform:
+        command = [sys.executable, "-m", "pip", "download", "--only-binary=:all:", "--dest", str(wheelhouse)]
+        if python_version:
+            command += ["--python-version", python_version]
+        if platform:
+            command += ["--platform", platform]
+    else:
+        command = [sys.executable, "-m", "pip", "wheel", "--wheel-dir", str(wheelhouse)]
+    command += ["--cache-dir", str(root), "--find-links", str(wheelhouse)]
+    if requirements is not None:
+        command += ["-r", str(requirements)]
+    command += list(packages)
+    return subprocess.run(command, check=False, capture_output=True, text=True)
+
+
+__all__ = [
+    "VM_CACHE_MOUNT",
+    "VM_PRIVATE_CACHE_DIR",
+    "ensure_pip_cache",
+    "get_pip_cache_root",
+    "get_wheelhouse",
+    "pip_cache_env",
+    "seed_packages",
+    "seed_wheelhouse",
+]
@@ -4,6 +4,7 @@ import datetime as dt
 import os
 from decimal import Decimal, InvalidOperation
 
+import psutil
 import requests
 from django.conf import settings
 from django.utils import timezone
@@ -40,7 +41,7 @@ CPU_SESSION_CAPACITY = max(1, int(os.getenv('DASHBOARD_CPU_SESSION_CAPACITY', st
 GPU_SESSION_CAPACITY = max(1, int(os.getenv('DASHBOARD_GPU_SESSION_CAPACITY', '1')))
 DEFAULT_SESSION_CPU = max(1, int(getattr(settings, 'RUNTIME_VM_CPU', 2)))
 DEFAULT_SESSION_RAM_GB = max(0.1, float(getattr(settings, 'RUNTIME_VM_RAM_MB', 4096)) / 1024)
-RAM_TOTAL_GB = max(1.0, float(os.getenv('DASHBOARD_RAM_TOTAL_GB', str(CPU_SESSION_CAPACITY * DEFAULT_SESSION_RAM_GB))))
+RAM_TOTAL_GB = max(1.0, float(os.getenv('DASHBOARD_RAM_TOTAL_GB', str(psutil.virtual_memory().total / 1024 ** 3))))
 VRAM_TOTAL_GB = max(1.0, float(os.getenv('DASHBOARD_VRAM_TOTAL_GB', '24')))
 SESSION_VRAM_GB = max(0.1, float(os.getenv('DASHBOARD_GPU_SESSION_VRAM_GB', str(VRAM_TOTAL_GB))))
 WORKER_CAPACITY = max(1, int(os.getenv('DASHBOARD_WORKER_CAPACITY', os.getenv('CELERY_WORKER_CONCURRENCY', '16'))))
@@ -203,6 +204,7 @@ def _build_runtime_overview_snapshot() -> dict[str, object]:
 
         from ..models.notebook import Notebook
         from .runtime import _sessions
+        from .session_telemetry import get_session_telemetry
     except Exception:
         snapshot = {
             'active_sessions': 0,
@@ -221,6 +223,8 @@ def _build_runtime_overview_snapshot() -> dict[str, object]:
         return snapshot
 
     cutoff = now - dt.timedelta(seconds=_session_ttl_seconds())
+    telemetry = get_session_telemetry()
+    samples = telemetry.sample_if_due(dict(_sessions))
     active_sessions: list[tuple[int, object]] = []
     notebook_ids: set[int] = set()
 
@@ -250,7 +254,8 @@ def _build_runtime_overview_snapshot() -> dict[str, object]:
     online_user_ids: set[int] = set()
     cpu_sessions = 0
     gpu_sessions = 0
-    cpu_reserved = 0
+    cpu_used = 0.0
+    ram_used_gb = 0.0
     session_rows = []
     session_cells_total = 0
 
@@ -273,12 +278,23 @@ def _build_runtime_overview_snapshot() -> dict[str, object]:
         else:
             cpu_sessions += 1
             cpu_count = max(1, int(getattr(vm_resources, 'cpu', DEFAULT_SESSION_CPU)))
-            cpu_reserved += cpu_count
+
+        # Sessions without a measurement yet count with their reservation.
+        session_id = f'{NOTEBOOK_SESSION_PREFIX}{notebook_id}'
+        sample = samples.get(session_id)
+        sample_payload = sample.to_payload() if sample is not None else {}
+        cpu_percent = sample.cpu_percent if sample is not None else None
+        memory_bytes = sample.memory_bytes if sample is not None else None
+        if cpu_percent is not None:
+            cpu_used += cpu_percent / 100
+        elif not is_gpu:
+            cpu_used += cpu_count
+        ram_used_gb += memory_bytes / 1024 ** 3 if memory_bytes is not None else DEFAULT_SESSION_RAM_GB
 
         updated_at = _normalize_datetime(getattr(session, 'updated_at', now))
         created_at = _normalize_datetime(getattr(session, 'created_at', now))
         session_rows.append({
-            'session_id': f'{NOTEBOOK_SESSION_PREFIX}{notebook_id}',
+            'session_id': session_id,
             'notebook_id': notebook_id,
             'notebook_title': (notebook or {}).get('title') or f'notebook_{notebook_id}.ipynb',
             'user': (notebook or {}).get('owner__email') or (notebook or {}).get('owner__username') or 'unknown',
@@ -289,14 +305,20 @@ def _build_runtime_overview_snapshot() -> dict[str, object]:
             'wait_seconds': 0,
             'age_seconds': _format_seconds((now - created_at).total_seconds()),
             'updated_seconds_ago': _format_seconds((now - updated_at).total_seconds()),
+            'cpu_percent': sample_payload.get('cpu_percent'),
+            'memory_bytes': sample_payload.get('memory_bytes'),
+            'disk_bytes': sample_payload.get('disk_bytes'),
+            'net_rx_bytes_per_second': sample_payload.get('net_rx_bytes_per_second'),
+            'net_tx_bytes_per_second': sample_payload.get('net_tx_bytes_per_second'),
+            'history': [point.to_payload() for point in telemetry.history(session_id)],
         })
 
     snapshot = {
         'active_sessions': len(active_sessions),
         'online_users': len(online_user_ids),
-        'cpu_load_percent': _clamp_percent((cpu_reserved / CPU_SESSION_CAPACITY) * 100),
+        'cpu_load_percent': _clamp_percent((cpu_used / CPU_SESSION_CAPACITY) * 100),
         'gpu_load_percent': _clamp_percent((gpu_sessions / GPU_SESSION_CAPACITY) * 100),
-        'ram_used_gb': round(min(RAM_TOTAL_GB, len(active_sessions) * DEFAULT_SESSION_RAM_GB), 1),
+        'ram_used_gb': round(min(RAM_TOTAL_GB, ram_used_gb), 1),
         'ram_total_gb': round(RAM_TOTAL_GB, 1),
         'vram_used_gb': round(min(VRAM_TOTAL_GB, gpu_sessions * SESSION_VRAM_GB), 1),
         'vram_total_gb': round(VRAM_TOTAL_GB, 1),
@@ -13,4 +13,16 @@ websocket_urlpatterns = [
         r"^ws/contests/(?P<contest_id>\d+)/notifications/$",
         consumers.ContestNotificationConsumer.as_asgi(),
     ),
+    re_path(
+        r"^ws/contests/(?P<contest_id>\d+)/leaderboard/$",
+        consumers.ContestLeaderboardConsumer.as_asgi(),
+    ),
+    re_path(
+        r"^ws/notebooks/(?P<notebook_id>\d+)/session/$",
+        consumers.NotebookSessionConsumer.as_asgi(),
+    ),
+    re_path(
+        r"^ws/runs/(?P<run_id>[0-9a-f]+)/$",
+        consumers.RunStreamConsumer.as_asgi(),
+    ),
 ]
@@ -4,23 +4,58 @@ import atexit
 import builtins
 import logging
 import os
-import subprocess
 import shutil
+import threading
+import time
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List
-
-import venv
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
 from urllib.parse import urlparse
 from urllib.request import urlopen
 
 from django.conf import settings
 from django.utils import timezone
 
+from .dataset_provisioning import prune_dataset_cache
+from .local_envs import prepare_session_env
+from .session_eviction import (
+    REASON_USER_SESSIONS,
+    SessionQuotaExceeded,
+    SessionUsage,
+    estimate_namespace_bytes,
+    eviction_message,
+    get_eviction_action,
+    get_user_max_memory_bytes,
+    get_user_max_sessions,
+    get_watermarks,
+    host_memory,
+    plan_evictions,
+    record_eviction,
+    record_sessions_memory,
+    select_for_session_quota,
+)
+from .session_hibernation import (
+    get_hibernate_after_seconds,
+    get_max_snapshot_bytes,
+    record_hibernation,
+    record_restore,
+    restore_namespace,
+    snapshot_namespace,
+    snapshot_path,
+)
+from .session_reaper import SessionReaper, get_reaper_interval, get_reaper_workers, is_reaper_enabled
+from .session_registry import (
+    SessionRegistry,
+    current_owner,
+    get_session_registry,
+    is_current_owner,
+    is_owner_alive,
+    reset_session_registry,
+)
+from .session_telemetry import get_session_telemetry, reset_session_telemetry
 from .vm_agent import (
-    _handle_shell_commands,
     dispose_vm_agent,
     get_vm_agent,
     get_interactive_run,
@@ -29,7 +64,8 @@ from .vm_agent import (
 )
 from .vm_exceptions import VmError
 from .vm_manager import get_vm_manager
-from .vm_models import VirtualMachine
+from .vm_models import VirtualMachine, VirtualMachineState
+from .websocket_notifications import broadcast_session_evicted
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +74,17 @@ class SessionNotFoundError(Exception):
     """Raised when runtime operations reference a missing session."""
 
 
+class SessionHeldElsewhereError(Exception):
+    """Raised when a live session's interpreter belongs to another server process."""
+
+
 DEFAULT_SESSION_TTL_SECONDS = 3600
+SESSION_REGISTRY_KIND = "sessions"
+# How often a process publishes activity of a session it holds and re-checks
+# that no other process has stopped it in the meantime.
+REGISTRY_SYNC_INTERVAL_SECONDS = 5.0
+# How often a process looks for expired sessions whose owner process is gone.
+REGISTRY_SWEEP_INTERVAL_SECONDS = 30.0
 DEFAULT_RUNTIME_ROOT = Path(
     getattr(settings, "RUNTIME_SANDBOX_ROOT", Path(settings.BASE_DIR) / "media" / "notebook_sessions")
 )
@@ -53,6 +99,14 @@ class RuntimeSession:
     workdir: Path
     python_exec: Path | None = None
     vm: VirtualMachine | None = None
+    hibernated_at: datetime | None = None
+    hibernation: Dict[str, Any] | None = None
+    active_runs: int = 0
+    awaiting_input: bool = False
+    user_id: int | None = None
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
+    # What each executed notebook cell read and defined, see ``cell_dependencies``.
+    executed_cells: Dict[Any, Any] = field(default_factory=dict, repr=False, compare=False)
 
 
 @dataclass
@@ -66,6 +120,16 @@ class RuntimeExecutionResult:
     status: str = "success"
     prompt: str | None = None
     run_id: str | None = None
+    removed_variables: List[str] = field(default_factory=list)
+
+
+@dataclass
+class CellExecutionResult:
+    """Result of one cell of a "Run all" job."""
+
+    cell_id: Any
+    duration_ms: int | None
+    result: RuntimeExecutionResult
 
 
 def _build_execution_result(payload: Dict[str, object]) -> RuntimeExecutionResult:
@@ -79,6 +143,7 @@ def _build_execution_result(payload: Dict[str, object]) -> RuntimeExecutionResul
         status=str(payload.get("status") or "success"),
         prompt=payload.get("prompt"),
         run_id=payload.get("run_id"),
+        removed_variables=list(payload.get("removed_variables") or []),
     )
 
 
@@ -108,6 +173,13 @@ def _new_namespace() -> Dict[str, Any]:
     return {"__builtins__": sandbox_builtins}
 
 
+def _build_local_namespace(session: RuntimeSession) -> Dict[str, Any]:
+    namespace = _new_namespace()
+    namespace["download_file"] = _build_download_helper(session)
+    namespace.setdefault("__name__", "__main__")
+    return namespace
+
+
 def _build_download_helper(session: RuntimeSession):
     def download_file(
         url: str,
@@ -139,37 +211,12 @@ def _build_download_helper(session: RuntimeSession):
 
 
 def _prepare_local_python_exec(workdir: Path) -> Path | None:
-    venv_path = workdir / ".venv"
+    """Interpreter for shell commands of a local session: the shared base env plus a workspace overlay."""
     try:
-        created = False
-        if not venv_path.exists():
-            builder = venv.EnvBuilder(with_pip=True, symlinks=os.name != "nt")
-            builder.create(venv_path)
-            created = True
-        if os.name == "nt":
-            candidate = venv_path / "Scripts" / "python.exe"
-        else:
-            candidate = venv_path / "bin" / "python"
-        if candidate.exists():
-            if created:
-                try:
-                    subprocess.run(
-                        [str(candidate), "-m", "pip", "install", "--upgrade", "pip"],
-                        check=False,
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL,
-                    )
-                except Exception as exc:
-                    logger.debug(
-                        "Failed to upgrade pip in virtualenv at %s using %s: %s",
-                        venv_path,
-                        candidate,
-                        exc,
-                    )
-            return candidate
-    except Exception:
+        return prepare_session_env(workdir)
+    except Exception as exc:
+        logger.debug("Failed to prepare local python env in %s: %s", workdir, exc)
         return None
-    return None
 
 
 def _write_stream_files(stdout_path: Path, stderr_path: Path, stdout: str, stderr: str) -> None:
@@ -208,6 +255,12 @@ def _destroy_session_vm(session_id: str) -> None:
         return
 
 
+def _teardown_session(session_id: str, workdir: Path | None) -> None:
+    _destroy_session_vm(session_id)
+    if workdir is not None and workdir.exists():
+        _clear_directory(workdir)
+
+
 def _iter_runtime_roots() -> List[Path]:
     roots: List[Path] = []
     sandbox_root = getattr(settings, "RUNTIME_SANDBOX_ROOT", None)
@@ -230,12 +283,74 @@ def _iter_runtime_roots() -> List[Path]:
     return resolved
 
 
-def _purge_runtime_root() -> None:
+def _purge_runtime_root(keep: Iterable[Path] = ()) -> None:
+    keep_paths = [Path(path).resolve() for path in keep]
     for root in _iter_runtime_roots():
         for path in root.glob("runner-*"):
+            resolved = path.resolve()
+            if any(kept == resolved or resolved in kept.parents for kept in keep_paths):
+                continue
             _clear_directory(path)
 
 
+def _session_record(session_id: str, session: RuntimeSession, *, owner: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    vm = session.vm
+    return {
+        "session_id": session_id,
+        "vm_id": vm.id if vm else None,
+        "backend": vm.backend if vm else "local",
+        "workdir": str(session.workdir),
+        "python_exec": str(session.python_exec) if session.python_exec else None,
+        "created_at": session.created_at.isoformat(),
+        "updated_at": session.updated_at.isoformat(),
+        "owner": owner or current_owner(),
+        "heartbeat_at": time.time(),
+        "hibernated": session.hibernated_at is not None,
+        "user_id": session.user_id,
+    }
+
+
+def _parse_record_time(record: Dict[str, Any] | None, field: str) -> datetime | None:
+    if not record or not record.get(field):
+        return None
+    try:
+        return _resolve_now(datetime.fromisoformat(str(record[field])))
+    except ValueError:
+        return None
+
+
+def _record_owner_alive(record: Dict[str, Any]) -> bool:
+    return is_owner_alive(record.get("owner"), heartbeat_at=record.get("heartbeat_at"))
+
+
+def _restore_session(record: Dict[str, Any]) -> RuntimeSession | None:
+    """
+    Rebuild a handle for a session created by another process.
+
+    Only VM-backed sessions can be driven from elsewhere: their interpreter lives
+    behind the filesystem agent, while a local session's namespace is private to
+    the process that created it.
+    """
+    if record.get("backend") != "docker" or not record.get("vm_id"):
+        return None
+    try:
+        vm = get_vm_manager().backend.get_vm(str(record["vm_id"]))
+    except VmError:
+        return None
+    current = _resolve_now()
+    updated_at = _parse_record_time(record, "updated_at") or current
+    return RuntimeSession(
+        namespace={},
+        created_at=_parse_record_time(record, "created_at") or current,
+        updated_at=updated_at,
+        workdir=vm.workspace_path,
+        python_exec=None,
+        vm=vm,
+        hibernated_at=updated_at if getattr(vm, "state", None) == VirtualMachineState.STOPPED else None,
+        user_id=record.get("user_id"),
+    )
+
+
 def _get_session_ttl_seconds() -> int:
     value = getattr(settings, "RUNTIME_SESSION_TTL_SECONDS", DEFAULT_SESSION_TTL_SECONDS)
     try:
@@ -247,8 +362,14 @@ def _get_session_ttl_seconds() -> int:
 class ExecutionBackend:
     """Pluggable execution backend contract."""
 
-    def __init__(self, *, sessions: Dict[str, RuntimeSession]):
+    def __init__(self, *, sessions: Dict[str, RuntimeSession], registry: SessionRegistry | None = None):
         self.sessions = sessions
+        self.registry = registry if registry is not None else get_session_registry()
+        self._synced_at: Dict[str, float] = {}
+        self._swept_at: float | None = None
+        self._maintaining = threading.Lock()
+        self._evicting = threading.Lock()
+        self.reaper: SessionReaper | None = None
 
     def create_session(
         self,
@@ -256,6 +377,7 @@ class ExecutionBackend:
         *,
         now: datetime | None = None,
         overrides: Dict[str, object] | None = None,
+        user_id: int | None = None,
     ) -> RuntimeSession:  # pragma: no cover - abstract
         raise NotImplementedError
 
@@ -274,7 +396,22 @@ class ExecutionBackend:
         _write_stream_files(stdout_path, stderr_path, result.stdout, result.stderr)
         return result
 
-    def stop_session(self, session_id: str) -> bool:  # pragma: no cover - abstract
+    def run_cells_stream(
+        self,
+        session_id: str,
+        cells: Sequence[Dict[str, Any]],
+        *,
+        events_path: Path,
+        stop_on_error: bool = True,
+    ) -> List[CellExecutionResult]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def stop_session(
+        self,
+        session_id: str,
+        *,
+        background: bool | None = None,
+    ) -> bool:  # pragma: no cover - abstract
         raise NotImplementedError
 
     def provide_input(
@@ -287,12 +424,117 @@ class ExecutionBackend:
     ) -> RuntimeExecutionResult:  # pragma: no cover - abstract
         raise NotImplementedError
 
+    def hibernate_session(
+        self,
+        session_id: str,
+        *,
+        now: datetime | None = None,
+    ) -> Dict[str, Any] | None:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def interrupt_session(self, session_id: str) -> Dict[str, Any]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def inspect_session(
+        self,
+        session_id: str,
+        names: Iterable[str] | None = None,
+    ) -> Dict[str, Any]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def dataframe_rows(
+        self,
+        session_id: str,
+        frame_id: str,
+        *,
+        offset: int,
+        limit: int,
+    ) -> Dict[str, Any]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
     def get_session(self, session_id: str, *, touch: bool = True, now: datetime | None = None) -> RuntimeSession | None:
         current = _resolve_now(now)
         self._auto_cleanup_expired(now=current)
         session = self.sessions.get(session_id)
+        if session is None:
+            session = self._adopt_session(session_id)
+        if session is not None and self._reaping and self._is_expired(session_id, session, now=current):
+            # The reaper scans periodically; a session found expired in between is detached right away.
+            self.stop_session(session_id, background=True)
+            return None
         if session and touch:
             session.updated_at = current
+        if session is not None:
+            session = self._sync_session(session_id, session)
+        return session
+
+    def lookup_session(self, session_id: str) -> Dict[str, Any] | None:
+        """Shared record of a session: owner process, VM id, workspace and liveness."""
+        record = self.registry.get(SESSION_REGISTRY_KIND, session_id)
+        if record is not None:
+            record["alive"] = _record_owner_alive(record)
+            record["local"] = session_id in self.sessions
+        return record
+
+    def _registry_ttl(self) -> int:
+        return max(_get_session_ttl_seconds(), 60) * 2
+
+    def _publish_session(
+        self,
+        session_id: str,
+        session: RuntimeSession,
+        *,
+        record: Dict[str, Any] | None = None,
+    ) -> None:
+        owner = None
+        heartbeat_at = None
+        if record is not None and not is_current_owner(record.get("owner")) and _record_owner_alive(record):
+            # Another live process owns the session; only publish our activity.
+            owner = record.get("owner")
+            heartbeat_at = record.get("heartbeat_at")
+        payload = _session_record(session_id, session, owner=owner)
+        if heartbeat_at is not None:
+            payload["heartbeat_at"] = heartbeat_at
+        self.registry.put(SESSION_REGISTRY_KIND, session_id, payload, ttl=self._registry_ttl())
+        self._synced_at[session_id] = time.monotonic()
+
+    def _release_session(self, session_id: str) -> None:
+        """Forget the local handle of a session without tearing down its VM."""
+        self.sessions.pop(session_id, None)
+        self._synced_at.pop(session_id, None)
+        dispose_vm_agent(session_id)
+
+    def _adopt_session(self, session_id: str) -> RuntimeSession | None:
+        record = self.registry.get(SESSION_REGISTRY_KIND, session_id)
+        if record is None:
+            return None
+        owner_alive = _record_owner_alive(record)
+        session = _restore_session(record)
+        if session is None:
+            if is_current_owner(record.get("owner")) or not owner_alive:
+                # The interpreter died with its process; the record is stale.
+                self.registry.delete(SESSION_REGISTRY_KIND, session_id)
+            return None
+        self.sessions[session_id] = session
+        if owner_alive and not is_current_owner(record.get("owner")):
+            self._synced_at[session_id] = time.monotonic()
+        else:
+            self._publish_session(session_id, session)
+        return session
+
+    def _sync_session(self, session_id: str, session: RuntimeSession) -> RuntimeSession | None:
+        synced_at = self._synced_at.get(session_id)
+        if synced_at is not None and time.monotonic() - synced_at < REGISTRY_SYNC_INTERVAL_SECONDS:
+            return session
+        record = self.registry.get(SESSION_REGISTRY_KIND, session_id)
+        if record is None and synced_at is not None:
+            # Another process stopped the session since we last looked.
+            self._release_session(session_id)
+            return None
+        shared_updated_at = _parse_record_time(record, "updated_at")
+        if shared_updated_at is not None and shared_updated_at > session.updated_at:
+            session.updated_at = shared_updated_at
+        self._publish_session(session_id, session, record=record)
         return session
 
     def reset_session(
@@ -301,17 +543,22 @@ class ExecutionBackend:
         *,
         now: datetime | None = None,
         overrides: Dict[str, object] | None = None,
+        user_id: int | None = None,
     ) -> RuntimeSession:
+        previous = self.sessions.get(session_id)
+        if user_id is None and previous is not None:
+            user_id = previous.user_id
         removed = self.stop_session(session_id)
         if not removed:
             raise SessionNotFoundError(f"Session '{session_id}' not found")
-        return self.create_session(session_id, now=now, overrides=overrides)
+        return self.create_session(session_id, now=now, overrides=overrides, user_id=user_id)
 
     def cleanup_expired(
         self,
         ttl_seconds: int = DEFAULT_SESSION_TTL_SECONDS,
         *,
         now: datetime | None = None,
+        sweep_registry: bool = True,
     ) -> List[str]:
         if ttl_seconds <= 0:
             ttl_seconds = 0
@@ -319,19 +566,275 @@ class ExecutionBackend:
         cutoff = current - timedelta(seconds=ttl_seconds)
         expired: List[str] = []
         for session_id, session in list(self.sessions.items()):
-            if session.updated_at < cutoff:
+            if self._is_expired(session_id, session, cutoff=cutoff):
+                expired.append(session_id)
+                self.stop_session(session_id)
+
+        if sweep_registry:
+            self._swept_at = time.monotonic()
+            # Sessions whose owner is gone are reaped by whichever process notices first.
+            for session_id, record in list(self.registry.items(SESSION_REGISTRY_KIND)):
+                if session_id in self.sessions or session_id in expired:
+                    continue
+                updated_at = _parse_record_time(record, "updated_at")
+                if updated_at is None or updated_at >= cutoff or _record_owner_alive(record):
+                    continue
                 expired.append(session_id)
                 self.stop_session(session_id)
         return expired
 
+    def _is_expired(
+        self,
+        session_id: str,
+        session: RuntimeSession,
+        *,
+        cutoff: datetime | None = None,
+        now: datetime | None = None,
+    ) -> bool:
+        if cutoff is None:
+            cutoff = _resolve_now(now) - timedelta(seconds=_get_session_ttl_seconds())
+        if session.updated_at >= cutoff:
+            return False
+        # Other processes may have driven the session more recently.
+        record = self.registry.get(SESSION_REGISTRY_KIND, session_id)
+        shared_updated_at = _parse_record_time(record, "updated_at")
+        if shared_updated_at is not None and shared_updated_at >= cutoff:
+            session.updated_at = shared_updated_at
+            return False
+        return True
+
+    @property
+    def _reaping(self) -> bool:
+        return self.reaper is not None and self.reaper.running
+
+    def _queue_teardown(self, session_id: str, workdir: Path | None, *, background: bool | None) -> None:
+        if background is None:
+            background = self._reaping
+        if background and self.reaper is not None:
+            self.reaper.submit(session_id, lambda: _teardown_session(session_id, workdir))
+        else:
+            _teardown_session(session_id, workdir)
+
+    def _wait_for_teardown(self, session_id: str) -> None:
+        if self.reaper is not None:
+            self.reaper.wait_for(session_id)
+
+    def start_reaper(self) -> SessionReaper:
+        """Move expiry scans and session teardown to a background reaper."""
+        if self.reaper is None:
+            self.reaper = SessionReaper(
+                self._reap,
+                interval=get_reaper_interval(),
+                workers=get_reaper_workers(),
+            )
+        self.reaper.start()
+        return self.reaper
+
+    def stop_reaper(self) -> None:
+        if self.reaper is not None:
+            self.reaper.stop(wait=True)
+            self.reaper = None
+
+    def _reap(self, *, now: datetime | None = None) -> List[str]:
+        current = _resolve_now(now)
+        expired = self.cleanup_expired(ttl_seconds=_get_session_ttl_seconds(), now=current)
+        self._run_maintenance(now=current)
+        return expired
+
     def cleanup_all_sessions(self) -> None:
+        if self.reaper is not None:
+            self.reaper.drain()
         for session_id in list(self.sessions.keys()):
-            self.stop_session(session_id)
-        _purge_runtime_root()
+            record = self.registry.get(SESSION_REGISTRY_KIND, session_id)
+            if record and not is_current_owner(record.get("owner")) and _record_owner_alive(record):
+                self._release_session(session_id)
+            else:
+                self.stop_session(session_id)
+        _purge_runtime_root(keep=self._foreign_workdirs())
+
+    def _foreign_workdirs(self) -> List[Path]:
+        return [
+            Path(record["workdir"])
+            for _session_id, record in self.registry.items(SESSION_REGISTRY_KIND)
+            if record.get("workdir")
+            and not is_current_owner(record.get("owner"))
+            and _record_owner_alive(record)
+        ]
+
+    def hibernate_idle_sessions(self, *, now: datetime | None = None) -> List[str]:
+        """Hibernate sessions owned by this process that have been idle long enough."""
+        idle_seconds = get_hibernate_after_seconds()
+        if idle_seconds <= 0:
+            return []
+        current = _resolve_now(now)
+        cutoff = current - timedelta(seconds=idle_seconds)
+        hibernated: List[str] = []
+        for session_id, session in list(self.sessions.items()):
+            if session.hibernated_at is not None or session.updated_at >= cutoff:
+                continue
+            record = self.registry.get(SESSION_REGISTRY_KIND, session_id)
+            if record is not None and not is_current_owner(record.get("owner")):
+                continue
+            shared_updated_at = _parse_record_time(record, "updated_at")
+            if shared_updated_at is not None and shared_updated_at >= cutoff:
+                continue
+            try:
+                if self.hibernate_session(session_id, now=current) is not None:
+                    hibernated.append(session_id)
+            except Exception:
+                logger.exception("Failed to hibernate idle session %s", session_id)
+        return hibernated
+
+    def _owns_session(self, session_id: str) -> bool:
+        record = self.registry.get(SESSION_REGISTRY_KIND, session_id)
+        return record is None or is_current_owner(record.get("owner"))
+
+    def session_usages(self, *, measure_memory: bool = True) -> List[SessionUsage]:
+        """Running (not hibernated) sessions held by this process, with their memory use."""
+        running = {
+            session_id: session
+            for session_id, session in list(self.sessions.items())
+            if session.hibernated_at is None and self._owns_session(session_id)
+        }
+        vm_memory: Dict[str, int] = {}
+        if measure_memory:
+            vms = [session.vm for session in running.values() if session.vm and session.vm.backend != "local"]
+            if vms:
+                try:
+                    vm_memory = get_vm_manager().backend.memory_usage(vms)
+                except Exception:
+                    logger.exception("Failed to read VM memory usage")
+        usages: List[SessionUsage] = []
+        for session_id, session in running.items():
+            memory_bytes = 0
+            if measure_memory:
+                vm = session.vm
+                if vm is not None and vm.backend != "local":
+                    memory_bytes = vm_memory.get(vm.id, 0)
+                else:
+                    memory_bytes = estimate_namespace_bytes(session.namespace)
+            usages.append(
+                SessionUsage(
+                    session_id=session_id,
+                    user_id=session.user_id,
+                    memory_bytes=memory_bytes,
+                    updated_at=session.updated_at,
+                    busy=bool(session.active_runs or session.awaiting_input),
+                )
+            )
+        return usages
+
+    def _user_session_usages(self, user_id: int, *, exclude: str) -> List[SessionUsage]:
+        usages = {
+            usage.session_id: usage
+            for usage in self.session_usages(measure_memory=False)
+            if usage.user_id == user_id and usage.session_id != exclude
+        }
+        # Sessions of the same user held by other processes count too, but
+        # only their owner can evict them.
+        for session_id, record in self.registry.items(SESSION_REGISTRY_KIND):
+            if session_id in usages or session_id == exclude or record.get("user_id") != user_id:
+                continue
+            if record.get("hibernated") or is_current_owner(record.get("owner")) or not _record_owner_alive(record):
+                continue
+            usages[session_id] = SessionUsage(
+                session_id=session_id,
+                user_id=user_id,
+                memory_bytes=0,
+                updated_at=_parse_record_time(record, "updated_at") or _resolve_now(),
+                busy=True,
+            )
+        return list(usages.values())
+
+    def _enforce_session_quota(self, user_id: int | None, *, session_id: str) -> None:
+        """Make room for one more running session of ``user_id`` or raise ``SessionQuotaExceeded``."""
+        max_sessions = get_user_max_sessions()
+        if user_id is None or max_sessions <= 0:
+            return
+        victims = select_for_session_quota(
+            self._user_session_usages(user_id, exclude=session_id),
+            user_id=user_id,
+            max_sessions=max_sessions,
+        )
+        for victim in victims:
+            if not self._evict(victim, REASON_USER_SESSIONS):
+                raise SessionQuotaExceeded(f"Could not free a session slot for user {user_id}")
+
+    def enforce_memory_limits(self) -> List[Tuple[str, str]]:
+        """Evict least recently used sessions while users or the host are over their memory limits."""
+        high_watermark, low_watermark = get_watermarks()
+        user_max_memory = get_user_max_memory_bytes()
+        host_used, host_total = host_memory()
+        host_pressure = high_watermark > 0 and host_total > 0 and host_used / host_total > high_watermark
+        if not host_pressure and user_max_memory <= 0:
+            return []
+        with self._evicting:
+            usages = self.session_usages()
+            record_sessions_memory(usages)
+            plan = plan_evictions(
+                usages,
+                host_used=host_used,
+                host_total=host_total,
+                high_watermark=high_watermark,
+                low_watermark=low_watermark,
+                user_max_memory=user_max_memory,
+            )
+            return [(session_id, reason) for session_id, reason in plan if self._evict(session_id, reason)]
+
+    def _evict(self, session_id: str, reason: str) -> bool:
+        action = get_eviction_action()
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+        try:
+            if action == "hibernate":
+                evicted = self.hibernate_session(session_id) is not None
+            else:
+                with session.lock:
+                    evicted = not (session.active_runs or session.awaiting_input) and self.stop_session(session_id)
+        except Exception:
+            logger.exception("Failed to evict session %s", session_id)
+            return False
+        if not evicted:
+            return False
+        record_eviction(reason, action)
+        logger.info("Evicted session %s (%s, %s)", session_id, reason, action)
+        broadcast_session_evicted(session_id, action=action, reason=reason, message=eviction_message(reason, action))
+        return True
+
+    def _run_maintenance(self, *, now: datetime) -> None:
+        if get_hibernate_after_seconds() > 0:
+            self.hibernate_idle_sessions(now=now)
+        get_session_telemetry().sample_if_due(dict(self.sessions))
+        try:
+            self.enforce_memory_limits()
+        except Exception:
+            logger.exception("Failed to enforce runtime memory limits")
+        try:
+            prune_dataset_cache()
+        except Exception:
+            logger.exception("Failed to prune the dataset cache")
+
+    def _run_maintenance_in_background(self, *, now: datetime) -> None:
+        if not self._maintaining.acquire(blocking=False):
+            return
+
+        def _run() -> None:
+            try:
+                self._run_maintenance(now=now)
+            finally:
+                self._maintaining.release()
+
+        threading.Thread(target=_run, name="runtime-maintenance", daemon=True).start()
 
     def _auto_cleanup_expired(self, *, now: datetime | None = None) -> None:
+        if self._reaping:
+            return
         ttl = _get_session_ttl_seconds()
-        self.cleanup_expired(ttl_seconds=ttl, now=now)
+        sweep_due = self._swept_at is None or time.monotonic() - self._swept_at >= REGISTRY_SWEEP_INTERVAL_SECONDS
+        self.cleanup_expired(ttl_seconds=ttl, now=now, sweep_registry=sweep_due)
+        if sweep_due:
+            self._run_maintenance_in_background(now=_resolve_now(now))
 
     def _require_session(self, session_id: str, *, now: datetime | None = None) -> RuntimeSession:
         session = self.get_session(session_id, touch=False, now=now)
@@ -349,64 +852,190 @@ class LegacyExecutionBackend(ExecutionBackend):
         *,
         now: datetime | None = None,
         overrides: Dict[str, object] | None = None,
+        user_id: int | None = None,
     ) -> RuntimeSession:
         current = _resolve_now(now)
         self._auto_cleanup_expired(now=current)
-        existing = self.sessions.get(session_id)
+        existing = self.sessions.get(session_id) or self._adopt_session(session_id)
         if existing is not None:
             existing.updated_at = current
             return existing
 
+        self._enforce_session_quota(user_id, session_id=session_id)
+        self._wait_for_teardown(session_id)
+        try:
+            self.enforce_memory_limits()
+        except Exception:
+            logger.exception("Failed to enforce runtime memory limits")
+
+        record = self.registry.get(SESSION_REGISTRY_KIND, session_id)
+        if record is not None and _record_owner_alive(record):
+            # Its interpreter cannot be driven from here, and a second one would
+            # split the session's state between two processes.
+            raise SessionHeldElsewhereError(
+                f"Session '{session_id}' is held in-process by {record.get('owner')}"
+            )
+
         vm = _ensure_session_vm(session_id, now=current, overrides=overrides)
         workdir = vm.workspace_path
         workdir.mkdir(parents=True, exist_ok=True)
-        namespace = {}
         python_exec: Path | None = None
 
         if vm.backend == "local":
-            namespace = _new_namespace()
             python_exec = _prepare_local_python_exec(workdir)
 
         session = RuntimeSession(
-            namespace=namespace,
+            namespace={},
             created_at=current,
             updated_at=current,
             workdir=workdir,
             python_exec=python_exec,
             vm=vm,
+            user_id=user_id,
         )
         if vm.backend == "local":
-            session.namespace["download_file"] = _build_download_helper(session)
-            session.namespace.setdefault("__name__", "__main__")
+            session.namespace = _build_local_namespace(session)
         self.sessions[session_id] = session
+        self._publish_session(session_id, session)
         return session
 
-    def stop_session(self, session_id: str) -> bool:
+    def stop_session(self, session_id: str, *, background: bool | None = None) -> bool:
         session = self.sessions.pop(session_id, None)
+        self._synced_at.pop(session_id, None)
+        record = self.registry.get(SESSION_REGISTRY_KIND, session_id)
+        self.registry.delete(SESSION_REGISTRY_KIND, session_id)
         dispose_vm_agent(session_id)
-        _destroy_session_vm(session_id)
-        removed = False
-        if session:
-            removed = True
-            if session.workdir.exists():
-                _clear_directory(session.workdir)
-        return removed
+        workdir = session.workdir if session else None
+        if workdir is None and record and record.get("workdir"):
+            workdir = Path(record["workdir"])
+        self._queue_teardown(session_id, workdir, background=background)
+        return session is not None or record is not None
 
-    def run_code(self, session_id: str, code: str) -> RuntimeExecutionResult:
+    def hibernate_session(self, session_id: str, *, now: datetime | None = None) -> Dict[str, Any] | None:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise SessionNotFoundError(f"Session '{session_id}' not found")
+        with session.lock:
+            if session.hibernated_at is not None:
+                return session.hibernation
+            if session.active_runs or session.awaiting_input:
+                return None
+            current = _resolve_now(now)
+            started = time.monotonic()
+            vm = session.vm
+            backend_name = vm.backend if vm else "local"
+            max_bytes = get_max_snapshot_bytes()
+            if vm and vm.backend == "docker":
+                summary = get_vm_agent(session_id, session).hibernate(max_bytes=max_bytes)
+                if summary.get("status") == "error":
+                    logger.warning("Failed to hibernate session %s: %s", session_id, summary.get("error"))
+                    return None
+                summary.pop("status", None)
+            else:
+                summary = snapshot_namespace(session.namespace, snapshot_path(session.workdir), max_bytes=max_bytes)
+                session.namespace = {}
+            dispose_vm_agent(session_id)
+            if vm is not None:
+                session.vm = get_vm_manager().stop_session_vm(session_id, now=current)
+            session.hibernated_at = current
+            session.hibernation = summary
+            record_hibernation(backend_name, seconds=time.monotonic() - started, size=int(summary.get("bytes") or 0))
+            self._publish_session(session_id, session)
+            logger.info(
+                "Hibernated session %s: %s values, %s bytes, skipped %s",
+                session_id,
+                len(summary.get("saved") or ()),
+                summary.get("bytes"),
+                sorted(summary.get("skipped") or {}),
+            )
+            return summary
+
+    def interrupt_session(self, session_id: str) -> Dict[str, Any]:
+        """
+        Stop the cell running in ``session_id`` with ``KeyboardInterrupt``.
+
+        The session lock is not taken: the agent answers control requests while
+        the cell runs, and the namespace survives the interrupt.
+        """
         session = self._require_session(session_id)
-        run_id = uuid.uuid4().hex
+        if session.hibernated_at is not None:
+            return {"status": "success", "interrupted": False}
+        result = get_vm_agent(session_id, session).interrupt()
+        if result.get("interrupted"):
+            logger.info("Interrupted running cell in session %s", session_id)
+        return result
+
+    def inspect_session(self, session_id: str, names: Iterable[str] | None = None) -> Dict[str, Any]:
+        """Variables of ``session_id``, readable while a cell is running."""
+        session = self._require_session(session_id)
+        if session.hibernated_at is not None:
+            return {"status": "success", "variables": {}, "hibernated": True}
+        return get_vm_agent(session_id, session).inspect(names)
+
+    def dataframe_rows(self, session_id: str, frame_id: str, *, offset: int, limit: int) -> Dict[str, Any]:
+        """A page of rows of a DataFrame output that was displayed truncated."""
+        session = self._require_session(session_id)
+        if session.hibernated_at is not None:
+            return {"status": "error", "error": "The table is no longer available; run the cell again"}
+        return get_vm_agent(session_id, session).dataframe_rows(frame_id, offset=offset, limit=limit)
+
+    def _resume_session(self, session_id: str, session: RuntimeSession) -> None:
+        """Bring a hibernated session back; the caller holds ``session.lock``."""
+        if session.hibernated_at is None:
+            return
+        started = time.monotonic()
         vm = session.vm
+        backend_name = vm.backend if vm else "local"
+        if vm is not None:
+            vm = get_vm_manager().resume_session_vm(session_id)
+            session.vm = vm
+            session.workdir = vm.workspace_path
         if vm and vm.backend == "docker":
-            agent = get_vm_agent(session_id, session)
-            if hasattr(agent, "exec_interactive_start"):
-                result_payload = agent.exec_interactive_start(code, run_id=run_id)
-            else:
-                result_payload = agent.exec_code(code)
+            summary = get_vm_agent(session_id, session).restore()
         else:
-            run = start_interactive_run(session=session, code=code, run_id=run_id)
-            run.wait_for_status()
-            result_payload = run.to_payload()
-        session.updated_at = _resolve_now()
+            session.namespace = _build_local_namespace(session)
+            summary = restore_namespace(session.namespace, snapshot_path(session.workdir))
+        session.hibernated_at = None
+        session.hibernation = None
+        record_restore(backend_name, seconds=time.monotonic() - started, size=int(summary.get("bytes") or 0))
+        if summary.get("skipped"):
+            logger.info("Session %s restored without %s", session_id, sorted(summary["skipped"]))
+        self._publish_session(session_id, session)
+
+    def _begin_run(self, session_id: str, session: RuntimeSession) -> None:
+        if session.hibernated_at is not None:
+            # Resuming adds a running session; make room outside of this
+            # session's lock since eviction takes the locks of other sessions.
+            self._enforce_session_quota(session.user_id, session_id=session_id)
+        with session.lock:
+            self._resume_session(session_id, session)
+            session.active_runs += 1
+
+    def _finish_run(self, session: RuntimeSession, result_payload: Dict[str, object] | None) -> None:
+        with session.lock:
+            session.active_runs = max(session.active_runs - 1, 0)
+            session.awaiting_input = bool(result_payload) and result_payload.get("status") == "input_required"
+            session.updated_at = _resolve_now()
+
+    def run_code(self, session_id: str, code: str) -> RuntimeExecutionResult:
+        session = self._require_session(session_id)
+        run_id = uuid.uuid4().hex
+        result_payload = None
+        self._begin_run(session_id, session)
+        try:
+            vm = session.vm
+            if vm and vm.backend == "docker":
+                agent = get_vm_agent(session_id, session)
+                if hasattr(agent, "exec_interactive_start"):
+                    result_payload = agent.exec_interactive_start(code, run_id=run_id)
+                else:
+                    result_payload = agent.exec_code(code)
+            else:
+                run = start_interactive_run(session=session, code=code, run_id=run_id)
+                run.wait_for_status()
+                result_payload = run.to_payload()
+        finally:
+            self._finish_run(session, result_payload)
         return _build_execution_result(result_payload)
 
     def provide_input(
@@ -418,6 +1047,23 @@ class LegacyExecutionBackend(ExecutionBackend):
         stdin_eof: bool = False,
     ) -> RuntimeExecutionResult:
         session = self._require_session(session_id)
+        result_payload = None
+        self._begin_run(session_id, session)
+        try:
+            result_payload = self._provide_input(session_id, session, run_id, text, stdin_eof=stdin_eof)
+        finally:
+            self._finish_run(session, result_payload)
+        return _build_execution_result(result_payload)
+
+    def _provide_input(
+        self,
+        session_id: str,
+        session: RuntimeSession,
+        run_id: str,
+        text: str | None,
+        *,
+        stdin_eof: bool,
+    ) -> Dict[str, object]:
         vm = session.vm
         if vm and vm.backend == "docker":
             agent = get_vm_agent(session_id, session)
@@ -454,8 +1100,7 @@ class LegacyExecutionBackend(ExecutionBackend):
                 provide_interactive_input(run_id, text, stdin_eof=stdin_eof)
                 run.wait_for_status(since_seq=seq)
                 result_payload = run.to_payload()
-        session.updated_at = _resolve_now()
-        return _build_execution_result(result_payload)
+        return result_payload
 
     def run_code_stream(
         self,
@@ -466,16 +1111,42 @@ class LegacyExecutionBackend(ExecutionBackend):
         stderr_path: Path,
     ) -> RuntimeExecutionResult:
         session = self._require_session(session_id)
-        vm = session.vm
-        if vm and vm.backend == "docker":
-            agent = get_vm_agent(session_id, session)
-            result_payload = agent.exec_code_stream(code, stdout_path=stdout_path, stderr_path=stderr_path)
-        else:
+        result_payload = None
+        self._begin_run(session_id, session)
+        try:
             agent = get_vm_agent(session_id, session)
             result_payload = agent.exec_code_stream(code, stdout_path=stdout_path, stderr_path=stderr_path)
-        session.updated_at = _resolve_now()
+        finally:
+            self._finish_run(session, result_payload)
         return _build_execution_result(result_payload)
 
+    def run_cells_stream(
+        self,
+        session_id: str,
+        cells: Sequence[Dict[str, Any]],
+        *,
+        events_path: Path,
+        stop_on_error: bool = True,
+    ) -> List[CellExecutionResult]:
+        session = self._require_session(session_id)
+        result_payload = None
+        self._begin_run(session_id, session)
+        try:
+            agent = get_vm_agent(session_id, session)
+            result_payload = agent.exec_batch(cells, events_path=events_path, stop_on_error=stop_on_error)
+        finally:
+            self._finish_run(session, result_payload)
+        if result_payload.get("status") == "error":
+            raise RuntimeError(str(result_payload.get("error") or "Run all failed"))
+        return [
+            CellExecutionResult(
+                cell_id=item.get("cell_id"),
+                duration_ms=item.get("duration_ms"),
+                result=_build_execution_result(item),
+            )
+            for item in result_payload.get("results") or []
+        ]
+
 
 
 
@@ -510,6 +1181,8 @@ def _get_backend() -> ExecutionBackend:
     global _backend
     if _backend is None:
         _backend = _build_backend()
+        if is_reaper_enabled():
+            _backend.start_reaper()
     return _backend
 
 
@@ -521,8 +1194,11 @@ def reset_execution_backend() -> None:
             _backend.cleanup_all_sessions()
         except Exception as exc:
             logger.debug("Failed to cleanup sessions during backend reset: %s", exc)
+        _backend.stop_reaper()
     _backend = None
     _sessions.clear()
+    reset_session_registry()
+    reset_session_telemetry()
 
 
 def create_session(
@@ -530,21 +1206,27 @@ def create_session(
     *,
     now: datetime | None = None,
     overrides: Dict[str, object] | None = None,
+    user_id: int | None = None,
 ) -> RuntimeSession:
-    return _get_backend().create_session(session_id, now=now, overrides=overrides)
+    return _get_backend().create_session(session_id, now=now, overrides=overrides, user_id=user_id)
 
 
 def get_session(session_id: str, *, touch: bool = True, now: datetime | None = None) -> RuntimeSession | None:
     return _get_backend().get_session(session_id, touch=touch, now=now)
 
 
+def lookup_session(session_id: str) -> Dict[str, Any] | None:
+    return _get_backend().lookup_session(session_id)
+
+
 def reset_session(
     session_id: str,
     *,
     now: datetime | None = None,
     overrides: Dict[str, object] | None = None,
+    user_id: int | None = None,
 ) -> RuntimeSession:
-    return _get_backend().reset_session(session_id, now=now, overrides=overrides)
+    return _get_backend().reset_session(session_id, now=now, overrides=overrides, user_id=user_id)
 
 
 def stop_session(session_id: str) -> bool:
@@ -577,6 +1259,16 @@ def run_code_stream(
     return _get_backend().run_code_stream(session_id, code, stdout_path=stdout_path, stderr_path=stderr_path)
 
 
+def run_cells_stream(
+    session_id: str,
+    cells: Sequence[Dict[str, Any]],
+    *,
+    events_path: Path,
+    stop_on_error: bool = True,
+) -> List[CellExecutionResult]:
+    return _get_backend().run_cells_stream(session_id, cells, events_path=events_path, stop_on_error=stop_on_error)
+
+
 def provide_input(
     session_id: str,
     run_id: str,
@@ -587,6 +1279,30 @@ def provide_input(
     return _get_backend().provide_input(session_id, run_id, text, stdin_eof=stdin_eof)
 
 
+def hibernate_session(session_id: str, *, now: datetime | None = None) -> Dict[str, Any] | None:
+    return _get_backend().hibernate_session(session_id, now=now)
+
+
+def interrupt_session(session_id: str) -> Dict[str, Any]:
+    return _get_backend().interrupt_session(session_id)
+
+
+def inspect_session(session_id: str, names: Iterable[str] | None = None) -> Dict[str, Any]:
+    return _get_backend().inspect_session(session_id, names)
+
+
+def dataframe_rows(session_id: str, frame_id: str, *, offset: int, limit: int) -> Dict[str, Any]:
+    return _get_backend().dataframe_rows(session_id, frame_id, offset=offset, limit=limit)
+
+
+def hibernate_idle_sessions(*, now: datetime | None = None) -> List[str]:
+    return _get_backend().hibernate_idle_sessions(now=now)
+
+
+def enforce_memory_limits() -> List[Tuple[str, str]]:
+    return _get_backend().enforce_memory_limits()
+
+
 def register_runtime_shutdown_hooks() -> None:
     global _shutdown_hooks_registered
     if _shutdown_hooks_registered:
@@ -601,16 +1317,27 @@ register_runtime_shutdown_hooks()
 __all__ = [
     "RuntimeSession",
     "RuntimeExecutionResult",
+    "CellExecutionResult",
     "DEFAULT_SESSION_TTL_SECONDS",
     "create_session",
     "get_session",
+    "lookup_session",
     "reset_session",
     "stop_session",
     "cleanup_expired",
     "cleanup_all_sessions",
     "run_code",
     "run_code_stream",
+    "run_cells_stream",
+    "hibernate_session",
+    "hibernate_idle_sessions",
+    "interrupt_session",
+    "inspect_session",
+    "dataframe_rows",
+    "enforce_memory_limits",
     "reset_execution_backend",
     "SessionNotFoundError",
+    "SessionHeldElsewhereError",
+    "SessionQuotaExceeded",
     "register_runtime_shutdown_hooks",
 ]
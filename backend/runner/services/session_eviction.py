@@ -0,0 +1,271 @@
+"""Memory accounting, per-user quotas and eviction of runtime sessions.
+
+The runtime measures what every session actually holds (container memory for
+Docker VMs, an estimate of the namespace for in-process sessions) and picks
+victims least recently used first when
+
+* a user holds more running sessions than ``RUNTIME_USER_MAX_SESSIONS``,
+* a user's sessions together use more than ``RUNTIME_USER_MAX_MEMORY_MB``,
+* host memory use crosses ``RUNTIME_HOST_MEMORY_HIGH_WATERMARK``; sessions are
+  then evicted until the projected use drops below the low watermark.
+
+Victims are hibernated (or stopped, see ``RUNTIME_EVICTION_ACTION``); sessions
+that are running code or waiting for input are never picked.
+"""
+
+from __future__ import annotations
+
+import sys
+import types
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import psutil
+from django.conf import settings
+from prometheus_client import Counter, Gauge
+
+EVICTION_ACTIONS = ("hibernate", "stop")
+DEFAULT_HIGH_WATERMARK = 0.9
+DEFAULT_LOW_WATERMARK = 0.8
+
+REASON_USER_SESSIONS = "user_sessions"
+REASON_USER_MEMORY = "user_memory"
+REASON_HOST_MEMORY = "host_memory"
+
+METRIC_NAMESPACE = getattr(settings, "PROMETHEUS_METRIC_NAMESPACE", "booml")
+
+SESSION_EVICTIONS = Counter(
+    "session_evictions_total",
+    "Runtime sessions hibernated or stopped to stay within memory and quota limits.",
+    labelnames=("reason", "action"),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+HOST_MEMORY_USED_RATIO = Gauge(
+    "host_memory_used_ratio",
+    "Share of host memory in use at the last eviction check.",
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+SESSIONS_MEMORY_BYTES = Gauge(
+    "runtime_sessions_memory_bytes",
+    "Memory held by running runtime sessions of this process at the last eviction check.",
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+
+class SessionQuotaExceeded(Exception):
+    """Raised when a user has no session that could make room for a new one."""
+
+
+@dataclass(frozen=True)
+class SessionUsage:
+    session_id: str
+    user_id: int | None
+    memory_bytes: int
+    updated_at: datetime
+    busy: bool = False
+
+
+def _read_int_setting(name: str) -> int:
+    try:
+        return max(0, int(getattr(settings, name, 0) or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _read_ratio_setting(name: str, default: float) -> float:
+    try:
+        value = float(getattr(settings, name, default))
+    except (TypeError, ValueError):
+        return default
+    return min(max(value, 0.0), 1.0)
+
+
+def get_user_max_sessions() -> int:
+    """Running sessions a user may hold at once; 0 means unlimited."""
+    return _read_int_setting("RUNTIME_USER_MAX_SESSIONS")
+
+
+def get_user_max_memory_bytes() -> int:
+    """Memory all running sessions of a user may hold together; 0 means unlimited."""
+    return _read_int_setting("RUNTIME_USER_MAX_MEMORY_MB") * 1024 * 1024
+
+
+def get_watermarks() -> Tuple[float, float]:
+    """``(high, low)`` host memory watermarks; a high watermark of 0 disables host eviction."""
+    high = _read_ratio_setting("RUNTIME_HOST_MEMORY_HIGH_WATERMARK", DEFAULT_HIGH_WATERMARK)
+    low = _read_ratio_setting("RUNTIME_HOST_MEMORY_LOW_WATERMARK", DEFAULT_LOW_WATERMARK)
+    return high, min(low, high)
+
+
+def get_eviction_action() -> str:
+    action = str(getattr(settings, "RUNTIME_EVICTION_ACTION", "hibernate") or "hibernate").strip().lower()
+    return action if action in EVICTION_ACTIONS else "hibernate"
+
+
+def host_memory() -> Tuple[int, int]:
+    """``(used, total)`` host memory in bytes; ``used`` excludes reclaimable caches."""
+    memory = psutil.virtual_memory()
+    used = memory.total - memory.available
+    HOST_MEMORY_USED_RATIO.set(used / memory.total if memory.total else 0.0)
+    return used, memory.total
+
+
+def estimate_namespace_bytes(namespace: Dict[str, Any]) -> int:
+    """
+    Approximate memory held by the values of an in-process namespace.
+
+    Array-like values report their buffers (``nbytes`` or pandas' shallow
+    ``memory_usage``); everything else counts with ``sys.getsizeof`` plus its
+    direct items for builtin containers. Values referenced twice count once.
+    """
+    seen: set[int] = set()
+    total = 0
+    for name, value in namespace.items():
+        if name.startswith("__") and name.endswith("__"):
+            continue
+        total += _estimate_value_bytes(value, seen, depth=1)
+    return total
+
+
+def _estimate_value_bytes(value: Any, seen: set[int], *, depth: int) -> int:
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, types.ModuleType):
+        return 0
+    memory_usage = getattr(value, "memory_usage", None)
+    if callable(memory_usage) and hasattr(value, "columns"):
+        try:
+            return int(memory_usage(index=True, deep=False).sum())
+        except Exception:
+            pass
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    try:
+        size = sys.getsizeof(value)
+    except TypeError:
+        return 0
+    if depth > 0:
+        if isinstance(value, dict):
+            items: Iterable[Any] = list(value.values())
+        elif isinstance(value, (list, tuple, set, frozenset)):
+            items = list(value)
+        else:
+            items = ()
+        for item in items:
+            size += _estimate_value_bytes(item, seen, depth=depth - 1)
+    return size
+
+
+def select_for_session_quota(
+    usages: Iterable[SessionUsage],
+    *,
+    user_id: int | None,
+    max_sessions: int,
+) -> List[str]:
+    """Sessions of ``user_id`` to evict so that one more session fits into the quota."""
+    if user_id is None or max_sessions <= 0:
+        return []
+    owned = [usage for usage in usages if usage.user_id == user_id]
+    excess = len(owned) - max_sessions + 1
+    if excess <= 0:
+        return []
+    idle = sorted((usage for usage in owned if not usage.busy), key=lambda usage: usage.updated_at)
+    if len(idle) < excess:
+        raise SessionQuotaExceeded(
+            f"User {user_id} already runs {len(owned)} sessions (limit {max_sessions}) and none of them is idle"
+        )
+    return [usage.session_id for usage in idle[:excess]]
+
+
+def plan_evictions(
+    usages: Iterable[SessionUsage],
+    *,
+    host_used: int,
+    host_total: int,
+    high_watermark: float,
+    low_watermark: float,
+    user_max_memory: int = 0,
+) -> List[Tuple[str, str]]:
+    """
+    Pick ``(session_id, reason)`` pairs to evict, least recently used first.
+
+    Users over their memory quota give up their own sessions first; if the host
+    is still above the high watermark, any idle session may be taken until the
+    projected use falls below the low watermark.
+    """
+    all_usages = list(usages)
+    candidates = sorted((usage for usage in all_usages if not usage.busy), key=lambda usage: usage.updated_at)
+    chosen: Dict[str, str] = {}
+    freed = 0
+
+    if user_max_memory > 0:
+        per_user: Dict[int, int] = {}
+        for usage in all_usages:
+            if usage.user_id is not None:
+                per_user[usage.user_id] = per_user.get(usage.user_id, 0) + usage.memory_bytes
+        for usage in candidates:
+            held = per_user.get(usage.user_id) if usage.user_id is not None else None
+            if held is None or held <= user_max_memory:
+                continue
+            chosen[usage.session_id] = REASON_USER_MEMORY
+            per_user[usage.user_id] = held - usage.memory_bytes
+            freed += usage.memory_bytes
+
+    if host_total > 0 and high_watermark > 0 and (host_used - freed) / host_total > high_watermark:
+        target = low_watermark * host_total
+        for usage in candidates:
+            if host_used - freed <= target:
+                break
+            if usage.session_id in chosen:
+                continue
+            chosen[usage.session_id] = REASON_HOST_MEMORY
+            freed += usage.memory_bytes
+
+    return list(chosen.items())
+
+
+def record_eviction(reason: str, action: str) -> None:
+    SESSION_EVICTIONS.labels(reason=reason, action=action).inc()
+
+
+def record_sessions_memory(usages: Iterable[SessionUsage]) -> None:
+    SESSIONS_MEMORY_BYTES.set(sum(usage.memory_bytes for usage in usages))
+
+
+def eviction_message(reason: str, action: str) -> Optional[str]:
+    verb = "приостановлена" if action == "hibernate" else "остановлена"
+    if reason == REASON_USER_SESSIONS:
+        return f"Сессия {verb}: достигнут лимит одновременно запущенных сессий"
+    if reason == REASON_USER_MEMORY:
+        return f"Сессия {verb}: превышен лимит памяти на пользователя"
+    if reason == REASON_HOST_MEMORY:
+        return f"Сессия {verb}: на сервере не хватает памяти"
+    return None
+
+
+__all__ = [
+    "SessionQuotaExceeded",
+    "SessionUsage",
+    "REASON_USER_SESSIONS",
+    "REASON_USER_MEMORY",
+    "REASON_HOST_MEMORY",
+    "get_user_max_sessions",
+    "get_user_max_memory_bytes",
+    "get_watermarks",
+    "get_eviction_action",
+    "host_memory",
+    "estimate_namespace_bytes",
+    "select_for_session_quota",
+    "plan_evictions",
+    "record_eviction",
+    "record_sessions_memory",
+    "eviction_message",
+]
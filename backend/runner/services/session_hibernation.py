@@ -0,0 +1,161 @@
+"""Snapshot of notebook namespaces for hibernated runtime sessions.
+
+Idle sessions give their memory (and, for Docker VMs, their container) back to
+the host. Picklable namespace values are written to ``hibernate.pkl`` in the
+workspace agent directory and loaded into a fresh interpreter on the next run.
+Imported modules are stored by name and re-imported; values that cannot be
+pickled or do not fit into the size budget are reported as skipped.
+
+The VM agent server carries its own copy of this logic (see
+``vm_agent_server.py``) because it runs inside the container.
+"""
+
+from __future__ import annotations
+
+import importlib
+import os
+import pickle
+import types
+from pathlib import Path
+from typing import Any, Dict
+
+from django.conf import settings
+from prometheus_client import Counter, Histogram
+
+try:  # pragma: no cover - optional dependency
+    import cloudpickle as _pickler
+except ImportError:  # pragma: no cover - optional dependency
+    _pickler = pickle
+
+SNAPSHOT_FILENAME = "hibernate.pkl"
+SNAPSHOT_VERSION = 1
+DEFAULT_MAX_SNAPSHOT_BYTES = 512 * 1024 * 1024
+# Helpers and per-process display hooks installed by the runtime; recreated on restore.
+RUNTIME_NAMES = frozenset({"download_file"})
+RUNTIME_PREFIX = "_booml_"
+
+METRIC_NAMESPACE = getattr(settings, "PROMETHEUS_METRIC_NAMESPACE", "booml")
+
+HIBERNATE_LATENCY = Histogram(
+    "session_hibernate_seconds",
+    "Time spent snapshotting and stopping an idle runtime session.",
+    labelnames=("backend",),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+RESTORE_LATENCY = Histogram(
+    "session_restore_seconds",
+    "Time spent bringing a hibernated runtime session back.",
+    labelnames=("backend",),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+SNAPSHOT_BYTES = Counter(
+    "session_snapshot_bytes",
+    "Bytes of namespace snapshots written (hibernate) and read (restore).",
+    labelnames=("backend", "direction"),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+
+def get_hibernate_after_seconds() -> int:
+    """Idle period after which a session is hibernated; 0 disables hibernation."""
+    try:
+        return max(0, int(getattr(settings, "RUNTIME_SESSION_HIBERNATE_AFTER_SECONDS", 0) or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def get_max_snapshot_bytes() -> int:
+    try:
+        return max(0, int(getattr(settings, "RUNTIME_SESSION_SNAPSHOT_MAX_BYTES", DEFAULT_MAX_SNAPSHOT_BYTES)))
+    except (TypeError, ValueError):
+        return DEFAULT_MAX_SNAPSHOT_BYTES
+
+
+def snapshot_path(workdir: Path) -> Path:
+    return workdir / ".vm_agent" / SNAPSHOT_FILENAME
+
+
+def snapshot_namespace(namespace: Dict[str, Any], path: Path, *, max_bytes: int) -> Dict[str, Any]:
+    """Write picklable values of ``namespace`` to ``path``; returns saved/skipped names and size."""
+    entries: Dict[str, tuple] = {}
+    skipped: Dict[str, str] = {}
+    total = 0
+    for name, value in namespace.items():
+        if name.startswith("__") and name.endswith("__") or name in RUNTIME_NAMES or name.startswith(RUNTIME_PREFIX):
+            continue
+        if isinstance(value, types.ModuleType):
+            entries[name] = ("module", value.__name__)
+            continue
+        try:
+            data = _pickler.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as exc:
+            skipped[name] = f"not picklable: {type(exc).__name__}"
+            continue
+        if total + len(data) > max_bytes:
+            skipped[name] = f"over the {max_bytes}-byte snapshot budget"
+            continue
+        entries[name] = ("value", data)
+        total += len(data)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("wb") as handle:
+        pickle.dump({"version": SNAPSHOT_VERSION, "entries": entries}, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return {
+        "saved": sorted(entries),
+        "skipped": skipped,
+        "bytes": path.stat().st_size,
+    }
+
+
+def restore_namespace(namespace: Dict[str, Any], path: Path) -> Dict[str, Any]:
+    """Load a snapshot written by :func:`snapshot_namespace` into ``namespace`` and delete it."""
+    if not path.exists():
+        return {"restored": [], "skipped": {}, "bytes": 0}
+    size = path.stat().st_size
+    with path.open("rb") as handle:
+        snapshot = pickle.load(handle)
+    restored = []
+    skipped: Dict[str, str] = {}
+    for name, (kind, payload) in (snapshot.get("entries") or {}).items():
+        try:
+            if kind == "module":
+                namespace[name] = importlib.import_module(payload)
+            else:
+                namespace[name] = _pickler.loads(payload)
+        except Exception as exc:
+            skipped[name] = f"restore failed: {type(exc).__name__}"
+            continue
+        restored.append(name)
+    path.unlink(missing_ok=True)
+    return {"restored": sorted(restored), "skipped": skipped, "bytes": size}
+
+
+def record_hibernation(backend: str, *, seconds: float, size: int) -> None:
+    HIBERNATE_LATENCY.labels(backend=backend).observe(seconds)
+    SNAPSHOT_BYTES.labels(backend=backend, direction="hibernate").inc(size)
+
+
+def record_restore(backend: str, *, seconds: float, size: int) -> None:
+    RESTORE_LATENCY.labels(backend=backend).observe(seconds)
+    SNAPSHOT_BYTES.labels(backend=backend, direction="restore").inc(size)
+
+
+__all__ = [
+    "SNAPSHOT_FILENAME",
+    "get_hibernate_after_seconds",
+    "get_max_snapshot_bytes",
+    "snapshot_path",
+    "snapshot_namespace",
+    "restore_namespace",
+    "record_hibernation",
+    "record_restore",
+]
@@ -0,0 +1,176 @@
+"""Background reclamation of expired runtime sessions.
+
+Requests only detach a session (drop the handle and its registry record); the
+expensive part - removing the container and the workspace - is queued here and
+runs on a bounded pool of worker threads. A scanner thread looks for expired
+sessions every ``interval`` seconds so that no request has to sweep the whole
+session table, and it also drives the periodic maintenance of the backend
+(idle hibernation, memory limits).
+
+Recreating a session whose teardown is still queued waits for that teardown
+only, so the same VM id is never created and destroyed concurrently.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict
+
+from django.conf import settings
+from prometheus_client import Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_SECONDS = 15.0
+DEFAULT_WORKERS = 4
+
+METRIC_NAMESPACE = getattr(settings, "PROMETHEUS_METRIC_NAMESPACE", "booml")
+
+TEARDOWN_LATENCY = Histogram(
+    "session_teardown_seconds",
+    "Time spent removing the VM and workspace of a stopped runtime session.",
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+RECLAIM_LATENCY = Histogram(
+    "session_reclaim_seconds",
+    "Time from a session being detached to its resources being reclaimed.",
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+PENDING_TEARDOWNS = Gauge(
+    "session_teardowns_pending",
+    "Session teardowns queued or running in the background reaper.",
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+
+def is_reaper_enabled() -> bool:
+    return bool(getattr(settings, "RUNTIME_SESSION_REAPER_ENABLED", True))
+
+
+def get_reaper_interval() -> float:
+    try:
+        return max(1.0, float(getattr(settings, "RUNTIME_SESSION_REAPER_INTERVAL_SECONDS", DEFAULT_INTERVAL_SECONDS)))
+    except (TypeError, ValueError):
+        return DEFAULT_INTERVAL_SECONDS
+
+
+def get_reaper_workers() -> int:
+    try:
+        return max(1, int(getattr(settings, "RUNTIME_SESSION_REAPER_WORKERS", DEFAULT_WORKERS)))
+    except (TypeError, ValueError):
+        return DEFAULT_WORKERS
+
+
+class SessionReaper:
+    def __init__(
+        self,
+        scan: Callable[[], object],
+        *,
+        interval: float = DEFAULT_INTERVAL_SECONDS,
+        workers: int = DEFAULT_WORKERS,
+    ):
+        self.scan = scan
+        self.interval = interval
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="session-teardown")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, session_id: str, teardown: Callable[[], None]) -> Future:
+        """Queue ``teardown`` for ``session_id``; runs after any earlier teardown of the same id."""
+        queued_at = time.monotonic()
+        with self._lock:
+            previous = self._pending.get(session_id)
+
+            def _run() -> None:
+                if previous is not None:
+                    previous.exception()
+                started = time.monotonic()
+                try:
+                    teardown()
+                finally:
+                    finished = time.monotonic()
+                    TEARDOWN_LATENCY.observe(finished - started)
+                    RECLAIM_LATENCY.observe(finished - queued_at)
+
+            future = self._executor.submit(_run)
+            self._pending[session_id] = future
+            PENDING_TEARDOWNS.set(len(self._pending))
+        future.add_done_callback(lambda done, key=session_id: self._forget(key, done))
+        return future
+
+    def _forget(self, session_id: str, future: Future) -> None:
+        exc = future.exception()
+        if exc is not None:
+            logger.warning("Teardown of session %s failed: %s", session_id, exc)
+        with self._lock:
+            if self._pending.get(session_id) is future:
+                self._pending.pop(session_id, None)
+            PENDING_TEARDOWNS.set(len(self._pending))
+
+    def wait_for(self, session_id: str, timeout: float | None = None) -> None:
+        with self._lock:
+            future = self._pending.get(session_id)
+        if future is not None:
+            future.exception(timeout=timeout)
+
+    def drain(self, timeout: float | None = None) -> None:
+        """Wait for every queued teardown."""
+        with self._lock:
+            futures = list(self._pending.values())
+        for future in futures:
+            future.exception(timeout=timeout)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        """Start the scanner thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._scan_loop, name="session-reaper", daemon=True)
+        self._thread.start()
+
+    def stop(self, *, wait: bool = True) -> None:
+        self._stopped.set()
+        self._wake.set()
+        self._executor.shutdown(wait=wait)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._stopped.is_set()
+
+    def _scan_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self.scan()
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning("Session reaper scan failed: %s", exc)
+
+
+__all__ = [
+    "SessionReaper",
+    "is_reaper_enabled",
+    "get_reaper_interval",
+    "get_reaper_workers",
+]
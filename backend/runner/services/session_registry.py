@@ -0,0 +1,281 @@
+"""Cross-process registry for runtime sessions and streaming runs.
+
+Runtime sessions and streaming runs are driven from whichever web worker the
+request lands on. Their metadata (owner process, VM id, workspace, liveness) is
+therefore kept in a shared store instead of a per-process dict:
+
+* ``redis`` - shared by every host, selected with ``RUNTIME_SESSION_REGISTRY=redis``;
+* ``file`` - JSON files under ``RUNTIME_SESSION_REGISTRY_ROOT``, shared by the
+  worker processes of one host (the default);
+* ``memory`` - a per-process dict, used by the test suite.
+
+Records are plain JSON objects grouped by ``kind`` (``sessions``, ``runs``, ...).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import socket
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+Record = Dict[str, Any]
+
+DEFAULT_RECORD_TTL_SECONDS = 24 * 3600
+_SAFE_KEY_PATTERN = re.compile(r"[^A-Za-z0-9_.-]")
+_registry: "SessionRegistry | None" = None
+_registry_lock = threading.Lock()
+
+
+def current_owner() -> Dict[str, Any]:
+    return {"host": socket.gethostname(), "pid": os.getpid()}
+
+
+def is_current_owner(owner: Optional[Dict[str, Any]]) -> bool:
+    return bool(owner) and owner == current_owner()
+
+
+def is_owner_alive(owner: Optional[Dict[str, Any]], *, heartbeat_at: float | None = None) -> bool:
+    """
+    Best-effort liveness of the process that owns a record.
+
+    Same-host owners are checked by pid; remote owners are considered alive while
+    their heartbeat is fresher than ``RUNTIME_SESSION_HEARTBEAT_TIMEOUT_SECONDS``.
+    """
+    if not owner:
+        return False
+    if owner.get("host") == socket.gethostname():
+        try:
+            os.kill(int(owner.get("pid") or 0), 0)
+        except (OSError, ValueError):
+            return False
+        return True
+    timeout = float(getattr(settings, "RUNTIME_SESSION_HEARTBEAT_TIMEOUT_SECONDS", 120))
+    return heartbeat_at is not None and time.time() - float(heartbeat_at) <= timeout
+
+
+class SessionRegistry(ABC):
+    """Key/value store of JSON records with per-record expiry."""
+
+    @abstractmethod
+    def get(self, kind: str, key: str) -> Optional[Record]:
+        ...
+
+    @abstractmethod
+    def put(self, kind: str, key: str, record: Record, *, ttl: int = DEFAULT_RECORD_TTL_SECONDS) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, kind: str, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def items(self, kind: str) -> Iterator[Tuple[str, Record]]:
+        ...
+
+    def update(self, kind: str, key: str, *, ttl: int = DEFAULT_RECORD_TTL_SECONDS, **fields: Any) -> Optional[Record]:
+        """Merge ``fields`` into an existing record; last writer wins."""
+        record = self.get(kind, key)
+        if record is None:
+            return None
+        record.update(fields)
+        self.put(kind, key, record, ttl=ttl)
+        return record
+
+
+class MemorySessionRegistry(SessionRegistry):
+    """Per-process registry; the behaviour before sessions were shared."""
+
+    def __init__(self) -> None:
+        self._records: Dict[Tuple[str, str], Tuple[float, Record]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, key: str) -> Optional[Record]:
+        with self._lock:
+            entry = self._records.get((kind, key))
+            if entry is None:
+                return None
+            expires_at, record = entry
+            if expires_at < time.time():
+                self._records.pop((kind, key), None)
+                return None
+            return json.loads(json.dumps(record))
+
+    def put(self, kind: str, key: str, record: Record, *, ttl: int = DEFAULT_RECORD_TTL_SECONDS) -> None:
+        with self._lock:
+            self._records[(kind, key)] = (time.time() + ttl, json.loads(json.dumps(record)))
+
+    def delete(self, kind: str, key: str) -> None:
+        with self._lock:
+            self._records.pop((kind, key), None)
+
+    def items(self, kind: str) -> Iterator[Tuple[str, Record]]:
+        with self._lock:
+            keys = [key for record_kind, key in self._records if record_kind == kind]
+        for key in keys:
+            record = self.get(kind, key)
+            if record is not None:
+                yield key, record
+
+
+class FileSessionRegistry(SessionRegistry):
+    """JSON files on a filesystem shared by the worker processes."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.root / kind / f"{_SAFE_KEY_PATTERN.sub('_', key)}.json"
+
+    def get(self, kind: str, key: str) -> Optional[Record]:
+        path = self._path(kind, key)
+        try:
+            envelope = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.debug("Ignoring unreadable registry record %s: %s", path, exc)
+            return None
+        if envelope.get("expires_at", 0) < time.time():
+            path.unlink(missing_ok=True)
+            return None
+        if envelope.get("key") != key:
+            # Two keys sanitized to the same file name; treat as a miss.
+            return None
+        return envelope.get("record")
+
+    def put(self, kind: str, key: str, record: Record, *, ttl: int = DEFAULT_RECORD_TTL_SECONDS) -> None:
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        envelope = {"key": key, "expires_at": time.time() + ttl, "record": record}
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(json.dumps(envelope), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def delete(self, kind: str, key: str) -> None:
+        self._path(kind, key).unlink(missing_ok=True)
+
+    def items(self, kind: str) -> Iterator[Tuple[str, Record]]:
+        directory = self.root / kind
+        if not directory.exists():
+            return
+        for path in sorted(directory.glob("*.json")):
+            try:
+                envelope = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            key = envelope.get("key")
+            if not key:
+                continue
+            record = self.get(kind, key)
+            if record is not None:
+                yield key, record
+
+
+class RedisSessionRegistry(SessionRegistry):
+    """Registry shared by every backend host through Redis."""
+
+    def __init__(self, url: str, *, prefix: str = "runtime"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, kind: str, key: str) -> str:
+        return f"{self.prefix}:{kind}:{key}"
+
+    def _index(self, kind: str) -> str:
+        return f"{self.prefix}:{kind}:__index__"
+
+    def get(self, kind: str, key: str) -> Optional[Record]:
+        raw = self.client.get(self._key(kind, key))
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def put(self, kind: str, key: str, record: Record, *, ttl: int = DEFAULT_RECORD_TTL_SECONDS) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self._key(kind, key), json.dumps(record), ex=max(int(ttl), 1))
+        pipe.sadd(self._index(kind), key)
+        pipe.execute()
+
+    def delete(self, kind: str, key: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(kind, key))
+        pipe.srem(self._index(kind), key)
+        pipe.execute()
+
+    def items(self, kind: str) -> Iterator[Tuple[str, Record]]:
+        keys = sorted(member.decode() if isinstance(member, bytes) else member for member in self.client.smembers(self._index(kind)))
+        if not keys:
+            return
+        values = self.client.mget([self._key(kind, key) for key in keys])
+        expired = []
+        for key, raw in zip(keys, values):
+            if raw is None:
+                expired.append(key)
+                continue
+            yield key, json.loads(raw)
+        if expired:
+            self.client.srem(self._index(kind), *expired)
+
+
+def _build_registry() -> SessionRegistry:
+    name = str(getattr(settings, "RUNTIME_SESSION_REGISTRY", "file") or "file").strip().lower()
+    if name == "memory":
+        return MemorySessionRegistry()
+    if name == "file":
+        root = getattr(settings, "RUNTIME_SESSION_REGISTRY_ROOT", None)
+        if not root:
+            sandbox_root = getattr(settings, "RUNTIME_SANDBOX_ROOT", None) or (
+                Path(settings.BASE_DIR) / "media" / "notebook_sessions"
+            )
+            root = Path(sandbox_root) / ".registry"
+        return FileSessionRegistry(Path(root))
+    if name == "redis":
+        url = getattr(settings, "RUNTIME_SESSION_REGISTRY_URL", "") or ""
+        if not url:
+            raise ValueError("RUNTIME_SESSION_REGISTRY=redis requires RUNTIME_SESSION_REGISTRY_URL")
+        return RedisSessionRegistry(url)
+    raise ValueError(f"Unsupported runtime session registry: {name!r}")
+
+
+def get_session_registry() -> SessionRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = _build_registry()
+    return _registry
+
+
+def reset_session_registry() -> None:
+    """Drop the cached registry so that settings are re-read (useful for tests)."""
+    global _registry
+    with _registry_lock:
+        _registry = None
+
+
+__all__ = [
+    "SessionRegistry",
+    "MemorySessionRegistry",
+    "FileSessionRegistry",
+    "RedisSessionRegistry",
+    "current_owner",
+    "is_current_owner",
+    "is_owner_alive",
+    "get_session_registry",
+    "reset_session_registry",
+]
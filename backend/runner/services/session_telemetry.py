@@ -0,0 +1,450 @@
+"""Measured resource use of runtime sessions.
+
+A stats source reads cumulative counters of every running session:
+
+* Docker VMs - from the cgroup of the container's init process (``cpu.stat``,
+  ``memory.current`` and ``memory.stat`` on cgroup v2, the ``cpuacct`` and
+  ``memory`` controllers on v1) and its network namespace
+  (``/proc/<pid>/net/dev``); when the cgroup is not visible from the server,
+  memory falls back to ``docker stats``;
+* local sessions - the namespace estimate also used for eviction; their code
+  runs in the server process, so CPU and network are not attributed;
+
+plus the size of the workspace on disk for both. ``SessionTelemetry`` turns
+successive readings into rates, keeps the last ``RUNTIME_TELEMETRY_HISTORY``
+samples per session and publishes the latest one as Prometheus gauges.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Mapping, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+from prometheus_client import Gauge
+
+from .session_eviction import estimate_namespace_bytes
+from .vm_manager import get_vm_manager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL_SECONDS = 15.0
+DEFAULT_HISTORY = 60
+
+METRIC_NAMESPACE = getattr(settings, "PROMETHEUS_METRIC_NAMESPACE", "booml")
+
+SESSION_CPU_PERCENT = Gauge(
+    "session_cpu_percent",
+    "CPU used by a runtime session at the last sample, in percent of one core.",
+    labelnames=("session",),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+SESSION_MEMORY_BYTES = Gauge(
+    "session_memory_bytes",
+    "Memory held by a runtime session at the last sample.",
+    labelnames=("session",),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+SESSION_DISK_BYTES = Gauge(
+    "session_disk_bytes",
+    "Disk space used by the workspace of a runtime session at the last sample.",
+    labelnames=("session",),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+SESSION_NETWORK_BYTES_PER_SECOND = Gauge(
+    "session_network_bytes_per_second",
+    "Network throughput of a runtime session over the last sampling interval.",
+    labelnames=("session", "direction"),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+
+@dataclass(frozen=True)
+class ResourceCounters:
+    """One raw reading; ``None`` marks what the source cannot observe."""
+
+    cpu_seconds: float | None = None
+    memory_bytes: int | None = None
+    disk_bytes: int | None = None
+    net_rx_bytes: int | None = None
+    net_tx_bytes: int | None = None
+
+
+@dataclass(frozen=True)
+class ResourceSample:
+    timestamp: datetime
+    cpu_percent: float | None = None
+    memory_bytes: int | None = None
+    disk_bytes: int | None = None
+    net_rx_bytes_per_second: float | None = None
+    net_tx_bytes_per_second: float | None = None
+
+    def to_payload(self) -> Dict[str, object]:
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "cpu_percent": None if self.cpu_percent is None else round(self.cpu_percent, 1),
+            "memory_bytes": self.memory_bytes,
+            "disk_bytes": self.disk_bytes,
+            "net_rx_bytes_per_second": _round_rate(self.net_rx_bytes_per_second),
+            "net_tx_bytes_per_second": _round_rate(self.net_tx_bytes_per_second),
+        }
+
+
+def get_telemetry_interval() -> float:
+    try:
+        return max(1.0, float(getattr(settings, "RUNTIME_TELEMETRY_INTERVAL_SECONDS", DEFAULT_INTERVAL_SECONDS)))
+    except (TypeError, ValueError):
+        return DEFAULT_INTERVAL_SECONDS
+
+
+def get_telemetry_history() -> int:
+    try:
+        return max(1, int(getattr(settings, "RUNTIME_TELEMETRY_HISTORY", DEFAULT_HISTORY)))
+    except (TypeError, ValueError):
+        return DEFAULT_HISTORY
+
+
+class StatsSource:
+    """Reads cumulative resource counters of running sessions."""
+
+    def read(self, sessions: Mapping[str, Any]) -> Dict[str, ResourceCounters]:
+        raise NotImplementedError
+
+
+class HostStatsSource(StatsSource):
+    def __init__(self, *, cgroup_root: Path | str = "/sys/fs/cgroup", proc_root: Path | str = "/proc"):
+        self.cgroup_root = Path(cgroup_root)
+        self.proc_root = Path(proc_root)
+
+    def read(self, sessions: Mapping[str, Any]) -> Dict[str, ResourceCounters]:
+        running = {
+            session_id: session
+            for session_id, session in sessions.items()
+            if getattr(session, "hibernated_at", None) is None
+        }
+        vms = {
+            session_id: session.vm
+            for session_id, session in running.items()
+            if getattr(session.vm, "backend", "local") != "local"
+        }
+        pids: Dict[str, int] = {}
+        if vms:
+            try:
+                pids = get_vm_manager().backend.host_pids(vms.values())
+            except Exception:
+                logger.exception("Failed to look up VM processes")
+
+        counters: Dict[str, ResourceCounters] = {}
+        unobserved = []
+        for session_id, session in running.items():
+            vm = getattr(session, "vm", None)
+            workspace = getattr(vm, "workspace_path", None) or getattr(session, "workdir", None)
+            disk_bytes = _directory_size(Path(workspace)) if workspace else None
+            if session_id not in vms:
+                memory_bytes = estimate_namespace_bytes(getattr(session, "namespace", {}) or {})
+                counters[session_id] = ResourceCounters(memory_bytes=memory_bytes, disk_bytes=disk_bytes)
+                continue
+            pid = pids.get(vm.id)
+            reading = self.read_process(pid) if pid else None
+            if reading is None:
+                unobserved.append((session_id, vm))
+                reading = ResourceCounters()
+            counters[session_id] = replace(reading, disk_bytes=disk_bytes)
+
+        if unobserved:
+            try:
+                memory = get_vm_manager().backend.memory_usage([vm for _, vm in unobserved])
+            except Exception:
+                logger.exception("Failed to read VM memory usage")
+                memory = {}
+            for session_id, vm in unobserved:
+                if vm.id in memory:
+                    counters[session_id] = replace(counters[session_id], memory_bytes=memory[vm.id])
+        return counters
+
+    def read_process(self, pid: int) -> ResourceCounters | None:
+        """Counters of the cgroup and network namespace ``pid`` belongs to."""
+        try:
+            lines = (self.proc_root / str(pid) / "cgroup").read_text().splitlines()
+        except OSError:
+            return None
+        paths: Dict[str, str] = {}
+        for line in lines:
+            parts = line.split(":", 2)
+            if len(parts) != 3:
+                continue
+            for controller in parts[1].split(",") if parts[1] else ("",):
+                paths[controller] = parts[2].lstrip("/")
+
+        if "" in paths:
+            group = self.cgroup_root / paths[""]
+            usage_usec = _read_stat(group / "cpu.stat", "usage_usec")
+            cpu_seconds = usage_usec / 1_000_000 if usage_usec is not None else None
+            memory_bytes = _read_memory(group / "memory.current", group / "memory.stat", "inactive_file")
+        else:
+            usage_ns = _read_int(self.cgroup_root / "cpuacct" / paths.get("cpuacct", "") / "cpuacct.usage")
+            cpu_seconds = usage_ns / 1_000_000_000 if usage_ns is not None else None
+            memory_group = self.cgroup_root / "memory" / paths.get("memory", "")
+            memory_bytes = _read_memory(
+                memory_group / "memory.usage_in_bytes",
+                memory_group / "memory.stat",
+                "total_inactive_file",
+            )
+        if cpu_seconds is None and memory_bytes is None:
+            return None
+        net_rx, net_tx = self._read_network(pid)
+        return ResourceCounters(
+            cpu_seconds=cpu_seconds,
+            memory_bytes=memory_bytes,
+            net_rx_bytes=net_rx,
+            net_tx_bytes=net_tx,
+        )
+
+    def _read_network(self, pid: int) -> Tuple[int | None, int | None]:
+        try:
+            lines = (self.proc_root / str(pid) / "net" / "dev").read_text().splitlines()
+        except OSError:
+            return None, None
+        rx = tx = 0
+        # Two header lines, then "iface: rx_bytes ... (8 receive fields) tx_bytes ...".
+        for line in lines[2:]:
+            name, _, data = line.partition(":")
+            fields = data.split()
+            if name.strip() == "lo" or len(fields) < 9:
+                continue
+            rx += int(fields[0])
+            tx += int(fields[8])
+        return rx, tx
+
+
+class SessionTelemetry:
+    def __init__(self, source: StatsSource, *, history: int = DEFAULT_HISTORY):
+        self.source = source
+        self.history_size = max(1, history)
+        self._history: Dict[str, Deque[ResourceSample]] = {}
+        self._previous: Dict[str, Tuple[datetime, ResourceCounters]] = {}
+        self._sampled_at: float | None = None
+        self._lock = threading.Lock()
+
+    def sample(self, sessions: Mapping[str, Any], *, now: datetime | None = None) -> Dict[str, ResourceSample]:
+        """Read every session once; sessions missing from ``sessions`` are forgotten."""
+        current = now or timezone.now()
+        try:
+            readings = self.source.read(sessions)
+        except Exception:
+            logger.exception("Failed to read runtime session telemetry")
+            readings = {}
+
+        samples: Dict[str, ResourceSample] = {}
+        with self._lock:
+            for session_id, counters in readings.items():
+                previous = self._previous.get(session_id)
+                elapsed = (current - previous[0]).total_seconds() if previous else 0.0
+                before = previous[1] if previous else ResourceCounters()
+                cpu_rate = _rate(counters.cpu_seconds, before.cpu_seconds, elapsed)
+                sample = ResourceSample(
+                    timestamp=current,
+                    cpu_percent=cpu_rate * 100 if cpu_rate is not None else None,
+                    memory_bytes=counters.memory_bytes,
+                    disk_bytes=counters.disk_bytes,
+                    net_rx_bytes_per_second=_rate(counters.net_rx_bytes, before.net_rx_bytes, elapsed),
+                    net_tx_bytes_per_second=_rate(counters.net_tx_bytes, before.net_tx_bytes, elapsed),
+                )
+                self._previous[session_id] = (current, counters)
+                self._history.setdefault(session_id, deque(maxlen=self.history_size)).append(sample)
+                samples[session_id] = sample
+            gone = [session_id for session_id in self._history if session_id not in readings]
+            for session_id in gone:
+                self._history.pop(session_id, None)
+                self._previous.pop(session_id, None)
+            self._sampled_at = time.monotonic()
+
+        for session_id in gone:
+            _remove_gauges(session_id)
+        for session_id, sample in samples.items():
+            _publish(session_id, sample)
+        return samples
+
+    def sample_if_due(
+        self,
+        sessions: Mapping[str, Any],
+        *,
+        interval: float | None = None,
+        now: datetime | None = None,
+    ) -> Dict[str, ResourceSample]:
+        """Sample unless the last sample is younger than ``interval``; returns the latest samples."""
+        if interval is None:
+            interval = get_telemetry_interval()
+        with self._lock:
+            fresh = self._sampled_at is not None and time.monotonic() - self._sampled_at < interval
+        if not fresh:
+            return self.sample(sessions, now=now)
+        with self._lock:
+            return {session_id: history[-1] for session_id, history in self._history.items() if history}
+
+    def latest(self, session_id: str) -> ResourceSample | None:
+        with self._lock:
+            history = self._history.get(session_id)
+            return history[-1] if history else None
+
+    def history(self, session_id: str) -> List[ResourceSample]:
+        with self._lock:
+            return list(self._history.get(session_id, ()))
+
+    def clear(self) -> None:
+        with self._lock:
+            session_ids = list(self._history)
+            self._history.clear()
+            self._previous.clear()
+            self._sampled_at = None
+        for session_id in session_ids:
+            _remove_gauges(session_id)
+
+
+def _rate(current: float | None, previous: float | None, elapsed: float) -> float | None:
+    if current is None or previous is None or elapsed <= 0 or current < previous:
+        return None
+    return (current - previous) / elapsed
+
+
+def _round_rate(value: float | None) -> float | None:
+    return None if value is None else round(value, 1)
+
+
+def _publish(session_id: str, sample: ResourceSample) -> None:
+    if sample.cpu_percent is not None:
+        SESSION_CPU_PERCENT.labels(session=session_id).set(sample.cpu_percent)
+    if sample.memory_bytes is not None:
+        SESSION_MEMORY_BYTES.labels(session=session_id).set(sample.memory_bytes)
+    if sample.disk_bytes is not None:
+        SESSION_DISK_BYTES.labels(session=session_id).set(sample.disk_bytes)
+    if sample.net_rx_bytes_per_second is not None:
+        SESSION_NETWORK_BYTES_PER_SECOND.labels(session=session_id, direction="rx").set(sample.net_rx_bytes_per_second)
+    if sample.net_tx_bytes_per_second is not None:
+        SESSION_NETWORK_BYTES_PER_SECOND.labels(session=session_id, direction="tx").set(sample.net_tx_bytes_per_second)
+
+
+def _remove_gauges(session_id: str) -> None:
+    for gauge, labels in (
+        (SESSION_CPU_PERCENT, (session_id,)),
+        (SESSION_MEMORY_BYTES, (session_id,)),
+        (SESSION_DISK_BYTES, (session_id,)),
+        (SESSION_NETWORK_BYTES_PER_SECOND, (session_id, "rx")),
+        (SESSION_NETWORK_BYTES_PER_SECOND, (session_id, "tx")),
+    ):
+        try:
+            gauge.remove(*labels)
+        except KeyError:
+            pass
+
+
+def _read_int(path: Path) -> int | None:
+    try:
+        return int(path.read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def _read_stat(path: Path, key: str) -> int | None:
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return None
+    for line in lines:
+        name, _, value = line.partition(" ")
+        if name == key:
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+def _read_memory(usage_path: Path, stat_path: Path, inactive_key: str) -> int | None:
+    # Like ``docker stats``: page cache that can be dropped does not count.
+    usage = _read_int(usage_path)
+    if usage is None:
+        return None
+    return max(0, usage - (_read_stat(stat_path, inactive_key) or 0))
+
+
+def _directory_size(root: Path) -> int | None:
+    """Allocated size of a directory tree; hard-linked files count once."""
+    if not root.is_dir():
+        return None
+    total = 0
+    seen: set[Tuple[int, int]] = set()
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if stat.st_nlink > 1:
+                key = (stat.st_dev, stat.st_ino)
+                if key in seen:
+                    continue
+                seen.add(key)
+            total += stat.st_blocks * 512
+    return total
+
+
+_telemetry: SessionTelemetry | None = None
+_telemetry_lock = threading.Lock()
+
+
+def get_session_telemetry() -> SessionTelemetry:
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            source = HostStatsSource(
+                cgroup_root=getattr(settings, "RUNTIME_TELEMETRY_CGROUP_ROOT", "/sys/fs/cgroup"),
+                proc_root=getattr(settings, "RUNTIME_TELEMETRY_PROC_ROOT", "/proc"),
+            )
+            _telemetry = SessionTelemetry(source, history=get_telemetry_history())
+        return _telemetry
+
+
+def reset_session_telemetry() -> None:
+    global _telemetry
+    with _telemetry_lock:
+        telemetry, _telemetry = _telemetry, None
+    if telemetry is not None:
+        telemetry.clear()
+
+
+__all__ = [
+    "ResourceCounters",
+    "ResourceSample",
+    "StatsSource",
+    "HostStatsSource",
+    "SessionTelemetry",
+    "get_session_telemetry",
+    "get_telemetry_history",
+    "get_telemetry_interval",
+    "reset_session_telemetry",
+]
@@ -0,0 +1,105 @@
+"""Compressed storage of final standings for finished contests."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from ..models import Contest, ContestStandingsSnapshot
+
+_COMPRESSION_LEVEL = 6
+
+
+def compress_standings(data: Dict[str, Any]) -> tuple[bytes, int]:
+    """Return ``(compressed_bytes, raw_size)`` for a JSON-serializable payload."""
+    raw = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, _COMPRESSION_LEVEL), len(raw)
+
+
+def decompress_standings(blob: bytes | memoryview) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(bytes(blob)).decode("utf-8"))
+
+
+def standings_fingerprint(
+    *,
+    end_time: datetime,
+    scoring: str,
+    problem_ids: Iterable[int],
+    participant_ids: Iterable[int],
+) -> str:
+    source = json.dumps(
+        [
+            end_time.isoformat(),
+            scoring,
+            list(problem_ids),
+            sorted(participant_ids),
+        ],
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+def load_standings_snapshot(contest_id: int, fingerprint: str) -> Optional[Dict[str, Any]]:
+    blob = (
+        ContestStandingsSnapshot.objects.filter(contest_id=contest_id, fingerprint=fingerprint)
+        .values_list("data", flat=True)
+        .first()
+    )
+    if blob is None:
+        return None
+    return decompress_standings(blob)
+
+
+def save_standings_snapshot(
+    contest: Contest,
+    fingerprint: str,
+    data: Dict[str, Any],
+) -> ContestStandingsSnapshot:
+    blob, raw_size = compress_standings(data)
+    snapshot, _ = ContestStandingsSnapshot.objects.update_or_create(
+        contest=contest,
+        defaults={
+            "contest_end_time": contest.get_end_time(),
+            "fingerprint": fingerprint,
+            "data": blob,
+            "raw_size": raw_size,
+        },
+    )
+    return snapshot
+
+
+def discard_standings_snapshots(
+    contest_ids: Iterable[int],
+    *,
+    submitted_at: Optional[datetime] = None,
+) -> int:
+    """
+    Drop snapshots of the contests that a submission change can affect.
+
+    A submission made after a contest ended only feeds the upsolving delta, so
+    its snapshot is kept; ``submitted_at=None`` drops the snapshots
+    unconditionally (rescoring, explicit refresh).
+    """
+    contest_ids = [cid for cid in set(contest_ids) if cid]
+    if not contest_ids:
+        return 0
+    snapshots = ContestStandingsSnapshot.objects.filter(contest_id__in=contest_ids)
+    if submitted_at is not None:
+        snapshots = snapshots.filter(contest_end_time__gte=submitted_at)
+    deleted, _ = snapshots.delete()
+    return deleted
+
+
+__all__ = [
+    "compress_standings",
+    "decompress_standings",
+    "standings_fingerprint",
+    "load_standings_snapshot",
+    "save_standings_snapshot",
+    "discard_standings_snapshots",
+]
@@ -1,20 +1,32 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import json
 import logging
 import threading
 import time
 import uuid
 
-from .runtime import RuntimeExecutionResult, SessionNotFoundError, get_session, run_code_stream
+from .cell_dependencies import record_cell_execution
+from .runtime import (
+    CellExecutionResult,
+    RuntimeExecutionResult,
+    SessionNotFoundError,
+    get_session,
+    run_cells_stream,
+    run_code_stream,
+)
+from .session_registry import current_owner, get_session_registry, is_owner_alive
 
 logger = logging.getLogger(__name__)
 
 
 MAX_STREAM_CHUNK_BYTES = 64 * 1024
 RUN_TTL_SECONDS = 3600
+RUNS_REGISTRY_KIND = "runs"
+ACTIVE_RUNS_REGISTRY_KIND = "active_runs"
 
 
 @dataclass
@@ -30,6 +42,11 @@ class StreamingRun:
     finished_at: float | None = None
     error: str | None = None
     result: RuntimeExecutionResult | None = None
+    # "Run all" jobs: cells in execution order (``cell_id`` is the first one),
+    # the JSON-lines file of their started/finished events and their results.
+    cell_ids: List[int] = field(default_factory=list)
+    events_path: Path | None = None
+    cell_results: List[CellExecutionResult] = field(default_factory=list)
 
 
 _RUNS: Dict[str, StreamingRun] = {}
@@ -41,18 +58,8 @@ class RunInProgressError(RuntimeError):
 
 
 def start_streaming_run(*, session_id: str, cell_id: int, notebook_id: int, code: str) -> StreamingRun:
-    _cleanup_expired_runs()
-    with _LOCK:
-        for run in _RUNS.values():
-            if run.session_id == session_id and run.status == "running":
-                raise RunInProgressError("Run already in progress")
-    session = get_session(session_id, touch=False)
-    if session is None:
-        raise SessionNotFoundError(f"Session '{session_id}' not found")
-
+    stream_dir = _claim_session(session_id)
     run_id = uuid.uuid4().hex
-    stream_dir = session.workdir / ".streams"
-    stream_dir.mkdir(parents=True, exist_ok=True)
     stdout_path = stream_dir / f"{run_id}.stdout"
     stderr_path = stream_dir / f"{run_id}.stderr"
     stdout_path.write_text("", encoding="utf-8")
@@ -68,22 +75,98 @@ def start_streaming_run(*, session_id: str, cell_id: int, notebook_id: int, code
         status="running",
         started_at=time.time(),
     )
+    _launch_run(run, _execute_run, code)
+    return run
+
+
+def start_notebook_run(
+    *,
+    session_id: str,
+    notebook_id: int,
+    cells: Sequence[Tuple[int, str]],
+    stop_on_error: bool = True,
+    on_finish: Callable[[StreamingRun], None] | None = None,
+) -> StreamingRun:
+    """
+    Run ``cells`` (id and code, in order) as one job in the session.
+
+    Every cell streams into its own pair of files and the job appends a
+    started and a finished event per cell to ``events_path``; ``on_finish``
+    gets the run once all results are in, e.g. to save them to the cells.
+    """
+    if not cells:
+        raise ValueError("No cells to run")
+    stream_dir = _claim_session(session_id)
+    run_id = uuid.uuid4().hex
+    cell_ids = [cell_id for cell_id, _ in cells]
+    run = StreamingRun(
+        run_id=run_id,
+        session_id=session_id,
+        cell_id=cell_ids[0],
+        notebook_id=notebook_id,
+        stdout_path=stream_dir / f"{run_id}.{cell_ids[0]}.stdout",
+        stderr_path=stream_dir / f"{run_id}.{cell_ids[0]}.stderr",
+        status="running",
+        started_at=time.time(),
+        cell_ids=cell_ids,
+        events_path=stream_dir / f"{run_id}.events",
+    )
+    run.events_path.write_text("", encoding="utf-8")
+    _launch_run(run, _execute_notebook_run, list(cells), stop_on_error, on_finish)
+    return run
+
+
+def cell_stream_paths(run: StreamingRun, cell_id: int) -> Tuple[Path, Path]:
+    """Stream files of one cell of ``run``."""
+    if not run.cell_ids:
+        return run.stdout_path, run.stderr_path
+    stream_dir = run.stdout_path.parent
+    return stream_dir / f"{run.run_id}.{cell_id}.stdout", stream_dir / f"{run.run_id}.{cell_id}.stderr"
+
+
+def _claim_session(session_id: str) -> Path:
+    """Stream directory of the session, if no other run is executing in it."""
+    _cleanup_expired_runs()
     with _LOCK:
-        _RUNS[run_id] = run
+        for run in _RUNS.values():
+            if run.session_id == session_id and run.status == "running":
+                raise RunInProgressError("Run already in progress")
+    if _has_remote_active_run(session_id):
+        raise RunInProgressError("Run already in progress")
+    session = get_session(session_id, touch=False)
+    if session is None:
+        raise SessionNotFoundError(f"Session '{session_id}' not found")
+    stream_dir = session.workdir / ".streams"
+    stream_dir.mkdir(parents=True, exist_ok=True)
+    return stream_dir
+
 
-    thread = threading.Thread(target=_execute_run, args=(run, code), daemon=True)
+def _launch_run(run: StreamingRun, target, *args) -> None:
+    with _LOCK:
+        _RUNS[run.run_id] = run
+    _publish_run(run)
+    thread = threading.Thread(target=target, args=(run, *args), daemon=True)
     thread.start()
-    return run
 
 
 def get_streaming_run(run_id: str) -> StreamingRun | None:
     _cleanup_expired_runs()
     with _LOCK:
-        return _RUNS.get(run_id)
+        run = _RUNS.get(run_id)
+    if run is not None:
+        return run
+    # The run may be executing in another worker process.
+    try:
+        record = get_session_registry().get(RUNS_REGISTRY_KIND, run_id)
+    except Exception as exc:
+        logger.warning("Failed to look up streaming run %s in the session registry: %s", run_id, exc)
+        return None
+    return _run_from_record(record) if record is not None else None
 
 
 def cancel_streaming_runs(session_id: str, *, reason: str) -> None:
     _cleanup_expired_runs()
+    cancelled: list[StreamingRun] = []
     with _LOCK:
         for run in list(_RUNS.values()):
             if run.session_id != session_id:
@@ -92,15 +175,128 @@ def cancel_streaming_runs(session_id: str, *, reason: str) -> None:
                 run.status = "error"
                 run.error = reason
                 run.finished_at = time.time()
-            _cleanup_run_files(run)
+                cancelled.append(run)
+            _cleanup_run_files(run, events=True)
+    for run in cancelled:
+        _publish_run(run)
+
+    try:
+        registry = get_session_registry()
+        active = registry.get(ACTIVE_RUNS_REGISTRY_KIND, session_id)
+        if active is not None:
+            registry.delete(ACTIVE_RUNS_REGISTRY_KIND, session_id)
+            registry.update(
+                RUNS_REGISTRY_KIND,
+                str(active.get("run_id")),
+                ttl=RUN_TTL_SECONDS,
+                status="error",
+                error=reason,
+                finished_at=time.time(),
+            )
+    except Exception as exc:
+        logger.warning("Failed to cancel shared runs of session %s: %s", session_id, exc)
 
 
-def read_stream_output(run: StreamingRun, *, stdout_offset: int, stderr_offset: int) -> Tuple[str, str, int, int]:
-    stdout_chunk, stdout_next = _read_chunk(run.stdout_path, stdout_offset)
-    stderr_chunk, stderr_next = _read_chunk(run.stderr_path, stderr_offset)
+def read_stream_output(
+    run: StreamingRun,
+    *,
+    stdout_offset: int,
+    stderr_offset: int,
+    cell_id: int | None = None,
+) -> Tuple[str, str, int, int]:
+    stdout_path, stderr_path = cell_stream_paths(run, run.cell_id if cell_id is None else cell_id)
+    stdout_chunk, stdout_next = _read_chunk(stdout_path, stdout_offset)
+    stderr_chunk, stderr_next = _read_chunk(stderr_path, stderr_offset)
     return stdout_chunk, stderr_chunk, stdout_next, stderr_next
 
 
+def read_run_events(run: StreamingRun, *, offset: int) -> Tuple[List[Dict[str, Any]], int]:
+    """Complete events of a "Run all" job written after byte ``offset``, and the next offset."""
+    if run.events_path is None or offset < 0:
+        return [], max(offset, 0)
+    try:
+        with run.events_path.open("rb") as fh:
+            fh.seek(offset)
+            data = fh.read()
+    except OSError:
+        return [], offset
+    complete = data[: data.rfind(b"\n") + 1]
+    events: List[Dict[str, Any]] = []
+    for line in complete.splitlines():
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            logger.warning("Skipping a malformed event of run %s", run.run_id)
+    return events, offset + len(complete)
+
+
+@dataclass
+class StreamCursor:
+    """What a client following a run already has; ``cell_id`` is the cell whose output it reads."""
+
+    cell_id: int | None = None
+    stdout_offset: int = 0
+    stderr_offset: int = 0
+    events_offset: int = 0
+
+
+def read_run_updates(run: StreamingRun, cursor: StreamCursor) -> List[Dict[str, Any]]:
+    """
+    Everything ``run`` produced after ``cursor``, advancing it.
+
+    New output is coalesced into one ``output`` message per cell; new "Run
+    all" events come in one ``events`` message, after the remaining output
+    of the cells they finish. A ``started`` event moves the cursor to the new
+    cell.
+    """
+    updates: List[Dict[str, Any]] = []
+
+    def drain_output() -> None:
+        if cursor.cell_id is None:
+            return
+        stdout_parts: List[str] = []
+        stderr_parts: List[str] = []
+        while True:
+            stdout_chunk, stderr_chunk, cursor.stdout_offset, cursor.stderr_offset = read_stream_output(
+                run,
+                stdout_offset=cursor.stdout_offset,
+                stderr_offset=cursor.stderr_offset,
+                cell_id=cursor.cell_id,
+            )
+            if not stdout_chunk and not stderr_chunk:
+                break
+            stdout_parts.append(stdout_chunk)
+            stderr_parts.append(stderr_chunk)
+        if stdout_parts:
+            updates.append(
+                {
+                    "type": "output",
+                    "cell_id": cursor.cell_id,
+                    "stdout": "".join(stdout_parts),
+                    "stderr": "".join(stderr_parts),
+                    "stdout_offset": cursor.stdout_offset,
+                    "stderr_offset": cursor.stderr_offset,
+                }
+            )
+
+    if cursor.cell_id is None and not run.cell_ids:
+        cursor.cell_id = run.cell_id
+    drain_output()
+    if run.cell_ids:
+        events, cursor.events_offset = read_run_events(run, offset=cursor.events_offset)
+        for event in events:
+            # A resumed cursor can already be on the started cell, with its offsets.
+            if event.get("event") == "started" and event.get("cell_id") != cursor.cell_id:
+                cursor.cell_id = event.get("cell_id")
+                cursor.stdout_offset = cursor.stderr_offset = 0
+            elif event.get("event") == "finished" and event.get("cell_id") == cursor.cell_id:
+                drain_output()
+        if events:
+            updates.append({"type": "events", "events": events, "events_offset": cursor.events_offset})
+        drain_output()
+    return updates
+
+
 def _execute_run(run: StreamingRun, code: str) -> None:
     # Avoid a race where status becomes "finished" before stream files are removed.
     # Some callers/tests treat "finished" as "all cleanup is done".
@@ -115,6 +311,7 @@ def _execute_run(run: StreamingRun, code: str) -> None:
             stdout_path=run.stdout_path,
             stderr_path=run.stderr_path,
         )
+        record_cell_execution(run.session_id, run.cell_id, code, result)
     except SessionNotFoundError as exc:
         final_status = "error"
         final_error = str(exc)
@@ -127,6 +324,43 @@ def _execute_run(run: StreamingRun, code: str) -> None:
         run.finished_at = time.time()
         _cleanup_run_files(run)
         run.status = final_status
+        _publish_run(run)
+
+
+def _execute_notebook_run(
+    run: StreamingRun,
+    cells: List[Tuple[int, str]],
+    stop_on_error: bool,
+    on_finish: Callable[[StreamingRun], None] | None,
+) -> None:
+    final_status = "finished"
+    final_error = None
+    results: List[CellExecutionResult] = []
+    batch = []
+    for cell_id, code in cells:
+        stdout_path, stderr_path = cell_stream_paths(run, cell_id)
+        batch.append({"id": cell_id, "code": code, "stdout_path": stdout_path, "stderr_path": stderr_path})
+
+    try:
+        results = run_cells_stream(run.session_id, batch, events_path=run.events_path, stop_on_error=stop_on_error)
+        sources = dict(cells)
+        for item in results:
+            record_cell_execution(run.session_id, item.cell_id, sources.get(item.cell_id, ""), item.result)
+    except Exception as exc:
+        final_status = "error"
+        final_error = str(exc)
+    finally:
+        run.cell_results = results
+        if on_finish is not None and results:
+            try:
+                on_finish(run)
+            except Exception:
+                logger.exception("Failed to store the results of run %s", run.run_id)
+        run.error = final_error
+        run.finished_at = time.time()
+        _cleanup_run_files(run)
+        run.status = final_status
+        _publish_run(run)
 
 
 def _read_chunk(path: Path, offset: int) -> Tuple[str, int]:
@@ -157,12 +391,101 @@ def _cleanup_expired_runs() -> None:
         for run_id in expired:
             run = _RUNS.pop(run_id, None)
             if run:
-                _cleanup_run_files(run)
+                _cleanup_run_files(run, events=True)
 
 
-def _cleanup_run_files(run: StreamingRun) -> None:
-    for path in (run.stdout_path, run.stderr_path):
+def _cleanup_run_files(run: StreamingRun, *, events: bool = False) -> None:
+    # Events of a finished "Run all" job stay readable until the run expires.
+    paths = [path for cell_id in run.cell_ids or [run.cell_id] for path in cell_stream_paths(run, cell_id)]
+    if events and run.events_path is not None:
+        paths.append(run.events_path)
+    for path in paths:
         try:
             path.unlink(missing_ok=True)
         except Exception as exc:
             logger.debug("Failed to remove stream file %s: %s", path, exc)
+
+
+def _run_record(run: StreamingRun) -> Dict[str, Any]:
+    return {
+        "run_id": run.run_id,
+        "session_id": run.session_id,
+        "cell_id": run.cell_id,
+        "notebook_id": run.notebook_id,
+        "stdout_path": str(run.stdout_path),
+        "stderr_path": str(run.stderr_path),
+        "status": run.status,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "error": run.error,
+        "result": asdict(run.result) if run.result is not None else None,
+        "cell_ids": run.cell_ids,
+        "events_path": str(run.events_path) if run.events_path is not None else None,
+        "cell_results": [asdict(item) for item in run.cell_results],
+        "owner": current_owner(),
+    }
+
+
+def _run_from_record(record: Dict[str, Any]) -> StreamingRun:
+    status = str(record.get("status") or "running")
+    error = record.get("error")
+    finished_at = record.get("finished_at")
+    owner = record.get("owner") or {}
+    # Runs do not heartbeat, so only a same-host owner can be declared dead.
+    if status == "running" and owner.get("host") == current_owner()["host"] and not is_owner_alive(owner):
+        status = "error"
+        error = "Run was interrupted: the worker executing it has exited"
+        finished_at = finished_at or time.time()
+    result = record.get("result")
+    return StreamingRun(
+        run_id=str(record["run_id"]),
+        session_id=str(record["session_id"]),
+        cell_id=int(record["cell_id"]),
+        notebook_id=int(record["notebook_id"]),
+        stdout_path=Path(record["stdout_path"]),
+        stderr_path=Path(record["stderr_path"]),
+        status=status,
+        started_at=float(record.get("started_at") or 0.0),
+        finished_at=finished_at,
+        error=error,
+        result=RuntimeExecutionResult(**result) if isinstance(result, dict) else None,
+        cell_ids=[int(cell_id) for cell_id in record.get("cell_ids") or []],
+        events_path=Path(record["events_path"]) if record.get("events_path") else None,
+        cell_results=[
+            CellExecutionResult(
+                cell_id=item.get("cell_id"),
+                duration_ms=item.get("duration_ms"),
+                result=RuntimeExecutionResult(**item["result"]),
+            )
+            for item in record.get("cell_results") or []
+        ],
+    )
+
+
+def _publish_run(run: StreamingRun) -> None:
+    """Share the run state so that any worker can serve its status polls."""
+    try:
+        registry = get_session_registry()
+        if run.status == "running":
+            registry.put(RUNS_REGISTRY_KIND, run.run_id, _run_record(run))
+            registry.put(ACTIVE_RUNS_REGISTRY_KIND, run.session_id, {"run_id": run.run_id})
+            return
+        registry.put(RUNS_REGISTRY_KIND, run.run_id, _run_record(run), ttl=RUN_TTL_SECONDS)
+        active = registry.get(ACTIVE_RUNS_REGISTRY_KIND, run.session_id)
+        if active is not None and active.get("run_id") == run.run_id:
+            registry.delete(ACTIVE_RUNS_REGISTRY_KIND, run.session_id)
+    except Exception as exc:
+        logger.warning("Failed to publish streaming run %s to the session registry: %s", run.run_id, exc)
+
+
+def _has_remote_active_run(session_id: str) -> bool:
+    try:
+        registry = get_session_registry()
+        active = registry.get(ACTIVE_RUNS_REGISTRY_KIND, session_id)
+        if active is None:
+            return False
+        record = registry.get(RUNS_REGISTRY_KIND, str(active.get("run_id")))
+    except Exception as exc:
+        logger.warning("Failed to check shared runs of session %s: %s", session_id, exc)
+        return False
+    return record is not None and _run_from_record(record).status == "running"
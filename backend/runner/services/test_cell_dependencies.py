@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from runner.services.cell_dependencies import analyze_cell, record_cell_execution, stale_cells
+from runner.services.runtime import RuntimeExecutionResult
+
+
+def _result(variables=(), *, error=None) -> RuntimeExecutionResult:
+    return RuntimeExecutionResult(
+        stdout="",
+        stderr="",
+        error=error,
+        variables={name: "..." for name in variables},
+        outputs=[],
+        artifacts=[],
+    )
+
+
+class AnalyzeCellTests(SimpleTestCase):
+    def test_reads_exclude_names_bound_earlier_in_the_cell(self):
+        reads, writes = analyze_cell("import numpy as np\nx = np.arange(n)\ny = x + offset\ny += 1")
+
+        self.assertEqual(reads, {"n", "offset"})
+        self.assertEqual(writes, {"np", "x", "y"})
+
+    def test_function_bodies_read_their_free_names(self):
+        reads, writes = analyze_cell(
+            "def score(row, k=default_k):\n    local = row * weight\n    return [local + i for i in range(k)]"
+        )
+
+        self.assertEqual(reads, {"default_k", "weight", "range"})
+        self.assertEqual(writes, {"score"})
+
+    def test_mutations_count_as_definitions(self):
+        reads, writes = analyze_cell("model.fit(X, y)\ndf['a'] = 1\nconfig.lr = 0.1\nprint(model)")
+
+        self.assertEqual(writes, {"model", "df", "config"})
+        self.assertIn("X", reads)
+
+    def test_shell_lines_are_analyzed_and_invalid_code_is_opaque(self):
+        self.assertEqual(analyze_cell("!pip install tqdm\nimport tqdm"), (frozenset(), frozenset({"tqdm"})))
+        self.assertIsNone(analyze_cell("def broken(:")[0])
+
+
+class StaleCellsTests(SimpleTestCase):
+    def setUp(self):
+        self.session = SimpleNamespace(executed_cells={}, lock=threading.RLock())
+        patcher = patch("runner.services.cell_dependencies.get_session", return_value=self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cells = [
+            (1, "import math\nbase = 10"),
+            (2, "data = list(range(base))"),
+            (3, "scale = 2"),
+            (4, "total = sum(data) * scale"),
+            (5, "print(math.pi)"),
+        ]
+
+    def _run(self, cells, changed=None):
+        for cell_id, code in cells:
+            reads, writes = analyze_cell(code)
+            record_cell_execution("notebook:1", cell_id, code, _result(writes if changed is None else changed))
+
+    def test_unchanged_notebook_has_nothing_to_run(self):
+        self._run(self.cells)
+
+        self.assertEqual(stale_cells("notebook:1", self.cells), [])
+
+    def test_edit_reruns_the_cell_and_its_dependents_only(self):
+        self._run(self.cells)
+        edited = list(self.cells)
+        edited[1] = (2, "data = list(range(base * 2))")
+
+        self.assertEqual(stale_cells("notebook:1", edited), [2, 4])
+
+    def test_cells_that_never_ran_or_failed_are_stale(self):
+        self._run(self.cells[:3])
+        record_cell_execution("notebook:1", 3, self.cells[2][1], _result(error="boom"))
+
+        self.assertEqual(stale_cells("notebook:1", self.cells), [3, 4, 5])
+
+    def test_cells_read_a_name_redefined_by_a_later_run_above_them(self):
+        self._run(self.cells)
+        # The user re-ran the edited first cell alone; cells using ``base`` are now out of date,
+        # the re-imported module is the same object and changes nothing.
+        edited = [(1, "import math\nbase = 20"), *self.cells[1:]]
+        self._run(edited[:1], changed={"base"})
+
+        self.assertEqual(stale_cells("notebook:1", edited), [2, 4])
+
+    def test_unfinished_runs_are_not_recorded(self):
+        result = _result(["x"])
+        result.status = "input_required"
+
+        record_cell_execution("notebook:1", 1, "x = input()", result)
+
+        self.assertEqual(self.session.executed_cells, {})
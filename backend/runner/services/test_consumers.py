@@ -1,4 +1,7 @@
 import asyncio
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from types import SimpleNamespace
 from unittest.mock import AsyncMock, patch
 
@@ -7,7 +10,9 @@ from channels.routing import URLRouter
 from channels.testing import WebsocketCommunicator
 from django.urls import re_path
 
-from runner.services import consumers
+from runner.services import consumers, streaming_runs
+from runner.services.session_registry import MemorySessionRegistry
+from runner.services.runtime import RuntimeExecutionResult
 from core.asgi import application
 
 
@@ -88,3 +93,262 @@ def test_contest_consumer_receives_notification_event():
             await communicator.disconnect()
 
     asyncio.run(scenario())
+
+
+def test_leaderboard_consumer_coalesces_changes_into_one_delta():
+    async def scenario():
+        leaderboard_application = URLRouter(
+            [
+                re_path(
+                    r"^ws/contests/(?P<contest_id>\d+)/leaderboard/$",
+                    consumers.ContestLeaderboardConsumer.as_asgi(),
+                )
+            ]
+        )
+        initial_rows = [
+            {"user_id": 1, "username": "alice", "rank": 1, "total_score": 90},
+            {"user_id": 2, "username": "bob", "rank": 2, "total_score": 80},
+        ]
+        updated_rows = [
+            {"user_id": 2, "username": "bob", "rank": 1, "total_score": 95},
+            {"user_id": 1, "username": "alice", "rank": 2, "total_score": 90},
+        ]
+        load_standings = AsyncMock(side_effect=[(1, initial_rows), (2, updated_rows)])
+
+        with patch.object(
+            consumers.ContestLeaderboardConsumer,
+            "_resolve_viewer_role",
+            new=AsyncMock(return_value="participant"),
+        ), patch.object(
+            consumers.ContestLeaderboardConsumer,
+            "_load_standings",
+            new=load_standings,
+        ), patch.object(consumers.settings, "LEADERBOARD_PUSH_INTERVAL_SECONDS", 0.2, create=True):
+            communicator = WebsocketCommunicator(leaderboard_application, "/ws/contests/31/leaderboard/")
+            communicator.scope["user"] = SimpleNamespace(id=9, is_authenticated=True)
+
+            connected, _ = await communicator.connect()
+            assert connected
+
+            snapshot = await communicator.receive_json_from(timeout=5)
+            assert snapshot["type"] == "snapshot"
+            assert snapshot["version"] == 1
+            assert [row["user_id"] for row in snapshot["rows"]] == [1, 2]
+
+            channel_layer = get_channel_layer()
+            for _ in range(3):
+                await channel_layer.group_send(
+                    "contest_31_leaderboard",
+                    {"type": "leaderboard.changed", "contest_id": 31},
+                )
+
+            delta = await communicator.receive_json_from(timeout=5)
+            assert delta["type"] == "delta"
+            assert delta["version"] == 2
+            assert delta["removed"] == []
+            assert [(row["user_id"], row["rank"], row["previous_rank"]) for row in delta["changed"]] == [
+                (2, 1, 2),
+                (1, 2, 1),
+            ]
+            assert await communicator.receive_nothing(timeout=0.5)
+            assert load_standings.await_count == 2
+
+            await communicator.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_leaderboard_consumer_pushes_again_for_changes_during_a_push():
+    async def scenario():
+        leaderboard_application = URLRouter(
+            [
+                re_path(
+                    r"^ws/contests/(?P<contest_id>\d+)/leaderboard/$",
+                    consumers.ContestLeaderboardConsumer.as_asgi(),
+                )
+            ]
+        )
+        loading = asyncio.Event()
+        release = asyncio.Event()
+        versions = iter(range(1, 4))
+
+        async def load_standings(self, contest_id, role):
+            version = next(versions)
+            if version == 2:
+                loading.set()
+                await release.wait()
+            return version, [{"user_id": 1, "username": "alice", "rank": 1, "total_score": version}]
+
+        with patch.object(
+            consumers.ContestLeaderboardConsumer,
+            "_resolve_viewer_role",
+            new=AsyncMock(return_value="participant"),
+        ), patch.object(
+            consumers.ContestLeaderboardConsumer,
+            "_load_standings",
+            new=load_standings,
+        ), patch.object(consumers.settings, "LEADERBOARD_PUSH_INTERVAL_SECONDS", 0.2, create=True):
+            communicator = WebsocketCommunicator(leaderboard_application, "/ws/contests/32/leaderboard/")
+            communicator.scope["user"] = SimpleNamespace(id=9, is_authenticated=True)
+
+            connected, _ = await communicator.connect()
+            assert connected
+            assert (await communicator.receive_json_from(timeout=5))["version"] == 1
+
+            channel_layer = get_channel_layer()
+            event = {"type": "leaderboard.changed", "contest_id": 32}
+            await channel_layer.group_send("contest_32_leaderboard", event)
+            await asyncio.wait_for(loading.wait(), timeout=5)
+            # Arrives while the second push is reading standings.
+            await channel_layer.group_send("contest_32_leaderboard", event)
+            await asyncio.sleep(0.05)
+            release.set()
+
+            assert (await communicator.receive_json_from(timeout=5))["version"] == 2
+            assert (await communicator.receive_json_from(timeout=5))["version"] == 3
+
+            await communicator.disconnect()
+
+    asyncio.run(scenario())
+
+
+def test_leaderboard_consumer_rejects_anonymous_user():
+    async def scenario():
+        leaderboard_application = URLRouter(
+            [
+                re_path(
+                    r"^ws/contests/(?P<contest_id>\d+)/leaderboard/$",
+                    consumers.ContestLeaderboardConsumer.as_asgi(),
+                )
+            ]
+        )
+        communicator = WebsocketCommunicator(leaderboard_application, "/ws/contests/31/leaderboard/")
+        communicator.scope["user"] = SimpleNamespace(id=None, is_authenticated=False)
+
+        connected, code = await communicator.connect()
+        assert not connected
+        assert code == 4401
+
+    asyncio.run(scenario())
+
+
+def _run_stream_application():
+    return URLRouter([re_path(r"^ws/runs/(?P<run_id>[0-9a-f]+)/$", consumers.RunStreamConsumer.as_asgi())])
+
+
+def test_run_stream_consumer_pushes_output_and_resumes_from_offsets():
+    async def scenario(workdir: Path):
+        run = streaming_runs.StreamingRun(
+            run_id="abc123",
+            session_id="notebook:7",
+            cell_id=3,
+            notebook_id=7,
+            stdout_path=workdir / "abc123.stdout",
+            stderr_path=workdir / "abc123.stderr",
+            started_at=time.time(),
+        )
+        run.stdout_path.write_text("hello\n")
+        run.stderr_path.write_text("")
+        with streaming_runs._LOCK:
+            streaming_runs._RUNS[run.run_id] = run
+
+        with patch.object(
+            consumers.RunStreamConsumer,
+            "_user_has_access_to_notebook",
+            new=AsyncMock(return_value=True),
+        ), patch.object(consumers.settings, "RUNTIME_STREAM_PUSH_INTERVAL_SECONDS", 0.05, create=True):
+            communicator = WebsocketCommunicator(_run_stream_application(), "/ws/runs/abc123/")
+            connected, _ = await communicator.connect()
+            assert connected
+
+            first = await communicator.receive_json_from(timeout=5)
+            assert first == {
+                "type": "output",
+                "cell_id": 3,
+                "stdout": "hello\n",
+                "stderr": "",
+                "stdout_offset": 6,
+                "stderr_offset": 0,
+            }
+
+            with run.stdout_path.open("a") as fh:
+                fh.write("one\n")
+                fh.write("two\n")
+            second = await communicator.receive_json_from(timeout=5)
+            assert (second["stdout"], second["stdout_offset"]) == ("one\ntwo\n", 14)
+            await communicator.disconnect()
+
+            resumed = WebsocketCommunicator(_run_stream_application(), "/ws/runs/abc123/?stdout_offset=10")
+            connected, _ = await resumed.connect()
+            assert connected
+            assert (await resumed.receive_json_from(timeout=5))["stdout"] == "two\n"
+
+            run.result = RuntimeExecutionResult(
+                stdout="hello\none\ntwo\n",
+                stderr="",
+                error=None,
+                variables={},
+                outputs=[],
+                artifacts=[],
+            )
+            run.status = "finished"
+            finished = await resumed.receive_json_from(timeout=5)
+            assert finished["type"] == "finished"
+            assert finished["status"] == "finished"
+            assert finished["result"]["stdout"] == "hello\none\ntwo\n"
+            assert (await resumed.receive_output(timeout=5))["type"] == "websocket.close"
+
+    try:
+        with TemporaryDirectory() as tmp:
+            asyncio.run(scenario(Path(tmp)))
+    finally:
+        with streaming_runs._LOCK:
+            streaming_runs._RUNS.clear()
+
+
+def test_run_stream_consumer_finishes_when_the_run_record_disappears():
+    async def scenario(workdir: Path):
+        run = streaming_runs.StreamingRun(
+            run_id="def456",
+            session_id="notebook:8",
+            cell_id=4,
+            notebook_id=8,
+            stdout_path=workdir / "def456.stdout",
+            stderr_path=workdir / "def456.stderr",
+            started_at=time.time(),
+        )
+        run.stdout_path.write_text("working\n")
+        run.stderr_path.write_text("")
+        registry = MemorySessionRegistry()
+
+        with patch.object(streaming_runs, "get_session_registry", return_value=registry), patch.object(
+            consumers.RunStreamConsumer,
+            "_user_has_access_to_notebook",
+            new=AsyncMock(return_value=True),
+        ), patch.object(consumers.settings, "RUNTIME_STREAM_PUSH_INTERVAL_SECONDS", 0.05, create=True):
+            # Executing in another worker: only the registry record is visible here.
+            streaming_runs._publish_run(run)
+            communicator = WebsocketCommunicator(_run_stream_application(), "/ws/runs/def456/")
+            connected, _ = await communicator.connect()
+            assert connected
+            assert (await communicator.receive_json_from(timeout=5))["stdout"] == "working\n"
+
+            registry.delete(streaming_runs.RUNS_REGISTRY_KIND, run.run_id)
+            finished = await communicator.receive_json_from(timeout=5)
+            assert finished["type"] == "finished"
+            assert finished["status"] == "error"
+            assert (await communicator.receive_output(timeout=5))["type"] == "websocket.close"
+
+    with TemporaryDirectory() as tmp:
+        asyncio.run(scenario(Path(tmp)))
+
+
+def test_run_stream_consumer_rejects_unknown_runs():
+    async def scenario():
+        with patch.object(consumers, "get_streaming_run", return_value=None):
+            communicator = WebsocketCommunicator(_run_stream_application(), "/ws/runs/ffff/")
+            connected, code = await communicator.connect()
+        assert not connected
+        assert code == 4404
+
+    asyncio.run(scenario())
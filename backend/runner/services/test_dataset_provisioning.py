@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from runner.services import dataset_provisioning
+from runner.services.dataset_provisioning import (
+    METHOD_COPY,
+    METHOD_SYMLINK,
+    cached_dataset,
+    provision_dataset_file,
+    prune_dataset_cache,
+)
+from runner.services.vm_backends import DockerVmBackend
+
+
+def _allocated_bytes(root: Path) -> int:
+    seen: set[tuple[int, int]] = set()
+    total = 0
+    for directory, dirnames, filenames in os.walk(root):
+        for name in dirnames + filenames:
+            stat = os.lstat(os.path.join(directory, name))
+            if (stat.st_dev, stat.st_ino) not in seen:
+                seen.add((stat.st_dev, stat.st_ino))
+                total += stat.st_blocks * 512
+    return total
+
+
+class DatasetProvisioningTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        root = Path(self.tmp_dir.name)
+        self.source = root / "media" / "train.csv"
+        self.source.parent.mkdir()
+        self.source.write_text("a,b\n1,2\n")
+        self.workdir = root / "session"
+        self.override = override_settings(RUNTIME_DATASET_CACHE_ROOT=str(root / "cache"))
+        self.override.enable()
+
+    def tearDown(self):
+        self.override.disable()
+        self.tmp_dir.cleanup()
+
+    def _saved_bytes(self) -> float:
+        return dataset_provisioning.DATASET_BYTES_SAVED._value.get()
+
+    def _write_source(self, name: str) -> Path:
+        path = self.source.with_name(name)
+        path.write_text("x\n")
+        return path
+
+    def test_vm_sessions_link_into_the_shared_cache_without_using_more_disk(self):
+        self.source.write_bytes(os.urandom(1024 * 1024))
+        size = self.source.stat().st_size
+        root = Path(self.tmp_dir.name)
+        saved_before = self._saved_bytes()
+        # A filesystem without reflinks, such as ext4.
+        with patch.object(dataset_provisioning, "_reflink", return_value=False):
+            before = _allocated_bytes(root)
+            first = provision_dataset_file(self.source, self.workdir / "train.csv", shared_cache=True)
+            after_first = _allocated_bytes(root)
+            second = provision_dataset_file(self.source, root / "other" / "train.csv", shared_cache=True)
+            after_second = _allocated_bytes(root)
+
+        self.assertEqual((first, second), (METHOD_SYMLINK, METHOD_SYMLINK))
+        self.assertLess(after_first - before, size // 10)
+        self.assertLess(after_second - after_first, size // 10)
+        self.assertEqual(self._saved_bytes() - saved_before, 2 * size)
+
+        target = self.workdir / "train.csv"
+        cached = cached_dataset(self.source)
+        self.assertEqual(Path(os.readlink(target)), cached)
+        self.assertEqual(target.read_bytes(), self.source.read_bytes())
+
+    def test_local_sessions_get_copies_outside_the_cache(self):
+        with patch.object(dataset_provisioning, "_reflink", return_value=False):
+            method = provision_dataset_file(self.source, self.workdir / "train.csv")
+
+        self.assertEqual(method, METHOD_COPY)
+        target = self.workdir / "train.csv"
+        self.assertFalse(target.is_symlink())
+        target.write_text("edited\n")
+        self.assertEqual(self.source.read_text(), "a,b\n1,2\n")
+        self.assertFalse(dataset_provisioning.get_dataset_cache_root().exists())
+
+    def test_changed_sources_get_a_fresh_cache_entry(self):
+        first_entry = cached_dataset(self.source)
+        self.source.write_text("a,b\n3,4\n5,6\n")
+        second_entry = cached_dataset(self.source)
+
+        self.assertNotEqual(first_entry, second_entry)
+        self.assertEqual(second_entry.read_text(), "a,b\n3,4\n5,6\n")
+
+    def test_pruning_removes_entries_no_workspace_links_to(self):
+        root = Path(self.tmp_dir.name)
+        with patch.object(dataset_provisioning, "_reflink", return_value=False):
+            provision_dataset_file(self.source, self.workdir / "train.csv", shared_cache=True)
+            provision_dataset_file(self.source, root / "other" / "train.csv", shared_cache=True)
+        entry = cached_dataset(self.source)
+        stale = cached_dataset(self._write_source("test.csv"))
+        later = time.time() + dataset_provisioning.REFERENCE_GRACE_SECONDS + 1
+
+        self.assertEqual(prune_dataset_cache(now=later), 1)
+        self.assertFalse(stale.exists())
+
+        # A workspace that is only moving keeps the entry during the grace period.
+        (self.workdir / "train.csv").unlink()
+        self.assertEqual(prune_dataset_cache(), 0)
+        (root / "other" / "train.csv").unlink()
+        self.assertEqual(prune_dataset_cache(now=later), 1)
+        self.assertFalse(entry.exists())
+        self.assertTrue(self.source.exists())
+
+    def test_docker_vms_mount_the_cache_read_only_at_its_server_path(self):
+        backend = DockerVmBackend(Path(self.tmp_dir.name) / "vms")
+        cache_root = dataset_provisioning.get_dataset_cache_root()
+
+        self.assertEqual(
+            backend._dataset_cache_args(),
+            ["--mount", f"type=bind,source={cache_root},target={cache_root},readonly"],
+        )
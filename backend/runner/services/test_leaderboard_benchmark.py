@@ -0,0 +1,65 @@
+from django.test import SimpleTestCase, TestCase
+
+from runner.services.leaderboard_benchmark import (
+    check_budgets,
+    load_benchmark_budgets,
+    profile_spec,
+    run_benchmark,
+    seed_synthetic_course,
+)
+from runner.views.contest_leaderboard import build_contest_leaderboards, build_course_leaderboard
+
+
+def _result(queries=5, wall_time_ms=100.0, peak_memory_mb=10.0):
+    return {
+        "queries": queries,
+        "wall_time_ms_min": wall_time_ms,
+        "wall_time_ms_max": wall_time_ms,
+        "peak_memory_mb": peak_memory_mb,
+    }
+
+
+class LeaderboardBudgetCheckTests(SimpleTestCase):
+    def test_committed_profiles_cover_the_largest_contest_and_course_sizes(self):
+        budgets = load_benchmark_budgets()
+
+        large = profile_spec(budgets["large"])
+        self.assertEqual(
+            (large.students, large.problems_per_contest * large.contests, large.submissions),
+            (5000, 20, 200_000),
+        )
+        course = profile_spec(budgets["course"])
+        self.assertEqual((course.students, course.contests, course.submissions), (2000, 30, 500_000))
+        for profile in budgets.values():
+            self.assertEqual(set(profile["budgets"]), {"contest_leaderboards", "course_leaderboard"})
+
+    def test_budget_and_baseline_violations_are_reported(self):
+        budgets = {"course_leaderboard": {"queries": 6, "wall_time_ms": 500, "peak_memory_mb": 64}}
+
+        self.assertEqual(check_budgets({"course_leaderboard": _result()}, budgets), [])
+
+        violations = check_budgets(
+            {"course_leaderboard": _result(queries=40, wall_time_ms=900.0)},
+            budgets,
+            baseline={"course_leaderboard": _result(queries=5, wall_time_ms=100.0)},
+        )
+        self.assertEqual(len(violations), 4)
+        self.assertTrue(all(item.startswith("course_leaderboard: ") for item in violations))
+
+
+class LeaderboardQueryBudgetTests(TestCase):
+    def test_small_profile_fits_committed_query_budget(self):
+        profile = load_benchmark_budgets()["small"]
+        data = seed_synthetic_course("budget_test", profile_spec(profile))
+
+        results = {
+            "contest_leaderboards": run_benchmark(lambda: build_contest_leaderboards(data.contests[0]), repeat=1),
+            "course_leaderboard": run_benchmark(lambda: build_course_leaderboard(data.course), repeat=1),
+        }
+
+        # Wall time and memory depend on the machine; the query budget must hold everywhere.
+        query_budgets = {
+            target: {"queries": budget["queries"]}
+            for target, budget in profile["budgets"].items()
+        }
+        self.assertEqual(check_budgets(results, query_budgets), [])
@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+
+from runner.services import leaderboard_cache
+
+
+class LeaderboardCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_bump_changes_version_and_etag(self):
+        version = leaderboard_cache.get_leaderboard_version(leaderboard_cache.CONTEST_SCOPE, 7)
+        self.assertEqual(
+            leaderboard_cache.get_leaderboard_version(leaderboard_cache.CONTEST_SCOPE, 7),
+            version,
+        )
+
+        leaderboard_cache.invalidate_leaderboards(contest_ids=[7])
+
+        bumped = leaderboard_cache.get_leaderboard_version(leaderboard_cache.CONTEST_SCOPE, 7)
+        self.assertNotEqual(bumped, version)
+        self.assertNotEqual(
+            leaderboard_cache.build_leaderboard_etag("contest", 7, "problems", "participant", version),
+            leaderboard_cache.build_leaderboard_etag("contest", 7, "problems", "participant", bumped),
+        )
+
+    def test_cached_response_builds_payload_once_and_honours_if_none_match(self):
+        calls = []
+
+        def build_payload():
+            calls.append(1)
+            return {"entries": [{"user_id": 1, "rank": 1}]}
+
+        kwargs = {
+            "scope": leaderboard_cache.CONTEST_SCOPE,
+            "object_id": 11,
+            "view": "problems",
+            "role": leaderboard_cache.ROLE_PARTICIPANT,
+            "build_payload": build_payload,
+        }
+        first = leaderboard_cache.cached_leaderboard_response(self.factory.get("/"), **kwargs)
+        second = leaderboard_cache.cached_leaderboard_response(self.factory.get("/"), **kwargs)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(len(calls), 1)
+
+        conditional = self.factory.get("/", HTTP_IF_NONE_MATCH=first["ETag"])
+        not_modified = leaderboard_cache.cached_leaderboard_response(conditional, **kwargs)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(len(calls), 1)
+
+        leaderboard_cache.bump_leaderboard_version(leaderboard_cache.CONTEST_SCOPE, 11)
+        refreshed = leaderboard_cache.cached_leaderboard_response(conditional, **kwargs)
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertEqual(len(calls), 2)
+
+    def test_etag_matching_accepts_lists_and_weak_prefix(self):
+        etag = leaderboard_cache.build_leaderboard_etag("course", 3, "overall", "manager", 42)
+        strong = etag[2:]
+        self.assertTrue(leaderboard_cache.etag_matches(f'"other", {strong}', etag))
+        self.assertTrue(leaderboard_cache.etag_matches("*", etag))
+        self.assertFalse(leaderboard_cache.etag_matches('"other"', etag))
+        self.assertFalse(leaderboard_cache.etag_matches(None, etag))
@@ -0,0 +1,32 @@
+from django.test import SimpleTestCase
+
+from runner.services.leaderboard_deltas import diff_leaderboard_rows, index_rows
+
+
+class LeaderboardDeltaTests(SimpleTestCase):
+    def test_unchanged_rows_are_omitted(self):
+        rows = index_rows([{"user_id": 1, "rank": 1, "total_score": 10}])
+
+        self.assertEqual(diff_leaderboard_rows(rows, rows), {"changed": [], "removed": []})
+
+    def test_new_moved_and_removed_rows(self):
+        previous = index_rows(
+            [
+                {"user_id": 1, "rank": 1, "total_score": 10},
+                {"user_id": 2, "rank": 2, "total_score": 5},
+            ]
+        )
+        current = index_rows(
+            [
+                {"user_id": 3, "rank": 1, "total_score": 12},
+                {"user_id": 1, "rank": 2, "total_score": 10},
+            ]
+        )
+
+        delta = diff_leaderboard_rows(previous, current)
+
+        self.assertEqual(
+            [(row["user_id"], row["previous_rank"]) for row in delta["changed"]],
+            [(3, None), (1, 1)],
+        )
+        self.assertEqual(delta["removed"], [2])
@@ -0,0 +1,78 @@
+import json
+from types import SimpleNamespace
+
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase
+
+from runner.services import leaderboard_cache, leaderboard_pages
+
+
+class LeaderboardPagesTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.loads = 0
+        self.rows = [{"user_id": 1000 + idx, "rank": idx + 1} for idx in range(250)]
+
+    def tearDown(self):
+        cache.clear()
+
+    def _load_standings(self):
+        self.loads += 1
+        return leaderboard_cache.get_leaderboard_version(leaderboard_cache.CONTEST_SCOPE, 5), self.rows
+
+    def _get(self, respond, query="", user_id=1, **headers):
+        request = self.factory.get(f"/standings/{query}", **headers)
+        request.user = SimpleNamespace(id=user_id, is_authenticated=True)
+        return respond(
+            request,
+            scope=leaderboard_cache.CONTEST_SCOPE,
+            object_id=5,
+            view="problems-overall",
+            role=leaderboard_cache.ROLE_PARTICIPANT,
+            load_standings=self._load_standings,
+        )
+
+    def test_pages_span_chunks_and_load_once_per_version(self):
+        response = self._get(leaderboard_pages.standings_page_response, "?page=2&page_size=80")
+        payload = json.loads(response.content)
+        self.assertEqual(payload["total"], 250)
+        self.assertEqual(payload["pages"], 4)
+        self.assertEqual([row["rank"] for row in payload["entries"]], list(range(81, 161)))
+
+        response = self._get(leaderboard_pages.standings_page_response, "?page=4&page_size=80")
+        self.assertEqual([row["rank"] for row in json.loads(response.content)["entries"]], list(range(241, 251)))
+        self.assertEqual(self.loads, 1)
+
+        not_modified = self._get(
+            leaderboard_pages.standings_page_response,
+            "?page=4&page_size=80",
+            HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        leaderboard_cache.invalidate_leaderboards(contest_ids=[5])
+        self._get(leaderboard_pages.standings_page_response, "?page=1")
+        self.assertEqual(self.loads, 2)
+
+    def test_page_size_is_capped(self):
+        response = self._get(leaderboard_pages.standings_page_response, "?page_size=100000")
+        payload = json.loads(response.content)
+        self.assertEqual(payload["page_size"], leaderboard_pages.MAX_PAGE_SIZE)
+        self.assertEqual(len(payload["entries"]), leaderboard_pages.MAX_PAGE_SIZE)
+
+    def test_position_returns_neighbours(self):
+        self._get(leaderboard_pages.standings_page_response)
+
+        response = self._get(leaderboard_pages.standings_position_response, "?neighbours=2", user_id=1100)
+        payload = json.loads(response.content)
+        self.assertEqual(payload["position"], 101)
+        self.assertEqual([row["user_id"] for row in payload["entries"]], [1098, 1099, 1100, 1101, 1102])
+        self.assertEqual(self.loads, 1)
+
+        top = json.loads(self._get(leaderboard_pages.standings_position_response, user_id=1000).content)
+        self.assertEqual([row["rank"] for row in top["entries"]], list(range(1, 7)))
+
+        outsider = json.loads(self._get(leaderboard_pages.standings_position_response, user_id=7).content)
+        self.assertIsNone(outsider["position"])
+        self.assertEqual(outsider["entries"], [])
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import importlib.util
+import sys
+import zipfile
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.test import SimpleTestCase, override_settings
+
+from runner.services import runtime, vm_agent, vm_manager
+from runner.services.local_envs import get_base_env_path, overlay_path, overlay_site_packages, session_shell_env
+from runner.services.session_registry import reset_session_registry
+from runner.services.vm_backends import DockerVmBackend
+from runner.services.vm_models import VmNetworkPolicy, VmResources, VmSpec
+
+
+def _write_wheel(directory: Path, name: str, version: str, source: str) -> Path:
+    """A minimal pure-Python wheel, so installs can be tested without a package index."""
+    dist_info = f"{name}-{version}.dist-info"
+    files = {
+        f"{name}/__init__.py": source,
+        f"{dist_info}/METADATA": f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        f"{dist_info}/WHEEL": "Wheel-Version: 1.0\nGenerator: booml-tests\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    }
+    record = []
+    for path, content in files.items():
+        digest = base64.urlsafe_b64encode(hashlib.sha256(content.encode()).digest()).rstrip(b"=").decode()
+        record.append(f"{path},sha256={digest},{len(content.encode())}")
+    record.append(f"{dist_info}/RECORD,,")
+    files[f"{dist_info}/RECORD"] = "\n".join(record) + "\n"
+    directory.mkdir(parents=True, exist_ok=True)
+    wheel = directory / f"{name}-{version}-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w") as archive:
+        for path, content in files.items():
+            archive.writestr(path, content)
+    return wheel
+
+
+class LocalSessionEnvTests(SimpleTestCase):
+    def setUp(self):
+        self._sandbox_tmp = TemporaryDirectory()
+        self._vm_tmp = TemporaryDirectory()
+        runtime.reset_execution_backend()
+        self.override = override_settings(
+            RUNTIME_SANDBOX_ROOT=self._sandbox_tmp.name,
+            RUNTIME_VM_ROOT=self._vm_tmp.name,
+            RUNTIME_VM_BACKEND="local",
+        )
+        self.override.enable()
+        reset_session_registry()
+        vm_manager.reset_vm_manager()
+        vm_agent.reset_vm_agents()
+
+    def tearDown(self):
+        runtime.reset_execution_backend()
+        vm_agent.reset_vm_agents()
+        vm_manager.reset_vm_manager()
+        self.override.disable()
+        reset_session_registry()
+        self._sandbox_tmp.cleanup()
+        self._vm_tmp.cleanup()
+
+    def test_sessions_share_the_base_env_and_keep_installs_in_their_overlay(self):
+        first = runtime.create_session("notebook:1")
+        second = runtime.create_session("notebook:2")
+
+        self.assertEqual(first.python_exec, second.python_exec)
+        self.assertTrue(first.python_exec.is_relative_to(get_base_env_path()))
+        self.assertTrue(overlay_path(first.workdir).is_dir())
+        self.assertFalse((overlay_path(first.workdir) / "bin").exists())
+
+        env = session_shell_env(first.workdir, first.python_exec)
+        self.assertEqual(env["PYTHONUSERBASE"], str(overlay_path(first.workdir)))
+        self.assertEqual(env["PIP_USER"], "1")
+
+        result = runtime.run_code("notebook:1", "!python -c \"import site, sys; print(sys.prefix); print(site.USER_BASE)\"")
+        prefix, user_base = result.stdout.split()
+        self.assertEqual(Path(prefix), get_base_env_path())
+        self.assertEqual(Path(user_base), overlay_path(first.workdir))
+
+    def test_sessions_install_from_the_shared_wheelhouse(self):
+        with TemporaryDirectory() as cache, override_settings(RUNTIME_PIP_CACHE_ROOT=cache, RUNTIME_PIP_OFFLINE=True):
+            _write_wheel(Path(cache) / "wheelhouse", "booml_probe", "1.0", "VALUE = 42\n")
+            first = runtime.create_session("notebook:1")
+            second = runtime.create_session("notebook:2")
+
+            env = session_shell_env(first.workdir, first.python_exec)
+            installed = runtime.run_code("notebook:1", "!pip install booml_probe\nimport booml_probe\nprint(booml_probe.VALUE)")
+            again = runtime.run_code("notebook:2", "!pip install booml_probe")
+
+            self.assertEqual(env["PIP_CACHE_DIR"], cache)
+            self.assertEqual(env["PIP_NO_INDEX"], "1")
+            self.assertIsNone(installed.error)
+            self.assertTrue(installed.stdout.endswith("42\n"), installed.stdout + installed.stderr)
+            for session in (first, second):
+                self.assertTrue((overlay_site_packages(session.workdir) / "booml_probe" / "__init__.py").exists())
+            self.assertIn("Successfully installed booml_probe-1.0", again.stdout)
+
+    def test_overlay_packages_are_importable_only_by_their_session(self):
+        path_before = list(sys.path)
+        with TemporaryDirectory() as cache, override_settings(RUNTIME_PIP_CACHE_ROOT=cache, RUNTIME_PIP_OFFLINE=True):
+            _write_wheel(Path(cache) / "wheelhouse", "booml_scoped", "1.0", "VALUE = 7\n")
+            runtime.create_session("notebook:1")
+            runtime.create_session("notebook:2")
+
+            installed = runtime.run_code("notebook:1", "!pip install booml_scoped\nimport booml_scoped")
+            reused = runtime.run_code("notebook:1", "import booml_scoped\nprint(booml_scoped.VALUE)")
+            other = runtime.run_code("notebook:2", "import booml_scoped")
+
+        self.assertIsNone(installed.error, installed.stdout + installed.stderr)
+        self.assertEqual(reused.stdout, "7\n")
+        self.assertIn("ModuleNotFoundError", other.error)
+        self.assertEqual(sys.path, path_before)
+        self.assertNotIn("booml_scoped", sys.modules)
+        self.assertIsNone(importlib.util.find_spec("booml_scoped"))
+
+    def test_docker_vms_share_only_the_read_only_wheelhouse(self):
+        spec = VmSpec(
+            image="runner-vm:latest",
+            resources=VmResources(cpu=1, ram_mb=512, disk_gb=1),
+            network=VmNetworkPolicy(outbound="deny", allowlist=()),
+            ttl_sec=60,
+        )
+        with TemporaryDirectory() as cache, override_settings(RUNTIME_PIP_CACHE_ROOT=cache):
+            args = DockerVmBackend(Path(self._sandbox_tmp.name))._pip_cache_args(spec)
+
+        mounts = [args[index + 1] for index, arg in enumerate(args) if arg == "--mount"]
+        env = dict(args[index + 1].split("=", 1) for index, arg in enumerate(args) if arg == "--env")
+        self.assertEqual(mounts, [f"type=bind,source={Path(cache) / 'wheelhouse'},target=/pip-cache/wheelhouse,readonly"])
+        self.assertEqual(env["PIP_CACHE_DIR"], "/vm/pip-cache")
+        self.assertEqual(env["PIP_FIND_LINKS"], "/pip-cache/wheelhouse")
+        self.assertEqual(env["PIP_NO_INDEX"], "1")
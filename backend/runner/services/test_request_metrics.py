@@ -1,7 +1,7 @@
 from datetime import timedelta
 from pathlib import Path
 from types import SimpleNamespace
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from django.contrib.auth import get_user_model
 from django.test import SimpleTestCase, TestCase
@@ -10,6 +10,7 @@ from django.utils import timezone
 from runner.models.notebook import Notebook
 from runner.services import request_metrics
 from runner.services.runtime import RuntimeSession, _sessions
+from runner.services.session_telemetry import ResourceSample
 
 
 User = get_user_model()
@@ -54,6 +55,33 @@ class RuntimeOverviewSnapshotTests(TestCase):
         self.assertEqual(snapshot['cpu_load_percent'], 100.0)
         self.assertEqual(snapshot['gpu_load_percent'], 50.0)
 
+    def test_uses_measured_session_resources_when_available(self):
+        owner = User.objects.create_user(username='owner-m', password='test')
+        measured = Notebook.objects.create(owner=owner, title='Measured', compute_device='cpu')
+        unmeasured = Notebook.objects.create(owner=owner, title='Unmeasured', compute_device='cpu')
+        now = timezone.now()
+        cpu_vm = SimpleNamespace(spec=SimpleNamespace(gpu=False, resources=SimpleNamespace(cpu=2)))
+        _sessions[f'notebook:{measured.id}'] = RuntimeSession({}, now, now, Path('/tmp/runtime-m'), None, cpu_vm)
+        _sessions[f'notebook:{unmeasured.id}'] = RuntimeSession({}, now, now, Path('/tmp/runtime-u'), None, cpu_vm)
+        sample = ResourceSample(timestamp=now, cpu_percent=50.0, memory_bytes=2 * 1024 ** 3)
+        telemetry = Mock()
+        telemetry.sample_if_due.return_value = {f'notebook:{measured.id}': sample}
+        telemetry.history.return_value = [sample]
+
+        with patch('runner.services.session_telemetry.get_session_telemetry', return_value=telemetry), patch.object(
+            request_metrics,
+            'CPU_SESSION_CAPACITY',
+            10,
+        ), patch.object(request_metrics, 'DEFAULT_SESSION_RAM_GB', 1.0):
+            snapshot = request_metrics._build_runtime_overview_snapshot()
+
+        # 0.5 measured cores plus the 2 reserved cores of the unmeasured session.
+        self.assertEqual(snapshot['cpu_load_percent'], 25.0)
+        self.assertEqual(snapshot['ram_used_gb'], 3.0)
+        rows = {row['notebook_id']: row for row in snapshot['sessions']}
+        self.assertEqual(rows[measured.id]['cpu_percent'], 50.0)
+        self.assertEqual(len(rows[measured.id]['history']), 1)
+
     def test_filters_expired_sessions_out_of_snapshot(self):
         owner = User.objects.create_user(username='owner', password='test')
         notebook = Notebook.objects.create(owner=owner, title='Old CPU', compute_device='cpu')
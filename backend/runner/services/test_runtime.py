@@ -14,7 +14,9 @@ from runner.services.runtime import (
     cleanup_expired,
     cleanup_all_sessions,
     create_session,
+    dataframe_rows,
     get_session,
+    inspect_session,
     reset_session,
     reset_execution_backend,
     stop_session,
@@ -176,6 +178,66 @@ class RuntimeServiceTests(SimpleTestCase):
         types = {item.get("type") for item in result.outputs}
         self.assertIn("text/html", types)
 
+    def test_large_outputs_are_stored_once_as_blobs(self) -> None:
+        session_id = "sess-blobs"
+        session = create_session(session_id)
+        code = "{'type': 'text/html', 'data': '<table>' + '<tr><td>1</td></tr>' * 1000 + '</table>'}"
+
+        with patch.dict("os.environ", {"RUNTIME_OUTPUT_INLINE_MAX_BYTES": "4096"}):
+            first = run_code(session_id, code)
+            second = run_code(session_id, code)
+            small = run_code(session_id, "{'type': 'text/html', 'data': '<b>hi</b>'}")
+
+        item = first.outputs[0]
+        self.assertIsNone(item["data"])
+        self.assertEqual(item["blob"], second.outputs[0]["blob"])
+        self.assertTrue(item["blob"].endswith(".html"))
+        self.assertEqual(len(list((session.workdir / ".outputs").iterdir())), 1)
+        self.assertEqual(small.outputs[0]["data"], "<b>hi</b>")
+
+    def test_variables_are_reported_incrementally_as_summaries(self) -> None:
+        session_id = "sess-variables"
+        create_session(session_id)
+
+        first = run_code(session_id, "import numpy as np\nbig = np.zeros((1000, 1000))\ntext = 'x' * 10000\nkeep = 1")
+        second = run_code(session_id, "keep = 2\ndel text")
+
+        self.assertEqual(first.variables["big"], "ndarray shape=(1000, 1000) dtype=float64 8000000 bytes")
+        self.assertLessEqual(len(first.variables["text"]), 200)
+        self.assertEqual(second.variables, {"keep": "2"})
+        self.assertEqual(second.removed_variables, ["text"])
+
+        inspected = inspect_session(session_id, ["big"])["variables"]
+        self.assertIn("array([[0., 0., 0., ..., 0., 0., 0.]", inspected["big"])
+
+    def test_large_dataframes_show_a_window_and_page_the_rest(self) -> None:
+        session_id = "sess-frames"
+        create_session(session_id)
+        code = (
+            "import numpy as np\nimport pandas as pd\n"
+            "df = pd.DataFrame({'a': np.arange(50000), 'b': [None, 'x'] * 25000})\ndf"
+        )
+        with patch.dict("os.environ", {"RUNTIME_OUTPUT_INLINE_MAX_BYTES": "1000000"}):
+            result = run_code(session_id, code)
+
+        item = next(item for item in result.outputs if item.get("metadata"))
+        metadata = item["metadata"]
+        self.assertLess(len(item["data"]), 20000)
+        self.assertIn("50000 rows", item["data"])
+        self.assertEqual((metadata["rows"], metadata["columns"]), (50000, 2))
+        self.assertTrue(metadata["stats_sampled"])
+        self.assertEqual(metadata["nulls_total"], 25000)
+
+        page = dataframe_rows(session_id, metadata["frame_id"], offset=100, limit=3)
+        self.assertEqual((page["status"], page["rows"]), ("success", 50000))
+        self.assertIn("<th>101</th>", page["html"])
+        self.assertNotIn("<th>103</th>", page["html"])
+        self.assertEqual(dataframe_rows(session_id, "0" * 32, offset=0, limit=3)["status"], "error")
+
+        # Paging does not keep a deleted frame alive.
+        run_code(session_id, "del df")
+        self.assertEqual(dataframe_rows(session_id, metadata["frame_id"], offset=0, limit=3)["status"], "error")
+
     def test_auto_cleanup_on_create(self) -> None:
         base = timezone.now()
         expired = create_session("auto-expired", now=base)
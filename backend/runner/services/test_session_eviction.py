@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import subprocess
+from datetime import timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import ANY, patch
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from runner.services import runtime, vm_agent, vm_manager
+from runner.services.session_eviction import (
+    REASON_HOST_MEMORY,
+    REASON_USER_MEMORY,
+    REASON_USER_SESSIONS,
+    SessionQuotaExceeded,
+    SessionUsage,
+    estimate_namespace_bytes,
+    plan_evictions,
+    select_for_session_quota,
+)
+from runner.services.session_registry import reset_session_registry
+from runner.services.vm_backends import DockerVmBackend
+from runner.services.vm_models import VirtualMachine, VirtualMachineState, VmNetworkPolicy, VmResources, VmSpec
+
+MB = 1024 * 1024
+
+
+def _usage(session_id: str, *, user_id: int | None = 1, memory_mb: int = 100, age: int = 0, busy: bool = False):
+    return SessionUsage(
+        session_id=session_id,
+        user_id=user_id,
+        memory_bytes=memory_mb * MB,
+        updated_at=timezone.now() - timedelta(minutes=age),
+        busy=busy,
+    )
+
+
+class EvictionPlanTests(SimpleTestCase):
+    def test_host_pressure_evicts_least_recently_used_until_low_watermark(self):
+        usages = [
+            _usage("recent", age=1, memory_mb=300),
+            _usage("oldest", age=30, memory_mb=200),
+            _usage("busy", age=60, memory_mb=500, busy=True),
+            _usage("older", age=20, memory_mb=200),
+        ]
+
+        plan = plan_evictions(
+            usages,
+            host_used=950 * MB,
+            host_total=1000 * MB,
+            high_watermark=0.9,
+            low_watermark=0.6,
+        )
+
+        self.assertEqual(plan, [("oldest", REASON_HOST_MEMORY), ("older", REASON_HOST_MEMORY)])
+
+    def test_no_eviction_below_the_high_watermark(self):
+        plan = plan_evictions(
+            [_usage("a", age=30)],
+            host_used=800 * MB,
+            host_total=1000 * MB,
+            high_watermark=0.9,
+            low_watermark=0.6,
+        )
+        self.assertEqual(plan, [])
+
+    def test_user_over_memory_quota_loses_own_sessions_first(self):
+        usages = [
+            _usage("u1-old", user_id=1, age=30, memory_mb=300),
+            _usage("u1-new", user_id=1, age=1, memory_mb=300),
+            _usage("u2-old", user_id=2, age=60, memory_mb=300),
+        ]
+
+        plan = plan_evictions(
+            usages,
+            host_used=100 * MB,
+            host_total=1000 * MB,
+            high_watermark=0.9,
+            low_watermark=0.8,
+            user_max_memory=400 * MB,
+        )
+
+        self.assertEqual(plan, [("u1-old", REASON_USER_MEMORY)])
+
+    def test_session_quota_picks_idle_sessions_or_raises(self):
+        usages = [_usage("a", age=10), _usage("b", age=20), _usage("c", user_id=2, age=30)]
+        self.assertEqual(select_for_session_quota(usages, user_id=1, max_sessions=2), ["b"])
+        self.assertEqual(select_for_session_quota(usages, user_id=1, max_sessions=3), [])
+
+        with self.assertRaises(SessionQuotaExceeded):
+            select_for_session_quota(
+                [_usage("a", busy=True), _usage("b", busy=True)],
+                user_id=1,
+                max_sessions=2,
+            )
+
+    def test_namespace_estimate_counts_buffers_and_containers(self):
+        import numpy as np
+
+        array = np.zeros(1000, dtype="float64")
+        estimate = estimate_namespace_bytes({"__name__": "__main__", "array": array, "alias": array, "items": [1, 2]})
+
+        self.assertGreaterEqual(estimate, array.nbytes)
+        self.assertLess(estimate, array.nbytes + 1024)
+
+
+class DockerMemoryUsageTests(SimpleTestCase):
+    def test_memory_usage_parses_docker_stats(self):
+        with TemporaryDirectory() as tmp:
+            backend = DockerVmBackend(Path(tmp))
+            vm = VirtualMachine(
+                id="runner-notebook_1",
+                session_id="notebook:1",
+                backend="docker",
+                state=VirtualMachineState.RUNNING,
+                spec=VmSpec(
+                    image="runner-vm:test",
+                    resources=VmResources(cpu=1, ram_mb=512, disk_gb=4),
+                    network=VmNetworkPolicy(outbound="deny", allowlist=()),
+                    ttl_sec=900,
+                ),
+                workspace_path=Path(tmp) / "runner-notebook_1" / "workspace",
+                created_at=timezone.now(),
+                updated_at=timezone.now(),
+                backend_data={"container": "runner-notebook_1"},
+            )
+            stats = subprocess.CompletedProcess(args=[], returncode=0, stdout="runner-notebook_1\t1.5GiB / 4GiB\n")
+            with patch.object(backend, "_run_docker_capture", return_value=stats):
+                self.assertEqual(backend.memory_usage([vm]), {"runner-notebook_1": int(1.5 * 1024**3)})
+
+
+class RuntimeEvictionTests(SimpleTestCase):
+    def setUp(self):
+        self._sandbox_tmp = TemporaryDirectory()
+        self._vm_tmp = TemporaryDirectory()
+        runtime.reset_execution_backend()
+        self.override = override_settings(
+            RUNTIME_SANDBOX_ROOT=self._sandbox_tmp.name,
+            RUNTIME_VM_ROOT=self._vm_tmp.name,
+            RUNTIME_VM_BACKEND="local",
+            RUNTIME_SESSION_TTL_SECONDS=3600,
+        )
+        self.override.enable()
+        reset_session_registry()
+        vm_manager.reset_vm_manager()
+        vm_agent.reset_vm_agents()
+        patcher = patch.object(runtime, "broadcast_session_evicted")
+        self.broadcast = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        runtime.reset_execution_backend()
+        vm_agent.reset_vm_agents()
+        vm_manager.reset_vm_manager()
+        self.override.disable()
+        reset_session_registry()
+        self._sandbox_tmp.cleanup()
+        self._vm_tmp.cleanup()
+
+    def test_session_quota_hibernates_the_users_least_recently_used_session(self):
+        now = timezone.now()
+        first = runtime.create_session("notebook:1", now=now - timedelta(minutes=10), user_id=7)
+        runtime.create_session("notebook:2", now=now - timedelta(minutes=5), user_id=7)
+
+        with override_settings(RUNTIME_USER_MAX_SESSIONS=2):
+            runtime.create_session("notebook:3", now=now, user_id=7)
+            runtime.create_session("notebook:4", now=now, user_id=8)
+
+        self.assertIsNotNone(first.hibernated_at)
+        self.assertEqual(
+            [usage.session_id for usage in runtime._get_backend().session_usages(measure_memory=False)],
+            ["notebook:2", "notebook:3", "notebook:4"],
+        )
+        self.broadcast.assert_called_once_with(
+            "notebook:1",
+            action="hibernate",
+            reason=REASON_USER_SESSIONS,
+            message=ANY,
+        )
+
+    def test_session_quota_rejects_when_every_session_is_busy(self):
+        session = runtime.create_session("notebook:1", user_id=7)
+        session.awaiting_input = True
+
+        with override_settings(RUNTIME_USER_MAX_SESSIONS=1):
+            with self.assertRaises(runtime.SessionQuotaExceeded):
+                runtime.create_session("notebook:2", user_id=7)
+
+    def test_host_memory_pressure_stops_idle_sessions(self):
+        now = timezone.now()
+        runtime.create_session("notebook:1", now=now - timedelta(minutes=10), user_id=7)
+        runtime.create_session("notebook:2", now=now, user_id=8)
+
+        with override_settings(
+            RUNTIME_HOST_MEMORY_HIGH_WATERMARK=0.9,
+            RUNTIME_HOST_MEMORY_LOW_WATERMARK=0.5,
+            RUNTIME_EVICTION_ACTION="stop",
+        ), patch.object(runtime, "host_memory", return_value=(950 * MB, 1000 * MB)), patch.object(
+            runtime,
+            "estimate_namespace_bytes",
+            return_value=300 * MB,
+        ):
+            evicted = runtime.enforce_memory_limits()
+
+        self.assertEqual(evicted, [("notebook:1", REASON_HOST_MEMORY), ("notebook:2", REASON_HOST_MEMORY)])
+        self.assertIsNone(runtime.get_session("notebook:1"))
+        self.assertEqual(self.broadcast.call_count, 2)
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import subprocess
+import threading
+from datetime import timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from runner.services import runtime, vm_agent, vm_manager
+from runner.services.session_hibernation import restore_namespace, snapshot_namespace
+from runner.services.session_registry import reset_session_registry
+from runner.services.vm_backends import DockerVmBackend
+from runner.services.vm_models import VirtualMachineState, VmNetworkPolicy, VmResources, VmSpec
+
+
+class NamespaceSnapshotTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / ".vm_agent" / "hibernate.pkl"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_round_trip_skips_unpicklable_values(self):
+        import json
+
+        namespace = {
+            "__name__": "__main__",
+            "json": json,
+            "data": {"a": [1, 2, 3]},
+            "lock": threading.Lock(),
+            "download_file": lambda path: path,
+        }
+
+        summary = snapshot_namespace(namespace, self.path, max_bytes=1024 * 1024)
+
+        self.assertEqual(summary["saved"], ["data", "json"])
+        self.assertEqual(list(summary["skipped"]), ["lock"])
+        self.assertGreater(summary["bytes"], 0)
+
+        restored_namespace = {}
+        restored = restore_namespace(restored_namespace, self.path)
+        self.assertEqual(restored["restored"], ["data", "json"])
+        self.assertIs(restored_namespace["json"], json)
+        self.assertEqual(restored_namespace["data"], {"a": [1, 2, 3]})
+        self.assertFalse(self.path.exists())
+
+    def test_values_over_the_budget_are_skipped(self):
+        summary = snapshot_namespace({"small": 1, "big": "x" * 10_000}, self.path, max_bytes=1_000)
+
+        self.assertEqual(summary["saved"], ["small"])
+        self.assertIn("budget", summary["skipped"]["big"])
+
+
+class RuntimeHibernationTests(SimpleTestCase):
+    def setUp(self):
+        self._sandbox_tmp = TemporaryDirectory()
+        self._vm_tmp = TemporaryDirectory()
+        runtime.reset_execution_backend()
+        self.override = override_settings(
+            RUNTIME_SANDBOX_ROOT=self._sandbox_tmp.name,
+            RUNTIME_VM_ROOT=self._vm_tmp.name,
+            RUNTIME_VM_BACKEND="local",
+            RUNTIME_SESSION_TTL_SECONDS=3600,
+        )
+        self.override.enable()
+        reset_session_registry()
+        vm_manager.reset_vm_manager()
+        vm_agent.reset_vm_agents()
+
+    def tearDown(self):
+        runtime.reset_execution_backend()
+        vm_agent.reset_vm_agents()
+        vm_manager.reset_vm_manager()
+        self.override.disable()
+        reset_session_registry()
+        self._sandbox_tmp.cleanup()
+        self._vm_tmp.cleanup()
+
+    def test_hibernated_session_is_restored_on_the_next_run(self):
+        session = runtime.create_session("notebook:1")
+        runtime.run_code("notebook:1", "x = 41")
+
+        summary = runtime.hibernate_session("notebook:1")
+
+        self.assertEqual(summary["saved"], ["x"])
+        self.assertIsNotNone(session.hibernated_at)
+        self.assertEqual(session.namespace, {})
+        self.assertEqual(session.vm.state, VirtualMachineState.STOPPED)
+        self.assertTrue(runtime.lookup_session("notebook:1")["hibernated"])
+
+        result = runtime.run_code("notebook:1", "print(x + 1)")
+
+        self.assertEqual(result.stdout.strip(), "42")
+        self.assertIsNone(session.hibernated_at)
+        self.assertEqual(session.vm.state, VirtualMachineState.RUNNING)
+        self.assertFalse(runtime.lookup_session("notebook:1")["hibernated"])
+
+    def test_session_waiting_for_input_is_not_hibernated(self):
+        session = runtime.create_session("notebook:2")
+        session.awaiting_input = True
+
+        self.assertIsNone(runtime.hibernate_session("notebook:2"))
+        self.assertIsNone(session.hibernated_at)
+
+    def test_only_idle_sessions_are_hibernated(self):
+        now = timezone.now()
+        runtime.create_session("notebook:3", now=now - timedelta(minutes=30))
+        runtime.create_session("notebook:4", now=now)
+
+        with override_settings(RUNTIME_SESSION_HIBERNATE_AFTER_SECONDS=600):
+            hibernated = runtime.hibernate_idle_sessions(now=now)
+
+        self.assertEqual(hibernated, ["notebook:3"])
+
+
+def _make_completed(stdout: str = "", returncode: int = 0) -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(args=[], returncode=returncode, stdout=stdout, stderr="")
+
+
+class DockerStopResumeTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.backend = DockerVmBackend(Path(self._tmp.name))
+        self.docker_calls: list[tuple[str, ...]] = []
+        self.created: list[str] = []
+        for name, side_effect in (
+            ("_run_docker", lambda args, check=True: self.docker_calls.append(args) or _make_completed()),
+            ("_create_container", lambda name, spec, vm_dir, workspace: self.created.append(name)),
+            ("_start_agent", lambda name: None),
+            ("_wait_for_agent", lambda agent_dir: None),
+        ):
+            patcher = patch.object(self.backend, name, side_effect=side_effect)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.spec = VmSpec(
+            image="runner-vm:test",
+            resources=VmResources(cpu=1, ram_mb=512, disk_gb=4),
+            network=VmNetworkPolicy(outbound="deny", allowlist=()),
+            ttl_sec=900,
+        )
+
+    def test_stopped_vm_resumes_with_its_workspace_and_snapshot(self):
+        vm = self.backend.create_vm(vm_id="runner-notebook_5", session_id="notebook:5", spec=self.spec)
+        (vm.workspace_path / "data.csv").write_text("a,b\n1,2\n")
+        (vm.workspace_path / ".vm_agent" / "hibernate.pkl").write_bytes(b"snapshot")
+
+        stopped = self.backend.stop_vm("runner-notebook_5")
+
+        self.assertEqual(stopped.state, VirtualMachineState.STOPPED)
+        self.assertNotIn("container", stopped.backend_data)
+        self.assertIn(("rm", "-f", "runner-notebook_5"), self.docker_calls)
+
+        resumed = self.backend.resume_vm("runner-notebook_5")
+
+        self.assertEqual(resumed.state, VirtualMachineState.RUNNING)
+        self.assertEqual(self.created, ["runner-notebook_5", "runner-notebook_5"])
+        self.assertEqual((resumed.workspace_path / "data.csv").read_text(), "a,b\n1,2\n")
+        self.assertEqual((resumed.workspace_path / ".vm_agent" / "hibernate.pkl").read_bytes(), b"snapshot")
+        self.assertTrue((resumed.workspace_path / ".vm_agent" / "agent_server.py").exists())
+        self.assertEqual(list(Path(self._tmp.name).glob(".parked-*")), [])
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import timedelta
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from runner.services import runtime, vm_agent, vm_manager
+from runner.services.session_reaper import SessionReaper
+from runner.services.session_registry import reset_session_registry
+
+
+class SessionReaperTests(SimpleTestCase):
+    def test_teardowns_run_in_parallel_up_to_the_worker_limit(self):
+        reaper = SessionReaper(lambda: None, workers=2)
+        self.addCleanup(reaper.stop)
+        release = threading.Event()
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def teardown():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            release.wait(5)
+            with lock:
+                running.pop()
+
+        for index in range(4):
+            reaper.submit(f"notebook:{index}", teardown)
+        time.sleep(0.2)
+        self.assertEqual(max(peak), 2)
+
+        release.set()
+        reaper.drain(timeout=5)
+        self.assertEqual(reaper.pending(), 0)
+
+    def test_teardowns_of_the_same_session_run_in_order(self):
+        reaper = SessionReaper(lambda: None, workers=4)
+        self.addCleanup(reaper.stop)
+        order = []
+        reaper.submit("notebook:1", lambda: (time.sleep(0.1), order.append("first")))
+        reaper.submit("notebook:1", lambda: order.append("second"))
+
+        reaper.wait_for("notebook:1", timeout=5)
+
+        self.assertEqual(order, ["first", "second"])
+
+
+class RuntimeReaperTests(SimpleTestCase):
+    def setUp(self):
+        self._sandbox_tmp = TemporaryDirectory()
+        self._vm_tmp = TemporaryDirectory()
+        runtime.reset_execution_backend()
+        self.override = override_settings(
+            RUNTIME_SANDBOX_ROOT=self._sandbox_tmp.name,
+            RUNTIME_VM_ROOT=self._vm_tmp.name,
+            RUNTIME_VM_BACKEND="local",
+            RUNTIME_SESSION_TTL_SECONDS=10,
+            RUNTIME_SESSION_REAPER_ENABLED=True,
+            RUNTIME_SESSION_REAPER_INTERVAL_SECONDS=3600,
+        )
+        self.override.enable()
+        reset_session_registry()
+        vm_manager.reset_vm_manager()
+        vm_agent.reset_vm_agents()
+
+    def tearDown(self):
+        runtime.reset_execution_backend()
+        vm_agent.reset_vm_agents()
+        vm_manager.reset_vm_manager()
+        self.override.disable()
+        reset_session_registry()
+        self._sandbox_tmp.cleanup()
+        self._vm_tmp.cleanup()
+
+    def test_requests_do_not_wait_for_teardown_of_other_sessions(self):
+        base = timezone.now()
+        expired = runtime.create_session("notebook:1", now=base)
+        backend = runtime._get_backend()
+        self.assertTrue(backend.reaper.running)
+        release = threading.Event()
+        real_teardown = runtime._teardown_session
+
+        def slow_teardown(session_id, workdir):
+            release.wait(5)
+            real_teardown(session_id, workdir)
+
+        with patch.object(runtime, "_teardown_session", side_effect=slow_teardown):
+            # A request for another session does not sweep expired sessions itself.
+            runtime.create_session("notebook:2", now=base + timedelta(seconds=20))
+            self.assertIn("notebook:1", runtime._sessions)
+
+            self.assertEqual(backend._reap(now=base + timedelta(seconds=20)), ["notebook:1"])
+            self.assertNotIn("notebook:1", runtime._sessions)
+            self.assertTrue(expired.workdir.exists())
+            self.assertEqual(backend.reaper.pending(), 1)
+
+            release.set()
+            backend.reaper.drain(timeout=5)
+
+        self.assertFalse(expired.workdir.exists())
+
+    def test_expired_session_is_detached_on_access_and_recreated_after_its_teardown(self):
+        base = timezone.now()
+        first = runtime.create_session("notebook:1", now=base)
+        (first.workdir / "old.txt").write_text("x")
+
+        later = base + timedelta(seconds=20)
+        self.assertIsNone(runtime.get_session("notebook:1", now=later))
+
+        second = runtime.create_session("notebook:1", now=later)
+        self.assertIsNot(first, second)
+        self.assertTrue(second.workdir.exists())
+        self.assertFalse((second.workdir / "old.txt").exists())
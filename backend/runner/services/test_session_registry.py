@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+
+from runner.services import runtime, streaming_runs, vm_agent, vm_manager
+from runner.services.session_registry import (
+    FileSessionRegistry,
+    current_owner,
+    get_session_registry,
+    is_owner_alive,
+    reset_session_registry,
+)
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+class FileSessionRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.registry = FileSessionRegistry(Path(self.tmp_dir.name))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_records_round_trip_and_are_visible_to_other_instances(self):
+        self.registry.put("sessions", "notebook:1", {"vm_id": "runner-notebook_1"})
+        other = FileSessionRegistry(Path(self.tmp_dir.name))
+
+        self.assertEqual(other.get("sessions", "notebook:1"), {"vm_id": "runner-notebook_1"})
+        self.assertEqual(
+            other.update("sessions", "notebook:1", updated_at="now"),
+            {"vm_id": "runner-notebook_1", "updated_at": "now"},
+        )
+        self.assertEqual([key for key, _record in self.registry.items("sessions")], ["notebook:1"])
+
+        other.delete("sessions", "notebook:1")
+        self.assertIsNone(self.registry.get("sessions", "notebook:1"))
+
+    def test_expired_records_are_dropped(self):
+        self.registry.put("sessions", "notebook:1", {"vm_id": "x"}, ttl=-1)
+
+        self.assertIsNone(self.registry.get("sessions", "notebook:1"))
+        self.assertEqual(list(self.registry.items("sessions")), [])
+
+    def test_owner_liveness(self):
+        self.assertTrue(is_owner_alive(current_owner()))
+        self.assertFalse(is_owner_alive({"host": socket.gethostname(), "pid": _dead_pid()}))
+        self.assertTrue(is_owner_alive({"host": "elsewhere", "pid": 1}, heartbeat_at=time.time()))
+        self.assertFalse(is_owner_alive({"host": "elsewhere", "pid": 1}, heartbeat_at=time.time() - 3600))
+
+
+class SharedRuntimeSessionTests(SimpleTestCase):
+    def setUp(self):
+        self._sandbox_tmp = TemporaryDirectory()
+        self._vm_tmp = TemporaryDirectory()
+        runtime.reset_execution_backend()
+        self.override = override_settings(
+            RUNTIME_SANDBOX_ROOT=self._sandbox_tmp.name,
+            RUNTIME_VM_ROOT=self._vm_tmp.name,
+            RUNTIME_VM_BACKEND="local",
+            RUNTIME_SESSION_TTL_SECONDS=60,
+            RUNTIME_SESSION_REGISTRY="file",
+            RUNTIME_SESSION_REGISTRY_ROOT=str(Path(self._sandbox_tmp.name) / ".registry"),
+        )
+        self.override.enable()
+        reset_session_registry()
+        vm_manager.reset_vm_manager()
+        vm_agent.reset_vm_agents()
+
+    def tearDown(self):
+        runtime.reset_execution_backend()
+        vm_agent.reset_vm_agents()
+        vm_manager.reset_vm_manager()
+        self.override.disable()
+        reset_session_registry()
+        self._sandbox_tmp.cleanup()
+        self._vm_tmp.cleanup()
+
+    def _foreign_record(self, session_id: str, *, backend: str, owner: dict, updated_at=None) -> dict:
+        now = updated_at or timezone.now()
+        workdir = Path(self._vm_tmp.name) / f"runner-{session_id.replace(':', '_')}" / "workspace"
+        workdir.mkdir(parents=True, exist_ok=True)
+        record = {
+            "session_id": session_id,
+            "vm_id": f"runner-{session_id.replace(':', '_')}",
+            "backend": backend,
+            "workdir": str(workdir),
+            "python_exec": None,
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat(),
+            "owner": owner,
+            "heartbeat_at": time.time(),
+        }
+        get_session_registry().put(runtime.SESSION_REGISTRY_KIND, session_id, record)
+        return record
+
+    def test_created_session_is_published_and_removed_on_stop(self):
+        runtime.create_session("notebook:1")
+
+        record = runtime.lookup_session("notebook:1")
+        self.assertEqual(record["owner"], current_owner())
+        self.assertEqual(record["backend"], "local")
+        self.assertTrue(record["alive"])
+
+        runtime.stop_session("notebook:1")
+        self.assertIsNone(runtime.lookup_session("notebook:1"))
+
+    def test_local_session_of_another_live_process_is_not_driven_here(self):
+        owner = {"host": socket.gethostname(), "pid": os.getppid()}
+        self._foreign_record("notebook:2", backend="local", owner=owner)
+
+        self.assertIsNone(runtime.get_session("notebook:2"))
+        self.assertEqual(runtime.lookup_session("notebook:2")["owner"], owner)
+        # A second interpreter here would fork the session's state.
+        with self.assertRaises(runtime.SessionHeldElsewhereError):
+            runtime.create_session("notebook:2")
+        self.assertNotIn("notebook:2", runtime._sessions)
+        self.assertEqual(runtime.lookup_session("notebook:2")["owner"], owner)
+
+    def test_vm_session_of_another_process_is_adopted_and_released_when_stopped_elsewhere(self):
+        owner = {"host": socket.gethostname(), "pid": os.getppid()}
+        record = self._foreign_record("notebook:3", backend="docker", owner=owner)
+        vm = SimpleNamespace(id=record["vm_id"], backend="docker", workspace_path=Path(record["workdir"]))
+        fake_manager = SimpleNamespace(backend=SimpleNamespace(get_vm=lambda _vm_id: vm))
+
+        with patch.object(runtime, "get_vm_manager", return_value=fake_manager), patch.object(
+            runtime,
+            "REGISTRY_SYNC_INTERVAL_SECONDS",
+            0,
+        ):
+            session = runtime.get_session("notebook:3")
+            self.assertIs(session.vm, vm)
+            self.assertEqual(session.workdir, Path(record["workdir"]))
+            # Ownership stays with the live process that created the VM.
+            self.assertEqual(runtime.lookup_session("notebook:3")["owner"], owner)
+
+            get_session_registry().delete(runtime.SESSION_REGISTRY_KIND, "notebook:3")
+            self.assertIsNone(runtime.get_session("notebook:3"))
+            self.assertNotIn("notebook:3", runtime._sessions)
+
+    def test_expired_sessions_of_dead_processes_are_reaped(self):
+        owner = {"host": socket.gethostname(), "pid": _dead_pid()}
+        stale = timezone.now() - timedelta(hours=2)
+        record = self._foreign_record("notebook:4", backend="local", owner=owner, updated_at=stale)
+
+        expired = runtime.cleanup_expired(ttl_seconds=60)
+
+        self.assertEqual(expired, ["notebook:4"])
+        self.assertIsNone(runtime.lookup_session("notebook:4"))
+        self.assertFalse(Path(record["workdir"]).exists())
+
+
+class SharedStreamingRunTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.override = override_settings(
+            RUNTIME_SESSION_REGISTRY="file",
+            RUNTIME_SESSION_REGISTRY_ROOT=self.tmp_dir.name,
+        )
+        self.override.enable()
+        reset_session_registry()
+        with streaming_runs._LOCK:
+            streaming_runs._RUNS.clear()
+
+    def tearDown(self):
+        with streaming_runs._LOCK:
+            streaming_runs._RUNS.clear()
+        self.override.disable()
+        reset_session_registry()
+        self.tmp_dir.cleanup()
+
+    def _publish(self, *, status: str, owner: dict, result=None) -> None:
+        get_session_registry().put(
+            streaming_runs.RUNS_REGISTRY_KIND,
+            "run-1",
+            {
+                "run_id": "run-1",
+                "session_id": "notebook:1",
+                "cell_id": 7,
+                "notebook_id": 1,
+                "stdout_path": str(Path(self.tmp_dir.name) / "run-1.stdout"),
+                "stderr_path": str(Path(self.tmp_dir.name) / "run-1.stderr"),
+                "status": status,
+                "started_at": time.time(),
+                "finished_at": None,
+                "error": None,
+                "result": result,
+                "owner": owner,
+            },
+        )
+        if status == "running":
+            get_session_registry().put(
+                streaming_runs.ACTIVE_RUNS_REGISTRY_KIND,
+                "notebook:1",
+                {"run_id": "run-1"},
+            )
+
+    def test_run_started_by_another_process_is_visible_and_blocks_new_runs(self):
+        self._publish(status="running", owner={"host": socket.gethostname(), "pid": os.getppid()})
+
+        run = streaming_runs.get_streaming_run("run-1")
+        self.assertEqual((run.status, run.cell_id), ("running", 7))
+        with self.assertRaises(streaming_runs.RunInProgressError):
+            streaming_runs.start_streaming_run(session_id="notebook:1", cell_id=8, notebook_id=1, code="")
+
+    def test_finished_remote_run_exposes_its_result(self):
+        result = {
+            "stdout": "hello\n",
+            "stderr": "",
+            "error": None,
+            "variables": {"x": "1"},
+            "outputs": [],
+            "artifacts": [],
+            "status": "success",
+            "prompt": None,
+            "run_id": None,
+        }
+        self._publish(status="finished", owner={"host": "elsewhere", "pid": 1}, result=result)
+
+        run = streaming_runs.get_streaming_run("run-1")
+        self.assertEqual(run.status, "finished")
+        self.assertEqual(run.result.stdout, "hello\n")
+        self.assertEqual(run.result.variables, {"x": "1"})
+
+    def test_running_run_of_a_dead_process_reports_an_error(self):
+        self._publish(status="running", owner={"host": socket.gethostname(), "pid": _dead_pid()})
+
+        run = streaming_runs.get_streaming_run("run-1")
+        self.assertEqual(run.status, "error")
+        self.assertIn("interrupted", run.error)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import subprocess
+from datetime import timedelta
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from runner.services.session_telemetry import (
+    SESSION_CPU_PERCENT,
+    SESSION_MEMORY_BYTES,
+    HostStatsSource,
+    ResourceCounters,
+    SessionTelemetry,
+    StatsSource,
+)
+from runner.services.vm_backends import DockerVmBackend
+from runner.services.vm_models import VirtualMachine, VirtualMachineState, VmNetworkPolicy, VmResources, VmSpec
+
+
+class FakeStatsSource(StatsSource):
+    def __init__(self):
+        self.readings = []
+
+    def read(self, sessions):
+        return self.readings.pop(0)
+
+
+def _gauge(gauge, **labels) -> float | None:
+    for metric in gauge.collect():
+        for sample in metric.samples:
+            if sample.labels == labels:
+                return sample.value
+    return None
+
+
+class SessionTelemetryTests(SimpleTestCase):
+    def setUp(self):
+        self.source = FakeStatsSource()
+        self.telemetry = SessionTelemetry(self.source, history=3)
+        self.addCleanup(self.telemetry.clear)
+
+    def test_rates_come_from_successive_counters(self):
+        base = timezone.now()
+        self.source.readings = [
+            {"notebook:1": ResourceCounters(cpu_seconds=10.0, memory_bytes=100, net_rx_bytes=0, net_tx_bytes=0)},
+            {"notebook:1": ResourceCounters(cpu_seconds=15.0, memory_bytes=200, net_rx_bytes=1000, net_tx_bytes=500)},
+        ]
+
+        first = self.telemetry.sample({"notebook:1": object()}, now=base)["notebook:1"]
+        second = self.telemetry.sample({"notebook:1": object()}, now=base + timedelta(seconds=10))["notebook:1"]
+
+        self.assertIsNone(first.cpu_percent)
+        self.assertEqual(first.memory_bytes, 100)
+        self.assertEqual(second.cpu_percent, 50.0)
+        self.assertEqual(second.net_rx_bytes_per_second, 100.0)
+        self.assertEqual(second.net_tx_bytes_per_second, 50.0)
+        self.assertEqual(_gauge(SESSION_CPU_PERCENT, session="notebook:1"), 50.0)
+        self.assertEqual(_gauge(SESSION_MEMORY_BYTES, session="notebook:1"), 200.0)
+
+    def test_history_is_bounded_and_dropped_with_the_session(self):
+        base = timezone.now()
+        self.source.readings = [{"notebook:1": ResourceCounters(memory_bytes=index)} for index in range(5)] + [{}]
+        for index in range(5):
+            self.telemetry.sample({"notebook:1": object()}, now=base + timedelta(seconds=index))
+
+        self.assertEqual([sample.memory_bytes for sample in self.telemetry.history("notebook:1")], [2, 3, 4])
+
+        self.telemetry.sample({}, now=base + timedelta(seconds=10))
+        self.assertEqual(self.telemetry.history("notebook:1"), [])
+        self.assertIsNone(_gauge(SESSION_MEMORY_BYTES, session="notebook:1"))
+
+    def test_sample_if_due_reuses_a_fresh_sample(self):
+        self.source.readings = [{"notebook:1": ResourceCounters(memory_bytes=1)}]
+        self.telemetry.sample_if_due({"notebook:1": object()}, interval=60)
+
+        samples = self.telemetry.sample_if_due({"notebook:1": object()}, interval=60)
+
+        self.assertEqual(samples["notebook:1"].memory_bytes, 1)
+
+
+class HostStatsSourceTests(SimpleTestCase):
+    def test_reads_cgroup_v2_and_network_counters_of_a_process(self):
+        with TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            group = root / "cgroup" / "system.slice" / "docker-abc.scope"
+            group.mkdir(parents=True)
+            (group / "cpu.stat").write_text("usage_usec 2500000\nuser_usec 2000000\n")
+            (group / "memory.current").write_text("1000\n")
+            (group / "memory.stat").write_text("anon 700\ninactive_file 300\n")
+            proc = root / "proc" / "42"
+            (proc / "net").mkdir(parents=True)
+            (proc / "cgroup").write_text("0::/system.slice/docker-abc.scope\n")
+            (proc / "net" / "dev").write_text(
+                "Inter-|   Receive                            |  Transmit\n"
+                " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets\n"
+                "    lo:  999 1 0 0 0 0 0 0  999 1 0 0 0 0 0 0\n"
+                "  eth0:  123 1 0 0 0 0 0 0  456 1 0 0 0 0 0 0\n"
+            )
+            source = HostStatsSource(cgroup_root=root / "cgroup", proc_root=root / "proc")
+
+            counters = source.read_process(42)
+
+        self.assertEqual(
+            counters,
+            ResourceCounters(cpu_seconds=2.5, memory_bytes=700, net_rx_bytes=123, net_tx_bytes=456),
+        )
+
+    def test_local_sessions_report_namespace_memory_and_workspace_size(self):
+        with TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            (workdir / "data.bin").write_bytes(b"x" * 8192)
+            session = SimpleNamespace(namespace={"data": b"x" * 1000}, workdir=workdir, vm=None, hibernated_at=None)
+
+            counters = HostStatsSource().read({"notebook:1": session})["notebook:1"]
+
+        self.assertIsNone(counters.cpu_seconds)
+        self.assertGreaterEqual(counters.memory_bytes, 1000)
+        self.assertGreaterEqual(counters.disk_bytes, 8192)
+
+
+class DockerHostPidsTests(SimpleTestCase):
+    def test_host_pids_parse_docker_inspect(self):
+        with TemporaryDirectory() as tmp:
+            backend = DockerVmBackend(Path(tmp))
+            vm = VirtualMachine(
+                id="runner-notebook_1",
+                session_id="notebook:1",
+                backend="docker",
+                state=VirtualMachineState.RUNNING,
+                spec=VmSpec(
+                    image="runner-vm:test",
+                    resources=VmResources(cpu=1, ram_mb=512, disk_gb=4),
+                    network=VmNetworkPolicy(outbound="deny", allowlist=()),
+                    ttl_sec=900,
+                ),
+                workspace_path=Path(tmp) / "runner-notebook_1" / "workspace",
+                created_at=timezone.now(),
+                updated_at=timezone.now(),
+                backend_data={"container": "runner-notebook_1"},
+            )
+            inspect = subprocess.CompletedProcess(args=[], returncode=0, stdout="/runner-notebook_1\t4242\n")
+            with patch.object(backend, "_run_docker_capture", return_value=inspect):
+                self.assertEqual(backend.host_pids([vm]), {"runner-notebook_1": 4242})
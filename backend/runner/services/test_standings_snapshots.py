@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+
+from django.test import SimpleTestCase
+
+from runner.services.standings_snapshots import (
+    compress_standings,
+    decompress_standings,
+    standings_fingerprint,
+)
+
+
+class StandingsSnapshotEncodingTests(SimpleTestCase):
+    def test_compressed_round_trip(self):
+        data = {"payload": {"entries": [{"user_id": idx, "rank": idx} for idx in range(200)]}, "state": {}}
+
+        blob, raw_size = compress_standings(data)
+
+        self.assertLess(len(blob), raw_size)
+        self.assertEqual(decompress_standings(memoryview(blob)), data)
+
+    def test_fingerprint_tracks_contest_inputs(self):
+        end_time = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        base = standings_fingerprint(end_time=end_time, scoring="partial", problem_ids=[1, 2], participant_ids=[5, 3])
+
+        self.assertEqual(
+            base,
+            standings_fingerprint(end_time=end_time, scoring="partial", problem_ids=[1, 2], participant_ids=[3, 5]),
+        )
+        self.assertNotEqual(
+            base,
+            standings_fingerprint(end_time=end_time, scoring="icpc", problem_ids=[1, 2], participant_ids=[3, 5]),
+        )
+        self.assertNotEqual(
+            base,
+            standings_fingerprint(end_time=end_time, scoring="partial", problem_ids=[2, 1], participant_ids=[3, 5]),
+        )
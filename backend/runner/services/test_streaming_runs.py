@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+import json
 import threading
 import time
 from unittest.mock import patch
@@ -10,7 +12,9 @@ from unittest.mock import patch
 from django.test import SimpleTestCase
 
 from runner.services import streaming_runs
-from runner.services.runtime import RuntimeExecutionResult
+from runner.services.cell_outputs import OUTPUT_STORAGE_PREFIX, build_output_model, serialize_output_model
+from runner.services.runtime import CellExecutionResult, RuntimeExecutionResult, _build_execution_result
+from runner.services.vm_agent import LocalVmAgent
 
 
 @dataclass
@@ -98,3 +102,111 @@ class StreamingRunsTests(SimpleTestCase):
             self.assertEqual(run.status, "finished")
             self.assertFalse(run.stdout_path.exists())
             self.assertFalse(run.stderr_path.exists())
+
+    def test_notebook_run_reports_cell_events_and_keeps_them_after_finish(self):
+        agent = LocalVmAgent(
+            SimpleNamespace(namespace={"__builtins__": __builtins__}, workdir=self.session.workdir, python_exec=None)
+        )
+        finished = []
+
+        def fake_run_cells_stream(_session_id, cells, *, events_path, stop_on_error):
+            payload = agent.exec_batch(cells, events_path=events_path, stop_on_error=stop_on_error)
+            return [
+                CellExecutionResult(item["cell_id"], item["duration_ms"], _build_execution_result(item))
+                for item in payload["results"]
+            ]
+
+        with patch("runner.services.streaming_runs.get_session", return_value=self.session), patch(
+            "runner.services.streaming_runs.run_cells_stream",
+            side_effect=fake_run_cells_stream,
+        ):
+            run = streaming_runs.start_notebook_run(
+                session_id="notebook:1",
+                notebook_id=1,
+                cells=[(10, "x = 1\nprint('a')"), (11, "print(x + 1)")],
+                on_finish=finished.append,
+            )
+            for _ in range(100):
+                if run.status != "running":
+                    break
+                time.sleep(0.02)
+
+        self.assertEqual(run.status, "finished")
+        self.assertEqual(finished, [run])
+        self.assertEqual([item.result.stdout for item in run.cell_results], ["a\n", "2\n"])
+        events, offset = streaming_runs.read_run_events(run, offset=0)
+        self.assertEqual(
+            [(event["event"], event["cell_id"]) for event in events],
+            [("started", 10), ("finished", 10), ("started", 11), ("finished", 11)],
+        )
+        self.assertEqual(streaming_runs.read_run_events(run, offset=offset), ([], offset))
+        self.assertFalse(any(path.exists() for path in streaming_runs.cell_stream_paths(run, 11)))
+
+    def test_notebook_run_events_are_read_up_to_the_last_complete_line(self):
+        events_path = self.session.workdir / "run.events"
+        events_path.write_text('{"event": "started", "cell_id": 1}\n{"event": "fini', encoding="utf-8")
+        run = SimpleNamespace(run_id="r", events_path=events_path)
+
+        events, offset = streaming_runs.read_run_events(run, offset=0)
+
+        self.assertEqual(events, [{"event": "started", "cell_id": 1}])
+        self.assertEqual(offset, len('{"event": "started", "cell_id": 1}\n'))
+
+    def test_output_model_matches_the_notebook_storage_format(self):
+        result = RuntimeExecutionResult(
+            stdout="hi\n",
+            stderr="",
+            error=None,
+            variables={},
+            outputs=[{"type": "image/png", "path": "plot.png", "name": "plot.png"}],
+            artifacts=[{"path": "model.pkl"}],
+        )
+
+        model = build_output_model("notebook:1", result, duration_ms=12)
+        stored = serialize_output_model(model)
+
+        self.assertTrue(stored.startswith(OUTPUT_STORAGE_PREFIX))
+        self.assertEqual(json.loads(stored[len(OUTPUT_STORAGE_PREFIX):])["format"], "booml_output_v2")
+        self.assertEqual(model["status"], "success")
+        self.assertEqual(model["meta"]["duration_ms"], 12)
+        self.assertEqual(model["streams"], [{"channel": "stdout", "text": "hi\n"}])
+        self.assertEqual(
+            model["rich_outputs"][0]["url"], "/api/sessions/file/?session_id=notebook%3A1&path=plot.png"
+        )
+        self.assertEqual(model["artifacts"][0]["name"], "model.pkl")
+
+    def test_run_updates_send_the_rest_of_a_cell_before_its_finished_event(self):
+        stream_dir = self.session.workdir
+        run = streaming_runs.StreamingRun(
+            run_id="r1",
+            session_id="notebook:1",
+            cell_id=1,
+            notebook_id=1,
+            stdout_path=stream_dir / "r1.1.stdout",
+            stderr_path=stream_dir / "r1.1.stderr",
+            cell_ids=[1, 2],
+            events_path=stream_dir / "r1.events",
+        )
+        (stream_dir / "r1.1.stdout").write_text("a\nb\n")
+        (stream_dir / "r1.2.stdout").write_text("c\n")
+        run.events_path.write_text(
+            "".join(
+                json.dumps(event) + "\n"
+                for event in [
+                    {"event": "started", "cell_id": 1},
+                    {"event": "finished", "cell_id": 1, "result": {}},
+                    {"event": "started", "cell_id": 2},
+                ]
+            )
+        )
+        cursor = streaming_runs.StreamCursor(cell_id=1, stdout_offset=2)
+
+        updates = streaming_runs.read_run_updates(run, cursor)
+
+        self.assertEqual(
+            [(update["type"], update.get("cell_id"), update.get("stdout")) for update in updates],
+            [("output", 1, "b\n"), ("events", None, None), ("output", 2, "c\n")],
+        )
+        self.assertEqual(len(updates[1]["events"]), 3)
+        self.assertEqual((cursor.cell_id, cursor.stdout_offset), (2, 2))
+        self.assertEqual(streaming_runs.read_run_updates(run, cursor), [])
@@ -1,16 +1,23 @@
-import io
 import builtins
+import os
 import threading
 import time
 from pathlib import Path
 from tempfile import TemporaryDirectory
 from types import SimpleNamespace
-from django.test import TestCase
+from unittest.mock import patch
+from django.test import SimpleTestCase
 
-from .vm_agent import _handle_shell_commands, start_interactive_run
+from .vm_agent import (
+    LocalVmAgent,
+    _CaptureBuffer,
+    _rewrite_shell_commands,
+    _run_shell_command,
+    start_interactive_run,
+)
 
 
-class ShellCommandHandlingTests(TestCase):
+class ShellCommandHandlingTests(SimpleTestCase):
     def setUp(self):
         self.tmpdir = TemporaryDirectory()
         self.workdir = Path(self.tmpdir.name)
@@ -18,57 +25,40 @@ class ShellCommandHandlingTests(TestCase):
     def tearDown(self):
         self.tmpdir.cleanup()
 
-    def test_handle_pip_install_command(self):
-        code = "!pip install requests\nprint('done')"
-        stdout_buf = io.StringIO()
-        stderr_buf = io.StringIO()
-        
-        filtered_code = _handle_shell_commands(
-            code, self.workdir, stdout_buf, stderr_buf
-        )
-        
-        self.assertNotIn("!pip", filtered_code)
-        self.assertIn("print('done')", filtered_code)
-        stdout_output = stdout_buf.getvalue()
-        self.assertTrue(len(stdout_output) > 0 or len(stderr_buf.getvalue()) > 0)
-
-    def test_handle_multiple_pip_install_commands(self):
-        code = "!pip install requests\n!pip install numpy\nprint('done')"
-        stdout_buf = io.StringIO()
-        stderr_buf = io.StringIO()
-        
-        filtered_code = _handle_shell_commands(
-            code, self.workdir, stdout_buf, stderr_buf
-        )
-        
-        self.assertNotIn("!pip", filtered_code)
-        self.assertIn("print('done')", filtered_code)
-
-    def test_preserve_non_pip_commands(self):
-        code = "x = 1\n!pip install requests\ny = 2\nprint(x + y)"
-        stdout_buf = io.StringIO()
-        stderr_buf = io.StringIO()
-        
-        filtered_code = _handle_shell_commands(
-            code, self.workdir, stdout_buf, stderr_buf
+    def test_shell_lines_become_helper_calls(self):
+        code = "x = 1\n!pip install requests\nfor i in range(2):\n    !echo $HOME\nprint(x)"
+
+        rewritten = _rewrite_shell_commands(code)
+
+        self.assertEqual(
+            rewritten.split("\n"),
+            ["x = 1", "_booml_shell('pip install requests')", "for i in range(2):", "    _booml_shell('echo $HOME')", "print(x)"],
         )
-        
-        self.assertIn("x = 1", filtered_code)
-        self.assertIn("y = 2", filtered_code)
-        self.assertIn("print(x + y)", filtered_code)
-        self.assertNotIn("!pip", filtered_code)
-
-    def test_handle_pip_install_with_parameters(self):
-        code = "!pip install --upgrade pip\nprint('done')"
-        stdout_buf = io.StringIO()
-        stderr_buf = io.StringIO()
-        
-        filtered_code = _handle_shell_commands(
-            code, self.workdir, stdout_buf, stderr_buf
+
+    def test_shell_output_streams_in_cell_order(self):
+        session = SimpleNamespace(namespace={"__builtins__": builtins}, workdir=self.workdir, python_exec=None)
+        code = "print('a')\n!echo b; echo err >&2\nprint('c')"
+
+        result = LocalVmAgent(session).exec_code_stream(
+            code, stdout_path=self.workdir / "out.txt", stderr_path=self.workdir / "err.txt"
         )
-        
-        self.assertNotIn("!pip", filtered_code)
-        self.assertIn("print('done')", filtered_code)
+
+        self.assertIsNone(result["error"])
+        self.assertEqual(result["stdout"], "a\nb\nc\n")
+        self.assertEqual(result["stderr"], "err\n")
+        self.assertEqual((self.workdir / "out.txt").read_text(), "a\nb\nc\n")
+
+    def test_shell_timeout_kills_the_process_group(self):
+        stdout_buf = _CaptureBuffer()
+        stderr_buf = _CaptureBuffer()
+
+        started = time.monotonic()
+        with patch.dict(os.environ, {"RUNTIME_SHELL_COMMAND_TIMEOUT_SECONDS": "1"}):
+            _run_shell_command("echo started; sleep 30 & sleep 30", self.workdir, stdout_buf, stderr_buf)
+
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual(stdout_buf.getvalue(), "started\n")
+        self.assertIn("timed out after 1.0 seconds", stderr_buf.getvalue())
 
     def test_wait_for_status_returns_immediately_if_input_required_already_set(self):
         namespace = {
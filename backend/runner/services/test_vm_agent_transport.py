@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from runner.services import vm_agent
+from runner.services.vm_agent import FilesystemVmAgent, LocalVmAgent, SocketVmAgent, get_vm_agent
+from runner.services.vm_agent_benchmark import local_agent_server, measure_round_trips
+
+
+class SocketTransportTests(SimpleTestCase):
+    def setUp(self):
+        self._tmp = TemporaryDirectory(prefix="agent-")
+        self.workspace = Path(self._tmp.name)
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_socket_and_file_transports_share_the_agent_namespace(self):
+        with local_agent_server(self.workspace) as vm:
+            socket_agent = SocketVmAgent(vm, timeout=30)
+            first = socket_agent.exec_code("x = 21\nprint('hi')")
+            second = FilesystemVmAgent(vm, timeout=30).exec_code("print(x * 2)")
+
+            self.assertTrue((self.workspace / ".vm_agent" / "agent.sock").exists())
+            with patch.object(FilesystemVmAgent, "_send_payload") as file_send:
+                third = socket_agent.exec_code("print(x + 1)")
+            file_send.assert_not_called()
+
+        self.assertEqual(first["stdout"], "hi\n")
+        self.assertEqual(first["variables"]["x"], "21")
+        self.assertEqual(second["stdout"], "42\n")
+        self.assertEqual(third["stdout"], "22\n")
+
+    def test_shell_output_streams_between_python_output(self):
+        code = "print('a')\nfor i in range(2):\n    !echo shell; echo err >&2\nprint('c')"
+        with local_agent_server(self.workspace) as vm:
+            result = SocketVmAgent(vm, timeout=30).exec_code_stream(
+                code, stdout_path=self.workspace / "out.txt", stderr_path=self.workspace / "err.txt"
+            )
+            stream = (self.workspace / "out.txt").read_text()
+
+        self.assertIsNone(result["error"])
+        self.assertEqual(result["stdout"], "a\nshell\nshell\nc\n")
+        self.assertEqual(result["stderr"], "err\nerr\n")
+        self.assertEqual(stream, result["stdout"])
+
+    def test_socket_agent_falls_back_to_command_files(self):
+        with local_agent_server(self.workspace, socket_enabled=False) as vm:
+            result = SocketVmAgent(vm, timeout=30).exec_code("print('via files')")
+
+        self.assertEqual(result["stdout"], "via files\n")
+
+    def test_round_trip_measurement(self):
+        with local_agent_server(self.workspace) as vm:
+            stats = measure_round_trips(SocketVmAgent(vm, timeout=30), repeat=5, warmup=1)
+
+        self.assertEqual(stats["runs"], 5)
+        self.assertLessEqual(stats["min_ms"], stats["p50_ms"])
+        self.assertLessEqual(stats["p50_ms"], stats["max_ms"])
+
+    def test_agent_server_pages_frames_only_while_they_are_alive(self):
+        code = "import pandas as pd\ndf = pd.DataFrame({'a': range(5000)})\ndf"
+        with local_agent_server(self.workspace) as vm:
+            agent = SocketVmAgent(vm, timeout=30)
+            result = agent.exec_code(code)
+            frame_id = next(item for item in result["outputs"] if item.get("metadata"))["metadata"]["frame_id"]
+            page = agent.dataframe_rows(frame_id, offset=10, limit=2)
+            agent.exec_code("del df")
+            gone = agent.dataframe_rows(frame_id, offset=10, limit=2)
+
+        self.assertEqual((page["status"], page["rows"]), ("success", 5000))
+        self.assertEqual(gone["status"], "error")
+
+
+def _run_in_thread(fn, *args):
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(fn(*args)), daemon=True)
+    thread.start()
+    return thread, result
+
+
+def _wait_until_busy(agent, timeout: float = 10.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = agent.status()
+        if status.get("busy"):
+            return status
+        time.sleep(0.02)
+    raise AssertionError("cell did not start running")
+
+
+class ControlRequestTests(SimpleTestCase):
+    def test_interrupt_stops_a_blocking_cell_and_keeps_the_namespace(self):
+        with TemporaryDirectory(prefix="agent-") as tmp, local_agent_server(Path(tmp)) as vm:
+            agent = SocketVmAgent(vm, timeout=30)
+            agent.exec_code("x = 41")
+            thread, result = _run_in_thread(agent.exec_code, "import time\ntime.sleep(60)")
+
+            status = _wait_until_busy(agent)
+            variables = agent.inspect(["x"])["variables"]
+            interrupted = agent.interrupt()
+            thread.join(timeout=10)
+            after = agent.exec_code("print(x + 1)")
+
+        self.assertEqual(status["task"], "run")
+        self.assertEqual(variables, {"x": "41"})
+        self.assertTrue(interrupted["interrupted"])
+        self.assertFalse(thread.is_alive())
+        self.assertIn("KeyboardInterrupt", result["error"])
+        self.assertEqual(after["stdout"], "42\n")
+
+    def test_interrupt_kills_a_running_shell_command(self):
+        with TemporaryDirectory(prefix="agent-") as tmp, local_agent_server(Path(tmp)) as vm:
+            agent = SocketVmAgent(vm, timeout=30)
+            agent.exec_code("pass")
+            thread, result = _run_in_thread(agent.exec_code, "print('before')\n!echo started; sleep 60")
+
+            _wait_until_busy(agent)
+            time.sleep(0.3)
+            interrupted = agent.interrupt()
+            thread.join(timeout=10)
+
+        self.assertTrue(interrupted["interrupted"])
+        self.assertFalse(thread.is_alive())
+        self.assertIn("KeyboardInterrupt", result["error"])
+        self.assertEqual(result["stdout"], "before\nstarted\n")
+
+    def test_interrupt_without_a_running_cell_is_a_no_op(self):
+        with TemporaryDirectory(prefix="agent-") as tmp, local_agent_server(Path(tmp)) as vm:
+            agent = SocketVmAgent(vm, timeout=30)
+            interrupted = agent.interrupt()
+            result = agent.exec_code("print('still alive')")
+
+        self.assertFalse(interrupted["interrupted"])
+        self.assertEqual(result["stdout"], "still alive\n")
+
+    def test_local_cells_are_interrupted_in_their_thread(self):
+        with TemporaryDirectory(prefix="local-") as tmp:
+            session = SimpleNamespace(namespace={"__builtins__": __builtins__, "n": 0}, workdir=Path(tmp), python_exec=None)
+            agent = LocalVmAgent(session)
+            thread, result = _run_in_thread(agent.exec_code, "while True:\n    n += 1")
+
+            _wait_until_busy(agent)
+            interrupted = agent.interrupt()
+            thread.join(timeout=10)
+
+        self.assertTrue(interrupted["interrupted"])
+        self.assertFalse(thread.is_alive())
+        self.assertIn("KeyboardInterrupt", result["error"])
+        self.assertGreater(session.namespace["n"], 0)
+        self.assertFalse(agent.status()["busy"])
+
+
+_SMALL_CAPTURE = {
+    "RUNTIME_OUTPUT_HEAD_BYTES": "16",
+    "RUNTIME_OUTPUT_TAIL_BYTES": "16",
+    "RUNTIME_OUTPUT_MAX_BYTES": "64",
+}
+_NOISY_CELL = "for i in range(1000):\n    print(f'line {i:04d}')\nprint('done')"
+
+
+class OutputCaptureTests(SimpleTestCase):
+    def _assert_bounded(self, result: dict, stream: str) -> None:
+        self.assertTrue(result["stdout"].startswith("line 0000\nline 0"))
+        self.assertIn("bytes of output dropped", result["stdout"])
+        self.assertTrue(result["stdout"].endswith("line 0999\ndone\n"))
+        self.assertLess(len(result["stdout"]), 100)
+        self.assertTrue(stream.startswith("line 0000\n"))
+        self.assertIn("output stream stopped after 64 bytes", stream)
+        self.assertNotIn("line 0999", stream)
+
+    def test_local_runs_keep_head_and_tail_and_cap_the_stream_file(self):
+        with TemporaryDirectory(prefix="local-") as tmp, patch.dict(os.environ, _SMALL_CAPTURE):
+            workdir = Path(tmp)
+            session = SimpleNamespace(namespace={"__builtins__": __builtins__}, workdir=workdir, python_exec=None)
+            result = LocalVmAgent(session).exec_code_stream(
+                _NOISY_CELL, stdout_path=workdir / "out.txt", stderr_path=workdir / "err.txt"
+            )
+            stream = (workdir / "out.txt").read_text()
+
+        self._assert_bounded(result, stream)
+
+    def test_agent_server_runs_keep_head_and_tail_and_cap_the_stream_file(self):
+        with TemporaryDirectory(prefix="agent-") as tmp, patch.dict(os.environ, _SMALL_CAPTURE):
+            workspace = Path(tmp)
+            with local_agent_server(workspace) as vm:
+                result = SocketVmAgent(vm, timeout=30).exec_code_stream(
+                    _NOISY_CELL, stdout_path=workspace / "out.txt", stderr_path=workspace / "err.txt"
+                )
+            stream = (workspace / "out.txt").read_text()
+
+        self._assert_bounded(result, stream)
+
+    def test_writes_after_a_character_cut_at_the_head_limit_stay_in_order(self):
+        cell = "import sys\nsys.stdout.write('привет')\nsys.stdout.write('X')"
+        limits = {"RUNTIME_OUTPUT_HEAD_BYTES": "5", "RUNTIME_OUTPUT_TAIL_BYTES": "64"}
+        with TemporaryDirectory(prefix="agent-") as tmp, patch.dict(os.environ, limits):
+            workspace = Path(tmp)
+            session = SimpleNamespace(namespace={"__builtins__": __builtins__}, workdir=workspace, python_exec=None)
+            local = LocalVmAgent(session).exec_code(cell)
+            with local_agent_server(workspace) as vm:
+                remote = SocketVmAgent(vm, timeout=30).exec_code(cell)
+
+        self.assertEqual(local["stdout"], "приветX")
+        self.assertEqual(remote["stdout"], "приветX")
+
+
+def _batch_cells(workspace: Path, sources: list[str]) -> list[dict]:
+    return [
+        {
+            "id": index,
+            "code": code,
+            "stdout_path": workspace / f"{index}.stdout",
+            "stderr_path": workspace / f"{index}.stderr",
+        }
+        for index, code in enumerate(sources, start=1)
+    ]
+
+
+def _read_events(path: Path) -> list[tuple]:
+    return [(event["event"], event["cell_id"]) for event in map(json.loads, path.read_text().splitlines())]
+
+
+class BatchRunTests(SimpleTestCase):
+    _SOURCES = ["x = 20\nprint('one')", "print(x + 1)\nraise ValueError('boom')", "print('never')"]
+
+    def _assert_stopped_at_the_error(self, result: dict, events: list[tuple], streamed: str) -> None:
+        self.assertTrue(result["stopped"])
+        self.assertEqual([item["cell_id"] for item in result["results"]], [1, 2])
+        self.assertEqual(result["results"][0]["stdout"], "one\n")
+        self.assertIsNone(result["results"][0]["error"])
+        self.assertIn("ValueError: boom", result["results"][1]["error"])
+        self.assertEqual(events, [("started", 1), ("finished", 1), ("started", 2), ("finished", 2)])
+        self.assertEqual(streamed, "21\n")
+
+    def test_agent_server_runs_cells_in_order_and_stops_on_error(self):
+        with TemporaryDirectory(prefix="agent-") as tmp:
+            workspace = Path(tmp)
+            with local_agent_server(workspace) as vm:
+                result = SocketVmAgent(vm, timeout=30).exec_batch(
+                    _batch_cells(workspace, self._SOURCES), events_path=workspace / "run.events"
+                )
+            self._assert_stopped_at_the_error(
+                result, _read_events(workspace / "run.events"), (workspace / "2.stdout").read_text()
+            )
+
+    def test_local_agent_runs_cells_in_order_and_stops_on_error(self):
+        with TemporaryDirectory(prefix="local-") as tmp:
+            workspace = Path(tmp)
+            session = SimpleNamespace(namespace={"__builtins__": __builtins__}, workdir=workspace, python_exec=None)
+            result = LocalVmAgent(session).exec_batch(
+                _batch_cells(workspace, self._SOURCES), events_path=workspace / "run.events"
+            )
+            self._assert_stopped_at_the_error(
+                result, _read_events(workspace / "run.events"), (workspace / "2.stdout").read_text()
+            )
+
+    def test_errors_do_not_stop_the_batch_without_stop_on_error(self):
+        with TemporaryDirectory(prefix="agent-") as tmp:
+            workspace = Path(tmp)
+            with local_agent_server(workspace) as vm:
+                result = SocketVmAgent(vm, timeout=30).exec_batch(
+                    _batch_cells(workspace, self._SOURCES), events_path=workspace / "run.events", stop_on_error=False
+                )
+
+        self.assertFalse(result["stopped"])
+        self.assertEqual(result["results"][2]["stdout"], "never\n")
+
+    def test_interrupt_cancels_the_rest_of_the_batch(self):
+        with TemporaryDirectory(prefix="agent-") as tmp:
+            workspace = Path(tmp)
+            with local_agent_server(workspace) as vm:
+                agent = SocketVmAgent(vm, timeout=30)
+                agent.exec_code("pass")
+                cells = _batch_cells(workspace, ["import time\ntime.sleep(60)", "print('never')"])
+                thread, result = _run_in_thread(
+                    lambda: agent.exec_batch(cells, events_path=workspace / "run.events", stop_on_error=False)
+                )
+
+                status = _wait_until_busy(agent)
+                interrupted = agent.interrupt()
+                thread.join(timeout=10)
+
+        self.assertEqual(status["task"], "run_batch")
+        self.assertTrue(interrupted["interrupted"])
+        self.assertTrue(result["stopped"])
+        self.assertEqual(len(result["results"]), 1)
+        self.assertIn("KeyboardInterrupt", result["results"][0]["error"])
+
+
+class AgentSelectionTests(SimpleTestCase):
+    def tearDown(self):
+        vm_agent.reset_vm_agents()
+
+    def test_transport_is_selected_by_settings(self):
+        session = SimpleNamespace(vm=SimpleNamespace(backend="docker", workspace_path=Path("/tmp/ws")))
+
+        self.assertIsInstance(get_vm_agent("notebook:1", session), SocketVmAgent)
+        with override_settings(RUNTIME_VM_AGENT_TRANSPORT="file"):
+            agent = get_vm_agent("notebook:2", session)
+        self.assertIs(type(agent), FilesystemVmAgent)
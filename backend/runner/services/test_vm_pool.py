@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+
+from runner.services.vm_backends import DockerVmBackend
+from runner.services.vm_models import VmNetworkPolicy, VmResources, VmSpec
+from runner.services.vm_pool import VmWarmPool, build_pool_profiles, profile_key
+
+
+def _make_completed(stdout: str = "", returncode: int = 0) -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(args=[], returncode=returncode, stdout=stdout, stderr="")
+
+
+def _make_spec(*, cpu: int = 1, gpu: bool = False) -> VmSpec:
+    return VmSpec(
+        image="runner-vm:test",
+        resources=VmResources(cpu=cpu, ram_mb=512, disk_gb=4),
+        network=VmNetworkPolicy(outbound="deny", allowlist=()),
+        ttl_sec=900,
+        gpu=gpu,
+    )
+
+
+class VmWarmPoolTests(SimpleTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self._tmp = TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.backend = DockerVmBackend(Path(self._tmp.name))
+        self.docker_calls: list[tuple[str, ...]] = []
+        self.created: list[str] = []
+        self.mounted: dict[str, Path] = {}
+        for name, side_effect in (
+            ("_run_docker", self._fake_docker),
+            ("_run_docker_capture", lambda args, check=True: _make_completed(stdout="true\n")),
+            ("_create_container", self._fake_create_container),
+            ("_start_agent", lambda name: None),
+            ("_wait_for_agent", lambda agent_dir: None),
+        ):
+            patcher = patch.object(self.backend, name, side_effect=side_effect)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.spec = _make_spec()
+        self.pool = VmWarmPool(self.backend, build_pool_profiles(self.spec, size=2))
+        self.backend.pool = self.pool
+
+    def _fake_create_container(self, name, spec, vm_dir, workspace):
+        self.created.append(name)
+        self.mounted[name] = vm_dir
+
+    def _fake_docker(self, args, check=True):
+        self.docker_calls.append(args)
+        return _make_completed()
+
+    def test_refill_warms_containers_up_to_the_profile_size(self) -> None:
+        self.assertEqual(self.pool.refill(), 2)
+        self.assertEqual(self.pool.refill(), 0)
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(self.pool.stats()["ready"], {profile_key(self.spec): 2})
+
+    def test_create_vm_claims_a_warm_container(self) -> None:
+        self.pool.refill()
+
+        vm = self.backend.create_vm(vm_id="runner-notebook_1", session_id="notebook:1", spec=self.spec)
+
+        self.assertEqual(len(self.created), 2)
+        self.assertEqual(vm.workspace_path, Path(self._tmp.name) / "runner-notebook_1" / "workspace")
+        self.assertTrue((vm.workspace_path / ".vm_agent" / "agent_server.py").exists())
+        self.assertEqual(vm.backend_data["container"], "runner-notebook_1")
+        self.assertEqual(self.backend.get_vm("runner-notebook_1").backend_data, vm.backend_data)
+        self.assertIn("rename", [call[0] for call in self.docker_calls])
+        stats = self.pool.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 0, 1.0))
+        self.assertEqual(stats["ready"], {profile_key(self.spec): 1})
+
+    def test_claimed_container_keeps_its_mounted_slot(self) -> None:
+        self.pool.refill()
+        mounted = dict(self.mounted)
+
+        vm = self.backend.create_vm(vm_id="runner-notebook_5", session_id="notebook:5", spec=self.spec)
+
+        vm_dir = Path(self._tmp.name) / "runner-notebook_5"
+        self.assertTrue(vm_dir.is_symlink())
+        slot = vm_dir.resolve()
+        # The bind-mounted directory is never moved; the session reaches it through the link.
+        self.assertIn(slot, [path.resolve() for path in mounted.values()])
+        self.assertTrue(slot.is_dir())
+        self.assertEqual(vm.workspace_path.resolve(), slot / "workspace")
+
+        self.backend.delete_vm("runner-notebook_5")
+        self.assertFalse(vm_dir.is_symlink() or vm_dir.exists())
+        self.assertFalse(slot.exists())
+
+    def test_unpooled_profile_or_empty_pool_falls_back_to_a_cold_start(self) -> None:
+        vm = self.backend.create_vm(vm_id="runner-notebook_2", session_id="notebook:2", spec=self.spec)
+        self.assertEqual(self.created, ["runner-notebook_2"])
+        self.assertEqual(vm.backend_data, {"container": "runner-notebook_2"})
+
+        self.backend.create_vm(vm_id="runner-notebook_3", session_id="notebook:3", spec=_make_spec(cpu=4))
+        self.assertEqual(self.pool.stats()["misses"], 1)
+
+    def test_stopped_warm_container_is_discarded(self) -> None:
+        self.pool.refill()
+        with patch.object(self.backend, "_run_docker_capture", return_value=_make_completed(stdout="false\n")):
+            vm = self.pool.claim(
+                vm_id="runner-notebook_4",
+                session_id="notebook:4",
+                spec=self.spec,
+                created_at=timezone.now(),
+            )
+
+        self.assertIsNone(vm)
+        self.assertEqual(self.pool.stats()["ready"], {profile_key(self.spec): 0})
+        self.assertFalse((Path(self._tmp.name) / "runner-notebook_4").exists())
+
+    def test_profiles_from_settings_overrides(self) -> None:
+        profiles = build_pool_profiles(
+            self.spec,
+            size=0,
+            overrides=[{"cpu": 4, "size": 3}, {"gpu": True, "size": 1}, {"cpu": 8}],
+        )
+        self.assertEqual(
+            sorted((profile.spec.resources.cpu, profile.spec.gpu, profile.size) for profile in profiles.values()),
+            [(1, True, 1), (4, False, 3)],
+        )
@@ -3,6 +3,7 @@ from unittest.mock import AsyncMock, patch
 
 from runner.services.websocket_notifications import (
     broadcast_contest_notification,
+    broadcast_leaderboard_changed,
     broadcast_metric_update,
 )
 
@@ -82,3 +83,19 @@ def test_broadcast_contest_notification_ignored_without_valid_recipients():
         )
 
     mocked_layer.assert_not_called()
+
+
+def test_broadcast_leaderboard_changed_sends_once_per_contest():
+    async_group_send = AsyncMock()
+    channel_layer = SimpleNamespace(group_send=async_group_send)
+
+    with patch(
+        "runner.services.websocket_notifications.get_channel_layer",
+        return_value=channel_layer,
+    ):
+        broadcast_leaderboard_changed([8, 3, 8, None])
+
+    assert [call.args for call in async_group_send.call_args_list] == [
+        ("contest_3_leaderboard", {"type": "leaderboard.changed", "contest_id": 3}),
+        ("contest_8_leaderboard", {"type": "leaderboard.changed", "contest_id": 8}),
+    ]
@@ -2,28 +2,53 @@ from __future__ import annotations
 
 import ast
 import base64
+import codecs
+import ctypes
+import hashlib
+import importlib
 import io
 import json
+import mimetypes
 import os
+import reprlib
+import signal
+import socket
+import struct
 import subprocess
 import sys
 import time
 import traceback
 import uuid
 import threading
+import weakref
+from collections import OrderedDict, deque
 from abc import ABC, abstractmethod
 from contextlib import contextmanager, redirect_stderr, redirect_stdout
 from pathlib import Path
-from typing import Dict, Iterable
+from typing import Dict, Iterable, Sequence
 from uuid import uuid4
 import logging
 
+from django.conf import settings
+
+from .local_envs import overlay_imports, session_shell_env
 from .vm_models import VirtualMachine
 
 _AGENT_CACHE: Dict[str, VmAgent] = {}
 _INTERACTIVE_RUNS: Dict[str, "InteractiveRun"] = {}
+# Threads currently running cells of a local session, keyed by ``id(session)``.
+_RUNNING_CELLS: Dict[int, set[int]] = {}
+_RUNNING_CELLS_LOCK = threading.Lock()
 logger = logging.getLogger(__name__)
 _TRACEBACK_SEPARATOR = "-" * 79
+_FRAME_HEADER = struct.Struct(">I")
+# sun_path holds 108 bytes including the terminator on Linux.
+_MAX_UNIX_SOCKET_PATH = 107
+AGENT_TRANSPORTS = ("socket", "file")
+# Workspace directory of content-addressed output blobs, shared with the VM agent server.
+OUTPUT_BLOBS_DIR = ".outputs"
+# Control requests are answered without waiting for the running cell.
+_CONTROL_TIMEOUT_SECONDS = 5.0
 
 
 def _format_exception(
@@ -129,46 +154,126 @@ def _read_timeout_env(name: str, default: float | None) -> float | None:
         return default
 
 
-def _handle_shell_commands(
-    code: str,
-    workdir: Path,
-    stdout_buffer: io.StringIO,
-    stderr_buffer: io.StringIO,
-    python_exec: Path | None = None,
-) -> str:
+_SHELL_HELPER = "_booml_shell"
+_SHELL_POLL_SECONDS = 0.1
+
+
+def _rewrite_shell_commands(code: str) -> str:
+    """Turn ``!cmd`` lines into calls of the shell helper so they run in place, in cell order."""
     lines = code.split('\n')
-    filtered_lines = []
-    shell_timeout = _read_timeout_env("RUNTIME_SHELL_COMMAND_TIMEOUT_SECONDS", None)
-    
-    for line in lines:
+    for index, line in enumerate(lines):
         stripped = line.lstrip()
         if stripped.startswith('!'):
-            shell_cmd = stripped[1:]
-            try:
-                result = subprocess.run(
-                    shell_cmd,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    cwd=str(workdir),
-                    timeout=shell_timeout,
-                    env={**os.environ, 'PIP_ROOT_USER_ACTION': 'ignore'}
-                )
-                stdout_buffer.write(result.stdout)
-                if result.stderr:
-                    stderr_buffer.write(result.stderr)
-            except Exception as e:
-                stderr_buffer.write(f"Error executing shell command '{shell_cmd}': {str(e)}\n")
-        else:
-            filtered_lines.append(line)
-    
-    return '\n'.join(filtered_lines)
+            indent = line[:len(line) - len(stripped)]
+            lines[index] = f"{indent}{_SHELL_HELPER}({stripped[1:]!r})"
+    return '\n'.join(lines)
 
 
+def _shell_runner(
+    workdir: Path,
+    stdout_buffer: io.TextIOBase,
+    stderr_buffer: io.TextIOBase,
+    python_exec: Path | None = None,
+):
+    def run_shell(command: str) -> None:
+        _run_shell_command(command, workdir, stdout_buffer, stderr_buffer, python_exec)
+
+    return run_shell
+
+
+def _run_shell_command(
+    command: str,
+    workdir: Path,
+    stdout_buffer: io.TextIOBase,
+    stderr_buffer: io.TextIOBase,
+    python_exec: Path | None = None,
+) -> None:
+    """
+    Run one ``!`` command, streaming its output into the run's buffers as it arrives.
+
+    The command gets its own process group so that a timeout or an interrupt of
+    the cell kills whatever it started, not just the shell.
+    """
+    shell_timeout = _read_timeout_env("RUNTIME_SHELL_COMMAND_TIMEOUT_SECONDS", None)
+    try:
+        process = subprocess.Popen(
+            command,
+            shell=True,
+            cwd=str(workdir),
+            env={**session_shell_env(workdir, python_exec), "PYTHONUNBUFFERED": "1"},
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+    except Exception as e:
+        stderr_buffer.write(f"Error executing shell command '{command}': {str(e)}\n")
+        return
+
+    pumps = [
+        threading.Thread(target=_pump_shell_output, args=(process.stdout, stdout_buffer), daemon=True),
+        threading.Thread(target=_pump_shell_output, args=(process.stderr, stderr_buffer), daemon=True),
+    ]
+    for pump in pumps:
+        pump.start()
+    timed_out = None
+    try:
+        timed_out = _wait_for_shell(process, shell_timeout)
+    except BaseException:
+        _kill_process_group(process)
+        raise
+    finally:
+        for pump in pumps:
+            pump.join()
+    if timed_out is not None:
+        stderr_buffer.write(f"Error executing shell command '{command}': {str(timed_out)}\n")
+    if python_exec is not None:
+        # ``!pip install`` may have added packages to the overlay the finders cached.
+        importlib.invalidate_caches()
+
+
+def _wait_for_shell(process: subprocess.Popen, timeout: float | None) -> subprocess.TimeoutExpired | None:
+    # Short waits keep the cell thread interruptible while the command runs.
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            process.wait(timeout=_SHELL_POLL_SECONDS)
+            return None
+        except subprocess.TimeoutExpired:
+            if deadline is not None and time.monotonic() >= deadline:
+                _kill_process_group(process)
+                return subprocess.TimeoutExpired(process.args, timeout)
+
+
+def _pump_shell_output(pipe, buffer: io.TextIOBase) -> None:
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+    try:
+        while True:
+            chunk = pipe.read1(65536)
+            if not chunk:
+                break
+            buffer.write(decoder.decode(chunk))
+        buffer.write(decoder.decode(b"", final=True))
+    except Exception as exc:
+        logger.debug("Failed to read shell command output: %s", exc)
+    finally:
+        pipe.close()
+
+
+def _kill_process_group(process: subprocess.Popen) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    process.wait()
+
 
 class VmAgent(ABC):
     """Executes code within a VM and returns stdout/stderr/errors."""
 
+    _batch_running = False
+    _batch_cancelled = False
+
     @abstractmethod
     def exec_code(self, code: str) -> Dict[str, object]:
         ...
@@ -177,44 +282,272 @@ class VmAgent(ABC):
         """Execute code while streaming stdout/stderr into files."""
         return self.exec_code(code)
 
+    def exec_batch(
+        self,
+        cells: Sequence[Dict[str, object]],
+        *,
+        events_path: Path,
+        stop_on_error: bool = True,
+    ) -> Dict[str, object]:
+        """
+        Run ``cells`` (``id``, ``code``, ``stdout_path``, ``stderr_path``) in order as one job.
+
+        A ``started`` and a ``finished`` event per cell are appended to
+        ``events_path`` as JSON lines. An error stops the job when
+        ``stop_on_error`` is set, an interrupt always does.
+        """
+        self._batch_cancelled = False
+        self._batch_running = True
+        results: list[Dict[str, object]] = []
+        try:
+            for cell in cells:
+                _append_run_event(events_path, {"event": "started", "cell_id": cell["id"]})
+                started = time.monotonic()
+                result = self.exec_code_stream(
+                    str(cell.get("code") or ""),
+                    stdout_path=Path(cell["stdout_path"]),
+                    stderr_path=Path(cell["stderr_path"]),
+                )
+                duration_ms = round((time.monotonic() - started) * 1000)
+                results.append({"cell_id": cell["id"], "duration_ms": duration_ms, **result})
+                _append_run_event(
+                    events_path,
+                    {"event": "finished", "cell_id": cell["id"], "duration_ms": duration_ms, "result": result},
+                )
+                if self._batch_cancelled or (stop_on_error and result.get("error")):
+                    break
+        finally:
+            self._batch_running = False
+        return {"status": "success", "results": results, "stopped": len(results) < len(cells)}
+
     def shutdown(self) -> None:
         """Optional hook when session resets."""
         return
 
+    def interrupt(self) -> Dict[str, object]:
+        """Raise ``KeyboardInterrupt`` in the running cell without touching the session."""
+        return _control_unsupported("interrupt")
+
+    def status(self) -> Dict[str, object]:
+        """Report whether a cell is running, answered while it runs."""
+        return _control_unsupported("status")
+
+    def inspect(self, names: Iterable[str] | None = None) -> Dict[str, object]:
+        """Snapshot namespace variables, answered while a cell runs."""
+        return _control_unsupported("inspect")
+
+    def dataframe_rows(self, frame_id: str, *, offset: int, limit: int) -> Dict[str, object]:
+        """Render more rows of a DataFrame output that was displayed truncated."""
+        return _control_unsupported("dataframe_rows")
+
+
+def _append_run_event(path: Path, event: Dict[str, object]) -> None:
+    try:
+        with Path(path).open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps({**event, "at": time.time()}, default=str) + "\n")
+    except Exception as exc:
+        logger.warning("Failed to write run event to %s: %s", path, exc)
+
+
+def _control_unsupported(action: str) -> Dict[str, object]:
+    return {"status": "error", "error": f"VM agent does not support '{action}' while a cell is running"}
+
+
+_OUTPUT_DROPPED_MARKER = "\n[... {dropped} bytes of output dropped ...]\n"
+_OUTPUT_TRUNCATED_MARKER = "\n[... output stream stopped after {limit} bytes, the result keeps the end ...]\n"
+# Open stream files whose buffered writes the flusher thread pushes out while a cell is quiet.
+_STREAM_BUFFERS: "weakref.WeakSet[_StreamingBuffer]" = weakref.WeakSet()
+_STREAM_FLUSHER_LOCK = threading.Lock()
+_STREAM_FLUSHER: threading.Thread | None = None
+
+
+def _text_size(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def _clip_head(text: str, size: int) -> str:
+    """Longest prefix of ``text`` that fits in ``size`` UTF-8 bytes."""
+    if text.isascii():
+        return text[:size]
+    return text.encode("utf-8")[:size].decode("utf-8", errors="ignore")
+
+
+def _clip_tail(text: str, size: int) -> str:
+    """Longest suffix of ``text`` that fits in ``size`` UTF-8 bytes."""
+    if size <= 0:
+        return ""
+    if text.isascii():
+        return text[-size:]
+    return text.encode("utf-8")[-size:].decode("utf-8", errors="ignore")
+
+
+def _output_flush_interval() -> float:
+    try:
+        return max(0.0, float(os.environ.get("RUNTIME_OUTPUT_FLUSH_SECONDS") or 0.2))
+    except ValueError:
+        return 0.2
+
+
+class _CaptureBuffer(io.TextIOBase):
+    """
+    Captured stdout/stderr of one run, bounded to its first and last bytes.
+
+    The first ``RUNTIME_OUTPUT_HEAD_BYTES`` are kept as written and the last
+    ``RUNTIME_OUTPUT_TAIL_BYTES`` in a ring of chunks; what falls out of the ring
+    is only counted in ``dropped_bytes`` and ``getvalue`` marks the gap.
+    """
+
+    def __init__(self) -> None:
+        self._head_limit = _read_positive_int_env("RUNTIME_OUTPUT_HEAD_BYTES", 64 * 1024)
+        self._tail_limit = _read_positive_int_env("RUNTIME_OUTPUT_TAIL_BYTES", 64 * 1024)
+        self._head: list[str] = []
+        self._head_size = 0
+        # Set once a write did not fit: a character cut at the limit leaves room
+        # that later writes must not use, or they would land before the overflow.
+        self._head_full = False
+        self._tail: deque[tuple[str, int]] = deque()
+        self._tail_size = 0
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.dropped_bytes = 0
+
+    def write(self, s: str) -> int:  # type: ignore[override]
+        text = "" if s is None else str(s)
+        if text:
+            with self._lock:
+                self._capture(text, _text_size(text))
+        return len(text)
+
+    def _capture(self, text: str, size: int) -> None:
+        self.total_bytes += size
+        if not self._head_full:
+            room = self._head_limit - self._head_size
+            if size <= room:
+                self._head.append(text)
+                self._head_size += size
+                return
+            self._head_full = True
+            head = _clip_head(text, room)
+            head_size = _text_size(head)
+            self._head.append(head)
+            self._head_size += head_size
+            text = text[len(head):]
+            size -= head_size
+        if size >= self._tail_limit:
+            clipped = _clip_tail(text, self._tail_limit)
+            clipped_size = _text_size(clipped)
+            self.dropped_bytes += self._tail_size + size - clipped_size
+            self._tail.clear()
+            self._tail_size = 0
+            text, size = clipped, clipped_size
+        self._tail.append((text, size))
+        self._tail_size += size
+        while self._tail_size > self._tail_limit:
+            _, dropped = self._tail.popleft()
+            self._tail_size -= dropped
+            self.dropped_bytes += dropped
+
+    def getvalue(self) -> str:
+        with self._lock:
+            head = "".join(self._head)
+            tail = "".join(chunk for chunk, _ in self._tail)
+            dropped = self.dropped_bytes
+        if not dropped:
+            return head + tail
+        return head + _OUTPUT_DROPPED_MARKER.format(dropped=dropped) + tail
+
+    def isatty(self) -> bool:  # pragma: no cover - defensive
+        return False
+
+
+class _StreamingBuffer(_CaptureBuffer):
+    """
+    Capture that also appends to a stream file read by offset while the cell runs.
+
+    Writes go through the file object's buffer and reach the disk at most every
+    ``RUNTIME_OUTPUT_FLUSH_SECONDS``, either on the next write or from the shared
+    flusher thread; the file stops growing after ``RUNTIME_OUTPUT_MAX_BYTES``.
+    """
 
-class _StreamingBuffer(io.TextIOBase):
     def __init__(self, path: Path):
+        super().__init__()
         self._path = Path(path)
         self._path.parent.mkdir(parents=True, exist_ok=True)
-        self._buffer = io.StringIO()
         self._file = self._path.open("a", encoding="utf-8")
+        self._file_limit = _read_positive_int_env("RUNTIME_OUTPUT_MAX_BYTES", 10 * 1024 * 1024)
+        self._file_size = 0
+        self._flush_interval = _output_flush_interval()
+        self._flushed_at = time.monotonic()
+        self._dirty = False
+        self.truncated = False
+        _register_stream_buffer(self)
 
     def write(self, s: str) -> int:  # type: ignore[override]
         text = "" if s is None else str(s)
-        self._buffer.write(text)
-        self._file.write(text)
-        self._file.flush()
+        if not text:
+            return 0
+        size = _text_size(text)
+        with self._lock:
+            self._capture(text, size)
+            if self.truncated or self._file.closed:
+                return len(text)
+            room = self._file_limit - self._file_size
+            if size > room:
+                self._file.write(_clip_head(text, room))
+                self._file.write(_OUTPUT_TRUNCATED_MARKER.format(limit=self._file_limit))
+                self._file_size = self._file_limit
+                self.truncated = True
+            else:
+                self._file.write(text)
+                self._file_size += size
+            self._dirty = True
+            if time.monotonic() - self._flushed_at >= self._flush_interval:
+                self._flush_file()
         return len(text)
 
-    def flush(self) -> None:
+    def _flush_file(self) -> None:
         try:
             self._file.flush()
         except Exception as exc:
             logger.debug("Failed to flush streaming buffer %s: %s", self._path, exc)
+        self._dirty = False
+        self._flushed_at = time.monotonic()
 
-    def getvalue(self) -> str:
-        return self._buffer.getvalue()
+    def flush(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._flush_file()
 
-    def isatty(self) -> bool:  # pragma: no cover - defensive
-        return False
+    def flush_if_idle(self) -> None:
+        """Push out writes that have waited a full flush interval for the next one."""
+        with self._lock:
+            if self._dirty and not self._file.closed and time.monotonic() - self._flushed_at >= self._flush_interval:
+                self._flush_file()
 
     def close(self) -> None:  # type: ignore[override]
-        try:
-            self._file.close()
-        except Exception as exc:
-            logger.debug("Failed to close streaming buffer %s: %s", self._path, exc)
-        finally:
-            super().close()
+        with self._lock:
+            try:
+                self._file.close()
+            except Exception as exc:
+                logger.debug("Failed to close streaming buffer %s: %s", self._path, exc)
+        _STREAM_BUFFERS.discard(self)
+        super().close()
+
+
+def _register_stream_buffer(buffer: _StreamingBuffer) -> None:
+    global _STREAM_FLUSHER
+    _STREAM_BUFFERS.add(buffer)
+    with _STREAM_FLUSHER_LOCK:
+        if _STREAM_FLUSHER is None or not _STREAM_FLUSHER.is_alive():
+            _STREAM_FLUSHER = threading.Thread(target=_flush_stream_buffers, name="stream-flusher", daemon=True)
+            _STREAM_FLUSHER.start()
+
+
+def _flush_stream_buffers() -> None:
+    while True:
+        time.sleep(max(_output_flush_interval(), 0.05))
+        for buffer in list(_STREAM_BUFFERS):
+            buffer.flush_if_idle()
 
 
 class _InteractiveStdin(io.TextIOBase):
@@ -252,8 +585,8 @@ class InteractiveRun:
         run_id: str,
         code: str,
         session,
-        stdout_buffer: io.StringIO | _StreamingBuffer,
-        stderr_buffer: io.StringIO | _StreamingBuffer,
+        stdout_buffer: _CaptureBuffer,
+        stderr_buffer: _CaptureBuffer,
     ) -> None:
         self.run_id = run_id
         self.code = code
@@ -405,15 +738,24 @@ class InteractiveRun:
             if isinstance(namespace.get("__builtins__"), dict):
                 namespace["__builtins__"]["input"] = self._input
 
-            with _workspace_cwd(self.session.workdir), redirect_stdout(self.stdout_buffer), redirect_stderr(self.stderr_buffer):
+            with (
+                _workspace_cwd(self.session.workdir),
+                overlay_imports(self.session.workdir),
+                redirect_stdout(self.stdout_buffer),
+                redirect_stderr(self.stderr_buffer),
+            ):
                 try:
                     _configure_pandas_display(namespace)
                     _configure_matplotlib_defaults(namespace)
                     _configure_plotly_defaults(namespace, display)
-                    code = _handle_shell_commands(self.code, self.session.workdir, self.stdout_buffer, self.stderr_buffer, self.session.python_exec)
-                    if code.strip():
-                        _execute_with_optional_displayhook(code, namespace, display)
-                except Exception as exc:
+                    with _interruptible(self.session):
+                        namespace[_SHELL_HELPER] = _shell_runner(
+                            self.session.workdir, self.stdout_buffer, self.stderr_buffer, self.session.python_exec
+                        )
+                        code = _rewrite_shell_commands(self.code)
+                        if code.strip():
+                            _execute_with_optional_displayhook(code, namespace, display)
+                except (Exception, KeyboardInterrupt) as exc:
                     self.error = _format_exception(exc, code=self.code, filename="<cell>")
                 else:
                     for item in _capture_matplotlib_figures(self.session):
@@ -451,7 +793,7 @@ class InteractiveRun:
             "stdout": self.stdout_buffer.getvalue(),
             "stderr": self.stderr_buffer.getvalue(),
             "error": self.error,
-            "variables": _snapshot_variables(self.session.namespace),
+            **_variable_changes(self.session.namespace),
             "outputs": self.outputs,
             "artifacts": self.artifacts,
         }
@@ -477,14 +819,8 @@ def start_interactive_run(
     stderr_path: Path | None = None,
     run_id: str | None = None,
 ) -> InteractiveRun:
-    if stdout_path is not None:
-        stdout_buffer: io.StringIO | _StreamingBuffer = _StreamingBuffer(stdout_path)
-    else:
-        stdout_buffer = io.StringIO()
-    if stderr_path is not None:
-        stderr_buffer: io.StringIO | _StreamingBuffer = _StreamingBuffer(stderr_path)
-    else:
-        stderr_buffer = io.StringIO()
+    stdout_buffer = _StreamingBuffer(stdout_path) if stdout_path is not None else _CaptureBuffer()
+    stderr_buffer = _StreamingBuffer(stderr_path) if stderr_path is not None else _CaptureBuffer()
     run = InteractiveRun(
         run_id=run_id or uuid.uuid4().hex,
         code=code,
@@ -504,12 +840,71 @@ def provide_interactive_input(run_id: str, text: str | None, *, stdin_eof: bool
     return run
 
 
+@contextmanager
+def _interruptible(session):
+    """Register the current thread as running a cell of ``session`` for ``_interrupt_local_cells``."""
+    key = id(session)
+    thread_id = threading.get_ident()
+    with _RUNNING_CELLS_LOCK:
+        _RUNNING_CELLS.setdefault(key, set()).add(thread_id)
+    try:
+        yield
+    finally:
+        with _RUNNING_CELLS_LOCK:
+            threads = _RUNNING_CELLS.get(key, set())
+            threads.discard(thread_id)
+            if not threads:
+                _RUNNING_CELLS.pop(key, None)
+            # Drop an interrupt that arrived after the cell had already finished.
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), None)
+
+
+def _interrupt_local_cells(session) -> bool:
+    """
+    Raise ``KeyboardInterrupt`` in the threads running cells of ``session``.
+
+    The exception is delivered at the next bytecode, so a cell blocked inside a
+    C call stops once that call returns. Prompts waiting for input are closed
+    so that the interrupt is not held up by ``input()``.
+    """
+    with _RUNNING_CELLS_LOCK:
+        threads = sorted(_RUNNING_CELLS.get(id(session), ()))
+        for thread_id in threads:
+            ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_ulong(thread_id), ctypes.py_object(KeyboardInterrupt))
+    for run in list(_INTERACTIVE_RUNS.values()):
+        if run.session is session and run.status == "input_required":
+            run.abort_input()
+    return bool(threads)
+
+
 class LocalVmAgent(VmAgent):
     """Legacy in-process executor for backwards compatibility."""
 
     def __init__(self, session):
         self.session = session
 
+    def interrupt(self) -> Dict[str, object]:
+        interrupted = _interrupt_local_cells(self.session)
+        if self._batch_running:
+            self._batch_cancelled = interrupted = True
+        return {"status": "success", "interrupted": interrupted}
+
+    def status(self) -> Dict[str, object]:
+        with _RUNNING_CELLS_LOCK:
+            busy = id(self.session) in _RUNNING_CELLS
+        runs = {
+            run_id: run.status
+            for run_id, run in list(_INTERACTIVE_RUNS.items())
+            if run.session is self.session
+        }
+        return {"status": "success", "busy": busy, "interactive_runs": runs}
+
+    def inspect(self, names: Iterable[str] | None = None) -> Dict[str, object]:
+        return {"status": "success", "variables": _inspect_variables(dict(self.session.namespace), names)}
+
+    def dataframe_rows(self, frame_id: str, *, offset: int, limit: int) -> Dict[str, object]:
+        return _dataframe_rows(self.session.namespace, frame_id, offset, limit)
+
     def exec_code(self, code: str) -> Dict[str, object]:
         return self._exec_code_with_buffers(code)
 
@@ -525,12 +920,12 @@ class LocalVmAgent(VmAgent):
     def _exec_code_with_buffers(
         self,
         code: str,
-        stdout_buffer: io.StringIO | _StreamingBuffer | None = None,
-        stderr_buffer: io.StringIO | _StreamingBuffer | None = None,
+        stdout_buffer: _CaptureBuffer | None = None,
+        stderr_buffer: _CaptureBuffer | None = None,
     ) -> Dict[str, object]:
         namespace = self.session.namespace
-        stdout_buffer = stdout_buffer or io.StringIO()
-        stderr_buffer = stderr_buffer or io.StringIO()
+        stdout_buffer = stdout_buffer or _CaptureBuffer()
+        stderr_buffer = stderr_buffer or _CaptureBuffer()
         error = None
         outputs: list[dict[str, object]] = []
         artifacts: list[dict[str, str]] = []
@@ -556,15 +951,24 @@ class LocalVmAgent(VmAgent):
                     register_artifact(item)
 
         namespace.setdefault("display", display)
-        with _workspace_cwd(self.session.workdir), redirect_stdout(stdout_buffer), redirect_stderr(stderr_buffer):
+        with (
+            _workspace_cwd(self.session.workdir),
+            overlay_imports(self.session.workdir),
+            redirect_stdout(stdout_buffer),
+            redirect_stderr(stderr_buffer),
+        ):
             try:
                 _configure_pandas_display(namespace)
                 _configure_matplotlib_defaults(namespace)
                 _configure_plotly_defaults(namespace, display)
-                code = _handle_shell_commands(code, self.session.workdir, stdout_buffer, stderr_buffer, self.session.python_exec)
-                if code.strip():
-                    _execute_with_optional_displayhook(code, namespace, display)
-            except Exception as exc:
+                with _interruptible(self.session):
+                    namespace[_SHELL_HELPER] = _shell_runner(
+                        self.session.workdir, stdout_buffer, stderr_buffer, self.session.python_exec
+                    )
+                    code = _rewrite_shell_commands(code)
+                    if code.strip():
+                        _execute_with_optional_displayhook(code, namespace, display)
+            except (Exception, KeyboardInterrupt) as exc:
                 error = _format_exception(exc, code=code, filename="<cell>")
             else:
                 for item in _capture_matplotlib_figures(self.session):
@@ -574,7 +978,7 @@ class LocalVmAgent(VmAgent):
             "stdout": stdout_buffer.getvalue(),
             "stderr": stderr_buffer.getvalue(),
             "error": error,
-            "variables": _snapshot_variables(namespace),
+            **_variable_changes(namespace),
             "outputs": outputs,
             "artifacts": artifacts,
         }
@@ -596,6 +1000,33 @@ class FilesystemVmAgent(VmAgent):
     def exec_code(self, code: str) -> Dict[str, object]:
         return self._send_payload({"code": code})
 
+    def exec_batch(
+        self,
+        cells: Sequence[Dict[str, object]],
+        *,
+        events_path: Path,
+        stop_on_error: bool = True,
+    ) -> Dict[str, object]:
+        workspace = self.vm.workspace_path
+        payload = {
+            "action": "run_batch",
+            "cells": [
+                {
+                    "id": cell["id"],
+                    "code": str(cell.get("code") or ""),
+                    "stream": {
+                        "stdout": _relative_stream_path(workspace, Path(cell["stdout_path"])),
+                        "stderr": _relative_stream_path(workspace, Path(cell["stderr_path"])),
+                    },
+                }
+                for cell in cells
+            ],
+            "events": _relative_stream_path(workspace, events_path),
+            "stop_on_error": stop_on_error,
+        }
+        # The agent timeout bounds one cell, so a job of several cells gets it per cell.
+        return self._send_payload(payload, timeout_scale=max(len(cells), 1))
+
     def exec_code_stream(self, code: str, *, stdout_path: Path, stderr_path: Path) -> Dict[str, object]:
         return self._send_payload(
             {
@@ -642,7 +1073,19 @@ class FilesystemVmAgent(VmAgent):
         }
         return self._send_payload(payload)
 
-    def _send_payload(self, payload: Dict[str, object]) -> Dict[str, object]:
+    def hibernate(self, *, max_bytes: int) -> Dict[str, object]:
+        return self._send_payload({"action": "hibernate", "max_bytes": int(max_bytes)})
+
+    def restore(self) -> Dict[str, object]:
+        return self._send_payload({"action": "restore"})
+
+    def dataframe_rows(self, frame_id: str, *, offset: int, limit: int) -> Dict[str, object]:
+        return self._send_payload({"action": "dataframe_rows", "frame_id": frame_id, "offset": offset, "limit": limit})
+
+    def _payload_timeout(self, timeout_scale: int) -> float | None:
+        return None if self.timeout is None else self.timeout * timeout_scale
+
+    def _send_payload(self, payload: Dict[str, object], *, timeout_scale: int = 1) -> Dict[str, object]:
         command_id = uuid.uuid4().hex
         tmp_path = self.commands_dir / f"{command_id}.json.tmp"
         final_path = self.commands_dir / f"{command_id}.json"
@@ -652,7 +1095,8 @@ class FilesystemVmAgent(VmAgent):
         tmp_path.rename(final_path)
 
         result_path = self.results_dir / f"{command_id}.json"
-        if self.timeout is None:
+        timeout = self._payload_timeout(timeout_scale)
+        if timeout is None:
             while True:
                 if result_path.exists():
                     try:
@@ -663,7 +1107,7 @@ class FilesystemVmAgent(VmAgent):
                         pass
                 time.sleep(0.05)
         else:
-            deadline = time.monotonic() + self.timeout
+            deadline = time.monotonic() + timeout
             while time.monotonic() < deadline:
                 if result_path.exists():
                     try:
@@ -676,13 +1120,123 @@ class FilesystemVmAgent(VmAgent):
             raise RuntimeError("VM agent timed out waiting for execution result")
 
 
+class SocketVmAgent(FilesystemVmAgent):
+    """
+    Sends commands over the agent's Unix socket in the shared workspace.
+
+    Each command is one length-prefixed JSON frame answered by one frame, so a
+    round trip costs no polling on either side. Agents that do not listen on
+    the socket (started by an older image, or a workspace mount that cannot
+    carry sockets) are reached through the command files instead.
+    """
+
+    def __init__(self, vm: VirtualMachine, *, timeout: float | None = None):
+        super().__init__(vm, timeout=timeout)
+        self.socket_path = vm.workspace_path / ".vm_agent" / "agent.sock"
+
+    def _send_payload(self, payload: Dict[str, object], *, timeout_scale: int = 1) -> Dict[str, object]:
+        try:
+            conn = _connect_unix_socket(self.socket_path, timeout=self._payload_timeout(timeout_scale))
+        except OSError:
+            return super()._send_payload(payload, timeout_scale=timeout_scale)
+        with conn:
+            try:
+                _write_frame(conn, payload)
+                result = _read_frame(conn)
+            except socket.timeout as exc:
+                raise RuntimeError("VM agent timed out waiting for execution result") from exc
+        if result is None:
+            raise RuntimeError("VM agent closed the connection before returning a result")
+        return result
+
+    def interrupt(self) -> Dict[str, object]:
+        return self._send_control({"action": "interrupt"})
+
+    def status(self) -> Dict[str, object]:
+        return self._send_control({"action": "status"})
+
+    def inspect(self, names: Iterable[str] | None = None) -> Dict[str, object]:
+        payload: Dict[str, object] = {"action": "inspect"}
+        if names:
+            payload["names"] = list(names)
+        return self._send_control(payload)
+
+    def dataframe_rows(self, frame_id: str, *, offset: int, limit: int) -> Dict[str, object]:
+        return self._send_control({"action": "dataframe_rows", "frame_id": frame_id, "offset": offset, "limit": limit})
+
+    def _send_control(self, payload: Dict[str, object]) -> Dict[str, object]:
+        # A separate connection: the one running the cell is busy until it finishes.
+        # Command files are served in order, so there is no fallback to them here.
+        try:
+            conn = _connect_unix_socket(self.socket_path, timeout=_CONTROL_TIMEOUT_SECONDS)
+            with conn:
+                _write_frame(conn, payload)
+                result = _read_frame(conn)
+        except OSError as exc:
+            return {"status": "error", "error": f"VM agent control channel is unavailable: {exc}"}
+        if result is None:
+            return {"status": "error", "error": "VM agent closed the connection before returning a result"}
+        return result
+
+
+def _connect_unix_socket(path: Path, *, timeout: float | None) -> socket.socket:
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout)
+    try:
+        if len(os.fsencode(str(path))) <= _MAX_UNIX_SOCKET_PATH:
+            conn.connect(str(path))
+        else:
+            # Deep workspace paths do not fit into sun_path; go through a directory fd.
+            dir_fd = os.open(path.parent, os.O_RDONLY)
+            try:
+                conn.connect(f"/proc/self/fd/{dir_fd}/{path.name}")
+            finally:
+                os.close(dir_fd)
+    except BaseException:
+        conn.close()
+        raise
+    return conn
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytes | None:
+    chunks = []
+    while size:
+        chunk = conn.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _read_frame(conn: socket.socket) -> Dict[str, object] | None:
+    header = _recv_exact(conn, _FRAME_HEADER.size)
+    if header is None:
+        return None
+    (length,) = _FRAME_HEADER.unpack(header)
+    body = _recv_exact(conn, length)
+    if body is None:
+        return None
+    return json.loads(body.decode("utf-8"))
+
+
+def _write_frame(conn: socket.socket, payload: Dict[str, object]) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    conn.sendall(_FRAME_HEADER.pack(len(body)) + body)
+
+
+def get_vm_agent_transport() -> str:
+    transport = str(getattr(settings, "RUNTIME_VM_AGENT_TRANSPORT", "socket") or "socket").strip().lower()
+    return transport if transport in AGENT_TRANSPORTS else "socket"
+
+
 def get_vm_agent(session_id: str, session) -> VmAgent:
     agent = _AGENT_CACHE.get(session_id)
     if agent is not None:
         return agent
     vm = session.vm
     if vm and vm.backend == "docker":
-        agent = FilesystemVmAgent(vm)
+        agent = SocketVmAgent(vm) if get_vm_agent_transport() == "socket" else FilesystemVmAgent(vm)
     else:
         agent = LocalVmAgent(session)
     _AGENT_CACHE[session_id] = agent
@@ -714,18 +1268,118 @@ def reset_vm_agents() -> None:
     _INTERACTIVE_RUNS.clear()
 
 
-def _snapshot_variables(namespace: Dict[str, object]) -> Dict[str, str]:
-    snapshot: Dict[str, str] = {}
-    for key, value in namespace.items():
-        if key == "__builtins__":
-            continue
+# Per-namespace record of what the last result reported, kept under a dunder
+# name so that it is neither reported nor hibernated.
+_VARIABLE_STATE_KEY = "__booml_variables__"
+_VARIABLE_SUMMARY_MAX_CHARS = 200
+_VARIABLE_REPR_MAX_CHARS = 100_000
+
+
+class _SummaryRepr(reprlib.Repr):
+    """``reprlib`` limits for containers and strings; arrays and frames by shape only."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.maxstring = 80
+        self.maxother = 80
+        self.maxlong = 40
+
+    def repr_instance(self, obj: object, level: int) -> str:
+        summary = _describe_array_like(obj)
+        if summary is not None:
+            return summary
+        return super().repr_instance(obj, level)
+
+
+_SUMMARY_REPR = _SummaryRepr()
+
+
+def _describe_array_like(value: object) -> str | None:
+    try:
+        shape = getattr(value, "shape", None)
+        if not isinstance(shape, tuple) or not shape:
+            return None
+        parts = [type(value).__name__, f"shape={tuple(int(dim) for dim in shape)}"]
+        dtype = getattr(value, "dtype", None)
+        if dtype is not None:
+            parts.append(f"dtype={dtype}")
+        nbytes = getattr(value, "nbytes", None)
+        if isinstance(nbytes, int):
+            parts.append(f"{nbytes} bytes")
+    except Exception:
+        return None
+    return " ".join(parts)
+
+
+def _summarize_value(value: object) -> str:
+    """A bounded description of ``value`` that never reprs large data in full."""
+    try:
+        summary = _SUMMARY_REPR.repr(value)
+    except Exception:
+        return f"<unrepresentable {type(value).__name__}>"
+    if len(summary) > _VARIABLE_SUMMARY_MAX_CHARS:
+        summary = summary[: _VARIABLE_SUMMARY_MAX_CHARS - 3] + "..."
+    return summary
+
+
+def _container_size(value: object) -> int | None:
+    # Truncated summaries hide appends; the length of builtin containers does not.
+    if isinstance(value, (list, dict, set, frozenset, tuple, str, bytes, bytearray)):
+        return len(value)
+    return None
+
+
+def _iter_user_variables(namespace: Dict[str, object]) -> Iterable[tuple[str, object]]:
+    for key, value in list(namespace.items()):
         if key.startswith("__") and key.endswith("__"):
             continue
+        if key.startswith("_booml_"):
+            continue
+        yield key, value
+
+
+def _snapshot_variables(namespace: Dict[str, object]) -> Dict[str, str]:
+    return {key: _summarize_value(value) for key, value in _iter_user_variables(namespace)}
+
+
+def _variable_changes(namespace: Dict[str, object]) -> Dict[str, object]:
+    """
+    Summaries of the variables bound or changed since the previous result.
+
+    A value counts as changed when its identity, container length or summary
+    differs, so rebinding and most in-place updates are reported while
+    untouched large objects are only summarized, never sent again.
+    """
+    previous = namespace.get(_VARIABLE_STATE_KEY)
+    if not isinstance(previous, dict):
+        previous = {}
+    current: Dict[str, tuple[int, int | None, str]] = {}
+    changed: Dict[str, str] = {}
+    for key, value in _iter_user_variables(namespace):
+        summary = _summarize_value(value)
+        current[key] = (id(value), _container_size(value), summary)
+        if previous.get(key) != current[key]:
+            changed[key] = summary
+    namespace[_VARIABLE_STATE_KEY] = current
+    return {"variables": changed, "removed_variables": sorted(set(previous) - set(current))}
+
+
+def _inspect_variables(namespace: Dict[str, object], names: Iterable[str] | None = None) -> Dict[str, str]:
+    """Summaries of every variable, or full reprs of the requested ``names``."""
+    if not names:
+        return _snapshot_variables(namespace)
+    result: Dict[str, str] = {}
+    for name in names:
+        if name not in namespace:
+            continue
         try:
-            snapshot[key] = repr(value)
+            text = repr(namespace[name])
         except Exception:
-            snapshot[key] = f"<unrepresentable {type(value).__name__}>"
-    return snapshot
+            text = f"<unrepresentable {type(namespace[name]).__name__}>"
+        if len(text) > _VARIABLE_REPR_MAX_CHARS:
+            text = text[:_VARIABLE_REPR_MAX_CHARS] + f"... ({len(text)} chars)"
+        result[name] = text
+    return result
 
 
 def _configure_pandas_display(namespace: Dict[str, object]) -> None:
@@ -841,6 +1495,10 @@ def _execute_with_optional_displayhook(code: str, namespace: Dict[str, object],
 
 
 def _convert_display_value(value: object, *, session) -> dict[str, object] | None:
+    return _offload_text_output(_describe_display_value(value, session=session), session=session)
+
+
+def _describe_display_value(value: object, *, session) -> dict[str, object] | None:
     if value is None:
         return None
 
@@ -853,7 +1511,7 @@ def _convert_display_value(value: object, *, session) -> dict[str, object] | Non
             "path": value.get("path"),
         }
 
-    dataframe_payload = _try_describe_dataframe(value)
+    dataframe_payload = _try_describe_dataframe(value, session=session)
     if dataframe_payload:
         return dataframe_payload
 
@@ -907,11 +1565,91 @@ def _try_encode_image(value: object, session) -> dict[str, object] | None:
     if Image is not None and isinstance(value, Image.Image):
         buffer = io.BytesIO()
         value.save(buffer, format="PNG")
-        return _build_image_output(buffer.getvalue(), "image/png", session=session)
+        return _build_rich_output(buffer.getvalue(), "image/png", session=session)
     return None
 
 
-def _try_describe_dataframe(value: object) -> dict[str, object] | None:
+# Frames displayed truncated, kept per namespace so that more rows can be fetched.
+# Only weak references: paging must not keep a frame alive after ``del df``.
+_DATAFRAME_PAGES_KEY = "__booml_dataframes__"
+_DATAFRAME_PAGE_MAX_ROWS = 500
+
+
+def _read_positive_int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name) or default))
+    except ValueError:
+        return default
+
+
+def _dataframe_window(rows: int) -> int | None:
+    """Rows pandas would show for a frame of ``rows`` under the display options; ``None`` shows all."""
+    import pandas as pd
+
+    max_rows = pd.get_option("display.max_rows")
+    if not max_rows or rows <= max_rows:
+        return max_rows or None
+    min_rows = pd.get_option("display.min_rows")
+    return min(min_rows, max_rows) if min_rows else max_rows
+
+
+def _dataframe_stats(value) -> Dict[str, object]:
+    """
+    Null counts and memory of ``value``, from an evenly strided row sample on large frames.
+
+    Memory is exact for fixed-width columns (shallow ``memory_usage``); only
+    the extra bytes of object columns are extrapolated from the sample.
+    """
+    rows = int(value.shape[0])
+    sample_rows = _read_positive_int_env("RUNTIME_DF_STATS_SAMPLE_ROWS", 10000)
+    sampled = rows > sample_rows
+    sample = value.iloc[:: -(-rows // sample_rows)] if sampled else value
+    scale = rows / len(sample) if len(sample) else 0.0
+
+    try:
+        nulls = {name: int(round(int(count) * scale)) for name, count in sample.isna().sum().items()}
+    except Exception:
+        nulls = None
+    try:
+        shallow = int(value.memory_usage(deep=False).sum())
+        sample_extra = int(sample.memory_usage(deep=True).sum()) - int(sample.memory_usage(deep=False).sum())
+        memory_bytes: int | None = shallow + int(round(sample_extra * scale))
+    except Exception:
+        memory_bytes = None
+    return {"nulls": nulls, "memory_bytes": memory_bytes, "sampled": sampled}
+
+
+def _remember_dataframe(value, namespace: Dict[str, object]) -> str:
+    pages = namespace.get(_DATAFRAME_PAGES_KEY)
+    if not isinstance(pages, OrderedDict):
+        pages = OrderedDict()
+        namespace[_DATAFRAME_PAGES_KEY] = pages
+    for stale in [key for key, ref in pages.items() if ref() is None]:
+        del pages[stale]
+    frame_id = uuid4().hex
+    pages[frame_id] = weakref.ref(value)
+    while len(pages) > _read_positive_int_env("RUNTIME_DF_PAGED_FRAMES", 8):
+        pages.popitem(last=False)
+    return frame_id
+
+
+def _dataframe_rows(namespace: Dict[str, object], frame_id: str, offset: int, limit: int) -> Dict[str, object]:
+    """Render one page of a frame displayed earlier, for "fetch more rows"."""
+    pages = namespace.get(_DATAFRAME_PAGES_KEY)
+    ref = pages.get(frame_id) if isinstance(pages, OrderedDict) else None
+    frame = ref() if ref is not None else None
+    if frame is None:
+        return {"status": "error", "error": "The table is no longer available; run the cell again"}
+    import pandas as pd
+
+    offset = max(0, int(offset))
+    limit = min(max(1, int(limit)), _DATAFRAME_PAGE_MAX_ROWS)
+    window = frame.iloc[offset : offset + limit]
+    html = window.to_html(max_rows=limit, max_cols=pd.get_option("display.max_columns"))
+    return {"status": "success", "html": html, "offset": offset, "limit": limit, "rows": int(frame.shape[0])}
+
+
+def _try_describe_dataframe(value: object, *, session=None) -> dict[str, object] | None:
     try:
         import pandas as pd
     except Exception:
@@ -920,19 +1658,19 @@ def _try_describe_dataframe(value: object) -> dict[str, object] | None:
     if not isinstance(value, pd.DataFrame):
         return None
 
+    rows = int(value.shape[0])
+    window = _dataframe_window(rows)
     try:
-        html = value.to_html()
+        html = value.to_html(
+            max_rows=window,
+            max_cols=pd.get_option("display.max_columns"),
+            show_dimensions=window is not None and rows > window,
+        )
     except Exception:
         return None
 
-    try:
-        nulls_total = int(value.isna().sum().sum())
-    except Exception:
-        nulls_total = None
-    try:
-        memory_bytes = int(value.memory_usage(deep=True).sum())
-    except Exception:
-        memory_bytes = None
+    stats = _dataframe_stats(value)
+    nulls = stats["nulls"]
 
     columns_preview = []
     truncated = False
@@ -942,19 +1680,13 @@ def _try_describe_dataframe(value: object) -> dict[str, object] | None:
             if idx >= preview_limit:
                 truncated = True
                 break
-            col = value[name]
-            try:
-                non_null = int(col.notna().sum())
-                nulls = int(col.isna().sum())
-            except Exception:
-                non_null = None
-                nulls = None
+            col_nulls = nulls.get(name) if nulls is not None else None
             columns_preview.append(
                 {
                     "name": str(name),
                     "dtype": str(dtype),
-                    "non_null": non_null,
-                    "nulls": nulls,
+                    "non_null": rows - col_nulls if col_nulls is not None else None,
+                    "nulls": col_nulls,
                 }
             )
     except Exception:
@@ -967,14 +1699,17 @@ def _try_describe_dataframe(value: object) -> dict[str, object] | None:
         dtype_counts = None
 
     metadata = {
-        "rows": int(value.shape[0]),
+        "rows": rows,
         "columns": int(value.shape[1]),
-        "nulls_total": nulls_total,
-        "memory_bytes": memory_bytes,
+        "nulls_total": sum(nulls.values()) if nulls is not None else None,
+        "memory_bytes": stats["memory_bytes"],
         "dtype_counts": dtype_counts,
         "columns_preview": columns_preview,
         "columns_truncated": truncated,
+        "stats_sampled": stats["sampled"],
     }
+    if session is not None and window is not None and rows > window:
+        metadata["frame_id"] = _remember_dataframe(value, session.namespace)
     return {"type": "text/html", "data": html, "metadata": metadata}
 
 
@@ -1005,32 +1740,55 @@ def _capture_matplotlib_figures(session) -> Iterable[dict[str, object]]:
                 plt.close(fig)
             except Exception:
                 logger.debug("Failed to close matplotlib figure", exc_info=True)
-        figures.append(_build_image_output(buffer.getvalue(), "image/png", session=session))
+        figures.append(_build_rich_output(buffer.getvalue(), "image/png", session=session))
     return figures
 
 
-def _build_image_output(payload: bytes, mime_type: str, *, session) -> dict[str, object]:
+_TEXT_OUTPUT_TYPES = {"text/html", "image/svg+xml"}
+
+
+def _build_rich_output(payload: bytes, mime_type: str, *, session) -> dict[str, object]:
+    """
+    Inline small outputs; store larger ones as content-addressed blobs.
+
+    A blob output carries the blob name instead of ``data``, so results stay
+    small and a figure rendered again is stored once. Blobs are served by
+    ``SessionOutputBlobView``.
+    """
     if not payload:
         return {}
     inline_limit = int(os.environ.get("RUNTIME_OUTPUT_INLINE_MAX_BYTES", "300000"))
     if len(payload) <= inline_limit:
-        encoded = base64.b64encode(payload).decode("ascii")
-        return {"type": mime_type, "data": encoded}
-    outputs_dir = session.workdir / ".outputs"
-    outputs_dir.mkdir(parents=True, exist_ok=True)
-    ext = "png" if mime_type == "image/png" else "img"
-    filename = f"output-{uuid4().hex}.{ext}"
-    target = outputs_dir / filename
-    target.write_bytes(payload)
-    relative = target.relative_to(session.workdir)
+        if mime_type in _TEXT_OUTPUT_TYPES:
+            return {"type": mime_type, "data": payload.decode("utf-8", errors="replace")}
+        return {"type": mime_type, "data": base64.b64encode(payload).decode("ascii")}
     return {
         "type": mime_type,
         "data": None,
-        "name": filename,
-        "path": relative.as_posix(),
+        "blob": _store_output_blob(payload, mime_type, session.workdir),
+        "size": len(payload),
     }
 
 
+def _offload_text_output(item: dict[str, object] | None, *, session) -> dict[str, object] | None:
+    if not item or item.get("type") not in _TEXT_OUTPUT_TYPES or not isinstance(item.get("data"), str):
+        return item
+    built = _build_rich_output(str(item["data"]).encode("utf-8"), str(item["type"]), session=session)
+    return {**item, **built}
+
+
+def _store_output_blob(payload: bytes, mime_type: str, workdir: Path) -> str:
+    suffix = mimetypes.guess_extension(mime_type) or ".bin"
+    name = hashlib.sha256(payload).hexdigest() + suffix
+    target = workdir / OUTPUT_BLOBS_DIR / name
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f"{name}.{uuid4().hex}.tmp")
+        tmp_path.write_bytes(payload)
+        tmp_path.replace(target)
+    return name
+
+
 @contextmanager
 def _workspace_cwd(path: Path):
     original = Path.cwd()
@@ -0,0 +1,116 @@
+"""Round-trip latency of the VM agent transports.
+
+The real agent server (``VM_AGENT_SERVER_SOURCE``) runs as a local process on a
+temporary workspace, without Docker, so the numbers isolate what the transport
+adds to every command: the same payloads are sent through the command files and
+through the Unix socket.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List
+
+from .vm_agent import FilesystemVmAgent, SocketVmAgent, VmAgent
+from .vm_agent_server import VM_AGENT_SERVER_SOURCE
+
+TRANSPORTS = {"file": FilesystemVmAgent, "socket": SocketVmAgent}
+
+
+@contextmanager
+def local_agent_server(workspace: Path, *, socket_enabled: bool = True, timeout: float = 20.0) -> Iterator[Any]:
+    """Run the agent server on ``workspace`` and yield a VM-like handle for the agent clients."""
+    agent_dir = workspace / ".vm_agent"
+    agent_dir.mkdir(parents=True, exist_ok=True)
+    server_file = agent_dir / "agent_server.py"
+    server_file.write_text(VM_AGENT_SERVER_SOURCE)
+    env = {
+        **os.environ,
+        "BOOML_AGENT_WORKSPACE": str(workspace),
+        "BOOML_AGENT_COMMANDS": str(agent_dir / "commands"),
+        "BOOML_AGENT_RESULTS": str(agent_dir / "results"),
+        "BOOML_AGENT_LOG": str(agent_dir / "agent.log"),
+        "BOOML_AGENT_STATUS": str(agent_dir / "status.json"),
+        "BOOML_AGENT_SNAPSHOT": str(agent_dir / "hibernate.pkl"),
+        # A directory instead of a socket path makes bind() fail, as on mounts without socket support.
+        "BOOML_AGENT_SOCKET": str(agent_dir / ("agent.sock" if socket_enabled else "")),
+    }
+    process = subprocess.Popen(
+        [sys.executable, str(server_file)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_ready(agent_dir / "status.json", process, timeout=timeout)
+        yield SimpleNamespace(workspace_path=workspace, backend="docker")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+def _wait_until_ready(status_file: Path, process: subprocess.Popen, *, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"VM agent exited with code {process.returncode}")
+        try:
+            if json.loads(status_file.read_text()).get("state") == "ready":
+                return
+        except (OSError, ValueError):
+            pass
+        time.sleep(0.01)
+    raise RuntimeError("VM agent did not become ready in time")
+
+
+def measure_round_trips(agent: VmAgent, *, code: str = "pass", repeat: int = 50, warmup: int = 3) -> Dict[str, float]:
+    """Latency statistics in milliseconds of ``repeat`` sequential ``exec_code`` calls."""
+    for _ in range(max(warmup, 0)):
+        agent.exec_code(code)
+    latencies: List[float] = []
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        agent.exec_code(code)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        "runs": len(latencies),
+        "min_ms": round(latencies[0], 3),
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "max_ms": round(latencies[-1], 3),
+    }
+
+
+def run_transport_benchmark(*, code: str = "pass", repeat: int = 50) -> Dict[str, Any]:
+    """Measure every transport against one agent server and compare their medians."""
+    results: Dict[str, Any] = {}
+    with TemporaryDirectory(prefix="booml-agent-bench-") as tmp:
+        with local_agent_server(Path(tmp)) as vm:
+            for name, agent_class in TRANSPORTS.items():
+                results[name] = measure_round_trips(agent_class(vm, timeout=60), code=code, repeat=repeat)
+    socket_p50 = results["socket"]["p50_ms"]
+    results["p50_speedup"] = round(results["file"]["p50_ms"] / socket_p50, 1) if socket_p50 else None
+    return results
+
+
+__all__ = [
+    "TRANSPORTS",
+    "local_agent_server",
+    "measure_round_trips",
+    "run_transport_benchmark",
+]
@@ -1,26 +1,58 @@
 VM_AGENT_SERVER_SOURCE = r"""#!/usr/bin/env python3
 import ast
 import base64
+import codecs
+import hashlib
+import importlib
 import io
 import json
+import mimetypes
 import os
+import pickle
+import queue
+import reprlib
+import signal
+import socket
+import struct
 import sys
 import subprocess
 import time
 import traceback
 import uuid
 import threading
-from contextlib import redirect_stdout, redirect_stderr
+import weakref
+from collections import OrderedDict, deque
+from contextlib import contextmanager, redirect_stdout, redirect_stderr
 from pathlib import Path
 
 
+WORKSPACE = Path(os.environ.get("BOOML_AGENT_WORKSPACE", "/workspace"))
 COMMANDS_DIR = Path(os.environ.get("BOOML_AGENT_COMMANDS", "/workspace/.vm_agent/commands"))
 RESULTS_DIR = Path(os.environ.get("BOOML_AGENT_RESULTS", "/workspace/.vm_agent/results"))
 LOG_FILE = Path(os.environ.get("BOOML_AGENT_LOG", "/workspace/.vm_agent/agent.log"))
 STATUS_FILE = Path(os.environ.get("BOOML_AGENT_STATUS", "/workspace/.vm_agent/status.json"))
 POLL_INTERVAL = float(os.environ.get("BOOML_AGENT_POLL_INTERVAL", "0.05"))
+SNAPSHOT_FILE = Path(os.environ.get("BOOML_AGENT_SNAPSHOT", "/workspace/.vm_agent/hibernate.pkl"))
+SOCKET_PATH = Path(os.environ.get("BOOML_AGENT_SOCKET", "/workspace/.vm_agent/agent.sock"))
+FRAME_HEADER = struct.Struct(">I")
+RUNTIME_NAMES = {"download_file"}
+RUNTIME_PREFIX = "_booml_"
+
+try:
+    import cloudpickle as _pickler
+except ImportError:
+    _pickler = pickle
 
 _INTERACTIVE_RUNS = {}
+# User code runs on the main thread, one task at a time, so that SIGINT can
+# interrupt it even inside blocking calls; transports only queue work and wait.
+_MAIN_TASKS = queue.Queue()
+_EXECUTION = {"task": None, "since": None, "interruptible": False, "cancelled": False}
+CONTROL_ACTIONS = {"interrupt", "status", "inspect", "dataframe_rows"}
+# Frames displayed truncated, newest last, so that more rows can be fetched.
+# Weak references only, so that ``del df`` still frees the frame.
+_DATAFRAME_PAGES = OrderedDict()
+DATAFRAME_PAGE_MAX_ROWS = 500
 _TRACEBACK_SEPARATOR = "-" * 79
 
 
@@ -122,37 +154,187 @@ def _format_exception(exc, *, code=None, filename=None):
     return "\n".join(parts)
 
 
-class StreamingBuffer(io.TextIOBase):
+OUTPUT_DROPPED_MARKER = "\n[... {dropped} bytes of output dropped ...]\n"
+OUTPUT_TRUNCATED_MARKER = "\n[... output stream stopped after {limit} bytes, the result keeps the end ...]\n"
+# Open stream files whose buffered writes the flusher thread pushes out while a cell is quiet.
+_STREAM_BUFFERS = weakref.WeakSet()
+_STREAM_FLUSHER_LOCK = threading.Lock()
+_STREAM_FLUSHER = None
+
+
+def text_size(text):
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def clip_head(text, size):
+    if text.isascii():
+        return text[:size]
+    return text.encode("utf-8")[:size].decode("utf-8", errors="ignore")
+
+
+def clip_tail(text, size):
+    if size <= 0:
+        return ""
+    if text.isascii():
+        return text[-size:]
+    return text.encode("utf-8")[-size:].decode("utf-8", errors="ignore")
+
+
+def output_flush_interval():
+    try:
+        return max(0.0, float(os.environ.get("RUNTIME_OUTPUT_FLUSH_SECONDS") or 0.2))
+    except ValueError:
+        return 0.2
+
+
+class CaptureBuffer(io.TextIOBase):
+    # Keeps the first RUNTIME_OUTPUT_HEAD_BYTES and a ring of the last
+    # RUNTIME_OUTPUT_TAIL_BYTES; the middle is only counted in dropped_bytes.
+    def __init__(self):
+        self._head_limit = read_positive_int_env("RUNTIME_OUTPUT_HEAD_BYTES", 64 * 1024)
+        self._tail_limit = read_positive_int_env("RUNTIME_OUTPUT_TAIL_BYTES", 64 * 1024)
+        self._head = []
+        self._head_size = 0
+        # Set once a write did not fit, so a character cut at the limit does
+        # not leave room that later writes would fill out of order.
+        self._head_full = False
+        self._tail = deque()
+        self._tail_size = 0
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.dropped_bytes = 0
+
+    def write(self, s):  # type: ignore[override]
+        text = "" if s is None else str(s)
+        if text:
+            with self._lock:
+                self._capture(text, text_size(text))
+        return len(text)
+
+    def _capture(self, text, size):
+        self.total_bytes += size
+        if not self._head_full:
+            room = self._head_limit - self._head_size
+            if size <= room:
+                self._head.append(text)
+                self._head_size += size
+                return
+            self._head_full = True
+            head = clip_head(text, room)
+            head_size = text_size(head)
+            self._head.append(head)
+            self._head_size += head_size
+            text = text[len(head):]
+            size -= head_size
+        if size >= self._tail_limit:
+            clipped = clip_tail(text, self._tail_limit)
+            clipped_size = text_size(clipped)
+            self.dropped_bytes += self._tail_size + size - clipped_size
+            self._tail.clear()
+            self._tail_size = 0
+            text, size = clipped, clipped_size
+        self._tail.append((text, size))
+        self._tail_size += size
+        while self._tail_size > self._tail_limit:
+            _, dropped = self._tail.popleft()
+            self._tail_size -= dropped
+            self.dropped_bytes += dropped
+
+    def getvalue(self):
+        with self._lock:
+            head = "".join(self._head)
+            tail = "".join(chunk for chunk, _ in self._tail)
+            dropped = self.dropped_bytes
+        if not dropped:
+            return head + tail
+        return head + OUTPUT_DROPPED_MARKER.format(dropped=dropped) + tail
+
+    def isatty(self):
+        return False
+
+
+class StreamingBuffer(CaptureBuffer):
+    # The stream file is written through its buffer and flushed at most every
+    # RUNTIME_OUTPUT_FLUSH_SECONDS (on a write or from the flusher thread), and
+    # stops growing after RUNTIME_OUTPUT_MAX_BYTES.
     def __init__(self, path: Path):
+        super().__init__()
         self._path = path
         self._path.parent.mkdir(parents=True, exist_ok=True)
-        self._buffer = io.StringIO()
         self._file = self._path.open("a", encoding="utf-8")
+        self._file_limit = read_positive_int_env("RUNTIME_OUTPUT_MAX_BYTES", 10 * 1024 * 1024)
+        self._file_size = 0
+        self._flush_interval = output_flush_interval()
+        self._flushed_at = time.monotonic()
+        self._dirty = False
+        self.truncated = False
+        register_stream_buffer(self)
 
     def write(self, s):  # type: ignore[override]
         text = "" if s is None else str(s)
-        self._buffer.write(text)
-        self._file.write(text)
-        self._file.flush()
+        if not text:
+            return 0
+        size = text_size(text)
+        with self._lock:
+            self._capture(text, size)
+            if self.truncated or self._file.closed:
+                return len(text)
+            room = self._file_limit - self._file_size
+            if size > room:
+                self._file.write(clip_head(text, room))
+                self._file.write(OUTPUT_TRUNCATED_MARKER.format(limit=self._file_limit))
+                self._file_size = self._file_limit
+                self.truncated = True
+            else:
+                self._file.write(text)
+                self._file_size += size
+            self._dirty = True
+            if time.monotonic() - self._flushed_at >= self._flush_interval:
+                self._flush_file()
         return len(text)
 
-    def flush(self):
+    def _flush_file(self):
         try:
             self._file.flush()
         except Exception:
             pass
+        self._dirty = False
+        self._flushed_at = time.monotonic()
 
-    def getvalue(self):
-        return self._buffer.getvalue()
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._flush_file()
 
-    def isatty(self):
-        return False
+    def flush_if_idle(self):
+        with self._lock:
+            if self._dirty and not self._file.closed and time.monotonic() - self._flushed_at >= self._flush_interval:
+                self._flush_file()
 
     def close(self):  # type: ignore[override]
-        try:
-            self._file.close()
-        finally:
-            super().close()
+        with self._lock:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+        _STREAM_BUFFERS.discard(self)
+        super().close()
+
+
+def register_stream_buffer(buffer):
+    global _STREAM_FLUSHER
+    _STREAM_BUFFERS.add(buffer)
+    with _STREAM_FLUSHER_LOCK:
+        if _STREAM_FLUSHER is None or not _STREAM_FLUSHER.is_alive():
+            _STREAM_FLUSHER = threading.Thread(target=flush_stream_buffers, daemon=True)
+            _STREAM_FLUSHER.start()
+
+
+def flush_stream_buffers():
+    while True:
+        time.sleep(max(output_flush_interval(), 0.05))
+        for buffer in list(_STREAM_BUFFERS):
+            buffer.flush_if_idle()
 
 
 class InteractiveStdin(io.TextIOBase):
@@ -201,7 +383,6 @@ class InteractiveRun:
         self._stdin_closed = False
         self._status_seq = 0
         self._condition = threading.Condition()
-        self._thread = threading.Thread(target=self._execute, daemon=True)
 
     @property
     def stdin_closed(self):
@@ -214,7 +395,7 @@ class InteractiveRun:
 
     def start(self):
         _INTERACTIVE_RUNS[self.run_id] = self
-        self._thread.start()
+        submit_to_main(self._execute, label=f"run:{self.run_id}")
 
     def _set_status(self, status: str, prompt: str | None = None) -> None:
         with self._condition:
@@ -344,10 +525,12 @@ class InteractiveRun:
                     configure_plotly_defaults(self.namespace, display)
                     configure_matplotlib_defaults(self.namespace)
                     configure_pandas_display(self.namespace)
-                    code = handle_shell_commands(self.code, self.workspace, self.stdout_buffer, self.stderr_buffer)
-                    if code.strip():
-                        execute_with_optional_displayhook(code, self.namespace, display)
-                except Exception as exc:
+                    with interruptible():
+                        self.namespace[SHELL_HELPER] = shell_runner(self.workspace, self.stdout_buffer, self.stderr_buffer)
+                        code = rewrite_shell_commands(self.code)
+                        if code.strip():
+                            execute_with_optional_displayhook(code, self.namespace, display)
+                except (Exception, KeyboardInterrupt) as exc:
                     self.error = _format_exception(exc, code=self.code, filename="<cell>")
                 else:
                     for item in capture_matplotlib_figures(self.workspace):
@@ -386,13 +569,13 @@ class InteractiveRun:
             "stdout": self.stdout_buffer.getvalue(),
             "stderr": self.stderr_buffer.getvalue(),
             "error": self.error,
-            "variables": snapshot_namespace(self.namespace),
+            **variable_changes(self.namespace),
             "outputs": self.outputs,
             "artifacts": self.artifacts,
         }
 
 
-def open_stream_buffer(workspace: Path, raw_path: str | None):
+def resolve_workspace_path(workspace: Path, raw_path: str | None):
     if not raw_path:
         return None
     try:
@@ -400,7 +583,22 @@ def open_stream_buffer(workspace: Path, raw_path: str | None):
         target.relative_to(workspace.resolve())
     except Exception:
         return None
-    return StreamingBuffer(target)
+    return target
+
+
+def open_stream_buffer(workspace: Path, raw_path: str | None):
+    target = resolve_workspace_path(workspace, raw_path)
+    return StreamingBuffer(target) if target is not None else None
+
+
+def append_run_event(path, event: dict) -> None:
+    if path is None:
+        return
+    try:
+        with path.open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps({**event, "at": time.time()}) + "\n")
+    except Exception as exc:
+        log(f"Failed to write run event to {path}: {exc}")
 
 
 def log(message: str) -> None:
@@ -409,20 +607,160 @@ def log(message: str) -> None:
         fh.write(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}\n")
 
 
+# What the last result reported, kept under a dunder name so that it is
+# neither reported nor hibernated.
+VARIABLE_STATE_KEY = "__booml_variables__"
+VARIABLE_SUMMARY_MAX_CHARS = 200
+VARIABLE_REPR_MAX_CHARS = 100_000
+
+
+class SummaryRepr(reprlib.Repr):
+    def __init__(self):
+        super().__init__()
+        self.maxstring = 80
+        self.maxother = 80
+        self.maxlong = 40
+
+    def repr_instance(self, obj, level):
+        summary = describe_array_like(obj)
+        if summary is not None:
+            return summary
+        return super().repr_instance(obj, level)
+
+
+SUMMARY_REPR = SummaryRepr()
+
+
+def describe_array_like(value):
+    try:
+        shape = getattr(value, "shape", None)
+        if not isinstance(shape, tuple) or not shape:
+            return None
+        parts = [type(value).__name__, f"shape={tuple(int(dim) for dim in shape)}"]
+        dtype = getattr(value, "dtype", None)
+        if dtype is not None:
+            parts.append(f"dtype={dtype}")
+        nbytes = getattr(value, "nbytes", None)
+        if isinstance(nbytes, int):
+            parts.append(f"{nbytes} bytes")
+    except Exception:
+        return None
+    return " ".join(parts)
+
+
+def summarize_value(value) -> str:
+    try:
+        summary = SUMMARY_REPR.repr(value)
+    except Exception:
+        return f"<unrepresentable {type(value).__name__}>"
+    if len(summary) > VARIABLE_SUMMARY_MAX_CHARS:
+        summary = summary[: VARIABLE_SUMMARY_MAX_CHARS - 3] + "..."
+    return summary
+
+
+def container_size(value) -> int | None:
+    # Truncated summaries hide appends; the length of builtin containers does not.
+    if isinstance(value, (list, dict, set, frozenset, tuple, str, bytes, bytearray)):
+        return len(value)
+    return None
+
+
+def iter_user_variables(namespace):
+    for key, value in list(namespace.items()):
+        if key.startswith("__") and key.endswith("__"):
+            continue
+        if key.startswith(RUNTIME_PREFIX):
+            continue
+        yield key, value
+
+
 def snapshot_namespace(namespace):
+    return {key: summarize_value(value) for key, value in iter_user_variables(namespace)}
+
+
+def variable_changes(namespace) -> dict:
+    # Only names bound or changed since the previous result are summarized
+    # into it; untouched large objects are never sent again.
+    previous = namespace.get(VARIABLE_STATE_KEY)
+    if not isinstance(previous, dict):
+        previous = {}
+    current = {}
+    changed = {}
+    for key, value in iter_user_variables(namespace):
+        summary = summarize_value(value)
+        current[key] = (id(value), container_size(value), summary)
+        if previous.get(key) != current[key]:
+            changed[key] = summary
+    namespace[VARIABLE_STATE_KEY] = current
+    return {"variables": changed, "removed_variables": sorted(set(previous) - set(current))}
+
+
+def inspect_variables(namespace, names=None) -> dict:
+    if not names:
+        return snapshot_namespace(namespace)
     result = {}
-    for key, value in namespace.items():
-        if key == "__builtins__":
-            continue
-        if key.startswith("__") and key.endswith("__"):
+    for name in names:
+        if name not in namespace:
             continue
         try:
-            result[key] = repr(value)
+            text = repr(namespace[name])
         except Exception:
-            result[key] = f"<unrepresentable {type(value).__name__}>"
+            text = f"<unrepresentable {type(namespace[name]).__name__}>"
+        if len(text) > VARIABLE_REPR_MAX_CHARS:
+            text = text[:VARIABLE_REPR_MAX_CHARS] + f"... ({len(text)} chars)"
+        result[name] = text
     return result
 
 
+def hibernate_namespace(namespace, max_bytes: int) -> dict:
+    entries = {}
+    skipped = {}
+    total = 0
+    for name, value in namespace.items():
+        if name.startswith("__") and name.endswith("__") or name in RUNTIME_NAMES or name.startswith(RUNTIME_PREFIX):
+            continue
+        if isinstance(value, type(sys)):
+            entries[name] = ("module", value.__name__)
+            continue
+        try:
+            data = _pickler.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as exc:
+            skipped[name] = f"not picklable: {type(exc).__name__}"
+            continue
+        if total + len(data) > max_bytes:
+            skipped[name] = f"over the {max_bytes}-byte snapshot budget"
+            continue
+        entries[name] = ("value", data)
+        total += len(data)
+    tmp_path = SNAPSHOT_FILE.with_name(f".{SNAPSHOT_FILE.name}.tmp")
+    with tmp_path.open("wb") as fh:
+        pickle.dump({"version": 1, "entries": entries}, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, SNAPSHOT_FILE)
+    return {"status": "success", "saved": sorted(entries), "skipped": skipped, "bytes": SNAPSHOT_FILE.stat().st_size}
+
+
+def restore_hibernated_namespace(namespace) -> dict:
+    if not SNAPSHOT_FILE.exists():
+        return {"status": "success", "restored": [], "skipped": {}, "bytes": 0}
+    size = SNAPSHOT_FILE.stat().st_size
+    with SNAPSHOT_FILE.open("rb") as fh:
+        snapshot = pickle.load(fh)
+    restored = []
+    skipped = {}
+    for name, (kind, payload) in (snapshot.get("entries") or {}).items():
+        try:
+            if kind == "module":
+                namespace[name] = importlib.import_module(payload)
+            else:
+                namespace[name] = _pickler.loads(payload)
+        except Exception as exc:
+            skipped[name] = f"restore failed: {type(exc).__name__}"
+            continue
+        restored.append(name)
+    SNAPSHOT_FILE.unlink(missing_ok=True)
+    return {"status": "success", "restored": sorted(restored), "skipped": skipped, "bytes": size}
+
+
 def build_download_helper(workspace: Path):
     import urllib.request
     from urllib.parse import urlparse
@@ -450,34 +788,99 @@ def build_download_helper(workspace: Path):
     return download_file
 
 
-def handle_shell_commands(code: str, workspace: Path, stdout_buffer: io.StringIO, stderr_buffer: io.StringIO) -> str:
+SHELL_HELPER = "_booml_shell"
+SHELL_POLL_SECONDS = 0.1
+
+
+def rewrite_shell_commands(code: str) -> str:
+    # Each "!cmd" line becomes a call of the shell helper, so it runs in cell order.
     lines = code.split('\n')
-    filtered_lines = []
-    shell_timeout = _read_timeout_env("RUNTIME_SHELL_COMMAND_TIMEOUT_SECONDS", None)
-    
-    for line in lines:
+    for index, line in enumerate(lines):
         stripped = line.lstrip()
         if stripped.startswith('!'):
-            shell_cmd = stripped[1:]
-            try:
-                result = subprocess.run(
-                    shell_cmd,
-                    shell=True,
-                    capture_output=True,
-                    text=True,
-                    cwd=str(workspace),
-                    timeout=shell_timeout,
-                    env={**os.environ, 'PIP_ROOT_USER_ACTION': 'ignore'}
-                )
-                stdout_buffer.write(result.stdout)
-                if result.stderr:
-                    stderr_buffer.write(result.stderr)
-            except Exception as e:
-                stderr_buffer.write(f"Error executing shell command '{shell_cmd}': {str(e)}\n")
-        else:
-            filtered_lines.append(line)
-    
-    return '\n'.join(filtered_lines)
+            indent = line[:len(line) - len(stripped)]
+            lines[index] = f"{indent}{SHELL_HELPER}({stripped[1:]!r})"
+    return '\n'.join(lines)
+
+
+def shell_runner(workspace: Path, stdout_buffer: io.TextIOBase, stderr_buffer: io.TextIOBase):
+    def run_shell(command):
+        run_shell_command(command, workspace, stdout_buffer, stderr_buffer)
+
+    return run_shell
+
+
+def run_shell_command(command: str, workspace: Path, stdout_buffer: io.TextIOBase, stderr_buffer: io.TextIOBase) -> None:
+    # Output is streamed into the run's buffers as it arrives; the command gets
+    # its own process group so a timeout or an interrupt kills all it started.
+    shell_timeout = _read_timeout_env("RUNTIME_SHELL_COMMAND_TIMEOUT_SECONDS", None)
+    try:
+        process = subprocess.Popen(
+            command,
+            shell=True,
+            cwd=str(workspace),
+            env={**os.environ, 'PIP_ROOT_USER_ACTION': 'ignore', 'PYTHONUNBUFFERED': '1'},
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+    except Exception as e:
+        stderr_buffer.write(f"Error executing shell command '{command}': {str(e)}\n")
+        return
+
+    pumps = [
+        threading.Thread(target=pump_shell_output, args=(process.stdout, stdout_buffer), daemon=True),
+        threading.Thread(target=pump_shell_output, args=(process.stderr, stderr_buffer), daemon=True),
+    ]
+    for pump in pumps:
+        pump.start()
+    timed_out = None
+    try:
+        timed_out = wait_for_shell(process, shell_timeout)
+    except BaseException:
+        kill_process_group(process)
+        raise
+    finally:
+        for pump in pumps:
+            pump.join()
+    if timed_out is not None:
+        stderr_buffer.write(f"Error executing shell command '{command}': {str(timed_out)}\n")
+
+
+def wait_for_shell(process, timeout):
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            process.wait(timeout=SHELL_POLL_SECONDS)
+            return None
+        except subprocess.TimeoutExpired:
+            if deadline is not None and time.monotonic() >= deadline:
+                kill_process_group(process)
+                return subprocess.TimeoutExpired(process.args, timeout)
+
+
+def pump_shell_output(pipe, buffer) -> None:
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(errors="replace"), translate=True)
+    try:
+        while True:
+            chunk = pipe.read1(65536)
+            if not chunk:
+                break
+            buffer.write(decoder.decode(chunk))
+        buffer.write(decoder.decode(b"", final=True))
+    except Exception:
+        pass
+    finally:
+        pipe.close()
+
+
+def kill_process_group(process) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    process.wait()
 
 
 def execute_with_optional_displayhook(code: str, namespace, display) -> None:
@@ -510,6 +913,10 @@ def execute_with_optional_displayhook(code: str, namespace, display) -> None:
 
 
 def convert_display_value(value, workspace: Path) -> dict | None:
+    return offload_text_output(describe_display_value(value, workspace), workspace)
+
+
+def describe_display_value(value, workspace: Path) -> dict | None:
     if value is None:
         return None
 
@@ -576,7 +983,7 @@ def try_encode_image(value, workspace: Path) -> dict | None:
     if Image is not None and isinstance(value, Image.Image):
         buffer = io.BytesIO()
         value.save(buffer, format="PNG")
-        return build_image_output(buffer.getvalue(), "image/png", workspace)
+        return build_rich_output(buffer.getvalue(), "image/png", workspace)
     return None
 
 
@@ -607,32 +1014,50 @@ def capture_matplotlib_figures(workspace: Path) -> list[dict]:
                 plt.close(fig)
             except Exception:
                 pass
-        outputs.append(build_image_output(buffer.getvalue(), "image/png", workspace))
+        outputs.append(build_rich_output(buffer.getvalue(), "image/png", workspace))
     return outputs
 
 
-def build_image_output(payload: bytes, mime_type: str, workspace: Path) -> dict:
+TEXT_OUTPUT_TYPES = {"text/html", "image/svg+xml"}
+
+
+def build_rich_output(payload: bytes, mime_type: str, workspace: Path) -> dict:
+    # Small outputs stay inline; anything larger is written once to a
+    # content-addressed blob and only its name travels in the result.
     if not payload:
         return {}
     inline_limit = int(os.environ.get("RUNTIME_OUTPUT_INLINE_MAX_BYTES", "300000"))
     if len(payload) <= inline_limit:
-        encoded = base64.b64encode(payload).decode("ascii")
-        return {"type": mime_type, "data": encoded}
-    outputs_dir = workspace / ".outputs"
-    outputs_dir.mkdir(parents=True, exist_ok=True)
-    ext = "png" if mime_type == "image/png" else "img"
-    filename = f"output-{uuid.uuid4().hex}.{ext}"
-    target = outputs_dir / filename
-    target.write_bytes(payload)
-    relative = target.relative_to(workspace)
+        if mime_type in TEXT_OUTPUT_TYPES:
+            return {"type": mime_type, "data": payload.decode("utf-8", errors="replace")}
+        return {"type": mime_type, "data": base64.b64encode(payload).decode("ascii")}
     return {
         "type": mime_type,
         "data": None,
-        "name": filename,
-        "path": relative.as_posix(),
+        "blob": store_output_blob(payload, mime_type, workspace),
+        "size": len(payload),
     }
 
 
+def offload_text_output(item: dict | None, workspace: Path) -> dict | None:
+    if not item or item.get("type") not in TEXT_OUTPUT_TYPES or not isinstance(item.get("data"), str):
+        return item
+    built = build_rich_output(item["data"].encode("utf-8"), item["type"], workspace)
+    return {**item, **built}
+
+
+def store_output_blob(payload: bytes, mime_type: str, workspace: Path) -> str:
+    suffix = mimetypes.guess_extension(mime_type) or ".bin"
+    name = hashlib.sha256(payload).hexdigest() + suffix
+    target = workspace / ".outputs" / name
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f"{name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_bytes(payload)
+        tmp_path.replace(target)
+    return name
+
+
 def process_command(command_path: Path, namespace, workspace: Path) -> None:
     try:
         payload = json.loads(command_path.read_text(encoding="utf-8"))
@@ -641,29 +1066,218 @@ def process_command(command_path: Path, namespace, workspace: Path) -> None:
         command_path.unlink(missing_ok=True)
         return
 
+    result = handle_payload(payload, namespace, workspace)
+    result_path = RESULTS_DIR / command_path.name
+    tmp_path = result_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(result), encoding="utf-8")
+    tmp_path.rename(result_path)
+    command_path.unlink(missing_ok=True)
+
+
+def handle_payload(payload: dict, namespace, workspace: Path) -> dict:
     action = payload.get("action") or "run"
     code = payload.get("code", "")
     stream = payload.get("stream") or {}
-    if action == "interactive_start":
+    if action in CONTROL_ACTIONS:
+        result = handle_control(action, payload, namespace)
+    elif action == "interactive_start":
         run_id = payload.get("run_id") or None
         result = start_interactive(code, namespace, workspace, stream=stream, run_id=run_id)
+    elif action == "run_batch":
+        cells = payload.get("cells") or []
+        events = payload.get("events")
+        stop_on_error = bool(payload.get("stop_on_error", True))
+        try:
+            result = run_on_main(
+                lambda: execute_batch(cells, namespace, workspace, events=events, stop_on_error=stop_on_error),
+                label="run_batch",
+            )
+        except Exception as exc:
+            result = {"status": "error", "error": str(exc), "results": []}
     elif action == "interactive_input":
         run_id = payload.get("run_id") or ""
         text = payload.get("input")
         stdin_eof = bool(payload.get("stdin_eof"))
         result = provide_interactive_input(run_id, text, stdin_eof=stdin_eof)
+    elif action in ("hibernate", "restore"):
+        try:
+            if action == "hibernate":
+                max_bytes = int(payload.get("max_bytes") or 0)
+                result = run_on_main(lambda: hibernate_namespace(namespace, max_bytes), label=action)
+            else:
+                result = run_on_main(lambda: restore_hibernated_namespace(namespace), label=action)
+        except Exception as exc:
+            log(f"Failed to {action} namespace: {exc}")
+            result = {"status": "error", "error": str(exc)}
     else:
-        result = execute_code(code, namespace, workspace, stream=stream)
-    result_path = RESULTS_DIR / command_path.name
-    tmp_path = result_path.with_suffix(".tmp")
-    tmp_path.write_text(json.dumps(result), encoding="utf-8")
-    tmp_path.rename(result_path)
-    command_path.unlink(missing_ok=True)
+        try:
+            result = run_on_main(lambda: execute_code(code, namespace, workspace, stream=stream), label="run")
+        except Exception as exc:
+            result = {
+                "stdout": "",
+                "stderr": "",
+                "error": _format_exception(exc, code=code),
+                "variables": {},
+                "outputs": [],
+                "artifacts": [],
+            }
+    return result
+
+
+class MainTask:
+    def __init__(self, fn, label: str):
+        self.fn = fn
+        self.label = label
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+def submit_to_main(fn, *, label: str) -> MainTask:
+    # A run still waiting for input would hold the main thread until the stdin
+    # timeout; like a notebook frontend, a new execution cancels that prompt.
+    for run in list(_INTERACTIVE_RUNS.values()):
+        if run.status == "input_required":
+            run.abort_input()
+    task = MainTask(fn, label)
+    _MAIN_TASKS.put(task)
+    return task
+
+
+def run_on_main(fn, *, label: str):
+    task = submit_to_main(fn, label=label)
+    task.done.wait()
+    if task.error is not None:
+        raise task.error
+    return task.result
+
+
+def run_main_tasks() -> None:
+    while True:
+        try:
+            task = _MAIN_TASKS.get()
+        except KeyboardInterrupt:
+            continue
+        _EXECUTION.update(task=task.label, since=time.time())
+        try:
+            task.result = task.fn()
+        except BaseException as exc:
+            task.error = exc if isinstance(exc, Exception) else RuntimeError(f"{type(exc).__name__} in agent task")
+        finally:
+            _EXECUTION.update(task=None, since=None, interruptible=False)
+            task.done.set()
+
+
+@contextmanager
+def interruptible():
+    _EXECUTION["interruptible"] = True
+    try:
+        yield
+    finally:
+        _EXECUTION["interruptible"] = False
+
+
+def handle_sigint(signum, frame):
+    # Only user code is interrupted; a late signal must not break the agent itself.
+    if _EXECUTION["interruptible"]:
+        raise KeyboardInterrupt
+
+
+def handle_control(action: str, payload: dict, namespace) -> dict:
+    # Served on the transport thread, concurrently with whatever runs on the main thread.
+    if action == "interrupt":
+        interrupted = bool(_EXECUTION["interruptible"])
+        if interrupted:
+            os.kill(os.getpid(), signal.SIGINT)
+        if _EXECUTION["task"] == "run_batch":
+            # Also stops a "Run all" job between cells, where nothing is interruptible.
+            _EXECUTION["cancelled"] = interrupted = True
+        return {"status": "success", "interrupted": interrupted, "task": _EXECUTION["task"]}
+    if action == "status":
+        since = _EXECUTION["since"]
+        return {
+            "status": "success",
+            "busy": _EXECUTION["task"] is not None,
+            "task": _EXECUTION["task"],
+            "running_seconds": round(time.time() - since, 3) if since else None,
+            "queued": _MAIN_TASKS.qsize(),
+            "interactive_runs": {run_id: run.status for run_id, run in list(_INTERACTIVE_RUNS.items())},
+        }
+    if action == "dataframe_rows":
+        try:
+            return dataframe_rows(str(payload.get("frame_id") or ""), int(payload.get("offset") or 0), int(payload.get("limit") or 50))
+        except Exception as exc:
+            return {"status": "error", "error": str(exc)}
+    return {"status": "success", "variables": inspect_variables(dict(namespace), payload.get("names"))}
+
+
+def recv_exact(conn, size: int) -> bytes | None:
+    chunks = []
+    while size:
+        chunk = conn.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(conn) -> dict | None:
+    header = recv_exact(conn, FRAME_HEADER.size)
+    if header is None:
+        return None
+    (length,) = FRAME_HEADER.unpack(header)
+    body = recv_exact(conn, length)
+    if body is None:
+        return None
+    return json.loads(body.decode("utf-8"))
+
+
+def write_frame(conn, payload: dict) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    conn.sendall(FRAME_HEADER.pack(len(body)) + body)
+
+
+def serve_connection(conn, namespace, workspace: Path) -> None:
+    with conn:
+        while True:
+            try:
+                payload = read_frame(conn)
+            except Exception as exc:
+                log(f"Failed to read socket command: {exc}")
+                return
+            if payload is None:
+                return
+            result = handle_payload(payload, namespace, workspace)
+            try:
+                write_frame(conn, result)
+            except OSError as exc:
+                log(f"Failed to send socket result: {exc}")
+                return
+
+
+def start_socket_server(namespace, workspace: Path) -> bool:
+    try:
+        SOCKET_PATH.unlink(missing_ok=True)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(str(SOCKET_PATH))
+        server.listen(16)
+    except OSError as exc:
+        log(f"Socket transport unavailable, using command files only: {exc}")
+        return False
+
+    def accept_loop():
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=serve_connection, args=(conn, namespace, workspace), daemon=True).start()
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return True
 
 
 def execute_code(code: str, namespace, workspace: Path, *, stream: dict | None = None) -> dict:
-    stdout_buffer = io.StringIO()
-    stderr_buffer = io.StringIO()
+    stdout_buffer = CaptureBuffer()
+    stderr_buffer = CaptureBuffer()
     stdout_stream = None
     stderr_stream = None
     if stream:
@@ -703,10 +1317,12 @@ def execute_code(code: str, namespace, workspace: Path, *, stream: dict | None =
                 configure_plotly_defaults(namespace, display)
                 configure_matplotlib_defaults(namespace)
                 configure_pandas_display(namespace)
-                code = handle_shell_commands(code, workspace, stdout_buffer, stderr_buffer)
-                if code.strip():
-                    execute_with_optional_displayhook(code, namespace, display)
-            except Exception as exc:
+                with interruptible():
+                    namespace[SHELL_HELPER] = shell_runner(workspace, stdout_buffer, stderr_buffer)
+                    code = rewrite_shell_commands(code)
+                    if code.strip():
+                        execute_with_optional_displayhook(code, namespace, display)
+            except (Exception, KeyboardInterrupt) as exc:
                 error = _format_exception(exc, code=code, filename="<cell>")
             else:
                 for item in capture_matplotlib_figures(workspace):
@@ -722,15 +1338,45 @@ def execute_code(code: str, namespace, workspace: Path, *, stream: dict | None =
         "stdout": stdout_buffer.getvalue(),
         "stderr": stderr_buffer.getvalue(),
         "error": error,
-        "variables": snapshot_namespace(namespace),
+        **variable_changes(namespace),
         "outputs": outputs,
         "artifacts": artifacts,
     }
 
 
+def execute_batch(cells: list, namespace, workspace: Path, *, events: str | None, stop_on_error: bool) -> dict:
+    # "Run all": the cells run back to back in one main-thread task, and every
+    # start and finish is appended to the events file the server streams from.
+    events_path = resolve_workspace_path(workspace, events)
+    _EXECUTION["cancelled"] = False
+    results = []
+    for cell in cells:
+        cell_id = cell.get("id")
+        code = str(cell.get("code") or "")
+        append_run_event(events_path, {"event": "started", "cell_id": cell_id})
+        started = time.monotonic()
+        try:
+            result = execute_code(code, namespace, workspace, stream=cell.get("stream") or {})
+        except Exception as exc:
+            result = {
+                "stdout": "",
+                "stderr": "",
+                "error": _format_exception(exc, code=code),
+                "variables": {},
+                "outputs": [],
+                "artifacts": [],
+            }
+        duration_ms = round((time.monotonic() - started) * 1000)
+        results.append({"cell_id": cell_id, "duration_ms": duration_ms, **result})
+        append_run_event(events_path, {"event": "finished", "cell_id": cell_id, "duration_ms": duration_ms, "result": result})
+        if _EXECUTION["cancelled"] or (stop_on_error and result.get("error")):
+            break
+    return {"status": "success", "results": results, "stopped": len(results) < len(cells)}
+
+
 def start_interactive(code: str, namespace, workspace: Path, *, stream: dict | None = None, run_id: str | None = None) -> dict:
-    stdout_buffer = io.StringIO()
-    stderr_buffer = io.StringIO()
+    stdout_buffer = CaptureBuffer()
+    stderr_buffer = CaptureBuffer()
     if stream:
         stdout_stream = open_stream_buffer(workspace, stream.get("stdout"))
         stderr_stream = open_stream_buffer(workspace, stream.get("stderr"))
@@ -854,6 +1500,70 @@ def configure_matplotlib_defaults(namespace) -> None:
     namespace["_booml_matplotlib_configured"] = True
 
 
+def read_positive_int_env(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name) or default))
+    except ValueError:
+        return default
+
+
+def dataframe_window(rows: int):
+    # Rows pandas would show under the display options; None shows all.
+    import pandas as pd
+
+    max_rows = pd.get_option("display.max_rows")
+    if not max_rows or rows <= max_rows:
+        return max_rows or None
+    min_rows = pd.get_option("display.min_rows")
+    return min(min_rows, max_rows) if min_rows else max_rows
+
+
+def dataframe_stats(value) -> dict:
+    # Large frames are measured on an evenly strided row sample; memory stays
+    # exact for fixed-width columns and only object bytes are extrapolated.
+    rows = int(value.shape[0])
+    sample_rows = read_positive_int_env("RUNTIME_DF_STATS_SAMPLE_ROWS", 10000)
+    sampled = rows > sample_rows
+    sample = value.iloc[:: -(-rows // sample_rows)] if sampled else value
+    scale = rows / len(sample) if len(sample) else 0.0
+
+    try:
+        nulls = {name: int(round(int(count) * scale)) for name, count in sample.isna().sum().items()}
+    except Exception:
+        nulls = None
+    try:
+        shallow = int(value.memory_usage(deep=False).sum())
+        sample_extra = int(sample.memory_usage(deep=True).sum()) - int(sample.memory_usage(deep=False).sum())
+        memory_bytes = shallow + int(round(sample_extra * scale))
+    except Exception:
+        memory_bytes = None
+    return {"nulls": nulls, "memory_bytes": memory_bytes, "sampled": sampled}
+
+
+def remember_dataframe(value) -> str:
+    for stale in [key for key, ref in _DATAFRAME_PAGES.items() if ref() is None]:
+        del _DATAFRAME_PAGES[stale]
+    frame_id = uuid.uuid4().hex
+    _DATAFRAME_PAGES[frame_id] = weakref.ref(value)
+    while len(_DATAFRAME_PAGES) > read_positive_int_env("RUNTIME_DF_PAGED_FRAMES", 8):
+        _DATAFRAME_PAGES.popitem(last=False)
+    return frame_id
+
+
+def dataframe_rows(frame_id: str, offset: int, limit: int) -> dict:
+    ref = _DATAFRAME_PAGES.get(frame_id)
+    frame = ref() if ref is not None else None
+    if frame is None:
+        return {"status": "error", "error": "The table is no longer available; run the cell again"}
+    import pandas as pd
+
+    offset = max(0, offset)
+    limit = min(max(1, limit), DATAFRAME_PAGE_MAX_ROWS)
+    window = frame.iloc[offset : offset + limit]
+    html = window.to_html(max_rows=limit, max_cols=pd.get_option("display.max_columns"))
+    return {"status": "success", "html": html, "offset": offset, "limit": limit, "rows": int(frame.shape[0])}
+
+
 def try_describe_dataframe(value) -> dict | None:
     try:
         import pandas as pd
@@ -863,19 +1573,19 @@ def try_describe_dataframe(value) -> dict | None:
     if not isinstance(value, pd.DataFrame):
         return None
 
+    rows = int(value.shape[0])
+    window = dataframe_window(rows)
     try:
-        html = value.to_html()
+        html = value.to_html(
+            max_rows=window,
+            max_cols=pd.get_option("display.max_columns"),
+            show_dimensions=window is not None and rows > window,
+        )
     except Exception:
         return None
 
-    try:
-        nulls_total = int(value.isna().sum().sum())
-    except Exception:
-        nulls_total = None
-    try:
-        memory_bytes = int(value.memory_usage(deep=True).sum())
-    except Exception:
-        memory_bytes = None
+    stats = dataframe_stats(value)
+    nulls = stats["nulls"]
 
     columns_preview = []
     truncated = False
@@ -885,19 +1595,13 @@ def try_describe_dataframe(value) -> dict | None:
             if idx >= preview_limit:
                 truncated = True
                 break
-            col = value[name]
-            try:
-                non_null = int(col.notna().sum())
-                nulls = int(col.isna().sum())
-            except Exception:
-                non_null = None
-                nulls = None
+            col_nulls = nulls.get(name) if nulls is not None else None
             columns_preview.append(
                 {
                     "name": str(name),
                     "dtype": str(dtype),
-                    "non_null": non_null,
-                    "nulls": nulls,
+                    "non_null": rows - col_nulls if col_nulls is not None else None,
+                    "nulls": col_nulls,
                 }
             )
     except Exception:
@@ -910,35 +1614,52 @@ def try_describe_dataframe(value) -> dict | None:
         dtype_counts = None
 
     metadata = {
-        "rows": int(value.shape[0]),
+        "rows": rows,
         "columns": int(value.shape[1]),
-        "nulls_total": nulls_total,
-        "memory_bytes": memory_bytes,
+        "nulls_total": sum(nulls.values()) if nulls is not None else None,
+        "memory_bytes": stats["memory_bytes"],
         "dtype_counts": dtype_counts,
         "columns_preview": columns_preview,
         "columns_truncated": truncated,
+        "stats_sampled": stats["sampled"],
     }
+    if window is not None and rows > window:
+        metadata["frame_id"] = remember_dataframe(value)
     return {"type": "text/html", "data": html, "metadata": metadata}
 
 
 def main() -> None:
     COMMANDS_DIR.mkdir(parents=True, exist_ok=True)
     RESULTS_DIR.mkdir(parents=True, exist_ok=True)
-    workspace = Path("/workspace").resolve()
+    workspace = WORKSPACE.resolve()
     namespace = {
         "__builtins__": __builtins__,
         "__name__": "__main__",
     }
     namespace["download_file"] = build_download_helper(workspace)
 
-    STATUS_FILE.write_text(json.dumps({"state": "ready"}), encoding="utf-8")
+    signal.signal(signal.SIGINT, handle_sigint)
+    socket_ready = start_socket_server(namespace, workspace)
+    STATUS_FILE.write_text(
+        json.dumps({"state": "ready", "socket": SOCKET_PATH.name if socket_ready else None}),
+        encoding="utf-8",
+    )
     log("Agent started")
 
+    threading.Thread(target=poll_command_files, args=(namespace, workspace), daemon=True).start()
+    run_main_tasks()
+
+
+def poll_command_files(namespace, workspace: Path) -> None:
     while True:
         has_work = False
         for command_file in sorted(COMMANDS_DIR.glob("*.json")):
             has_work = True
-            process_command(command_file, namespace, workspace)
+            try:
+                process_command(command_file, namespace, workspace)
+            except Exception as exc:
+                log(f"Failed to process command {command_file.name}: {exc}")
+                command_file.unlink(missing_ok=True)
         if not has_work:
             time.sleep(POLL_INTERVAL)
 
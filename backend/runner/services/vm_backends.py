@@ -6,15 +6,18 @@ import os
 import shutil
 import subprocess
 import time
+import uuid
 from abc import ABC, abstractmethod
 from dataclasses import asdict, replace
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable
 
 from django.conf import settings
 from django.utils import timezone
 
+from .dataset_provisioning import get_dataset_cache_root
+from .package_cache import VM_CACHE_MOUNT, VM_PRIVATE_CACHE_DIR, ensure_pip_cache, get_wheelhouse, pip_cache_env
 from .vm_agent_server import VM_AGENT_SERVER_SOURCE
 from .vm_exceptions import GpuSlotsBusy, VmAlreadyExistsError, VmNotFoundError
 from .vm_models import (
@@ -52,6 +55,24 @@ class VmBackend(ABC):
     def delete_vm(self, vm_id: str) -> None:
         ...
 
+    @abstractmethod
+    def stop_vm(self, vm_id: str, *, now: datetime | None = None) -> VirtualMachine:
+        """Release the VM's compute but keep its directory and workspace."""
+        ...
+
+    @abstractmethod
+    def resume_vm(self, vm_id: str, *, now: datetime | None = None) -> VirtualMachine:
+        """Bring a stopped VM back with the same workspace contents."""
+        ...
+
+    def memory_usage(self, vms: Iterable[VirtualMachine]) -> Dict[str, int]:
+        """Resident memory in bytes per VM id, for VMs whose usage the backend can observe."""
+        return {}
+
+    def host_pids(self, vms: Iterable[VirtualMachine]) -> Dict[str, int]:
+        """Host pid of the init process per VM id, for VMs running as host processes."""
+        return {}
+
 
 class LocalVmBackend(VmBackend):
     """Stores VM metadata on the local filesystem (legacy sandbox)."""
@@ -113,6 +134,16 @@ class LocalVmBackend(VmBackend):
             raise VmNotFoundError(f"VM {vm_id} was not found under {self.root}")
         shutil.rmtree(vm_dir, ignore_errors=True)
 
+    def stop_vm(self, vm_id: str, *, now: datetime | None = None) -> VirtualMachine:
+        vm = replace(self.get_vm(vm_id), state=VirtualMachineState.STOPPED, updated_at=_resolve_now(now))
+        self._write_metadata(self._vm_dir(vm_id), vm)
+        return vm
+
+    def resume_vm(self, vm_id: str, *, now: datetime | None = None) -> VirtualMachine:
+        vm = replace(self.get_vm(vm_id), state=VirtualMachineState.RUNNING, updated_at=_resolve_now(now))
+        self._write_metadata(self._vm_dir(vm_id), vm)
+        return vm
+
     def _vm_dir(self, vm_id: str) -> Path:
         return self.root / vm_id
 
@@ -207,6 +238,8 @@ class DockerVmBackend(VmBackend):
             self._host_root_is_windows = False
         self._container_base = Path(getattr(settings, "BASE_DIR", self.root.parent)).resolve()
         self._docker_bin = _resolve_docker_bin()
+        # Optional VmWarmPool handing out pre-started containers (see vm_pool.py).
+        self.pool = None
 
     def create_vm(
         self,
@@ -217,19 +250,24 @@ class DockerVmBackend(VmBackend):
         now: datetime | None = None,
     ) -> VirtualMachine:
         vm_dir = self._vm_dir(vm_id)
-        if vm_dir.exists():
+        if vm_dir.exists() or vm_dir.is_symlink():
             # If directory exists but no metadata, it's a stale state - clean it up
             metadata_path = self._metadata_path(vm_dir)
             if not metadata_path.exists():
-                shutil.rmtree(vm_dir, ignore_errors=True)
+                _remove_vm_dir(vm_dir)
             else:
                 raise VmAlreadyExistsError(f"VM {vm_id} already exists at {vm_dir}")
-        
+
+        timestamp = _resolve_now(now)
+        if self.pool is not None:
+            pooled = self.pool.claim(vm_id=vm_id, session_id=session_id, spec=spec, created_at=timestamp)
+            if pooled is not None:
+                return pooled
+
         vm_dir.mkdir(parents=True, exist_ok=False)
 
         workspace = vm_dir / "workspace"
         agent_dir = self._prepare_agent_dir(workspace)
-        timestamp = _resolve_now(now)
 
         container_name = vm_id
         mig_uuid: str | None = None
@@ -240,7 +278,7 @@ class DockerVmBackend(VmBackend):
         except GpuSlotsBusy:
             # Configured MIG pool is full. Do NOT silently downgrade to CPU:
             # the caller asked for GPU explicitly, so surface the busy state.
-            shutil.rmtree(vm_dir, ignore_errors=True)
+            _remove_vm_dir(vm_dir)
             raise
         except Exception as exc:
             if spec.gpu:
@@ -257,10 +295,10 @@ class DockerVmBackend(VmBackend):
                         exc,
                     )
                 except Exception:
-                    shutil.rmtree(vm_dir, ignore_errors=True)
+                    _remove_vm_dir(vm_dir)
                     raise
             else:
-                shutil.rmtree(vm_dir, ignore_errors=True)
+                _remove_vm_dir(vm_dir)
                 raise
 
         backend_data: Dict[str, str] = {"container": container_name}
@@ -291,7 +329,7 @@ class DockerVmBackend(VmBackend):
             container = self._read_container_name(vm_dir)
             if container:
                 self._run_docker(("rm", "-f", container), check=False)
-            shutil.rmtree(vm_dir, ignore_errors=True)
+            _remove_vm_dir(vm_dir)
             raise VmNotFoundError(f"Metadata is missing for VM at {vm_dir}")
         return self._read_metadata(vm_dir)
 
@@ -302,7 +340,86 @@ class DockerVmBackend(VmBackend):
         container = self._read_container_name(vm_dir)
         if container:
             self._run_docker(("rm", "-f", container), check=False)
-        shutil.rmtree(vm_dir, ignore_errors=True)
+        _remove_vm_dir(vm_dir)
+
+    def stop_vm(self, vm_id: str, *, now: datetime | None = None) -> VirtualMachine:
+        vm = self.get_vm(vm_id)
+        container = vm.backend_data.get("container")
+        if container:
+            # Removing (not just stopping) the container also frees its MIG slot.
+            self._run_docker(("rm", "-f", container), check=False)
+        backend_data = {key: value for key, value in vm.backend_data.items() if key not in ("container", "mig_uuid")}
+        vm = replace(
+            vm,
+            state=VirtualMachineState.STOPPED,
+            updated_at=_resolve_now(now),
+            backend_data=backend_data,
+        )
+        self._write_metadata(self._vm_dir(vm_id), vm)
+        return vm
+
+    def resume_vm(self, vm_id: str, *, now: datetime | None = None) -> VirtualMachine:
+        vm = self.get_vm(vm_id)
+        if vm.state == VirtualMachineState.RUNNING:
+            return vm
+        vm_dir = self._vm_dir(vm_id)
+        parked = self.root / f".parked-{vm_id}-{uuid.uuid4().hex[:8]}"
+        os.rename(vm.workspace_path, parked)
+        _remove_vm_dir(vm_dir)
+        try:
+            resumed = self.create_vm(vm_id=vm_id, session_id=vm.session_id, spec=vm.spec, now=now)
+        except Exception:
+            # Put the user's files back so that a later resume can try again.
+            vm_dir.mkdir(parents=True, exist_ok=True)
+            os.rename(parked, vm.workspace_path)
+            self._write_metadata(vm_dir, vm)
+            raise
+        _move_workspace_contents(parked, resumed.workspace_path)
+        return resumed
+
+    def memory_usage(self, vms: Iterable[VirtualMachine]) -> Dict[str, int]:
+        containers = {
+            str(vm.backend_data["container"]): vm.id
+            for vm in vms
+            if vm.state == VirtualMachineState.RUNNING and vm.backend_data.get("container")
+        }
+        if not containers:
+            return {}
+        result = self._run_docker_capture(
+            ("stats", "--no-stream", "--format", "{{.Name}}\t{{.MemUsage}}", *containers),
+            check=False,
+        )
+        usage: Dict[str, int] = {}
+        for line in (result.stdout or "").splitlines():
+            name, _, mem_usage = line.partition("\t")
+            vm_id = containers.get(name.strip())
+            if vm_id is None:
+                continue
+            # MemUsage looks like "123.4MiB / 2GiB".
+            parsed = _parse_docker_size(mem_usage.split("/")[0])
+            if parsed is not None:
+                usage[vm_id] = parsed
+        return usage
+
+    def host_pids(self, vms: Iterable[VirtualMachine]) -> Dict[str, int]:
+        containers = {
+            str(vm.backend_data["container"]): vm.id
+            for vm in vms
+            if vm.state == VirtualMachineState.RUNNING and vm.backend_data.get("container")
+        }
+        if not containers:
+            return {}
+        result = self._run_docker_capture(
+            ("inspect", "--format", "{{.Name}}\t{{.State.Pid}}", *containers),
+            check=False,
+        )
+        pids: Dict[str, int] = {}
+        for line in (result.stdout or "").splitlines():
+            name, _, pid = line.partition("\t")
+            vm_id = containers.get(name.strip().lstrip("/"))
+            if vm_id is not None and pid.strip().isdigit() and int(pid) > 0:
+                pids[vm_id] = int(pid)
+        return pids
 
     # --- internal helpers -------------------------------------------------
 
@@ -345,6 +462,8 @@ class DockerVmBackend(VmBackend):
             "--mount",
             f"type=bind,source={source_workspace},target=/workspace",
         ]
+        args += self._pip_cache_args(spec)
+        args += self._dataset_cache_args()
         mig_uuid: str | None = None
         if spec.gpu:
             if self._gpu_mig_uuids:
@@ -367,6 +486,40 @@ class DockerVmBackend(VmBackend):
         self._run_docker(("start", container_name))
         return mig_uuid
 
+    def _pip_cache_args(self, spec: VmSpec) -> list[str]:
+        """
+        Mount the shared wheelhouse read-only; pip's own cache stays in the VM.
+
+        The shared http/wheel cache is not mounted: pip installs whatever it
+        finds there, so a writable shared copy would let one tenant change the
+        packages of every other (see ``package_cache``).
+        """
+        root = ensure_pip_cache()
+        if root is None:
+            return []
+        wheelhouse = get_wheelhouse(root)
+        args = [
+            "--mount",
+            f"type=bind,source={self._map_to_host(wheelhouse)},target={VM_CACHE_MOUNT}/{wheelhouse.name},readonly",
+        ]
+        # Without outbound network the index is unreachable, so pip goes straight to the wheelhouse.
+        offline = True if spec.network.outbound == "deny" else None
+        env = pip_cache_env(VM_CACHE_MOUNT, offline=offline, cache_dir=VM_PRIVATE_CACHE_DIR)
+        for name, value in env.items():
+            args += ["--env", f"{name}={value}"]
+        return args
+
+    def _dataset_cache_args(self) -> list[str]:
+        """
+        Mount the problem dataset cache read-only at the path the server uses.
+
+        Workspace links into the cache then resolve both here and in the VM,
+        and no session can change the data the others see.
+        """
+        root = get_dataset_cache_root()
+        root.mkdir(parents=True, exist_ok=True)
+        return ["--mount", f"type=bind,source={self._map_to_host(root)},target={root},readonly"]
+
     def _pick_free_mig_uuid(self) -> str:
         """Pick a MIG UUID from the configured pool that no live container holds.
 
@@ -547,6 +700,58 @@ class DockerVmBackend(VmBackend):
         return backend_data.get("container")
 
 
+_DOCKER_SIZE_UNITS = {
+    "b": 1,
+    "kb": 1000,
+    "mb": 1000**2,
+    "gb": 1000**3,
+    "tb": 1000**4,
+    "kib": 1024,
+    "mib": 1024**2,
+    "gib": 1024**3,
+    "tib": 1024**4,
+}
+
+
+def _parse_docker_size(value: str) -> int | None:
+    text = value.strip().lower()
+    number = text.rstrip("abcdefghijklmnopqrstuvwxyz")
+    unit = text[len(number):].strip() or "b"
+    multiplier = _DOCKER_SIZE_UNITS.get(unit)
+    if multiplier is None:
+        return None
+    try:
+        return int(float(number) * multiplier)
+    except ValueError:
+        return None
+
+
+def _remove_vm_dir(vm_dir: Path) -> None:
+    """Remove a VM directory; a pooled VM's directory is a link to its pool slot, removed with it."""
+    if vm_dir.is_symlink():
+        slot = vm_dir.resolve()
+        vm_dir.unlink(missing_ok=True)
+        shutil.rmtree(slot, ignore_errors=True)
+    else:
+        shutil.rmtree(vm_dir, ignore_errors=True)
+
+
+def _move_workspace_contents(source: Path, target: Path) -> None:
+    """Move user files of a parked workspace into a fresh one, keeping the new agent."""
+    for entry in source.iterdir():
+        if entry.name == ".vm_agent":
+            for item in entry.iterdir():
+                # Agent-owned state (snapshots) is carried over; the agent itself is not.
+                if item.is_file() and item.name.startswith("hibernate"):
+                    os.replace(item, target / ".vm_agent" / item.name)
+            continue
+        destination = target / entry.name
+        if destination.exists():
+            continue
+        os.rename(entry, destination)
+    shutil.rmtree(source, ignore_errors=True)
+
+
 def _resolve_now(value: datetime | None = None) -> datetime:
     resolved = value or timezone.now()
     if timezone.is_naive(resolved):
@@ -8,6 +8,7 @@ from typing import Mapping
 from .vm_backends import DockerVmBackend, LocalVmBackend, VmBackend
 from .vm_config import VmConfig, get_vm_config
 from .vm_exceptions import VmNotFoundError
+from .vm_pool import VmWarmPool, configured_pool_profiles
 from .vm_models import (
     VirtualMachine,
     VmNetworkPolicy,
@@ -53,6 +54,12 @@ class VmManager:
         except VmNotFoundError:
             return
 
+    def stop_session_vm(self, session_id: str, *, now: datetime | None = None) -> VirtualMachine:
+        return self.backend.stop_vm(self._build_vm_id(session_id), now=now)
+
+    def resume_session_vm(self, session_id: str, *, now: datetime | None = None) -> VirtualMachine:
+        return self.backend.resume_vm(self._build_vm_id(session_id), now=now)
+
     def build_default_spec(self) -> VmSpec:
         return VmSpec(
             image=self.config.image,
@@ -124,11 +131,19 @@ def get_vm_manager() -> VmManager:
         config = get_vm_config()
         backend = _build_backend(config)
         _vm_manager = VmManager(config=config, backend=backend)
+        if isinstance(backend, DockerVmBackend):
+            profiles, refill_interval = configured_pool_profiles(_vm_manager.build_default_spec())
+            if profiles:
+                backend.pool = VmWarmPool(backend, profiles, refill_interval=refill_interval)
+                backend.pool.start()
     return _vm_manager
 
 
 def reset_vm_manager() -> None:
     global _vm_manager
+    pool = getattr(_vm_manager.backend, "pool", None) if _vm_manager is not None else None
+    if pool is not None:
+        pool.stop()
     _vm_manager = None
 
 
@@ -0,0 +1,370 @@
+"""Pool of pre-warmed, agent-ready Docker VMs.
+
+Creating a container, starting the agent and waiting for it to report ready
+takes seconds, which is what a student waits for before their first cell runs.
+The pool keeps ``size`` ready containers per resource profile. Each one is
+created with its bind mounts on a slot directory,
+``<RUNTIME_VM_ROOT>/.vm_pool/slots/<name>/``, that never moves: renaming a
+directory under a live bind mount is not something to rely on.
+``.vm_pool/<profile>/<name>`` marks a slot as ready. A claim renames the marker,
+which is atomic and so safe between worker processes sharing the VM root, and
+points the session's VM directory at the slot with a symlink; removing the VM
+directory removes the slot with it.
+
+The pool is refilled by a background thread after every claim and periodically.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Mapping, Tuple
+
+from django.conf import settings
+from prometheus_client import Counter, Gauge, Histogram
+
+from .vm_models import VirtualMachine, VirtualMachineState, VmResources, VmSpec
+
+if TYPE_CHECKING:  # pragma: no cover - import cycle guard
+    from .vm_backends import DockerVmBackend
+
+logger = logging.getLogger(__name__)
+
+POOL_DIR_NAME = ".vm_pool"
+SLOTS_DIR_NAME = "slots"
+WARMING_DIR_NAME = ".warming"
+CLAIMED_DIR_NAME = ".claimed"
+POOL_METADATA_FILE = "pool.json"
+CONTAINER_PREFIX = "booml-pool-"
+# Warming directories older than this belong to a crashed process.
+STALE_WARMING_SECONDS = 600
+
+METRIC_NAMESPACE = getattr(settings, "PROMETHEUS_METRIC_NAMESPACE", "booml")
+
+POOL_READY_GAUGE = Gauge(
+    "vm_pool_ready",
+    "Warm, agent-ready containers waiting in the VM pool.",
+    labelnames=("profile",),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+POOL_CLAIMS_COUNTER = Counter(
+    "vm_pool_claims",
+    "VM pool claims grouped by outcome (hit or miss).",
+    labelnames=("profile", "result"),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+)
+
+POOL_CLAIM_LATENCY = Histogram(
+    "vm_pool_claim_latency_seconds",
+    "Time spent handing a warm container to a session.",
+    labelnames=("profile",),
+    namespace=METRIC_NAMESPACE,
+    subsystem="backend",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+
+@dataclass(frozen=True)
+class PoolProfile:
+    spec: VmSpec
+    size: int
+
+
+def profile_key(spec: VmSpec) -> str:
+    """Directory-safe key of the container settings that a warm VM is created with."""
+    network = f"{spec.network.outbound}:{','.join(spec.network.allowlist)}"
+    digest = hashlib.sha1(f"{spec.image}|{network}".encode("utf-8")).hexdigest()[:8]
+    device = "gpu" if spec.gpu else "cpu"
+    return f"{device}-{spec.resources.cpu}c-{spec.resources.ram_mb}m-{digest}"
+
+
+def build_pool_profiles(
+    default_spec: VmSpec,
+    *,
+    size: int,
+    overrides: List[Mapping[str, Any]] | None = None,
+) -> Dict[str, PoolProfile]:
+    """
+    Profiles from ``RUNTIME_VM_POOL_PROFILES`` (``[{"cpu": 4, "ram_mb": 8192,
+    "gpu": true, "size": 2}, ...]``), or the default spec with ``size`` warm VMs.
+    """
+    profiles: Dict[str, PoolProfile] = {}
+    for item in overrides or [{}]:
+        resources = VmResources(
+            cpu=int(item.get("cpu", default_spec.resources.cpu)),
+            ram_mb=int(item.get("ram_mb", default_spec.resources.ram_mb)),
+            disk_gb=int(item.get("disk_gb", default_spec.resources.disk_gb)),
+        )
+        spec = replace(default_spec, resources=resources, gpu=bool(item.get("gpu", default_spec.gpu)))
+        profile_size = max(0, int(item.get("size", size)))
+        if profile_size:
+            profiles[profile_key(spec)] = PoolProfile(spec=spec, size=profile_size)
+    return profiles
+
+
+class VmWarmPool:
+    def __init__(
+        self,
+        backend: "DockerVmBackend",
+        profiles: Dict[str, PoolProfile],
+        *,
+        refill_interval: float = 30.0,
+    ):
+        self.backend = backend
+        self.profiles = profiles
+        self.refill_interval = refill_interval
+        self.root = backend.root / POOL_DIR_NAME
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    # --- claiming ---------------------------------------------------------
+
+    def claim(
+        self,
+        *,
+        vm_id: str,
+        session_id: str,
+        spec: VmSpec,
+        created_at: datetime,
+    ) -> VirtualMachine | None:
+        """Hand a warm container to ``session_id``, or return ``None`` on a miss."""
+        key = profile_key(spec)
+        if key not in self.profiles:
+            return None
+        started = time.monotonic()
+        vm = None
+        for entry in self._ready_entries(key):
+            vm = self._claim_entry(entry, vm_id=vm_id, session_id=session_id, spec=spec, created_at=created_at)
+            if vm is not None:
+                break
+        self._record_claim(key, hit=vm is not None, latency=time.monotonic() - started)
+        self.request_refill()
+        return vm
+
+    def _claim_entry(
+        self,
+        entry: Path,
+        *,
+        vm_id: str,
+        session_id: str,
+        spec: VmSpec,
+        created_at: datetime,
+    ) -> VirtualMachine | None:
+        claimed = self.root / CLAIMED_DIR_NAME / f"{entry.name}-{vm_id}"
+        claimed.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.rename(entry, claimed)
+        except FileNotFoundError:
+            # Claimed by another process in the meantime.
+            return None
+
+        slot = self._slot_dir(entry.name)
+        try:
+            pool_metadata = json.loads((slot / POOL_METADATA_FILE).read_text())
+        except (OSError, ValueError):
+            pool_metadata = {}
+        container = str(pool_metadata.get("container") or entry.name)
+        if not self._is_running(container):
+            logger.warning("Discarding warm VM %s: container is not running", container)
+            self._discard(container, slot, claimed)
+            return None
+        if self.backend._run_docker(("rename", container, vm_id), check=False).returncode == 0:
+            container = vm_id
+
+        vm_dir = self.backend._vm_dir(vm_id)
+        backend_data: Dict[str, str] = {"container": container, "pool_profile": profile_key(spec)}
+        if pool_metadata.get("mig_uuid"):
+            backend_data["mig_uuid"] = str(pool_metadata["mig_uuid"])
+        vm = VirtualMachine(
+            id=vm_id,
+            session_id=session_id,
+            spec=spec,
+            state=VirtualMachineState.RUNNING,
+            workspace_path=vm_dir / "workspace",
+            created_at=created_at,
+            updated_at=created_at,
+            backend="docker",
+            backend_data=backend_data,
+        )
+        # Metadata goes in before the link so the VM never appears half-initialised.
+        self.backend._write_metadata(slot, vm)
+        (slot / POOL_METADATA_FILE).unlink(missing_ok=True)
+        try:
+            # Relative, so that the link also resolves where the VM root is mounted on the host.
+            os.symlink(os.path.relpath(slot, vm_dir.parent), vm_dir, target_is_directory=True)
+        except OSError as exc:
+            logger.warning("Failed to hand warm VM %s to %s: %s", container, vm_id, exc)
+            self._discard(container, slot, claimed)
+            return None
+        claimed.unlink(missing_ok=True)
+        return vm
+
+    def _slot_dir(self, name: str) -> Path:
+        return self.root / SLOTS_DIR_NAME / name
+
+    def _discard(self, container: str, slot: Path, marker: Path | None = None) -> None:
+        self.backend._run_docker(("rm", "-f", container), check=False)
+        shutil.rmtree(slot, ignore_errors=True)
+        if marker is not None:
+            marker.unlink(missing_ok=True)
+
+    def _is_running(self, container: str) -> bool:
+        result = self.backend._run_docker_capture(
+            ("inspect", "--format", "{{.State.Running}}", container),
+            check=False,
+        )
+        return result.returncode == 0 and result.stdout.strip() == "true"
+
+    def _ready_entries(self, key: str) -> List[Path]:
+        directory = self.root / key
+        if not directory.exists():
+            return []
+        return sorted(path for path in directory.iterdir() if path.is_file())
+
+    # --- refilling --------------------------------------------------------
+
+    def refill(self) -> int:
+        """Warm containers until every profile has ``size`` ready; returns how many were added."""
+        lock_path = self.root / ".refill.lock"
+        with lock_path.open("a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another process is already refilling the shared pool.
+                return 0
+            try:
+                self._discard_stale_warming()
+                added = 0
+                for key, profile in self.profiles.items():
+                    missing = profile.size - len(self._ready_entries(key))
+                    for _ in range(max(missing, 0)):
+                        if self._warm_one(key, profile.spec):
+                            added += 1
+                    POOL_READY_GAUGE.labels(profile=key).set(len(self._ready_entries(key)))
+                return added
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _warm_one(self, key: str, spec: VmSpec) -> bool:
+        name = f"{CONTAINER_PREFIX}{uuid.uuid4().hex[:12]}"
+        warming = self.root / WARMING_DIR_NAME / name
+        warming.parent.mkdir(parents=True, exist_ok=True)
+        warming.touch()
+        slot = self._slot_dir(name)
+        slot.mkdir(parents=True)
+        workspace = slot / "workspace"
+        try:
+            agent_dir = self.backend._prepare_agent_dir(workspace)
+            mig_uuid = self.backend._create_container(name, spec, slot, workspace)
+            self.backend._start_agent(name)
+            self.backend._wait_for_agent(agent_dir)
+            (slot / POOL_METADATA_FILE).write_text(
+                json.dumps({"container": name, "mig_uuid": mig_uuid, "profile": key, "warmed_at": time.time()})
+            )
+            target = self.root / key
+            target.mkdir(parents=True, exist_ok=True)
+            os.rename(warming, target / name)
+            return True
+        except Exception as exc:
+            logger.warning("Failed to warm a VM for pool profile %s: %s", key, exc)
+            self._discard(name, slot, warming)
+            return False
+
+    def _discard_stale_warming(self) -> None:
+        warming = self.root / WARMING_DIR_NAME
+        if not warming.exists():
+            return
+        cutoff = time.time() - STALE_WARMING_SECONDS
+        for path in warming.iterdir():
+            try:
+                if path.stat().st_mtime >= cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            self._discard(path.name, self._slot_dir(path.name), path)
+
+    def request_refill(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        """Start the background refill thread (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._refill_loop, name="vm-pool-refill", daemon=True)
+        self._thread.start()
+        self.request_refill()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+
+    def _refill_loop(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(self.refill_interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                return
+            try:
+                self.refill()
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning("VM pool refill failed: %s", exc)
+
+    # --- metrics ----------------------------------------------------------
+
+    def _record_claim(self, key: str, *, hit: bool, latency: float) -> None:
+        with self._stats_lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+        POOL_CLAIMS_COUNTER.labels(profile=key, result="hit" if hit else "miss").inc()
+        POOL_CLAIM_LATENCY.labels(profile=key).observe(latency)
+        POOL_READY_GAUGE.labels(profile=key).set(len(self._ready_entries(key)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            hits, misses = self._hits, self._misses
+        claims = hits + misses
+        return {
+            "ready": {key: len(self._ready_entries(key)) for key in self.profiles},
+            "target": {key: profile.size for key, profile in self.profiles.items()},
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / claims, 4) if claims else None,
+        }
+
+
+def configured_pool_profiles(default_spec: VmSpec) -> Tuple[Dict[str, PoolProfile], float]:
+    size = int(getattr(settings, "RUNTIME_VM_POOL_SIZE", 0) or 0)
+    raw_profiles = getattr(settings, "RUNTIME_VM_POOL_PROFILES", None) or None
+    if isinstance(raw_profiles, str):
+        raw_profiles = json.loads(raw_profiles) if raw_profiles.strip() else None
+    interval = float(getattr(settings, "RUNTIME_VM_POOL_REFILL_INTERVAL_SECONDS", 30) or 30)
+    return build_pool_profiles(default_spec, size=size, overrides=raw_profiles), interval
+
+
+__all__ = [
+    "PoolProfile",
+    "VmWarmPool",
+    "build_pool_profiles",
+    "configured_pool_profiles",
+    "profile_key",
+]
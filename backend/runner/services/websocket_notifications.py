@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import logging
+import re
 from typing import Iterable, Mapping, Optional
 
 from asgiref.sync import async_to_sync
@@ -12,6 +13,8 @@ logger = logging.getLogger(__name__)
 
 _GROUP_PATTERN = "submission_{submission_id}"
 _CONTEST_GROUP_PATTERN = "contest_{contest_id}_user_{user_id}"
+_LEADERBOARD_GROUP_PATTERN = "contest_{contest_id}_leaderboard"
+_SESSION_GROUP_PATTERN = "runtime_session_{key}"
 
 
 def broadcast_metric_update(submission_id: Optional[int], metric_name: str, metric_score: float) -> None:
@@ -83,4 +86,63 @@ def broadcast_contest_notification(
         )
 
 
-__all__ = ["broadcast_metric_update", "broadcast_contest_notification"]
+def broadcast_leaderboard_changed(contest_ids: Iterable[int]) -> None:
+    """Tell standings subscribers of each contest that their leaderboard changed."""
+    normalized_contest_ids = sorted({int(cid) for cid in contest_ids if cid})
+    if not normalized_contest_ids:
+        logger.debug("Skip leaderboard broadcast: no contests")
+        return
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        logger.debug("Skip leaderboard broadcast: channel layer is not configured")
+        return
+
+    for contest_id in normalized_contest_ids:
+        async_to_sync(channel_layer.group_send)(
+            _LEADERBOARD_GROUP_PATTERN.format(contest_id=contest_id),
+            {"type": "leaderboard.changed", "contest_id": contest_id},
+        )
+
+
+def session_group_name(session_id: str) -> str:
+    """Channel group of a runtime session (group names only allow ``[\\w.-]``)."""
+    return _SESSION_GROUP_PATTERN.format(key=re.sub(r"[^\w.-]", "_", session_id))
+
+
+def broadcast_session_evicted(
+    session_id: str,
+    *,
+    action: str,
+    reason: str,
+    message: Optional[str] = None,
+) -> None:
+    """Tell clients of a runtime session that it was hibernated or stopped to free resources."""
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        logger.debug("Skip session eviction broadcast: channel layer is not configured")
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(
+            session_group_name(session_id),
+            {
+                "type": "session.evicted",
+                "session_id": session_id,
+                "action": action,
+                "reason": reason,
+                "message": message,
+            },
+        )
+    except Exception:
+        # Eviction runs from maintenance threads; a broken channel layer must not stop it.
+        logger.exception("Failed to broadcast eviction of session %s", session_id)
+
+
+__all__ = [
+    "broadcast_metric_update",
+    "broadcast_contest_notification",
+    "broadcast_leaderboard_changed",
+    "broadcast_session_evicted",
+    "session_group_name",
+]
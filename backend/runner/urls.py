@@ -48,7 +48,14 @@ from .views.contest_notifications import (
     mark_contest_notifications_read,
     send_contest_notification,
 )
-from .views.contest_leaderboard import contest_problem_leaderboard, course_leaderboard
+from .views.contest_leaderboard import (
+    contest_leaderboard_position,
+    contest_leaderboard_standings,
+    contest_problem_leaderboard,
+    course_leaderboard,
+    course_leaderboard_position,
+    course_leaderboard_standings,
+)
 from .views.course import course_contests, course_detail
 from .views.course import (
     update_course,
@@ -105,6 +112,8 @@ urlpatterns = [
     path('backend/course/<int:course_id>/update/', update_course, name='backend_course_update'),
     path('backend/course/<int:course_id>/delete/', delete_course, name='backend_course_delete'),
     path('backend/course/<int:course_id>/leaderboard/', course_leaderboard, name='backend_course_leaderboard'),
+    path('backend/course/<int:course_id>/leaderboard/standings/', course_leaderboard_standings, name='backend_course_leaderboard_standings'),
+    path('backend/course/<int:course_id>/leaderboard/me/', course_leaderboard_position, name='backend_course_leaderboard_position'),
     path('backend/course/<int:course_id>/participants/update/', update_course_participants, name='backend_course_participants_update'),
     path('backend/course/<int:course_id>/participants/remove/', remove_course_participants, name='backend_course_participants_remove'),
     path('backend/course/<int:course_id>/contests/reorder/', reorder_course_contests, name='backend_course_contests_reorder'),
@@ -112,6 +121,8 @@ urlpatterns = [
     path('contest/<int:contest_id>/', contest_detail, name='contest_detail'),
     path('contest/<int:contest_id>/submissions/', contest_submissions, name='contest_submissions'),
     path('contest/<int:contest_id>/leaderboard/', contest_problem_leaderboard, name='contest_problem_leaderboard'),
+    path('contest/<int:contest_id>/leaderboard/standings/', contest_leaderboard_standings, name='contest_leaderboard_standings'),
+    path('contest/<int:contest_id>/leaderboard/me/', contest_leaderboard_position, name='contest_leaderboard_position'),
     path('contest/<int:course_id>/new/', create_contest, name='create_contest'),
     path('contest/<int:contest_id>/delete/', delete_contest, name='delete_contest'),
     path('contest/<int:contest_id>/update/', update_contest, name='contest_update'),
@@ -199,6 +210,16 @@ urlpatterns = [
         contest_problem_leaderboard,
         name='backend_contest_leaderboard',
     ),
+    path(
+        'backend/contest/<int:contest_id>/leaderboard/standings/',
+        contest_leaderboard_standings,
+        name='backend_contest_leaderboard_standings',
+    ),
+    path(
+        'backend/contest/<int:contest_id>/leaderboard/me/',
+        contest_leaderboard_position,
+        name='backend_contest_leaderboard_position',
+    ),
     path(
         'backend/contest/<int:contest_id>/problems/add/',
         add_problem_to_contest,
@@ -15,7 +15,7 @@ from django.utils.dateparse import parse_date, parse_datetime
 from ..models import Contest, Course, Problem, CourseParticipant, ContestProblem, Submission
 from ..forms.contest_draft import ContestForm
 from ..services.contest_labels import contest_problem_label
-from .contest_leaderboard import build_contest_leaderboards
+from .contest_leaderboard import build_contest_leaderboard_payload
 from .submissions import _primary_metric
 
 User = get_user_model()
@@ -568,7 +568,9 @@ def contest_detail(request, contest_id):
             }
             for index, link in enumerate(problem_links)
         ]
-        leaderboards, overall_leaderboard = build_contest_leaderboards(contest)
+        standings = build_contest_leaderboard_payload(contest)
+        leaderboards = standings["leaderboards"]
+        overall_leaderboard = standings["overall_leaderboard"]
     else:
         leaderboards, overall_leaderboard = [], {
             "scoring": contest.scoring,
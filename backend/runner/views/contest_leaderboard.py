@@ -1,15 +1,30 @@
 from __future__ import annotations
 
+import json
 from collections import defaultdict
 from datetime import datetime
 from typing import Any, Dict, List, Tuple
 
 from django.contrib.auth.decorators import login_required
+from django.db.models import Case, FloatField, Max, Q, TextField, Value, When
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
-
-from ..models import Contest, CourseParticipant, ProblemDescriptor, Submission
+from django.utils.dateparse import parse_datetime
+
+from ..models import Contest, ContestProblem, CourseParticipant, ProblemDescriptor, Submission
+from ..services.leaderboard_cache import (
+    CONTEST_SCOPE,
+    COURSE_SCOPE,
+    ROLE_MANAGER,
+    ROLE_PARTICIPANT,
+    cached_leaderboard_response,
+    get_cached_leaderboard_body,
+    invalidate_leaderboards,
+)
+from ..services.leaderboard_pages import standings_page_response, standings_position_response
 from ..services.problem_scoring import (
     default_curve_p,
     extract_raw_metric,
@@ -17,17 +32,21 @@ from ..services.problem_scoring import (
     resolve_score_spec,
     score_from_raw,
 )
+from ..services.standings_snapshots import (
+    discard_standings_snapshots,
+    load_standings_snapshot,
+    save_standings_snapshot,
+    standings_fingerprint,
+)
 
 
 _VALID_STATUSES = {Submission.STATUS_ACCEPTED, Submission.STATUS_VALIDATED}
-
-
-def _metric_is_lower_better(metric_name: str) -> bool:
-    if not metric_name:
-        return False
-    metric_lower = metric_name.lower()
-    time_keywords = ["time", "duration", "ms", "seconds", "минуты", "время"]
-    return any(kw in metric_lower for kw in time_keywords)
+_PENDING_STATUSES = {Submission.STATUS_PENDING, Submission.STATUS_RUNNING}
+# Pre-deadline aggregates stored in a standings snapshot.
+_FROZEN_COUNTERS = ("attempts", "attempts_before_deadline", "wrong_attempts_before")
+_FROZEN_RESULTS = ("best_results", "first_valid")
+# Plain decimal/scientific numbers as rendered by jsonb ->> (no nan/inf, no booleans).
+_NUMERIC_TEXT_RE = r"^\s*[-+]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$"
 
 
 def _coerce_metric(value: Any) -> float | None:
@@ -63,16 +82,6 @@ def _extract_score_value(metrics: Any, settings: Dict[str, Any]) -> float | None
     return _coerce_metric(score_100)
 
 
-def _extract_metric_value(metrics: Any, metric_name: str) -> float | None:
-    if metrics is None:
-        return None
-    if isinstance(metrics, dict):
-        value = metrics.get(metric_name) or metrics.get("metric")
-        if value is not None:
-            return _coerce_metric(value)
-    return None
-
-
 def _is_better(
     candidate: float,
     candidate_at: datetime | None,
@@ -118,9 +127,25 @@ def _collect_contest_participants(contest: Contest) -> List[Dict[str, Any]]:
     return list(participants.values())
 
 
-def _build_contest_leaderboard_data(contest: Contest) -> Dict[str, Any]:
-    problems = list(contest.problems.filter(is_published=True))
-    participants = _collect_contest_participants(contest) if problems else []
+def _build_contest_leaderboard_data(
+    contest: Contest,
+    *,
+    problems: List[Any] | None = None,
+    participants: List[Dict[str, Any]] | None = None,
+    final_only: bool = False,
+    frozen_state: Dict[str, Any] | None = None,
+) -> Dict[str, Any]:
+    """
+    Aggregate contest submissions per (problem, user).
+
+    ``final_only`` restricts the scan to submissions made before the deadline
+    (the frozen standings). ``frozen_state`` resumes from such standings and
+    scans only the submissions made after the deadline.
+    """
+    if problems is None:
+        problems = list(contest.problems.filter(is_published=True))
+    if participants is None:
+        participants = _collect_contest_participants(contest) if problems else []
     problem_settings: Dict[int, Dict[str, Any]] = {}
 
     if problems:
@@ -168,17 +193,29 @@ def _build_contest_leaderboard_data(contest: Contest) -> Dict[str, Any]:
     first_valid_after_deadline: Dict[Tuple[int, int], Dict[str, Any]] = {}
     wrong_attempts_before: Dict[Tuple[int, int], int] = defaultdict(int)
     earliest_submission_at = None
+    pending_submissions = 0
     end_time = contest.get_end_time()
+    if frozen_state is not None:
+        attempts.update(frozen_state["attempts"])
+        attempts_before_deadline.update(frozen_state["attempts_before_deadline"])
+        wrong_attempts_before.update(frozen_state["wrong_attempts_before"])
+        best_results.update(frozen_state["best_results"])
+        first_valid.update(frozen_state["first_valid"])
+        earliest_submission_at = frozen_state["earliest_submission_at"]
 
     participant_ids = [participant["id"] for participant in participants]
     if problems and participant_ids:
         problem_ids = [problem.id for problem in problems]
+        submissions = Submission.objects.filter(
+            problem_id__in=problem_ids,
+            user_id__in=participant_ids,
+        )
+        if end_time is not None and frozen_state is not None:
+            submissions = submissions.filter(submitted_at__gt=end_time)
+        elif end_time is not None and final_only:
+            submissions = submissions.filter(Q(submitted_at__lte=end_time) | Q(submitted_at__isnull=True))
         submissions = (
-            Submission.objects.filter(
-                problem_id__in=problem_ids,
-                user_id__in=participant_ids,
-            )
-            .values(
+            submissions.values(
                 "id",
                 "problem_id",
                 "user_id",
@@ -205,6 +242,8 @@ def _build_contest_leaderboard_data(contest: Contest) -> Dict[str, Any]:
                 earliest_submission_at is None or submitted_at < earliest_submission_at
             ):
                 earliest_submission_at = submitted_at
+            if row["status"] in _PENDING_STATUSES:
+                pending_submissions += 1
 
             is_valid = row["status"] in _VALID_STATUSES
             if not is_valid:
@@ -273,9 +312,54 @@ def _build_contest_leaderboard_data(contest: Contest) -> Dict[str, Any]:
         "wrong_attempts_before": wrong_attempts_before,
         "earliest_submission_at": earliest_submission_at,
         "contest_end_time": end_time,
+        "pending_submissions": pending_submissions,
     }
 
 
+def _freeze_leaderboard_state(data: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON-friendly copy of the pre-deadline aggregates used to resume a scan."""
+
+    def _freeze_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        frozen = dict(result)
+        if frozen["submitted_at"] is not None:
+            frozen["submitted_at"] = frozen["submitted_at"].isoformat()
+        return frozen
+
+    earliest_submission_at = data["earliest_submission_at"]
+    state: Dict[str, Any] = {
+        "earliest_submission_at": earliest_submission_at.isoformat() if earliest_submission_at else None,
+    }
+    for name in _FROZEN_COUNTERS:
+        state[name] = [[problem_id, user_id, value] for (problem_id, user_id), value in data[name].items()]
+    for name in _FROZEN_RESULTS:
+        state[name] = [
+            [problem_id, user_id, _freeze_result(result)]
+            for (problem_id, user_id), result in data[name].items()
+        ]
+    return state
+
+
+def _thaw_leaderboard_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    def _thaw_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        thawed = dict(result)
+        if thawed["submitted_at"] is not None:
+            thawed["submitted_at"] = parse_datetime(thawed["submitted_at"])
+        return thawed
+
+    earliest_submission_at = state.get("earliest_submission_at")
+    thawed: Dict[str, Any] = {
+        "earliest_submission_at": parse_datetime(earliest_submission_at) if earliest_submission_at else None,
+    }
+    for name in _FROZEN_COUNTERS:
+        thawed[name] = {(problem_id, user_id): value for problem_id, user_id, value in state.get(name, [])}
+    for name in _FROZEN_RESULTS:
+        thawed[name] = {
+            (problem_id, user_id): _thaw_result(result)
+            for problem_id, user_id, result in state.get(name, [])
+        }
+    return thawed
+
+
 def build_contest_problem_leaderboards(
     contest: Contest,
     data: Dict[str, Any] | None = None,
@@ -570,11 +654,106 @@ def build_contest_leaderboards(contest: Contest) -> Tuple[List[Dict[str, Any]],
     )
 
 
-@login_required
-def contest_problem_leaderboard(request, contest_id: int):
-    if request.method != "GET":
-        return JsonResponse({"detail": "Method not allowed"}, status=405)
+def _render_contest_leaderboard_payload(contest: Contest, data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "contest_id": contest.id,
+        "leaderboards": build_contest_problem_leaderboards(contest, data=data),
+        "overall_leaderboard": build_contest_overall_leaderboard(contest, data=data),
+    }
+
+
+def _build_finished_contest_standings(
+    contest: Contest,
+    problems: List[Any],
+    participants: List[Dict[str, Any]],
+    fingerprint: str,
+) -> Tuple[Dict[str, Any], bool]:
+    """Build final standings; return ``(snapshot, saved)``."""
+    data = _build_contest_leaderboard_data(
+        contest,
+        problems=problems,
+        participants=participants,
+        final_only=True,
+    )
+    snapshot = {
+        "payload": _render_contest_leaderboard_payload(contest, data),
+        "state": _freeze_leaderboard_state(data),
+    }
+    # Submissions still in the queue would change the final standings once graded.
+    if data["pending_submissions"]:
+        return snapshot, False
+    save_standings_snapshot(contest, fingerprint, snapshot)
+    return snapshot, True
+
+
+def _contest_standings_inputs(contest: Contest) -> Tuple[List[Any], List[Dict[str, Any]], str]:
+    problems = list(contest.problems.filter(is_published=True))
+    participants = _collect_contest_participants(contest) if problems else []
+    fingerprint = standings_fingerprint(
+        end_time=contest.get_end_time(),
+        scoring=contest.scoring,
+        problem_ids=[problem.id for problem in problems],
+        participant_ids=[participant["id"] for participant in participants],
+    )
+    return problems, participants, fingerprint
+
+
+def refresh_contest_standings_snapshot(contest: Contest) -> Dict[str, Any]:
+    """Rebuild the snapshot of a finished contest regardless of the stored one."""
+    end_time = contest.get_end_time()
+    if end_time is None or timezone.now() < end_time:
+        return {"contest_id": contest.id, "saved": False, "reason": "not_finished"}
+    problems, participants, fingerprint = _contest_standings_inputs(contest)
+    discard_standings_snapshots([contest.id])
+    _, saved = _build_finished_contest_standings(contest, problems, participants, fingerprint)
+    invalidate_leaderboards(contest_ids=[contest.id], course_ids=[contest.course_id])
+    return {
+        "contest_id": contest.id,
+        "saved": saved,
+        "reason": "" if saved else "pending_submissions",
+    }
+
+
+def contest_leaderboard_cache_view(include_upsolving: bool) -> str:
+    return "problems" if include_upsolving else "problems-final"
+
+
+def build_contest_leaderboard_payload(
+    contest: Contest,
+    *,
+    include_upsolving: bool | None = None,
+) -> Dict[str, Any]:
+    """
+    Standings payload of a contest.
+
+    Once the contest has ended its final standings come from an immutable
+    snapshot; post-deadline submissions are applied on top of it only when
+    upsolving results are requested (by default, when the contest allows
+    upsolving).
+    """
+    end_time = contest.get_end_time()
+    if end_time is None or timezone.now() < end_time:
+        return _render_contest_leaderboard_payload(contest, _build_contest_leaderboard_data(contest))
+
+    if include_upsolving is None:
+        include_upsolving = contest.allow_upsolving
+    problems, participants, fingerprint = _contest_standings_inputs(contest)
+    snapshot = load_standings_snapshot(contest.id, fingerprint)
+    if snapshot is None:
+        snapshot, _ = _build_finished_contest_standings(contest, problems, participants, fingerprint)
+    if not include_upsolving:
+        return snapshot["payload"]
+
+    data = _build_contest_leaderboard_data(
+        contest,
+        problems=problems,
+        participants=participants,
+        frozen_state=_thaw_leaderboard_state(snapshot["state"]),
+    )
+    return _render_contest_leaderboard_payload(contest, data)
 
+
+def _load_leaderboard_contest(request, contest_id: int) -> Tuple[Contest | None, JsonResponse | None]:
     contest = get_object_or_404(
         Contest.objects.select_related("course__section").prefetch_related(
             "problems",
@@ -583,25 +762,146 @@ def contest_problem_leaderboard(request, contest_id: int):
         pk=contest_id,
     )
     if not contest.is_visible_to(request.user):
-        return JsonResponse({"detail": "Forbidden"}, status=403)
+        return None, JsonResponse({"detail": "Forbidden"}, status=403)
     if not contest.are_problems_visible_to(request.user):
-        return JsonResponse({"detail": "Forbidden"}, status=403)
+        return None, JsonResponse({"detail": "Forbidden"}, status=403)
+    return contest, None
 
-    leaderboards, overall_leaderboard = build_contest_leaderboards(contest)
-    return JsonResponse(
-        {
-            "contest_id": contest.id,
-            "leaderboards": leaderboards,
-            "overall_leaderboard": overall_leaderboard,
-        },
-        status=200,
+
+def _include_upsolving(request, contest: Contest) -> bool:
+    raw_upsolving = request.GET.get("upsolving")
+    if raw_upsolving is None:
+        return contest.allow_upsolving
+    return raw_upsolving.strip().lower() in {"1", "true", "yes"}
+
+
+def load_contest_overall_standings(
+    contest: Contest,
+    role: str,
+    *,
+    include_upsolving: bool | None = None,
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """``(version, ranked overall rows)`` read through the shared payload cache."""
+    if include_upsolving is None:
+        include_upsolving = contest.allow_upsolving
+    version, body = get_cached_leaderboard_body(
+        scope=CONTEST_SCOPE,
+        object_id=contest.id,
+        view=contest_leaderboard_cache_view(include_upsolving),
+        role=role,
+        build_payload=lambda: build_contest_leaderboard_payload(contest, include_upsolving=include_upsolving),
+    )
+    return version, json.loads(body)["overall_leaderboard"]["entries"]
+
+
+@login_required
+def contest_problem_leaderboard(request, contest_id: int):
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+
+    contest, error = _load_leaderboard_contest(request, contest_id)
+    if error is not None:
+        return error
+
+    include_upsolving = _include_upsolving(request, contest)
+    return cached_leaderboard_response(
+        request,
+        scope=CONTEST_SCOPE,
+        object_id=contest.id,
+        view=contest_leaderboard_cache_view(include_upsolving),
+        role=ROLE_MANAGER if contest.is_user_manager(request.user) else ROLE_PARTICIPANT,
+        build_payload=lambda: build_contest_leaderboard_payload(contest, include_upsolving=include_upsolving),
+    )
+
+
+def _contest_standings_response(request, contest_id: int, respond):
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+
+    contest, error = _load_leaderboard_contest(request, contest_id)
+    if error is not None:
+        return error
+
+    include_upsolving = _include_upsolving(request, contest)
+    role = ROLE_MANAGER if contest.is_user_manager(request.user) else ROLE_PARTICIPANT
+    return respond(
+        request,
+        scope=CONTEST_SCOPE,
+        object_id=contest.id,
+        view=f"{contest_leaderboard_cache_view(include_upsolving)}-overall",
+        role=role,
+        load_standings=lambda: load_contest_overall_standings(
+            contest,
+            role,
+            include_upsolving=include_upsolving,
+        ),
+    )
+
+
+@login_required
+def contest_leaderboard_standings(request, contest_id: int):
+    return _contest_standings_response(request, contest_id, standings_page_response)
+
+
+@login_required
+def contest_leaderboard_position(request, contest_id: int):
+    return _contest_standings_response(request, contest_id, standings_position_response)
+
+
+def _numeric_text_value(text_field: str) -> Case:
+    """Cast a JSON text value to float, or NULL when it is not a plain number."""
+    return Case(
+        When(**{f"{text_field}__regex": _NUMERIC_TEXT_RE}, then=Cast(text_field, FloatField())),
+        default=Value(None, output_field=FloatField()),
+        output_field=FloatField(),
+    )
+
+
+def _best_course_metrics(problem_metrics: Dict[int, str]):
+    """
+    One grouped query: best raw metric per (problem, user) over valid submissions.
+
+    The problem metric key is used unless it is missing, non-numeric or zero, in
+    which case the generic ``metric`` key is used.
+    Groups whose submissions carry no usable metric are returned with ``best=None``
+    so that every solver is still listed.
+    """
+    problems_by_metric: Dict[str, List[int]] = defaultdict(list)
+    for problem_id, metric_name in problem_metrics.items():
+        problems_by_metric[metric_name].append(problem_id)
+
+    primary_text = Case(
+        *[
+            When(problem_id__in=problem_ids, then=KeyTextTransform(metric_name, "metrics"))
+            for metric_name, problem_ids in problems_by_metric.items()
+        ],
+        default=Value(None, output_field=TextField()),
+        output_field=TextField(),
+    )
+    return (
+        Submission.objects.filter(
+            problem_id__in=list(problem_metrics),
+            status__in=_VALID_STATUSES,
+        )
+        .annotate(
+            _primary_text=primary_text,
+            _fallback_text=KeyTextTransform("metric", "metrics"),
+        )
+        .annotate(
+            _primary=_numeric_text_value("_primary_text"),
+            _fallback=_numeric_text_value("_fallback_text"),
+        )
+        .values("problem_id", "user_id")
+        .annotate(best=Max(Coalesce(NullIf("_primary", Value(0.0)), "_fallback")))
+        .order_by()
     )
 
 
 def build_course_leaderboard(course) -> Dict[str, Any]:
-    from ..models import Course
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
 
-    # contests = list(course.contests.filter(is_published=True, approval_status=Contest.ApprovalStatus.APPROVED))
     contests = list(course.contests.all())
 
     participants = {
@@ -614,130 +914,86 @@ def build_course_leaderboard(course) -> Dict[str, Any]:
         for participant in CourseParticipant.objects.filter(course=course).select_related("user")
     }
 
-    participant_ids = list(participants.keys())
-    
-    problem_ids = []
-    for contest in contests:
-        for problem in contest.problems.all():
-            problem_ids.append(problem.id)
-    
+    contest_problems: Dict[int, List[int]] = defaultdict(list)
+    for contest_id, problem_id in (
+        ContestProblem.objects.filter(contest__course=course)
+        .order_by("contest_id", "position", "id")
+        .values_list("contest_id", "problem_id")
+    ):
+        contest_problems[contest_id].append(problem_id)
+    problem_ids = sorted({pid for pids in contest_problems.values() for pid in pids})
+
+    problem_metrics: Dict[int, str] = {problem_id: "metric" for problem_id in problem_ids}
+    for descriptor in ProblemDescriptor.objects.filter(problem_id__in=problem_ids).only(
+        "problem_id",
+        "metric",
+        "metric_name",
+    ):
+        metric_name = (descriptor.metric or descriptor.metric_name or "").strip()
+        problem_metrics[descriptor.problem_id] = metric_name or "metric"
+
+    best_by_problem: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+    solver_ids: List[int] = []
+    seen_solvers = set(participants)
     if problem_ids:
-        solvers = Submission.objects.filter(
-            problem_id__in=problem_ids,
-            status__in=_VALID_STATUSES,
-        ).values_list('user_id', flat=True).distinct()
-        solver_ids = list(solvers)
-        
-        for solver_id in solver_ids:
-            if solver_id and solver_id not in participant_ids:
-                participant_ids.append(solver_id)
-    
-    if not participant_ids:
-        return {"course_id": course.id, "contests": [], "entries": []}
+        for row in _best_course_metrics(problem_metrics).iterator(chunk_size=5000):
+            user_id = row["user_id"]
+            if user_id and user_id not in seen_solvers:
+                seen_solvers.add(user_id)
+                solver_ids.append(user_id)
+            if row["best"] is not None:
+                best_by_problem[row["problem_id"]].append((user_id, row["best"] * 100))
+
+    if solver_ids:
+        for user_id, username in User.objects.filter(id__in=solver_ids).values_list("id", "username"):
+            participants[user_id] = {
+                "user_id": user_id,
+                "username": username,
+                "role": None,
+                "is_owner": False,
+            }
 
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
-    
-    for uid in participant_ids:
-        if uid not in participants:
-            user = User.objects.filter(id=uid).first()
-            if user:
-                participants[uid] = {
-                    "user_id": uid,
-                    "username": user.username,
-                    "role": None,
-                    "is_owner": False,
-                }
+    if not participants:
+        return {"course_id": course.id, "contests": [], "entries": []}
 
-    problem_descriptors = {}
-    contest_problems = {}
-    for contest in contests:
-        problems = list(contest.problems.all())
-        contest_problems[contest.id] = problems
-        for problem in problems:
-            if problem.id not in problem_descriptors:
-                descriptor = ProblemDescriptor.objects.filter(problem=problem).first()
-                if descriptor:
-                    metric_name = (descriptor.metric or descriptor.metric_name or "").strip()
-                else:
-                    metric_name = "metric"
-                problem_descriptors[problem.id] = {
-                    "metric": metric_name or "metric",
-                    "lower_is_better": _metric_is_lower_better(metric_name),
+    scored_contests = [contest for contest in contests if contest_problems.get(contest.id)]
+    user_results: Dict[int, Dict[str, Any]] = {
+        uid: {
+            "user_id": uid,
+            "username": participant["username"],
+            "total_score": 0.0,
+            "contests_completed": 0,
+            "problems_solved": 0,
+            "contest_details": [
+                {
+                    "contest_id": contest.id,
+                    "contest_title": contest.title,
+                    "score": None,
+                    "problems_solved": 0,
+                    "problems_total": len(contest_problems[contest.id]),
                 }
+                for contest in scored_contests
+            ],
+        }
+        for uid, participant in participants.items()
+    }
 
-    user_results: Dict[int, Dict[str, Any]] = {uid: {
-        "user_id": uid,
-        "username": participants[uid]["username"],
-        "total_score": 0.0,
-        "contests_completed": 0,
-        "problems_solved": 0,
-        "contest_details": [],
-    } for uid in participant_ids}
-
-    for contest in contests:
-        problems = contest_problems.get(contest.id, [])
-        if not problems:
-            continue
-
-        problem_ids = [p.id for p in problems]
-        contest_score_lower_is_better = contest.scoring == Contest.Scoring.ICPC
-
-        for user_id in participant_ids:
-            user_results[user_id]["contest_details"].append({
-                "contest_id": contest.id,
-                "contest_title": contest.title,
-                "score": None,
-                "problems_solved": 0,
-                "problems_total": len(problems),
-            })
-
-        last_contest_idx = {uid: len(user_results[uid]["contest_details"]) - 1 for uid in participant_ids}
-
-        submissions = Submission.objects.filter(
-            problem_id__in=problem_ids,
-            user_id__in=participant_ids,
-            status__in=_VALID_STATUSES,
-        ).values("id", "problem_id", "user_id", "metrics", "submitted_at")
-
-        contest_best: Dict[Tuple[int, int], Dict[str, Any]] = {}
-        for row in submissions.iterator(chunk_size=1000):
-            key = (row["problem_id"], row["user_id"])
-            descriptor = problem_descriptors.get(row["problem_id"])
-            if descriptor is None:
-                continue
-            raw_metric = _extract_metric_value(row["metrics"], descriptor["metric"])
-            if raw_metric is None:
-                continue
-            
-            score_value = raw_metric * 100
-                
-            current = contest_best.get(key)
-            if current is None or _is_better(
-                score_value, row["submitted_at"],
-                current.get("score_value", 0), current.get("submitted_at")
-            ):
-                contest_best[key] = {
-                    "score_value": score_value,
-                    "submitted_at": row["submitted_at"],
-                }
+    for contest_idx, contest in enumerate(scored_contests):
+        for problem_id in contest_problems[contest.id]:
+            for user_id, score in best_by_problem.get(problem_id, ()):
+                result = user_results.get(user_id)
+                if result is None:
+                    continue
+                contest_entry = result["contest_details"][contest_idx]
+                contest_entry["score"] = (contest_entry["score"] or 0) + score
+                contest_entry["problems_solved"] += 1
+                result["problems_solved"] += 1
 
-        for problem in problems:
-            for user_id in participant_ids:
-                key = (problem.id, user_id)
-                best = contest_best.get(key)
-                if best:
-                    score = best["score_value"]
-                    contest_entry = user_results[user_id]["contest_details"][last_contest_idx[user_id]]
-                    contest_entry["score"] = (contest_entry["score"] or 0) + score
-                    contest_entry["problems_solved"] += 1
-                    user_results[user_id]["problems_solved"] += 1
-
-        for user_id in participant_ids:
-            contest_entry = user_results[user_id]["contest_details"][last_contest_idx[user_id]]
+    for result in user_results.values():
+        for contest_entry in result["contest_details"]:
             if contest_entry["problems_solved"] > 0:
-                user_results[user_id]["contests_completed"] += 1
-                user_results[user_id]["total_score"] += contest_entry["score"] or 0
+                result["contests_completed"] += 1
+                result["total_score"] += contest_entry["score"] or 0
 
     entries = list(user_results.values())
     entries.sort(key=lambda x: (-x["total_score"], x.get("problems_solved", 0), x.get("contests_completed", 0)), reverse=False)
@@ -749,9 +1005,6 @@ def build_course_leaderboard(course) -> Dict[str, Any]:
             rank += 1
             last_score = entry["total_score"]
         entry["rank"] = rank
-        for detail in entry["contest_details"]:
-            if detail.get("best_submitted_at") and isinstance(detail["best_submitted_at"], datetime):
-                detail["best_submitted_at"] = detail["best_submitted_at"].isoformat()
 
     return {
         "course_id": course.id,
@@ -764,6 +1017,20 @@ def build_course_leaderboard(course) -> Dict[str, Any]:
     }
 
 
+def _course_leaderboard_role(request, course) -> str | None:
+    is_teacher = CourseParticipant.objects.filter(
+        course=course,
+        user=request.user,
+        role=CourseParticipant.Role.TEACHER,
+    ).exists()
+
+    is_owner = course.owner_id == request.user.id
+
+    if not (is_teacher or is_owner or course.is_open):
+        return None
+    return ROLE_MANAGER if (is_teacher or is_owner) else ROLE_PARTICIPANT
+
+
 @login_required
 def course_leaderboard(request, course_id: int):
     from ..models import Course
@@ -776,16 +1043,56 @@ def course_leaderboard(request, course_id: int):
         pk=course_id,
     )
 
-    is_teacher = CourseParticipant.objects.filter(
-        course=course,
-        user=request.user,
-        role=CourseParticipant.Role.TEACHER,
-    ).exists()
+    role = _course_leaderboard_role(request, course)
+    if role is None:
+        return JsonResponse({"detail": "Forbidden"}, status=403)
 
-    is_owner = course.owner_id == request.user.id
+    return cached_leaderboard_response(
+        request,
+        scope=COURSE_SCOPE,
+        object_id=course.id,
+        view="overall",
+        role=role,
+        build_payload=lambda: build_course_leaderboard(course),
+    )
 
-    if not (is_teacher or is_owner or course.is_open):
+
+def _course_standings_response(request, course_id: int, respond):
+    from ..models import Course
+
+    if request.method != "GET":
+        return JsonResponse({"detail": "Method not allowed"}, status=405)
+
+    course = get_object_or_404(Course, pk=course_id)
+    role = _course_leaderboard_role(request, course)
+    if role is None:
         return JsonResponse({"detail": "Forbidden"}, status=403)
 
-    leaderboard = build_course_leaderboard(course)
-    return JsonResponse(leaderboard, status=200)
+    def load_standings():
+        version, body = get_cached_leaderboard_body(
+            scope=COURSE_SCOPE,
+            object_id=course.id,
+            view="overall",
+            role=role,
+            build_payload=lambda: build_course_leaderboard(course),
+        )
+        return version, json.loads(body)["entries"]
+
+    return respond(
+        request,
+        scope=COURSE_SCOPE,
+        object_id=course.id,
+        view="overall-standings",
+        role=role,
+        load_standings=load_standings,
+    )
+
+
+@login_required
+def course_leaderboard_standings(request, course_id: int):
+    return _course_standings_response(request, course_id, standings_page_response)
+
+
+@login_required
+def course_leaderboard_position(request, course_id: int):
+    return _course_standings_response(request, course_id, standings_position_response)
@@ -6,6 +6,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 
 from ..models import Contest, Course, CourseParticipant
+from ..services.leaderboard_cache import invalidate_leaderboards
 from ..services.user_access import is_platform_admin
 
 User = get_user_model()
@@ -228,6 +229,7 @@ def reorder_course_contests(request, course_id):
     for idx, cid in enumerate(new_order):
         by_id[cid].position = idx
     Contest.objects.bulk_update([by_id[cid] for cid in new_order], ["position"])
+    invalidate_leaderboards(course_ids=[course.id])
 
     return JsonResponse({"course_id": course.id, "contest_ids": new_order}, status=200)
 
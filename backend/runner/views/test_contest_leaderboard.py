@@ -5,14 +5,29 @@ from datetime import timedelta
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from runner.models import Contest, Course, CourseParticipant, Problem, ProblemDescriptor, Section, Submission
+from runner.models import (
+    Contest,
+    ContestStandingsSnapshot,
+    Course,
+    CourseParticipant,
+    Problem,
+    ProblemDescriptor,
+    Section,
+    Submission,
+)
 from runner.services.section_service import SectionCreateInput, create_section
 from runner.views.contest_leaderboard import (
+    build_contest_leaderboard_payload,
     build_contest_overall_leaderboard,
     build_contest_problem_leaderboards,
+    build_course_leaderboard,
+    contest_leaderboard_position,
+    contest_leaderboard_standings,
     contest_problem_leaderboard,
 )
 
@@ -309,6 +324,60 @@ class ContestLeaderboardViewTests(TestCase):
         self.assertIsNotNone(alice_overall["upsolving_total_score"])
         self.assertLess(alice_overall["total_score"], alice_overall["upsolving_total_score"])
 
+    def test_finished_contest_standings_are_frozen_in_snapshot(self):
+        start_time = timezone.now() - timedelta(hours=3)
+        finished_contest = Contest.objects.create(
+            title="Finished Contest",
+            course=self.course,
+            created_by=self.teacher,
+            is_published=True,
+            approval_status=Contest.ApprovalStatus.APPROVED,
+            start_time=start_time,
+            duration_minutes=60,
+            allow_upsolving=True,
+        )
+        finished_contest.problems.add(self.problem_accuracy)
+        before_deadline = self._create_submission(self.alice, self.problem_accuracy, "accuracy", 0.6)
+        Submission.objects.filter(pk=before_deadline.pk).update(submitted_at=start_time + timedelta(minutes=20))
+        after_deadline = self._create_submission(self.bob, self.problem_accuracy, "accuracy", 0.9)
+        Submission.objects.filter(pk=after_deadline.pk).update(submitted_at=start_time + timedelta(minutes=90))
+
+        live_leaderboards = build_contest_problem_leaderboards(finished_contest)
+        live_overall = build_contest_overall_leaderboard(finished_contest)
+        payload = json.loads(json.dumps(build_contest_leaderboard_payload(finished_contest)))
+
+        self.assertTrue(ContestStandingsSnapshot.objects.filter(contest=finished_contest).exists())
+        self.assertEqual(payload["leaderboards"], json.loads(json.dumps(live_leaderboards, default=str)))
+        self.assertEqual(payload["overall_leaderboard"], json.loads(json.dumps(live_overall)))
+
+        final_only = build_contest_leaderboard_payload(finished_contest, include_upsolving=False)
+        bob_final = next(
+            row for row in final_only["overall_leaderboard"]["entries"] if row["user_id"] == self.bob.id
+        )
+        self.assertIsNone(bob_final["upsolving_total_score"])
+        self.assertIsNone(bob_final["total_score"])
+
+        # More upsolving keeps the snapshot; only the post-deadline delta grows.
+        self._create_submission(self.charlie, self.problem_accuracy, "accuracy", 0.8)
+        self.assertTrue(ContestStandingsSnapshot.objects.filter(contest=finished_contest).exists())
+        with CaptureQueriesContext(connection) as queries:
+            payload = build_contest_leaderboard_payload(finished_contest)
+        charlie_entry = next(
+            row for row in payload["overall_leaderboard"]["entries"] if row["user_id"] == self.charlie.id
+        )
+        self.assertIsNotNone(charlie_entry["upsolving_total_score"])
+        submission_scans = [
+            query["sql"] for query in queries.captured_queries if '"runner_submission"' in query["sql"]
+        ]
+        self.assertEqual(len(submission_scans), 1)
+        self.assertIn('"submitted_at" >', submission_scans[0])
+
+        # Regrading a pre-deadline submission discards the frozen standings.
+        before_deadline.refresh_from_db()
+        before_deadline.metrics = {"accuracy": 0.7}
+        before_deadline.save(update_fields=["metrics"])
+        self.assertFalse(ContestStandingsSnapshot.objects.filter(contest=finished_contest).exists())
+
     def test_same_problem_submissions_are_shared_across_contests(self):
         earlier_contest = Contest.objects.create(
             title="Earlier Contest",
@@ -381,3 +450,123 @@ class ContestLeaderboardViewTests(TestCase):
         response = contest_problem_leaderboard.__wrapped__(request, contest_id=self.contest.id)
 
         self.assertEqual(response.status_code, 403)
+
+    def test_leaderboard_poll_returns_not_modified_until_submission_changes(self):
+        self._create_submission(self.alice, self.problem_rmse, "rmse", 0.4)
+
+        request = self.factory.get("/")
+        request.user = self.alice
+        first = contest_problem_leaderboard.__wrapped__(request, contest_id=self.contest.id)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertTrue(etag)
+
+        repeat = self.factory.get("/", HTTP_IF_NONE_MATCH=etag)
+        repeat.user = self.alice
+        not_modified = contest_problem_leaderboard.__wrapped__(repeat, contest_id=self.contest.id)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], etag)
+
+        self._create_submission(self.bob, self.problem_rmse, "rmse", 0.2)
+
+        after_change = self.factory.get("/", HTTP_IF_NONE_MATCH=etag)
+        after_change.user = self.alice
+        refreshed = contest_problem_leaderboard.__wrapped__(after_change, contest_id=self.contest.id)
+        self.assertEqual(refreshed.status_code, 200)
+        self.assertNotEqual(refreshed["ETag"], etag)
+        payload = json.loads(refreshed.content.decode())
+        rmse_board = next(lb for lb in payload["leaderboards"] if lb["problem_id"] == self.problem_rmse.id)
+        bob_entry = next(entry for entry in rmse_board["entries"] if entry["user_id"] == self.bob.id)
+        self.assertEqual(bob_entry["rank"], 1)
+
+    def test_standings_pages_and_position_match_overall_leaderboard(self):
+        self._create_submission(self.alice, self.problem_rmse, "rmse", 0.4)
+        self._create_submission(self.bob, self.problem_rmse, "rmse", 0.2)
+        self._create_submission(self.charlie, self.problem_accuracy, "accuracy", 0.9)
+        overall = build_contest_overall_leaderboard(self.contest)["entries"]
+
+        request = self.factory.get("/", {"page": 1, "page_size": 2})
+        request.user = self.alice
+        response = contest_leaderboard_standings.__wrapped__(request, contest_id=self.contest.id)
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(response.content.decode())
+        self.assertEqual(payload["total"], len(overall))
+        self.assertEqual(
+            [row["user_id"] for row in payload["entries"]],
+            [row["user_id"] for row in overall[:2]],
+        )
+
+        request = self.factory.get("/", {"neighbours": 1})
+        request.user = self.alice
+        response = contest_leaderboard_position.__wrapped__(request, contest_id=self.contest.id)
+        payload = json.loads(response.content.decode())
+        alice_index = next(idx for idx, row in enumerate(overall) if row["user_id"] == self.alice.id)
+        self.assertEqual(payload["position"], alice_index + 1)
+        self.assertEqual(
+            [row["user_id"] for row in payload["entries"]],
+            [row["user_id"] for row in overall[max(alice_index - 1, 0):alice_index + 2]],
+        )
+
+    def test_leaderboard_etag_changes_with_contest_settings_and_viewer_role(self):
+        request = self.factory.get("/")
+        request.user = self.alice
+        student_etag = contest_problem_leaderboard.__wrapped__(request, contest_id=self.contest.id)["ETag"]
+
+        request = self.factory.get("/")
+        request.user = self.teacher
+        teacher_etag = contest_problem_leaderboard.__wrapped__(request, contest_id=self.contest.id)["ETag"]
+        self.assertNotEqual(student_etag, teacher_etag)
+
+        self.contest.scoring = Contest.Scoring.PARTIAL
+        self.contest.save(update_fields=["scoring"])
+
+        request = self.factory.get("/", HTTP_IF_NONE_MATCH=student_etag)
+        request.user = self.alice
+        response = contest_problem_leaderboard.__wrapped__(request, contest_id=self.contest.id)
+        self.assertEqual(response.status_code, 200)
+        payload = json.loads(response.content.decode())
+        self.assertEqual(payload["overall_leaderboard"]["scoring"], Contest.Scoring.PARTIAL)
+
+    def test_course_leaderboard_query_count_does_not_grow_with_contests_and_solvers(self):
+        self._create_submission(self.alice, self.problem_rmse, "rmse", 0.4)
+        with CaptureQueriesContext(connection) as baseline:
+            build_course_leaderboard(self.course)
+
+        outsider = User.objects.create_user(username="outsider", password="pass")
+        for idx in range(3):
+            extra_problem = Problem.objects.create(title=f"Extra {idx}", statement="desc", rating=1000)
+            ProblemDescriptor.objects.create(problem=extra_problem, metric="f1")
+            extra_contest = Contest.objects.create(
+                title=f"Extra Contest {idx}",
+                course=self.course,
+                created_by=self.teacher,
+            )
+            extra_contest.problems.add(extra_problem, self.problem_accuracy)
+            self._create_submission(self.bob, extra_problem, "f1", 0.5)
+            self._create_submission(outsider, extra_problem, "f1", 0.25)
+        self._create_submission(self.charlie, self.problem_accuracy, "accuracy", 0.7)
+
+        with CaptureQueriesContext(connection) as grown:
+            leaderboard = build_course_leaderboard(self.course)
+
+        self.assertLessEqual(len(grown.captured_queries), len(baseline.captured_queries) + 1)
+        self.assertLessEqual(len(grown.captured_queries), 6)
+        entries = {entry["username"]: entry for entry in leaderboard["entries"]}
+        self.assertIn("outsider", entries)
+        self.assertAlmostEqual(entries["outsider"]["total_score"], 75.0, places=6)
+        self.assertEqual(entries["outsider"]["contests_completed"], 3)
+        # The accuracy problem is shared by four contests and counts in each of them.
+        self.assertAlmostEqual(entries["charlie"]["total_score"], 280.0, places=6)
+        self.assertEqual(entries["charlie"]["problems_solved"], 4)
+
+    def test_course_leaderboard_falls_back_to_generic_metric_key(self):
+        self._create_submission(self.alice, self.problem_rmse, "metric", 0.3)
+        self._create_submission(self.bob, self.problem_rmse, "rmse", 0.0)
+        self._create_submission(self.charlie, self.problem_rmse, "rmse", "n/a")
+
+        leaderboard = build_course_leaderboard(self.course)
+        entries = {entry["username"]: entry for entry in leaderboard["entries"]}
+
+        self.assertAlmostEqual(entries["alice"]["total_score"], 30.0, places=6)
+        self.assertEqual(entries["bob"]["problems_solved"], 0)
+        self.assertEqual(entries["charlie"]["problems_solved"], 0)
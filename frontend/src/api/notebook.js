@@ -193,6 +193,21 @@ export function stopNotebookSession(sessionId) {
     })
 }
 
+export function interruptNotebookSession(sessionId) {
+    return apiPost('/api/sessions/interrupt/', {
+        session_id: sessionId,
+    })
+}
+
+export function getNotebookDataFrameRows(sessionId, frameId, offset, limit) {
+    return apiGet('/api/sessions/dataframe/rows/', {
+        session_id: sessionId,
+        frame_id: frameId,
+        offset,
+        limit,
+    })
+}
+
 export function getNotebookSessionFiles(sessionId) {
     return apiGet('/api/sessions/files/', {
         session_id: sessionId,
@@ -206,6 +221,42 @@ export function runNotebookCell(sessionId, cellId) {
     })
 }
 
+export function startNotebookRunAll(sessionId, notebookId, cellIds, { stopOnError = true, mode = 'all' } = {}) {
+    return apiPost('/api/cells/run/all/', {
+        session_id: sessionId,
+        notebook_id: notebookId,
+        cell_ids: cellIds,
+        stop_on_error: stopOnError,
+        mode,
+    })
+}
+
+export function getNotebookRunAllStatus(runId, { eventsOffset = 0, cellId = null, stdoutOffset = 0, stderrOffset = 0 } = {}) {
+    const params = {
+        run_id: runId,
+        events_offset: eventsOffset,
+        stdout_offset: stdoutOffset,
+        stderr_offset: stderrOffset,
+    }
+    if (cellId != null) {
+        params.cell_id = cellId
+    }
+    return apiGet('/api/cells/run/all/status/', params)
+}
+
+export function openRunStreamSocket(runId, { eventsOffset = 0, cellId = null, stdoutOffset = 0, stderrOffset = 0 } = {}) {
+    const query = new URLSearchParams({
+        events_offset: String(eventsOffset),
+        stdout_offset: String(stdoutOffset),
+        stderr_offset: String(stderrOffset),
+    })
+    if (cellId != null) {
+        query.set('cell_id', String(cellId))
+    }
+    const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws'
+    return new WebSocket(`${protocol}://${window.location.host}/ws/runs/${encodeURIComponent(runId)}/?${query}`)
+}
+
 export function uploadNotebookSessionFile(sessionId, file, path = '') {
     const formData = new FormData()
     formData.append('session_id', sessionId)
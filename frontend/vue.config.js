@@ -47,6 +47,11 @@ module.exports = defineConfig({
         target: backendTarget,
         changeOrigin: true,
       },
+      '/ws': {
+        target: backendTarget,
+        changeOrigin: true,
+        ws: true,
+      },
     },
   }
 })